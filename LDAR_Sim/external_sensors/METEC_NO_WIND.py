@@ -23,7 +23,7 @@ An alternative sensor, specifically built to replicate the probability of detect
 # ------------------------------------------------------------------------------
 import numpy as np
 from utils.attribution import update_tag
-from methods.funcs import measured_rate
+from methods.funcs import measured_rate, measured_rates
 
 
 def detect_emissions(
@@ -76,7 +76,6 @@ def detect_emissions(
 
     """
 
-    missed_leaks_str = "{}_missed_leaks".format(self.config["label"])
     equip_measured_rates = []
     site_measured_rate = 0
     found_leak = False
@@ -90,14 +89,12 @@ def detect_emissions(
         if prob_detect >= 1:
             prob_detect = 1
         if rate < (mdl[2] * 3.6):
-            site[missed_leaks_str] += n_leaks
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+            self.add_missed_leaks(site, n_leaks)
         elif np.random.binomial(1, prob_detect):
             found_leak = True
             site_measured_rate = measured_rate(covered_site_rate, self.config["sensor"]["QE"])
         else:
-            site[missed_leaks_str] += n_leaks
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+            self.add_missed_leaks(site, n_leaks)
     elif self.config["measurement_scale"] == "equipment":
         for rate in covered_equipment_rates:
             m_rate = measured_rate(rate, self.config["sensor"]["QE"])
@@ -114,8 +111,7 @@ def detect_emissions(
             equip_measured_rates.append(m_rate)
             site_measured_rate += m_rate
         if not found_leak:
-            site[missed_leaks_str] += n_leaks
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+            self.add_missed_leaks(site, n_leaks)
     elif self.config["measurement_scale"] == "component":
         for leak in covered_leaks:
             rate = leak["rate"] * 3.6
@@ -123,8 +119,7 @@ def detect_emissions(
             if prob_detect >= 1:
                 prob_detect = 1
             if rate < (mdl[2] * 3.6):
-                site[missed_leaks_str] += 1
-                self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += 1
+                self.add_missed_leaks(site, 1)
             elif np.random.binomial(1, prob_detect):
                 found_leak = True
                 meas_rate = measured_rate(leak["rate"], self.config["sensor"]["QE"])
@@ -141,8 +136,7 @@ def detect_emissions(
                 if is_new_leak:
                     site_measured_rate += meas_rate
             else:
-                site[missed_leaks_str] += 1
-                self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += 1
+                self.add_missed_leaks(site, 1)
     site_dict = {
         "site": site,
         "leaks_present": covered_leaks,
@@ -153,3 +147,55 @@ def detect_emissions(
         "found_leak": found_leak,
     }
     return site_dict
+
+
+def detect_emissions_batch(self, batch):
+    """The METEC non-wind normalized probability of detection curve of detect_emissions,
+    for all sites visited by a crew in a day. See methods.detection.Sensor for the
+    returned values.
+    """
+    mdl = self.config["sensor"]["MDL"]
+    QE = self.config["sensor"]["QE"]
+    n_visits = len(batch)
+
+    if self.config["measurement_scale"] == "site":
+        # factor of 3.6 converts g/s to kg/h
+        rate = batch.covered_site_rates * 3.6
+        with np.errstate(over="ignore"):
+            prob_detect = 1 / (1 + np.exp(mdl[0] - mdl[1] * rate))
+        found_leak = (rate >= mdl[2] * 3.6) & (np.random.binomial(1, prob_detect) == 1)
+        site_measured_rates = np.zeros(n_visits)
+        site_measured_rates[found_leak] = measured_rates(batch.covered_site_rates[found_leak], QE)
+        return {
+            "found_leak": found_leak,
+            "site_measured_rates": site_measured_rates,
+            "missed_leaks": np.where(found_leak, 0, batch.n_leaks),
+        }
+    elif self.config["measurement_scale"] == "equipment":
+        equip_measured_rates = measured_rates(batch.covered_equipment_rates, QE)
+        rate = equip_measured_rates * 3.6
+        with np.errstate(over="ignore"):
+            prob_detect = 1 / (1 + np.exp(mdl[0] - mdl[1] * rate))
+        equip_found = (rate >= mdl[2] * 3.6) & (np.random.binomial(1, prob_detect) == 1)
+        equip_measured_rates[~equip_found] = 0
+        found_leak = batch.equipment_any(equip_found)
+        return {
+            "found_leak": found_leak,
+            "site_measured_rates": batch.equipment_sum(equip_measured_rates),
+            "equip_measured_rates": equip_measured_rates,
+            "missed_leaks": np.where(found_leak, 0, batch.n_leaks),
+        }
+    elif self.config["measurement_scale"] == "component":
+        rate = batch.leak_rates * 3.6
+        with np.errstate(over="ignore"):
+            prob_detect = 1 / (1 + np.exp(mdl[0] - mdl[1] * rate))
+        detected = (rate >= mdl[2] * 3.6) & (np.random.binomial(1, prob_detect) == 1)
+        leak_measured_rates = np.zeros(len(detected))
+        leak_measured_rates[detected] = measured_rates(batch.leak_rates[detected], QE)
+        return {
+            "found_leak": batch.leak_count(detected) > 0,
+            "detected": detected,
+            "leak_measured_rates": leak_measured_rates,
+            "missed_leaks": batch.leak_count(~detected),
+        }
+    return {"found_leak": np.zeros(n_visits, dtype=bool)}
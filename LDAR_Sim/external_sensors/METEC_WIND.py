@@ -22,7 +22,7 @@ An alternative sensor, specifically built to replicate the probability of detect
 #
 # ------------------------------------------------------------------------------
 import numpy as np
-from methods.funcs import measured_rate
+from methods.funcs import measured_rate, measured_rates
 from utils.attribution import update_tag
 from utils.unit_converter import gas_convert
 
@@ -82,17 +82,16 @@ def detect_emissions(
                 venting (float): same as input
                 found_leak (boolean): Did the crew find at least one leak at the site
     """
-    missed_leaks_str = "{}_missed_leaks".format(self.config["label"])
     equip_measured_rates = []
     site_measured_rate = 0
     found_leak = False
     n_leaks = len(covered_leaks)
     mdl = self.config["sensor"]["MDL"]
 
-    hourly_windspeed = self.state["weather"].get_hourly_weather(
-        ["winds"], self.state["t"].current_date, number_of_hours=1, site=site
+    hourly_windspeed = self.state["site_weather"].hourly(
+        "winds", site, self.state["t"].current_date, number_of_hours=1
     )
-    average_wind = np.average(hourly_windspeed["winds"])
+    average_wind = np.average(hourly_windspeed)
 
     if self.config["measurement_scale"] == "site":
         # Calculate the rate per wind based on the overall site rate
@@ -100,14 +99,12 @@ def detect_emissions(
         prob_detect = 1 / (1 + np.exp(mdl[0] - mdl[1] * rate_per_wind))
         # Check the actual site rate against cutoff value
         if covered_site_rate <= (mdl[2] * GsTOKGh):
-            site[missed_leaks_str] += n_leaks
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+            self.add_missed_leaks(site, n_leaks)
         elif np.random.binomial(1, prob_detect):
             found_leak = True
             site_measured_rate = measured_rate(covered_site_rate, self.config["sensor"]["QE"])
         else:
-            site[missed_leaks_str] += n_leaks
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+            self.add_missed_leaks(site, n_leaks)
     elif self.config["measurement_scale"] == "equipment":
         for rate in covered_equipment_rates:
             m_rate = measured_rate(rate, self.config["sensor"]["QE"])
@@ -121,10 +118,8 @@ def detect_emissions(
                 m_rate = 0
             equip_measured_rates.append(m_rate)
             site_measured_rate += m_rate
-
-            if not found_leak:
-                site[missed_leaks_str] += 1
-                self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+        if not found_leak:
+            self.add_missed_leaks(site, n_leaks)
     elif self.config["measurement_scale"] == "component":
         for leak in covered_leaks:
             rate_per_wind = leak["rate"] * GsTOKGh / average_wind
@@ -132,8 +127,7 @@ def detect_emissions(
             if prob_detect >= 1:
                 prob_detect = 1
             if leak["rate"] <= (mdl[2] * GsTOKGh):
-                site[missed_leaks_str] += 1
-                self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += 1
+                self.add_missed_leaks(site, 1)
             elif np.random.binomial(1, prob_detect):
                 found_leak = True
                 meas_rate = measured_rate(leak["rate"], self.config["sensor"]["QE"])
@@ -150,8 +144,7 @@ def detect_emissions(
                 if is_new_leak:
                     site_measured_rate += meas_rate
             else:
-                site[missed_leaks_str] += 1
-                self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += 1
+                self.add_missed_leaks(site, 1)
     site_dict = {
         "site": site,
         "leaks_present": covered_leaks,
@@ -162,3 +155,61 @@ def detect_emissions(
         "found_leak": found_leak,
     }
     return site_dict
+
+
+def detect_emissions_batch(self, batch):
+    """The METEC wind dependent probability of detection curve of detect_emissions, for
+    all sites visited by a crew in a day. See methods.detection.Sensor for the returned
+    values.
+    """
+    mdl = self.config["sensor"]["MDL"]
+    QE = self.config["sensor"]["QE"]
+    n_visits = len(batch)
+    # Wind speed on the hour of each visit
+    average_wind = self.state["site_weather"].values("winds", batch.sites, batch.dates)
+
+    if self.config["measurement_scale"] == "site":
+        # Calculate the rate per wind based on the overall site rate
+        rate_per_wind = batch.covered_site_rates * GsTOKGh / average_wind
+        with np.errstate(over="ignore"):
+            prob_detect = 1 / (1 + np.exp(mdl[0] - mdl[1] * rate_per_wind))
+        # Check the actual site rate against cutoff value
+        found_leak = (batch.covered_site_rates > mdl[2] * GsTOKGh) & (
+            np.random.binomial(1, prob_detect) == 1
+        )
+        site_measured_rates = np.zeros(n_visits)
+        site_measured_rates[found_leak] = measured_rates(batch.covered_site_rates[found_leak], QE)
+        return {
+            "found_leak": found_leak,
+            "site_measured_rates": site_measured_rates,
+            "missed_leaks": np.where(found_leak, 0, batch.n_leaks),
+        }
+    elif self.config["measurement_scale"] == "equipment":
+        rates = batch.covered_equipment_rates
+        equip_measured_rates = measured_rates(rates, QE)
+        rate_per_wind = rates * GsTOKGh / average_wind[batch.equipment_visit]
+        with np.errstate(over="ignore"):
+            prob_detect = 1 / (1 + np.exp(mdl[0] - mdl[1] * rate_per_wind))
+        equip_found = (rates > mdl[2] * GsTOKGh) & (np.random.binomial(1, prob_detect) == 1)
+        equip_measured_rates[~equip_found] = 0
+        found_leak = batch.equipment_any(equip_found)
+        return {
+            "found_leak": found_leak,
+            "site_measured_rates": batch.equipment_sum(equip_measured_rates),
+            "equip_measured_rates": equip_measured_rates,
+            "missed_leaks": np.where(found_leak, 0, batch.n_leaks),
+        }
+    elif self.config["measurement_scale"] == "component":
+        rate_per_wind = batch.leak_rates * GsTOKGh / average_wind[batch.leak_visit]
+        with np.errstate(over="ignore"):
+            prob_detect = 1 / (1 + np.exp(mdl[0] - mdl[1] * rate_per_wind))
+        detected = (batch.leak_rates > mdl[2] * GsTOKGh) & (np.random.binomial(1, prob_detect) == 1)
+        leak_measured_rates = np.zeros(len(detected))
+        leak_measured_rates[detected] = measured_rates(batch.leak_rates[detected], QE)
+        return {
+            "found_leak": batch.leak_count(detected) > 0,
+            "detected": detected,
+            "leak_measured_rates": leak_measured_rates,
+            "missed_leaks": batch.leak_count(~detected),
+        }
+    return {"found_leak": np.zeros(n_visits, dtype=bool)}
@@ -69,7 +69,7 @@ def setup_campaigns(campaigns, prog_params, virtual_world, n_sites, n_screening_
             )
 
 
-def update_campaigns(campaigns, sites, cur_ts, current_date):
+def update_campaigns(campaigns, sites, cur_ts, current_date, flag_registry):
     for midx, cpgn in campaigns.items():
         next_camp_start = cpgn["schedule"][cpgn["current_campaign"] + 1]
         if cpgn["current_campaign"] < cpgn["n_campaigns"] and cur_ts > next_camp_start:
@@ -94,3 +94,4 @@ def update_campaigns(campaigns, sites, cur_ts, current_date):
                 site["date_flagged"] = current_date
                 site["flagged_by"] = "makeup"
                 site["preferred_FU_method"] = cpgn["preferred_FU_method"]
+                flag_registry.flag(site)
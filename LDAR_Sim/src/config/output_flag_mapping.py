@@ -25,3 +25,4 @@ SITES = "sites"
 TIMESERIES = "timeseries"
 PLOTS = "plots"
 BATCH_REPORTING = "batch_reporting"
+FORMAT = "format"
@@ -18,12 +18,15 @@
 #
 # ------------------------------------------------------------------------------
 
+from collections import defaultdict
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from out_processing.plot_queue import PlotJob, PlotQueue
 
 
-def cost_mitigation(simulation_dfs, ref_program, base_program, output_directory):
+def cost_mitigation(simulation_dfs, ref_program, base_program, output_directory, plot_queue=None):
     """This function takes the simulation dataframes and economics
     default program parameters as inputs. It calculates the cost
     of each LDAR program and breaks each down into individual
@@ -34,167 +37,255 @@ def cost_mitigation(simulation_dfs, ref_program, base_program, output_directory)
     function calculates a cost/mitigation ratio. Outputs are two
     figures: one for the costs/method/site and the other plots
     the cost/mitigation ratios of each program. Two csv files
-    are also output into the file directory.
+    are also output into the file directory. Figures are rendered
+    by the plot_queue (out_processing.plot_queue.PlotQueue) when
+    one is given, otherwise before returning.
+    """
+    accumulator = EconomicsAccumulator()
+    for sim_idx, simulation_df in enumerate(simulation_dfs):
+        accumulator.add(sim_idx, simulation_df)
+    return accumulator.summarize(ref_program, base_program, output_directory, plot_queue=plot_queue)
+
+
+def sim_economics(simulation_df):
+    """Reduce the output of a single simulation to the values used by cost_mitigation,
+    so simulations can be reduced as soon as they finish.
     """
+    timeseries = simulation_df["timeseries"]
+    return {
+        "program_name": simulation_df["program_name"],
+        "total_program_emissions_kg": timeseries["daily_emissions_kg"].sum(),
+        "sale_price_natgas": simulation_df["p_c_economics"]["sale_price_natgas"],
+        "GWP_CH4": simulation_df["p_c_economics"]["GWP_CH4"],
+        "carbon_price_tonnesCO2e": simulation_df["p_c_economics"]["carbon_price_tonnesCO2e"],
+        "cost_CCUS": simulation_df["p_c_economics"]["cost_CCUS"],
+        "total_program_cost": timeseries["total_daily_cost"].sum(),
+        "costs": timeseries.filter(regex="cost$", axis=1).sum(),
+        "n_sites": len(simulation_df["sites"]),
+        "timesteps": len(timeseries),
+    }
+
+
+class EconomicsAccumulator:
+    """Economics of finished simulations, for cost_mitigation. Each simulation output is
+    reduced to its totals (see sim_economics) as soon as it is added, and totals are held
+    as columns with one value per simulation, so outputs can be calculated for any number
+    of programs without holding simulation timeseries. Results do not depend on the order
+    simulations are added in.
+    """
+
+    def __init__(self):
+        self.sim_idxs = []
+        self.totals = defaultdict(list)
+        self.costs = []
+        self.n_sites = []
+        self.timesteps = []
+
+    @property
+    def n_simulations(self):
+        return len(self.sim_idxs)
+
+    def add(self, sim_idx, simulation_df):
+        """Reduce the output of a finished simulation.
+
+        Args:
+            sim_idx (int): Position of the simulation in the list of simulations, used to
+                keep economics in the order of the simulations
+            simulation_df (dict): Simulation output
+        """
+        self.add_economics(sim_idx, sim_economics(simulation_df))
 
-    # Get simulation dataframes and put them in a dictionary, convert to df.
-    economics_outputs = [
-        {
-            "program_name": df["program_name"],
-            "total_program_emissions_kg": df["timeseries"]["daily_emissions_kg"].sum(),
-            "sale_price_natgas": df["p_c_economics"]["sale_price_natgas"],
-            "GWP_CH4": df["p_c_economics"]["GWP_CH4"],
-            "carbon_price_tonnesCO2e": df["p_c_economics"]["carbon_price_tonnesCO2e"],
-            "cost_CCUS": df["p_c_economics"]["cost_CCUS"],
-            "total_program_cost": df["timeseries"]["total_daily_cost"].sum(),
-        }
-        for df in simulation_dfs
-    ]
-
-    economics_outputs_df = pd.DataFrame(economics_outputs)
-
-    # Calculate the mean emissions and costs across all sims, convert units.
-    economics_df = economics_outputs_df.groupby(by="program_name").mean()
-
-    economics_df["total_emissions_mcf"] = (
-        (economics_df["total_program_emissions_kg"] / 0.678) * 35.3147
-    ) / 1000
-
-    economics_df["simulation_avg_emissions_tonnesCO2e"] = (
-        economics_df["total_program_emissions_kg"] / 1000
-    ) * economics_df["GWP_CH4"]
-
-    # Find the simulation average emissions from the baseline program.
-    # This should be 'P_none' (No LDAR) but the user may want to use a
-    # different program for the baseline.
-    # Subtract from programs.
-    try:
-        P_base_value = economics_df.loc[base_program, "total_emissions_mcf"]
-
-        economics_df["difference_base_mcf"] = economics_df["total_emissions_mcf"] - P_base_value
-
-        # Take difference in emissions and multiply by sale price of natural gas.
-        # Filter out results that don't achieve reductions over baseline.
-
-        economics_df["value_gas_sold"] = (
-            economics_df["difference_base_mcf"] * economics_df["sale_price_natgas"] * -1
-        )
-
-        economics_df.loc[(economics_df.value_gas_sold <= 0), "value_gas_sold"] = 0
-
-        # Find difference from baseline (no LDAR) in tonnes CO2e.
-        # Use value for cost/mitigation ratio.
-        # Need to verify that alt-program(s) achieve reductions over baseline.
-        def converter(difference_base_mcf, GWP_CH4):
-            if difference_base_mcf <= 0:
-                temp = (((abs(difference_base_mcf * 1000) / 35.3147) * 0.678) / 1000) * GWP_CH4
+    def add_economics(self, sim_idx, economics):
+        """Add a simulation already reduced with sim_economics.
+
+        Args:
+            sim_idx (int): Position of the simulation in the list of simulations
+            economics (dict): Reduced simulation output
+        """
+        self.sim_idxs.append(sim_idx)
+        for column, value in economics.items():
+            if column == "costs":
+                self.costs.append(value)
+            elif column == "n_sites":
+                self.n_sites.append(value)
+            elif column == "timesteps":
+                self.timesteps.append(value)
             else:
-                temp = 0
-            return temp
-
-        economics_df["dif_base_tonnesCO2e"] = economics_df.apply(
-            lambda row: converter(row["difference_base_mcf"], row["GWP_CH4"]), axis=1
-        )
-
-        economics_df["cost_mitigation_ratio"] = np.divide(
-            economics_df["total_program_cost"],
-            economics_df["dif_base_tonnesCO2e"],
-            out=np.zeros_like(economics_df["total_program_cost"]),
-            where=economics_df["dif_base_tonnesCO2e"] != 0,
-        )
-
-        # Reset index of df and set up program list and x ticks for plotting.
-        economics_df.reset_index(inplace=True)
-        programs = economics_df["program_name"]
-        x = np.arange(len(programs))
-
-        # Plot up the cost mitigation ratios for each program and comparables.
-        plt.xticks(x, programs)
-        plt.scatter(
-            x,
-            economics_df["cost_mitigation_ratio"],
-            marker="o",
-            c=np.random.rand(len(x)),
-            s=100,
-        ),
-        plt.axhline(
-            y=economics_df["carbon_price_tonnesCO2e"][1],
-            color="darkgreen",
-            linestyle="dashed",
-            label="Carbon Price",
-        ),
-        plt.axhline(
-            y=economics_df["cost_CCUS"][1],
-            color="blue",
-            linestyle="dotted",
-            label="Cost CCUS (Pure Stream)",
-        ),
-        plt.ylabel("$/tonne CO2e"),
-        plt.xlabel("Program"),
-        plt.title("Comparing LDAR Program Cost Mitigation Ratios"),
-        plt.legend(),
-        plt.savefig(output_directory / "cost_mitigation_plot.png")
-
-        # Set up number of sites and timesteps for cost/method/site plot.
-        n_sites = len(simulation_dfs[0]["sites"])
-        timesteps = len(simulation_dfs[0]["timeseries"])
-
-        # Get costs from other df's into new df.
-        df1 = pd.DataFrame(
-            df["timeseries"].filter(regex="cost$", axis=1).sum() for df in simulation_dfs
-        )
-        df1["program_name"] = [df["program_name"] for df in simulation_dfs]
-        cost_df = df1.groupby(by="program_name").mean()
-        cost_df.reset_index(inplace=True)
-        cost_method_df = cost_df.drop(columns="total_daily_cost")
-        cost_method_df["value_gas_sold"] = economics_df["value_gas_sold"] * -1
-
-        # Average costs into per method per site per year.
-        # Get adjusted program cost (costs - value gas sold).
-        def cost_site_year(x):
-            return ((x / n_sites) / timesteps) * 365
-
-        for column in cost_method_df.columns:
-            if column != "program_name":
-                cost_method_df[column] = cost_method_df[column].map(cost_site_year)
-
-        cost_method_df["adjusted_program_cost"] = cost_method_df.sum(axis=1, numeric_only=True)
-
-        # Reconfigure df columns to have verification cost first.
-        # Allows it to be at the bottom of the bar plot.
-        second_column = cost_method_df.pop("verification_cost")
-        cost_method_df.insert(1, "verification_cost", second_column)
-        cost_method_site_year_thousand = cost_method_df.set_index("program_name") / 1000
-        # converting to thousands for plotting
-
-        # Plot up the cost/method/site/year cost for each program.
-        cost_method_site_year_thousand.loc[:, "verification_cost":"value_gas_sold"].plot.bar(
-            stacked=True
-        )
-        plt.scatter(
-            programs,
-            cost_method_site_year_thousand["adjusted_program_cost"],
-            marker="o",
-            color="black",
-            zorder=2,
-            label="costs - gas sold",
-        )
-        plt.xticks(rotation=0)
-        plt.axhline(y=0, color="black", linestyle="solid")
-        plt.ylabel("Cost/Benefit (Thousand $/site/year)")
-        plt.xlabel("Program")
-        plt.title("Costs and Benefits of LDAR Programs")
-        plt.legend()
-        plt.savefig(output_directory / "cost_method_plot.png")
-
-        # Output dataframes into csv's.
-        economics_df.to_csv(output_directory / "economics_outputs.csv", index=True)
-
-        cost_method_site_year_thousand.to_csv(
-            output_directory / "annual_cost_method_site.csv", index=True
-        )
-
-    except Exception:
-        print("No base program, cannot run economics.")
-
-    return economics_df
+                self.totals[column].append(value)
+
+    def summarize(self, ref_program, base_program, output_directory, plot_queue=None):
+        """cost_mitigation outputs of all added simulations.
+
+        Args:
+            ref_program (string): Name of the reference program
+            base_program (string): Name of the baseline program
+            output_directory (Path): Directory outputs are written to
+            plot_queue (PlotQueue, optional): Queue figures are submitted to. Defaults to
+                None, figures rendered before returning.
+
+        Returns:
+            DataFrame: Mean economics of each program
+        """
+        if plot_queue is None:
+            plot_queue = PlotQueue()
+        # Simulations in the order of the simulations
+        order = np.argsort(self.sim_idxs, kind="stable")
+        economics_outputs_df = pd.DataFrame(self.totals).iloc[order]
+
+        # Calculate the mean emissions and costs across all sims, convert units.
+        economics_df = economics_outputs_df.groupby(by="program_name").mean()
+
+        economics_df["total_emissions_mcf"] = (
+            (economics_df["total_program_emissions_kg"] / 0.678) * 35.3147
+        ) / 1000
+
+        economics_df["simulation_avg_emissions_tonnesCO2e"] = (
+            economics_df["total_program_emissions_kg"] / 1000
+        ) * economics_df["GWP_CH4"]
+
+        # Find the simulation average emissions from the baseline program.
+        # This should be 'P_none' (No LDAR) but the user may want to use a
+        # different program for the baseline.
+        # Subtract from programs.
+        try:
+            P_base_value = economics_df.loc[base_program, "total_emissions_mcf"]
+
+            economics_df["difference_base_mcf"] = economics_df["total_emissions_mcf"] - P_base_value
+
+            # Take difference in emissions and multiply by sale price of natural gas.
+            # Filter out results that don't achieve reductions over baseline.
+
+            economics_df["value_gas_sold"] = (
+                economics_df["difference_base_mcf"] * economics_df["sale_price_natgas"] * -1
+            )
+
+            economics_df.loc[(economics_df.value_gas_sold <= 0), "value_gas_sold"] = 0
+
+            # Find difference from baseline (no LDAR) in tonnes CO2e.
+            # Use value for cost/mitigation ratio.
+            # Need to verify that alt-program(s) achieve reductions over baseline.
+            difference_base_mcf = economics_df["difference_base_mcf"]
+            economics_df["dif_base_tonnesCO2e"] = np.where(
+                difference_base_mcf <= 0,
+                (((abs(difference_base_mcf * 1000) / 35.3147) * 0.678) / 1000)
+                * economics_df["GWP_CH4"],
+                0,
+            )
+
+            economics_df["cost_mitigation_ratio"] = np.divide(
+                economics_df["total_program_cost"],
+                economics_df["dif_base_tonnesCO2e"],
+                out=np.zeros_like(economics_df["total_program_cost"]),
+                where=economics_df["dif_base_tonnesCO2e"] != 0,
+            )
+
+            # Reset index of df and set up program list and x ticks for plotting.
+            economics_df.reset_index(inplace=True)
+            programs = economics_df["program_name"]
+
+            # Plot up the cost mitigation ratios for each program and comparables.
+            plot_queue.submit(
+                PlotJob(
+                    render_cost_mitigation,
+                    output_directory / "cost_mitigation_plot.png",
+                    {
+                        "programs": programs.tolist(),
+                        "ratios": economics_df["cost_mitigation_ratio"].to_numpy(),
+                        "carbon_price": economics_df["carbon_price_tonnesCO2e"][1],
+                        "cost_CCUS": economics_df["cost_CCUS"][1],
+                    },
+                )
+            )
+
+            # Set up number of sites and timesteps for cost/method/site plot.
+            n_sites = self.n_sites[order[0]]
+            timesteps = self.timesteps[order[0]]
+
+            # Get costs from other df's into new df.
+            df1 = pd.DataFrame([self.costs[sim] for sim in order])
+            df1["program_name"] = economics_outputs_df["program_name"].to_numpy()
+            cost_df = df1.groupby(by="program_name").mean()
+            cost_df.reset_index(inplace=True)
+            cost_method_df = cost_df.drop(columns="total_daily_cost")
+            cost_method_df["value_gas_sold"] = economics_df["value_gas_sold"] * -1
+
+            # Average costs into per method per site per year.
+            # Get adjusted program cost (costs - value gas sold).
+            cost_columns = cost_method_df.columns.drop("program_name")
+            cost_method_df[cost_columns] = (
+                (cost_method_df[cost_columns] / n_sites) / timesteps
+            ) * 365
+
+            cost_method_df["adjusted_program_cost"] = cost_method_df.sum(axis=1, numeric_only=True)
+
+            # Reconfigure df columns to have verification cost first.
+            # Allows it to be at the bottom of the bar plot.
+            second_column = cost_method_df.pop("verification_cost")
+            cost_method_df.insert(1, "verification_cost", second_column)
+            cost_method_site_year_thousand = cost_method_df.set_index("program_name") / 1000
+            # converting to thousands for plotting
+
+            # Plot up the cost/method/site/year cost for each program.
+            plot_queue.submit(
+                PlotJob(
+                    render_cost_method,
+                    output_directory / "cost_method_plot.png",
+                    {"cost_method_site_year_thousand": cost_method_site_year_thousand},
+                )
+            )
+
+            # Output dataframes into csv's.
+            economics_df.to_csv(output_directory / "economics_outputs.csv", index=True)
+
+            cost_method_site_year_thousand.to_csv(
+                output_directory / "annual_cost_method_site.csv", index=True
+            )
+
+        except Exception:
+            print("No base program, cannot run economics.")
+
+        return economics_df
+
+
+def render_cost_mitigation(path, metadata, programs, ratios, carbon_price, cost_CCUS):
+    """Render the cost/mitigation ratio of each program, with the carbon price and the
+    cost of CCUS. Programs are colored by their position.
+    """
+    fig, ax = plt.subplots()
+    x = np.arange(len(programs))
+    ax.set_xticks(x, programs)
+    ax.scatter(x, ratios, marker="o", c=x, s=100)
+    ax.axhline(y=carbon_price, color="darkgreen", linestyle="dashed", label="Carbon Price")
+    ax.axhline(y=cost_CCUS, color="blue", linestyle="dotted", label="Cost CCUS (Pure Stream)")
+    ax.set_ylabel("$/tonne CO2e")
+    ax.set_xlabel("Program")
+    ax.set_title("Comparing LDAR Program Cost Mitigation Ratios")
+    ax.legend()
+    fig.savefig(path, metadata=metadata)
+    plt.close(fig)
+
+
+def render_cost_method(path, metadata, cost_method_site_year_thousand):
+    """Render the yearly cost per site of each method and the value of gas sold for each
+    program, stacked, with the adjusted program cost.
+    """
+    fig, ax = plt.subplots()
+    cost_method_site_year_thousand.loc[:, "verification_cost":"value_gas_sold"].plot.bar(
+        stacked=True, ax=ax
+    )
+    ax.scatter(
+        cost_method_site_year_thousand.index,
+        cost_method_site_year_thousand["adjusted_program_cost"],
+        marker="o",
+        color="black",
+        zorder=2,
+        label="costs - gas sold",
+    )
+    ax.tick_params(axis="x", labelrotation=0)
+    ax.axhline(y=0, color="black", linestyle="solid")
+    ax.set_ylabel("Cost/Benefit (Thousand $/site/year)")
+    ax.set_xlabel("Program")
+    ax.set_title("Costs and Benefits of LDAR Programs")
+    ax.legend()
+    fig.savefig(path, metadata=metadata)
+    plt.close(fig)
@@ -56,3 +56,33 @@ def get_distance(lon1, lat1, lon2, lat2, calc_method):
         # HBD - To be added a later date
         d = 100
     return d
+
+
+def get_distances(lon1, lat1, lon2, lat2):
+    """
+    Vectorized Haversine distances between coordinates, broadcast like numpy arrays,
+    ie. site coordinates of shape (n, 1) and home base coordinates of shape (m,) give
+    a (n, m) array of distances
+
+    Parameters
+    ----------
+    lat1 : latitudes 1
+    lon1 : longitudes 1
+    lat2 : latitudes 2
+    lon2 : longitudes 2
+
+    Returns an array of distances in km
+
+    """
+    lat1 = np.asarray(lat1, dtype=float)
+    lon1 = np.asarray(lon1, dtype=float)
+    lat2 = np.asarray(lat2, dtype=float)
+    lon2 = np.asarray(lon2, dtype=float)
+    radius = 6371.0
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians(lon2 - lon1)
+    a = np.sin(dlat / 2.0) * np.sin(dlat / 2.0) + np.cos(np.radians(lat1)) * np.cos(
+        np.radians(lat2)
+    ) * np.sin(dlon / 2.0) * np.sin(dlon / 2.0)
+    c = 2.0 * np.arctan2(np.sqrt(a), np.sqrt(1.0 - a))
+    return radius * c
@@ -0,0 +1,119 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        geography.distance_cache
+# Purpose:     Distances between the sites of a simulation, and between sites and home
+#              bases, calculated once and shared by all crews.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+
+import numpy as np
+from geography.distance import get_distance, get_distances
+from geography.homebase import HomeBaseTable
+from geography.site_index import unit_sphere
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0
+# Distances between sites closer than this are kept, most route planning trips are
+# between neighbouring sites. Other distances are calculated when they are looked up.
+SITE_RADIUS_KM = 50.0
+
+
+class DistanceCache:
+    """Haversine distances between the sites of a simulation, and between sites and home
+    bases. Distances between sites within a radius are kept in a sparse table, with
+    the sites within the radius of each site sorted in a row (compressed sparse rows).
+    Site to home base distances are kept in a table for each list of home bases (see
+    geography.homebase.HomeBaseTable). Tables are calculated once, vectorized, and are
+    read only afterwards, so all crews of a simulation share them.
+
+    Locations are looked up by coordinates, any location that is not a site is
+    calculated with geography.distance.get_distance.
+    """
+
+    def __init__(self, sites, radius=SITE_RADIUS_KM):
+        """
+        Args:
+            sites (list): Sites of the simulation
+            radius (float, optional): Radius in km within which distances between sites
+                are kept. Defaults to SITE_RADIUS_KM.
+        """
+        self.lons = np.array([float(site["lon"]) for site in sites])
+        self.lats = np.array([float(site["lat"]) for site in sites])
+        self.site_locs = list(zip(self.lons.tolist(), self.lats.tolist()))
+        # First site at each location, sites at the same location share distances
+        self.site_rows = {}
+        for site_idx, loc in enumerate(self.site_locs):
+            self.site_rows.setdefault(loc, site_idx)
+        self._home_base_tables = {}
+
+        # Pairs of sites within the radius, from a KD tree of the sites on the unit sphere
+        n_sites = len(self.site_locs)
+        if n_sites > 0:
+            chord = 2 * np.sin(min(radius / EARTH_RADIUS_KM, np.pi) / 2)
+            pairs = cKDTree(unit_sphere(self.lons, self.lats)).query_pairs(
+                chord, output_type="ndarray"
+            )
+        else:
+            pairs = np.empty((0, 2), dtype=int)
+        pair_distances = get_distances(
+            self.lons[pairs[:, 0]],
+            self.lats[pairs[:, 0]],
+            self.lons[pairs[:, 1]],
+            self.lats[pairs[:, 1]],
+        )
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        order = np.lexsort((cols, rows))
+        self.indices = cols[order]
+        self.data = np.concatenate([pair_distances, pair_distances])[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_sites))])
+
+    def distance(self, lon1, lat1, lon2, lat2):
+        """Get the Haversine distance between two locations.
+
+        Args:
+            lon1 (float): Longitude of location 1
+            lat1 (float): Latitude of location 1
+            lon2 (float): Longitude of location 2
+            lat2 (float): Latitude of location 2
+
+        Returns:
+            float: Distance in km
+        """
+        row = self.site_rows.get((float(lon1), float(lat1)))
+        col = self.site_rows.get((float(lon2), float(lat2)))
+        if row is not None and col is not None:
+            if row == col:
+                return 0.0
+            first, last = self.indptr[row], self.indptr[row + 1]
+            pos = first + np.searchsorted(self.indices[first:last], col)
+            if pos < last and self.indices[pos] == col:
+                return self.data[pos]
+        return get_distance(lon1, lat1, lon2, lat2, "Haversine")
+
+    def home_base_table(self, homebase_locs):
+        """Get the table of distances between sites and home bases, calculated the first
+        time a list of home bases is requested.
+
+        Args:
+            homebase_locs (list): Longitude and latitude of each home base
+
+        Returns:
+            HomeBaseTable: Site to home base distances
+        """
+        key = tuple((float(lon), float(lat)) for lon, lat in homebase_locs)
+        if key not in self._home_base_tables:
+            self._home_base_tables[key] = HomeBaseTable(homebase_locs, self.site_locs)
+        return self._home_base_tables[key]
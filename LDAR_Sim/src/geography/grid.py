@@ -0,0 +1,111 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        geography.grid
+# Purpose:     Assign sites to the cells of the weather grid, for all sites at once.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from geography.vector import grid_contains_points
+
+# Number of site to grid assignments kept by a process
+CACHE_SIZE = 8
+# Largest number of site and grid coordinate pairs compared at once
+MAX_BLOCK = 2**20
+
+_assignments = OrderedDict()
+
+
+def nearest_index(values, grid):
+    """Get the index of the grid value closest to each value. Ties go to the first grid
+    value, as with min(range(len(grid)), key=lambda i: abs(grid[i] - value)).
+
+    Args:
+        values (array): Values
+        grid (array): Grid values
+
+    Returns:
+        array: Index of the closest grid value of each value
+    """
+    values = np.asarray(values, dtype=np.float64)
+    grid = np.asarray(grid, dtype=np.float64)
+    indices = np.empty(len(values), dtype=np.int64)
+    block = max(1, MAX_BLOCK // max(1, len(grid)))
+    for first in range(0, len(values), block):
+        last = first + block
+        indices[first:last] = np.abs(grid[None, :] - values[first:last, None]).argmin(axis=1)
+    return indices
+
+
+def assign_grid_cells(sites, latitude, longitude):
+    """Get the weather grid cell of each site, the closest grid latitude and longitude.
+    Site longitudes are taken modulo 360 to find the closest grid longitude, while the
+    check that sites are within the grid compares the site longitudes as they are (see
+    geography.vector.grid_contains_point), as LDAR-Sim always has.
+
+    Assignments are kept for the last CACHE_SIZE grids and site coordinates, so the
+    simulations of the same sites on the same grid only assign them once.
+
+    Args:
+        sites (list): Sites, with lat and lon
+        latitude (array): Grid latitudes
+        longitude (array): Grid longitudes
+
+    Returns:
+        tuple: (int array) lat_index and (int array) lon_index of each site, and an exit
+            message listing every site outside of the grid, None if all sites are in it
+    """
+    lats = np.array([float(site["lat"]) for site in sites], dtype=np.float64)
+    lons = np.array([float(site["lon"]) for site in sites], dtype=np.float64)
+    latitude = np.ascontiguousarray(latitude, dtype=np.float64)
+    longitude = np.ascontiguousarray(longitude, dtype=np.float64)
+    key = hashlib.sha1()
+    for values in (lats, lons, latitude, longitude):
+        key.update(np.int64(len(values)).tobytes())
+        key.update(values.tobytes())
+    key = key.hexdigest()
+    if key in _assignments:
+        _assignments.move_to_end(key)
+        lat_index, lon_index = _assignments[key]
+    else:
+        lat_index = nearest_index(lats, latitude)
+        lon_index = nearest_index(lons % 360, longitude)
+        _assignments[key] = (lat_index, lon_index)
+        if len(_assignments) > CACHE_SIZE:
+            _assignments.popitem(last=False)
+
+    is_contained, directions = grid_contains_points([lats, lons], [latitude, longitude])
+    exit_msg = None
+    if not is_contained.all():
+        outside = np.flatnonzero(~is_contained).tolist()
+        exit_msg = "\n".join(
+            [
+                "Simulation terminated: {} site(s) are outside the spatial bounds of "
+                "your grid data!".format(len(outside))
+            ]
+            + [
+                "    {} (lat {}, lon {}) is too far {}".format(
+                    sites[site_idx].get("facility_ID", site_idx),
+                    sites[site_idx]["lat"],
+                    sites[site_idx]["lon"],
+                    " and ".join(directions[site_idx]),
+                )
+                for site_idx in outside
+            ]
+        )
+    return lat_index, lon_index, exit_msg
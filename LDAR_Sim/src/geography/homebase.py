@@ -1,4 +1,5 @@
-from geography.distance import get_distance
+import numpy as np
+from geography.distance import get_distance, get_distances
 
 # ------------------------------------------------------------------------------
 # Program:     The LDAR Simulator (LDAR-Sim)
@@ -57,17 +58,93 @@ def find_homebase_opt(lon1, lat1, lon2, lat2, homebase_locs):
     The latitude and longitude of nearest home base and the distance to that home base in km.
     """
     xy2 = (lon2, lat2)
-    if xy2 in homebase_locs:
-        ind = homebase_locs.index(xy2)
-        homebase_locs.pop(ind)
+    # The distance from the crew to the next facility is the same for all home bases
+    d2 = get_distance(lon1, lat1, lon2, lat2, "Haversine")
     D = []
-    for xy in homebase_locs:
+    # Home bases at the next visit facility are skipped, without changing homebase_locs
+    candidates = [xy for xy in homebase_locs if xy != xy2]
+    for xy in candidates:
         lon3 = xy[0]
         lat3 = xy[1]
         d1 = get_distance(lon1, lat1, lon3, lat3, "Haversine")
-        d2 = get_distance(lon1, lat1, lon2, lat2, "Haversine")
         d = d1 + d2
         D.append(d)
     dist = min(D)
     ind = D.index(dist)
-    return (homebase_locs[ind], dist)
+    return (candidates[ind], dist)
+
+
+class HomeBaseTable:
+    """
+    Distances between locations and home bases, calculated once for all locations given
+    when the table is created (ie. all sites), and once for any other location when it is
+    first looked up. Lookups give the same results as find_homebase and find_homebase_opt.
+    """
+
+    def __init__(self, homebase_locs, locations=()):
+        """
+        Parameters
+        ----------
+        homebase_locs : A list that includes longitudes and latitudes of all home bases
+        locations : A list of (longitude, latitude) of locations to look up in advance
+        """
+        self.homebase_locs = list(homebase_locs)
+        self._hb_lons = np.array([float(lonlat[0]) for lonlat in homebase_locs])
+        self._hb_lats = np.array([float(lonlat[1]) for lonlat in homebase_locs])
+        keys = list(dict.fromkeys((float(lon), float(lat)) for lon, lat in locations))
+        # Row of each location in the table
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self.distances = self._get_distances(keys)
+        # Distances of locations that were not looked up in advance
+        self._other_distances = {}
+
+    def _get_distances(self, keys):
+        if len(keys) == 0:
+            return np.empty((0, len(self.homebase_locs)))
+        lons, lats = np.array(keys, dtype=float).T
+        return get_distances(lons[:, np.newaxis], lats[:, np.newaxis], self._hb_lons, self._hb_lats)
+
+    def location_distances(self, lon, lat):
+        """
+        Get the distances in km between a location and each home base.
+        """
+        key = (float(lon), float(lat))
+        if key in self._rows:
+            return self.distances[self._rows[key]]
+        if key not in self._other_distances:
+            self._other_distances[key] = self._get_distances([key])[0]
+        return self._other_distances[key]
+
+    def nearest(self, lon, lat):
+        """
+        Find the nearest home base of a location (see find_homebase).
+
+        Returns
+        -------
+        The latitude and longitude of nearest home base and the distance to that home base in km.
+        """
+        distances = self.location_distances(lon, lat)
+        ind = int(np.argmin(distances))
+        return (self.homebase_locs[ind], distances[ind])
+
+    def nearest_opt(self, lon1, lat1, lon2, lat2, d2=None):
+        """
+        Find the home base that nearest to both LDAR team and next visit facility
+        (see find_homebase_opt).
+
+        Parameters
+        ----------
+        lon1 and lat1 are longitude and latitude of the current location of LDAR crew
+        lon2 and lat2 are longitude and latitude of the next visit facility
+        d2 : The distance between the LDAR crew and the next visit facility in km, if known
+
+        Returns
+        -------
+        The latitude and longitude of nearest home base and the distance to that home base in km.
+        """
+        if d2 is None:
+            d2 = get_distance(lon1, lat1, lon2, lat2, "Haversine")
+        at_next_loc = (self._hb_lons == float(lon2)) & (self._hb_lats == float(lat2))
+        distances = np.where(at_next_loc, np.inf, self.location_distances(lon1, lat1))
+        ind = int(np.argmin(distances))
+        return (self.homebase_locs[ind], distances[ind] + d2)
@@ -0,0 +1,88 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        geography.site_index
+# Purpose:     Spatial index of sites, to find the nearest site of a location
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def unit_sphere(lons, lats):
+    """Convert coordinates to points on the unit sphere. The straight line distance
+    between points grows with the Haversine distance between coordinates, so nearest
+    points are nearest coordinates.
+
+    Args:
+        lons (list): Longitudes
+        lats (list): Latitudes
+
+    Returns:
+        array: (x, y, z) of each coordinate
+    """
+    lons = np.radians(np.asarray(lons, dtype=float))
+    lats = np.radians(np.asarray(lats, dtype=float))
+    return np.column_stack([np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats)])
+
+
+class SiteIndex:
+    """KD tree of site coordinates on the unit sphere, from which sites are removed
+    as they are picked. Removed sites stay in the tree and are skipped by queries.
+    """
+
+    def __init__(self, lons, lats):
+        """
+        Args:
+            lons (list): Longitude of each site
+            lats (list): Latitude of each site
+        """
+        self.n_sites = len(lons)
+        self.removed = np.zeros(self.n_sites, dtype=bool)
+        self.n_removed = 0
+        if self.n_sites > 0:
+            self.tree = cKDTree(unit_sphere(lons, lats))
+
+    def __len__(self):
+        return self.n_sites - self.n_removed
+
+    def remove(self, site_idx):
+        """Remove a site from the index.
+
+        Args:
+            site_idx (int): Position of the site in the coordinates of the index
+        """
+        if not self.removed[site_idx]:
+            self.removed[site_idx] = True
+            self.n_removed += 1
+
+    def nearest(self, lon, lat):
+        """Find the nearest site of a location that has not been removed.
+
+        Args:
+            lon (float): Longitude
+            lat (float): Latitude
+
+        Returns:
+            int: Position of the site in the coordinates of the index, None if all
+                sites have been removed
+        """
+        if len(self) == 0:
+            return None
+        # The nearest removed sites and at least one remaining site
+        _, site_idxs = self.tree.query(unit_sphere([lon], [lat])[0], k=self.n_removed + 1)
+        site_idxs = np.atleast_1d(site_idxs)
+        remaining = ~self.removed[site_idxs]
+        return int(site_idxs[remaining][0])
@@ -17,6 +17,8 @@
 # along with this program.  If not, see <https://opensource.org/licenses/MIT>.
 #
 
+import numpy as np
+
 
 def grid_contains_point(point_coord, grid_list_coord):
     """Identify if a point is within a grid of coordinates
@@ -59,3 +61,33 @@ def grid_contains_point(point_coord, grid_list_coord):
         )
         is_contained = False
     return is_contained, exit_msg
+
+
+def grid_contains_points(point_coords, grid_list_coord):
+    """Identify which of a list of points are within a grid of coordinates, with the
+    bounds of grid_contains_point.
+
+    Args:
+        point_coords ([lats,lons]): Latitude and longitude of each point
+        grid_list_coord (list): List of grid centroids
+
+    Returns:
+        tuple: (bool array) is each point contained, and (list) the directions each
+            point is outside the grid, ie. ["North", "West"], empty if contained
+    """
+    lats = np.asarray(point_coords[0], dtype=np.float64)
+    lons = np.asarray(point_coords[1], dtype=np.float64)
+    grid_lats = np.asarray(grid_list_coord[0], dtype=np.float64)
+    grid_lons = np.asarray(grid_list_coord[1], dtype=np.float64)
+    outside = {
+        "North": lats > grid_lats.max(),
+        "South": lats < grid_lats.min(),
+        "East": lons > grid_lons.max(),
+        "West": lons < grid_lons.min(),
+    }
+    directions = [[] for _ in range(len(lats))]
+    for direction, is_outside in outside.items():
+        for point_idx in np.flatnonzero(is_outside).tolist():
+            directions[point_idx].append(direction)
+    is_contained = ~np.logical_or.reduce(list(outside.values()))
+    return is_contained, directions
@@ -0,0 +1,187 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        initialization.input_store
+# Purpose:     Store large simulation inputs once, so workers load them by reference
+#              rather than receiving a pickled copy with every simulation.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from initialization.leaks import PregeneratedLeaks
+
+# Columns of PregeneratedLeaks stored as memory-mapped arrays
+LEAK_ARRAYS = ("leak_counts", "rates", "equipment_groups", "days_active", "days")
+
+
+class SimInputStore:
+    """Read only store of the pregenerated sites and leaks of simulations. Inputs are
+    written once to a temporary folder, and simulations only carry the path to them.
+    Leak arrays are memory-mapped read only when loaded, so all workers share one copy
+    through the page cache. Sites are mutated by simulations, each load returns a new
+    copy of them.
+    """
+
+    def __init__(self, store_dir=None):
+        """
+        Args:
+            store_dir (Path, optional): Folder to store inputs in. Defaults to a new
+                temporary folder, removed by cleanup.
+        """
+        if store_dir is None:
+            self.store_dir = Path(tempfile.mkdtemp(prefix="ldar_sim_inputs_"))
+        else:
+            self.store_dir = Path(store_dir)
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+        # Files of the sites and leaks already stored, keyed by their id
+        self._stored = {}
+
+    def put(self, key, sites, leak_timeseries, initial_leaks, leak_dir=None):
+        """Store the inputs of a simulation. Sites and leaks shared by several programs
+        of the same simulation are only stored once.
+
+        Args:
+            key (str): Name of the simulation inputs, ie. "0_P_OGI"
+            sites (list): Site dictionaries
+            leak_timeseries (dict): Leak timeseries of each site, keyed by facility_ID
+            initial_leaks (dict): Initial leaks of each site, keyed by facility_ID
+            leak_dir (Path, optional): Folder the leaks were already written to by
+                write_leaks, ie. a world of the world cache. Defaults to None, writing
+                the leaks to the store.
+
+        Returns:
+            str: Path to the stored inputs, see load_sim_inputs
+        """
+        # Inputs are kept alive in the store so their ids are not reused
+        if id(sites) not in self._stored:
+            sites_file = self.store_dir / "sites_{}.p".format(len(self._stored))
+            with open(sites_file, "wb") as f:
+                pickle.dump(sites, f)
+            self._stored[id(sites)] = (sites_file, sites)
+        if leak_dir is None:
+            if id(leak_timeseries) not in self._stored:
+                leak_dir = self.store_dir / "leaks_{}".format(len(self._stored))
+                leak_dir.mkdir()
+                write_leaks(leak_dir, "leak_timeseries", leak_timeseries)
+                write_leaks(leak_dir, "initial_leaks", initial_leaks)
+                self._stored[id(leak_timeseries)] = (leak_dir, leak_timeseries)
+            leak_dir = self._stored[id(leak_timeseries)][0]
+        input_file = self.store_dir / "{}.p".format(key)
+        with open(input_file, "wb") as f:
+            pickle.dump({"sites": str(self._stored[id(sites)][0]), "leaks": str(leak_dir)}, f)
+        return str(input_file)
+
+    def cleanup(self):
+        """Remove the stored inputs."""
+        self._stored = {}
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+
+def write_leaks(leak_dir, name, site_leaks):
+    """Write the leaks of all sites. Leaks held as arrays (PregeneratedLeaks) are written
+    as columns concatenated across sites, other leaks (lists of leak dictionaries) are
+    pickled.
+
+    Args:
+        leak_dir (Path): Folder to write to
+        name (str): Name of the leaks, ie. "initial_leaks"
+        site_leaks (dict): Leaks of each site, keyed by facility_ID
+    """
+    if not all(hasattr(leaks, "leak_counts") for leaks in site_leaks.values()):
+        with open(leak_dir / "{}.p".format(name), "wb") as f:
+            pickle.dump(site_leaks, f)
+        return
+    sites = [
+        (leaks.facility_ID, leaks.lat, leaks.lon, leaks.start_date, leaks.n_timesteps)
+        for leaks in site_leaks.values()
+    ]
+    offsets = np.cumsum([0] + [len(leaks.leak_counts) for leaks in site_leaks.values()])
+    np.save(leak_dir / "{}_offsets.npy".format(name), offsets)
+    for column in LEAK_ARRAYS:
+        values = [getattr(leaks, column) for leaks in site_leaks.values()]
+        # Columns such as days are only set for leak timeseries
+        if any(site_values is not None for site_values in values):
+            np.save(leak_dir / "{}_{}.npy".format(name, column), np.concatenate(values))
+    with open(leak_dir / "{}_sites.p".format(name), "wb") as f:
+        pickle.dump(sites, f)
+
+
+def read_leaks(leak_dir, name):
+    """Read the leaks of all sites written by write_leaks. Columns are memory-mapped
+    read only, each site's PregeneratedLeaks holds views of them.
+
+    Args:
+        leak_dir (Path): Folder to read from
+        name (str): Name of the leaks, ie. "initial_leaks"
+
+    Returns:
+        dict: Leaks of each site, keyed by facility_ID
+    """
+    pickled = leak_dir / "{}.p".format(name)
+    if pickled.is_file():
+        with open(pickled, "rb") as f:
+            return pickle.load(f)
+    offsets = np.load(leak_dir / "{}_offsets.npy".format(name))
+    columns = {}
+    for column in LEAK_ARRAYS:
+        column_file = leak_dir / "{}_{}.npy".format(name, column)
+        if column_file.is_file():
+            columns[column] = np.load(column_file, mmap_mode="r")
+    with open(leak_dir / "{}_sites.p".format(name), "rb") as f:
+        sites = pickle.load(f)
+    site_leaks = {}
+    for site_idx, (facility_ID, lat, lon, start_date, n_timesteps) in enumerate(sites):
+        first, last = offsets[site_idx], offsets[site_idx + 1]
+        site_columns = {column: values[first:last] for column, values in columns.items()}
+        site_leaks[facility_ID] = PregeneratedLeaks(
+            facility_ID,
+            lat,
+            lon,
+            start_date,
+            site_columns.get("leak_counts"),
+            site_columns.get("rates"),
+            site_columns.get("equipment_groups"),
+            days_active=site_columns.get("days_active"),
+            days=site_columns.get("days"),
+            n_timesteps=n_timesteps,
+        )
+    return site_leaks
+
+
+def load_sim_inputs(input_path):
+    """Load simulation inputs stored by SimInputStore.put.
+
+    Args:
+        input_path (str): Path returned by SimInputStore.put
+
+    Returns:
+        dict: sites (a new copy), leak_timeseries and initial_leaks
+    """
+    with open(input_path, "rb") as f:
+        inputs = pickle.load(f)
+    with open(inputs["sites"], "rb") as f:
+        sites = pickle.load(f)
+    leak_dir = Path(inputs["leaks"])
+    return {
+        "sites": sites,
+        "leak_timeseries": read_leaks(leak_dir, "leak_timeseries"),
+        "initial_leaks": read_leaks(leak_dir, "initial_leaks"),
+    }
@@ -18,10 +18,15 @@
 #
 # ------------------------------------------------------------------------------
 
+from collections.abc import Sequence
 from datetime import datetime, timedelta
 
+import numpy as np
 from numpy import random
-from utils.distributions import leak_rvs
+from utils.distributions import leak_rvs, leak_rvs_batch
+
+# Maximum number of site x day draws held in memory at once when generating leak timeseries
+MAX_BLOCK_DRAWS = 4_000_000
 
 
 def generate_leak(program, site, start_date, leak_count, days_active=0, day_ts_began=0):
@@ -47,13 +52,54 @@ def generate_leak(program, site, start_date, leak_count, days_active=0, day_ts_b
             program["emissions"]["max_leak_rate"],
             site["leak_rate_units"],
         )
+    equipment_group = random.randint(1, int(site["equipment_groups"]) + 1)
+    return leak_record(
+        site["facility_ID"],
+        site["lat"],
+        site["lon"],
+        start_date,
+        leak_count,
+        leak_rate,
+        equipment_group,
+        days_active,
+        day_ts_began,
+    )
+
+
+def leak_record(
+    facility_ID,
+    lat,
+    lon,
+    start_date,
+    leak_count,
+    rate,
+    equipment_group,
+    days_active=0,
+    day_ts_began=0,
+):
+    """Build the leak dictionary used throughout the simulation
+
+    Args:
+        facility_ID (str): ID of the site the leak is at
+        lat (float): Site latitude
+        lon (float): Site longitude
+        start_date (datetime): Leak start date
+        leak_count (integer): Number of leaks at site, used for creating id
+        rate (float): Leak rate in g/s
+        equipment_group (int): Equipment group the leak is on
+        days_active (int, optional): Days the leak has been active. Defaults to 0.
+        day_ts_began (int, optional): Timestep the leak began. Defaults to 0.
+
+    Returns:
+        dict: Leak object
+    """
     return {
-        "leak_ID": "{}_{}".format(site["facility_ID"], str(leak_count).zfill(10)),
-        "facility_ID": str(site["facility_ID"]),
-        "equipment_group": random.randint(1, int(site["equipment_groups"]) + 1),
-        "rate": leak_rate,
-        "lat": float(site["lat"]),
-        "lon": float(site["lon"]),
+        "leak_ID": "{}_{}".format(facility_ID, str(leak_count).zfill(10)),
+        "facility_ID": str(facility_ID),
+        "equipment_group": equipment_group,
+        "rate": rate,
+        "lat": float(lat),
+        "lon": float(lon),
         "status": "active",
         "days_active": days_active,
         "volume": None,
@@ -146,3 +192,209 @@ def generate_initial_leaks(virtual_world, site, start_date):
             generate_leak(virtual_world, site, leak_start_date, leak_count, days_active)
         )
     return initial_site_leaks
+
+
+class PregeneratedLeaks(Sequence):
+    """Leaks of a single site stored as arrays. Leak dictionaries are only built when
+    an entry is accessed.
+
+    Initial leaks are indexed by leak. A leak timeseries (days is set) is indexed by
+    timestep, and holds None on days without a new leak, like the lists returned by
+    generate_leak_timeseries.
+    """
+
+    def __init__(
+        self,
+        facility_ID,
+        lat,
+        lon,
+        start_date,
+        leak_counts,
+        rates,
+        equipment_groups,
+        days_active=None,
+        days=None,
+        n_timesteps=None,
+    ):
+        self.facility_ID = facility_ID
+        self.lat = lat
+        self.lon = lon
+        self.start_date = start_date
+        self.leak_counts = leak_counts
+        self.rates = rates
+        self.equipment_groups = equipment_groups
+        self.days_active = days_active
+        self.days = days
+        self.n_timesteps = n_timesteps
+
+    def __len__(self):
+        if self.days is not None:
+            return self.n_timesteps
+        return len(self.leak_counts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("leak index out of range")
+        if self.days is None:
+            leak = index
+            days_active = int(self.days_active[leak])
+            start_date = self.start_date - timedelta(days=days_active)
+            day_ts_began = 0
+        else:
+            leak = np.searchsorted(self.days, index)
+            if leak == len(self.days) or self.days[leak] != index:
+                return None
+            days_active = 0
+            start_date = self.start_date + timedelta(days=index)
+            day_ts_began = index
+        return leak_record(
+            self.facility_ID,
+            self.lat,
+            self.lon,
+            start_date,
+            int(self.leak_counts[leak]),
+            float(self.rates[leak]),
+            int(self.equipment_groups[leak]),
+            days_active,
+            day_ts_began,
+        )
+
+
+def _draw_leak_rates(virtual_world, sites, leak_sites, rng):
+    """Draw the rates of all leaks in one go, grouping leaks by the source
+    (empirical sample or distribution) of their site.
+    Args:
+        virtual_world (dict): Virtual world parameters dictionary
+        sites (list): Site parameter and variable dictionaries
+        leak_sites (array): Index of the site of each leak
+        rng (numpy Generator): Random generator used for the draws
+    Returns:
+        array: Leak rates
+    """
+    emis = virtual_world["emissions"]
+    if emis["leak_file"] and emis["leak_file_use"] == "sample":
+        return rng.choice(emis["empirical_leaks"], size=len(leak_sites))
+    # Sites of the same subtype share the same leak rate source
+    groups = {}
+    for site_idx, site in enumerate(sites):
+        if "leak_rate_source" in site and site["leak_rate_source"] == "sample":
+            key = ("sample", id(site["empirical_leak_rates"]))
+        else:
+            key = ("dist", id(site["leak_rate_dist"]), tuple(site["leak_rate_units"]))
+        groups.setdefault(key, (site, []))[1].append(site_idx)
+    rates = np.empty(len(leak_sites))
+    for key, (site, group_sites) in groups.items():
+        in_group = np.isin(leak_sites, group_sites)
+        n_leaks = int(np.count_nonzero(in_group))
+        if key[0] == "sample":
+            rates[in_group] = rng.choice(site["empirical_leak_rates"], size=n_leaks)
+        else:
+            rates[in_group] = leak_rvs_batch(
+                site["leak_rate_dist"],
+                n_leaks,
+                emis["max_leak_rate"],
+                site["leak_rate_units"],
+                random_state=rng,
+            )
+    return rates
+
+
+def generate_site_leaks(virtual_world, sites, start_date, end_date, rng):
+    """Generate the initial leaks and leak timeseries of all sites at once. Equivalent to
+        calling generate_initial_leaks then generate_leak_timeseries for each site, with
+        all random values drawn in batches.
+    Args:
+        virtual_world (dict): Virtual world parameters dictionary
+        sites (list): Site parameter and variable dictionaries
+        start_date (list): Simulation start date [year, month, day]
+        end_date (list): Simulation end date [year, month, day]
+        rng (numpy Generator): Random generator used for the draws
+    Returns:
+        dict: leak_timeseries, dict: initial_leaks. Both are keyed by facility_ID and
+            hold PregeneratedLeaks.
+    """
+    n_sites = len(sites)
+    prog_start_date = datetime(*start_date)
+    n_timesteps = (datetime(*end_date) - prog_start_date).days
+    if virtual_world["subtype_file"] is not None:
+        NRd = np.array([site["NRd"] for site in sites])
+        LPR = np.array([site["LPR"] for site in sites], dtype=float)
+    else:
+        NRd = np.full(n_sites, virtual_world["NRd"])
+        LPR = np.full(n_sites, virtual_world["emissions"]["LPR"], dtype=float)
+
+    # --- Initial leaks ---
+    if virtual_world["n_init_days"] is not None:
+        init_max_days_active = np.full(n_sites, virtual_world["n_init_days"], dtype=np.int64)
+    else:
+        init_max_days_active = NRd.astype(np.int64)
+    if virtual_world["n_init_leaks_prob"] is not None:
+        n_init_leaks = rng.binomial(init_max_days_active, virtual_world["n_init_leaks_prob"])
+    else:
+        n_init_leaks = rng.binomial(init_max_days_active, LPR)
+    init_sites = np.repeat(np.arange(n_sites), n_init_leaks)
+    init_days_active = rng.integers(0, init_max_days_active[init_sites])
+
+    # --- Leak timeseries, one Bernoulli draw per site and day ---
+    block = max(1, MAX_BLOCK_DRAWS // max(n_timesteps, 1))
+    ts_sites = []
+    ts_days = []
+    for first in range(0, n_sites, block):
+        last = first + block
+        block_LPR = LPR[first:last]
+        new_leaks = rng.random((len(block_LPR), n_timesteps)) < block_LPR[:, None]
+        block_sites, block_days = np.nonzero(new_leaks)
+        ts_sites.append(block_sites + first)
+        ts_days.append(block_days)
+    ts_sites = np.concatenate(ts_sites) if ts_sites else np.empty(0, dtype=np.int64)
+    ts_days = np.concatenate(ts_days) if ts_days else np.empty(0, dtype=np.int64)
+
+    # --- Leak attributes ---
+    leak_sites = np.concatenate([init_sites, ts_sites])
+    equipment_groups = np.array([int(site["equipment_groups"]) for site in sites])
+    leak_equipment = rng.integers(1, equipment_groups[leak_sites] + 1)
+    leak_rates = _draw_leak_rates(virtual_world, sites, leak_sites, rng)
+
+    # Leaks are numbered per site, initial leaks first then new leaks by day
+    n_init = len(init_sites)
+    init_counts = np.arange(n_init) - np.searchsorted(init_sites, init_sites) + 1
+    ts_counts = (
+        np.arange(len(ts_sites)) - np.searchsorted(ts_sites, ts_sites) + n_init_leaks[ts_sites] + 1
+    )
+    init_bounds = np.searchsorted(init_sites, np.arange(n_sites + 1))
+    ts_bounds = np.searchsorted(ts_sites, np.arange(n_sites + 1))
+
+    leak_timeseries = {}
+    initial_leaks = {}
+    for site_idx, site in enumerate(sites):
+        i0, i1 = init_bounds[site_idx], init_bounds[site_idx + 1]
+        t0, t1 = ts_bounds[site_idx], ts_bounds[site_idx + 1]
+        # Leak attributes hold initial leaks then timeseries leaks
+        a0, a1 = n_init + t0, n_init + t1
+        site.update({"initial_leaks": int(i1 - i0), "cum_leaks": int(i1 - i0 + t1 - t0)})
+        initial_leaks[site["facility_ID"]] = PregeneratedLeaks(
+            site["facility_ID"],
+            site["lat"],
+            site["lon"],
+            prog_start_date,
+            init_counts[i0:i1],
+            leak_rates[i0:i1],
+            leak_equipment[i0:i1],
+            days_active=init_days_active[i0:i1],
+        )
+        leak_timeseries[site["facility_ID"]] = PregeneratedLeaks(
+            site["facility_ID"],
+            site["lat"],
+            site["lon"],
+            prog_start_date,
+            ts_counts[t0:t1],
+            leak_rates[a0:a1],
+            leak_equipment[a0:a1],
+            days=ts_days[t0:t1],
+            n_timesteps=n_timesteps,
+        )
+    return leak_timeseries, initial_leaks
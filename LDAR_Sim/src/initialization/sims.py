@@ -21,39 +21,86 @@
 
 import os
 import pickle
-from copy import deepcopy
 
 from initialization.preseed import gen_seed_timeseries
 from initialization.sites import generate_sites, regenerate_sites
+from initialization.world_cache import World, world_dir, world_key, write_world
 
 
-def create_sims(sim_params, programs, virtual_world, generator_dir, in_dir, out_dir):
-    # Store params used to generate the pickle files for change detection
+def create_sims(
+    sim_params,
+    programs,
+    virtual_world,
+    generator_dir,
+    in_dir,
+    out_dir,
+    input_store=None,
+    defer_plots=False,
+):
+    """Create the list of simulations to run, one per simulation and program.
+
+    Pregenerated worlds are read from, or generated and written to, the world cache in
+    generator_dir (see initialization.world_cache), one world per simulation shared by
+    all programs. Pickled worlds of previous versions are still read when present.
+
+    When an input_store (initialization.input_store.SimInputStore) is provided, the
+    pregenerated sites and leaks are written to it and simulations hold the path to
+    them ("sim_inputs") instead of the inputs themselves.
+
+    With defer_plots, simulations return their plot jobs ("plot_jobs") for the caller to
+    render (see out_processing.plot_queue), instead of rendering them.
+    """
     n_simulations = sim_params["n_simulations"]
     pregen_leaks = sim_params["pregenerate_leaks"]
     preseed_random = sim_params["preseed_random"]
     base_prog = sim_params["baseline_program"]
+    leak_generation_seed = sim_params["leak_generation_seed"]
+    if pregen_leaks:
+        # Worlds are cached by the hash of everything they are generated from
+        key = world_key(virtual_world, sim_params, in_dir)
+        sites_file = in_dir / virtual_world["infrastructure_file"]
     simulations = []
     for i in range(n_simulations):
+        world = None
         if pregen_leaks:
+            # Pickled worlds of previous versions are used when present
             file_loc = generator_dir / "pregen_{}_{}.p".format(i, base_prog)
+            sim_world_dir = world_dir(generator_dir, i, key)
             # If there is no pregenerated file for the virtual world
-            if not os.path.isfile(file_loc):
+            if not os.path.isfile(file_loc) and not sim_world_dir.is_dir():
                 sites, leak_timeseries, initial_leaks = generate_sites(
                     virtual_world,
                     in_dir,
                     pregen_leaks,
                     sim_params["start_date"],
                     sim_params["end_date"],
+                    seed=None if leak_generation_seed is None else [leak_generation_seed, i],
                 )
+                sites = regenerate_sites(virtual_world, sites, in_dir)
         else:
             sites, leak_timeseries, initial_leaks = [], [], []
         if preseed_random:
             seed_timeseries = gen_seed_timeseries(sim_params)
         else:
             seed_timeseries = None
+        if pregen_leaks and not os.path.isfile(file_loc):
+            if not sim_world_dir.is_dir():
+                write_world(
+                    sim_world_dir,
+                    sites,
+                    leak_timeseries,
+                    initial_leaks,
+                    seed_timeseries,
+                    sites_file,
+                )
+            # All programs share the world, read from the cache
+            world = World(sim_world_dir, sites_file)
+            sites = world.sites()
+            leak_timeseries = world.leak_timeseries()
+            initial_leaks = world.initial_leaks()
+            seed_timeseries = world.seed_timeseries()
         for pidx, p in programs.items():
-            if pregen_leaks:
+            if pregen_leaks and world is None:
                 file_loc = generator_dir / "pregen_{}_{}.p".format(i, pidx)
                 if os.path.isfile(file_loc):
                     # If there is a pregenerated file for the virtual world
@@ -64,16 +111,7 @@ def create_sims(sim_params, programs, virtual_world, generator_dir, in_dir, out_
                     seed_timeseries = generated_data["seed_timeseries"]
                 else:
                     sites = regenerate_sites(virtual_world, sites, in_dir)
-                    pickle.dump(
-                        {
-                            "sites": sites,
-                            "leak_timeseries": leak_timeseries,
-                            "initial_leaks": initial_leaks,
-                            "seed_timeseries": seed_timeseries,
-                        },
-                        open(file_loc, "wb"),
-                    )
-            else:
+            elif not pregen_leaks:
                 sites = []
 
             opening_message = "Simulating program: {} ; simulation {} of {}".format(
@@ -82,24 +120,35 @@ def create_sims(sim_params, programs, virtual_world, generator_dir, in_dir, out_
             closing_message = "Finished simulating program {} ; simulation {} of {} ".format(
                 pidx, i + 1, n_simulations
             )
-            simulations.append(
-                [
+            simulation = {
+                "i": i,
+                "program": programs[pidx],
+                "simulation_settings": sim_params,
+                "virtual_world": virtual_world,
+                "input_directory": in_dir,
+                "output_directory": out_dir,
+                "opening_message": opening_message,
+                "closing_message": closing_message,
+                "pregenerate_leaks": pregen_leaks,
+                "print_from_simulation": sim_params["print_from_simulations"],
+                "seed_timeseries": seed_timeseries,
+                "defer_plots": defer_plots,
+            }
+            if pregen_leaks and input_store is not None:
+                simulation["sim_inputs"] = input_store.put(
+                    "{}_{}".format(i, pidx),
+                    sites,
+                    leak_timeseries,
+                    initial_leaks,
+                    leak_dir=None if world is None else world.world_dir,
+                )
+            else:
+                simulation.update(
                     {
-                        "i": i,
-                        "program": deepcopy(programs[pidx]),
-                        "simulation_settings": sim_params,
-                        "virtual_world": virtual_world,
-                        "input_directory": in_dir,
-                        "output_directory": out_dir,
-                        "opening_message": opening_message,
-                        "closing_message": closing_message,
-                        "pregenerate_leaks": pregen_leaks,
-                        "print_from_simulation": sim_params["print_from_simulations"],
                         "sites": sites,
                         "leak_timeseries": leak_timeseries,
                         "initial_leaks": initial_leaks,
-                        "seed_timeseries": seed_timeseries,
                     }
-                ]
-            )
+                )
+            simulations.append([simulation])
     return simulations
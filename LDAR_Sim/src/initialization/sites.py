@@ -26,20 +26,24 @@ import random
 
 import numpy as np
 import pandas as pd
-from initialization.leaks import generate_initial_leaks, generate_leak_timeseries
+from initialization.leaks import generate_site_leaks
 from utils.distributions import fit_dist, unpackage_dist
 from utils.emis_inputs import assign_vents
 from methods.init_func.repair_delay import determine_delay
 
 
 def init_generator_files(generator_dir, sim_params, in_dir, virtual_world):
-    sites_file = virtual_world["infrastructure_file"]
-    sites_in = pd.read_csv(in_dir / sites_file)
-    sim_sites = sites_in.to_dict("records")
+    """Create the generator folder. Pickled worlds of previous versions are removed when
+    the parameters or sites they were generated with have changed. Worlds of the world
+    cache are invalidated by their hash instead (see initialization.world_cache).
+    """
     if not os.path.exists(generator_dir):
         os.mkdir(generator_dir)
     gen_files = fnmatch.filter(os.listdir(generator_dir), "*.p")
-    if len(gen_files) > 0:
+    if len(fnmatch.filter(gen_files, "pregen_*.p")) > 0:
+        sites_file = virtual_world["infrastructure_file"]
+        sites_in = pd.read_csv(in_dir / sites_file)
+        sim_sites = sites_in.to_dict("records")
         try:
             old_sites = pickle.load(open(generator_dir / "sites.p", "rb"))
             old_params = pickle.load(open(generator_dir / "params.p", "rb"))
@@ -50,8 +54,6 @@ def init_generator_files(generator_dir, sim_params, in_dir, virtual_world):
         if old_params != sim_params or old_sites != sim_sites:
             for file in gen_files:
                 os.remove(generator_dir / file)
-    pickle.dump(sim_sites, open(generator_dir / "sites.p", "wb"))
-    pickle.dump(sim_params, open(generator_dir / "params.p", "wb"))
 
 
 def get_subtype_dist(program, wd):
@@ -111,17 +113,25 @@ def get_subtype_file(program, wd):
         unpackage_dist(program, wd)
 
 
-def generate_sites(virtual_world, in_dir, pregen_leaks, start_date, end_date):
+def generate_sites(virtual_world, in_dir, pregen_leaks, start_date, end_date, seed=None):
     """[summary]
 
     Args:
         virtual_world (dict): The virtual world parameters informing site generation.
         in_dir (Path): The path to the inputs directory
         pregen_leaks (boolean): Boolean indicating whether or not to pregenerate leaks.
+        start_date (list): Simulation start date [year, month, day]
+        end_date (list): Simulation end date [year, month, day]
+        seed (int or list of ints, optional): Seed making the generated sites and leaks
+            reproducible. Defaults to None.
 
     Returns:
         [dict]: sites, Union[dict, None]: leak_timeseries, Union[dict, None]: initial_leaks
     """
+    rng = np.random.default_rng(seed)
+    # Without a seed, site sampling and repair delays keep using the global generators
+    site_rng = rng if seed is not None else None
+
     # Read in the sites as a list of dictionaries
     sites_in = pd.read_csv(in_dir / virtual_world["infrastructure_file"])
     sites = sites_in.to_dict("records")
@@ -131,7 +141,10 @@ def generate_sites(virtual_world, in_dir, pregen_leaks, start_date, end_date):
     if n_samples is None:
         n_samples = len(sites)
     # even if n_samples is None, the sample function is still used to shuffle
-    sites = random.sample(sites, n_samples)
+    if site_rng is None:
+        sites = random.sample(sites, n_samples)
+    else:
+        sites = [sites[idx] for idx in site_rng.permutation(len(sites))[:n_samples]]
 
     # Get leaks from file
     if virtual_world["emissions"]["leak_file"] is not None:
@@ -142,8 +155,6 @@ def generate_sites(virtual_world, in_dir, pregen_leaks, start_date, end_date):
     # get_subtype_dist(program, in_dir)
     get_subtype_file(virtual_world, in_dir)
 
-    leak_timeseries = {}
-    initial_leaks = {}
     # Additional variable(s) for each site
     for site in sites:
         # Add a distribution and unit for each leak
@@ -155,17 +166,15 @@ def generate_sites(virtual_world, in_dir, pregen_leaks, start_date, end_date):
             site.update(virtual_world["subtypes"][0])
 
         # Determine repair delay for each site
-        site["repair_delay"] = determine_delay(virtual_world)
+        site["repair_delay"] = determine_delay(virtual_world, site_rng)
 
-        if pregen_leaks:
-            initial_site_leaks = generate_initial_leaks(virtual_world, site, start_date)
-            initial_leaks.update({site["facility_ID"]: initial_site_leaks})
-            site_timeseries = generate_leak_timeseries(virtual_world, site, start_date, end_date)
-            leak_timeseries.update({site["facility_ID"]: site_timeseries})
+    if pregen_leaks:
+        leak_timeseries, initial_leaks = generate_site_leaks(
+            virtual_world, sites, start_date, end_date, rng
+        )
+        for site in sites:
             if "leak_rate_dist" in site:
                 del site["leak_rate_dist"]
-
-    if pregen_leaks:
         return sites, leak_timeseries, initial_leaks
     else:
         return sites, None, None
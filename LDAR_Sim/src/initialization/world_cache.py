@@ -0,0 +1,227 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        initialization.world_cache
+# Purpose:     Columnar on disk cache of the pregenerated sites and leaks of each
+#              simulation, shared by all programs.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+import copy
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from initialization.input_store import read_leaks, write_leaks
+from weather.weather_cache import file_hash
+
+# Prefix of world folders in the generator folder, followed by the simulation index
+WORLD_DIR_PREFIX = "world"
+# Virtual world keys that are added while running, or that do not change generated
+# worlds (the weather file is large and would be hashed on every run)
+IGNORED_KEYS = (
+    "weather_file",
+    "weather_cache",
+    "subtypes",
+    "sites",
+    "leak_timeseries",
+    "initial_leaks",
+    "seed_timeseries",
+    "pregenerate_leaks",
+    "simulation",
+    "timesteps",
+)
+# Simulation settings used when generating worlds
+GENERATION_SETTINGS = ("start_date", "end_date", "preseed_random", "leak_generation_seed")
+# Integer site columns set by the generator
+INT_SITE_COLUMNS = ("cum_leaks", "initial_leaks")
+# Other site columns set by the generator, often shared by all sites of a subtype
+OBJECT_SITE_COLUMNS = (
+    "leak_rate_units",
+    "repair_delay",
+    "empirical_leak_rates",
+    "leak_rate_dist",
+    "empirical_vent_rates",
+)
+
+
+def _input_files(values, in_dir):
+    """Get the names of the input files referenced by parameter values."""
+    if isinstance(values, dict):
+        values = values.values()
+    elif isinstance(values, str):
+        return {values} if values and (in_dir / values).is_file() else set()
+    elif not isinstance(values, list):
+        return set()
+    files = set()
+    for value in values:
+        files |= _input_files(value, in_dir)
+    return files
+
+
+def world_key(virtual_world, sim_params, in_dir):
+    """Get the hash of everything a pregenerated world depends on: the virtual world
+    parameters, the generation settings and the content of the input files they
+    reference (infrastructure file, subtype file and the files it references).
+
+    Args:
+        virtual_world (dict): Virtual world parameters
+        sim_params (dict): Simulation settings
+        in_dir (Path): Input directory
+
+    Returns:
+        str: Hex digest
+    """
+    params = copy.deepcopy({k: v for k, v in virtual_world.items() if k not in IGNORED_KEYS})
+    params["emissions"].pop("empirical_leaks", None)
+    files = _input_files(params, in_dir)
+    if params.get("subtype_file"):
+        subtypes = pd.read_csv(in_dir / params["subtype_file"])
+        files |= _input_files(subtypes.select_dtypes(object).stack().tolist(), in_dir)
+    inputs = {
+        "virtual_world": params,
+        "settings": {setting: sim_params[setting] for setting in GENERATION_SETTINGS},
+        "files": {name: file_hash(in_dir / name) for name in sorted(files)},
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def world_dir(generator_dir, sim_idx, key):
+    """Get the folder of the world of a simulation.
+
+    Args:
+        generator_dir (Path): Generator folder
+        sim_idx (int): Simulation index
+        key (str): Hash of the world inputs (see world_key)
+
+    Returns:
+        Path: World folder
+    """
+    return Path(generator_dir) / "{}_{}_{}".format(WORLD_DIR_PREFIX, sim_idx, key[:16])
+
+
+def write_world(out_dir, sites, leak_timeseries, initial_leaks, seed_timeseries, sites_file):
+    """Write a pregenerated world. Sites are stored as their row in the infrastructure
+    file and the columns added by the generator, leaks as columns (see
+    initialization.input_store.write_leaks). Worlds of the same simulation with other
+    inputs are removed. The world is written to a temporary folder that is then renamed,
+    so processes never see a partially written world.
+
+    Args:
+        out_dir (Path): World folder (see world_dir)
+        sites (list): Site dictionaries, as returned by regenerate_sites
+        leak_timeseries (dict): Leak timeseries of each site, keyed by facility_ID
+        initial_leaks (dict): Initial leaks of each site, keyed by facility_ID
+        seed_timeseries (list): Daily seeds, or None
+        sites_file (Path): Infrastructure file
+    """
+    out_dir = Path(out_dir)
+    sim_prefix = out_dir.name[: out_dir.name.rindex("_") + 1]
+    for old_dir in out_dir.parent.glob("{}*".format(sim_prefix)):
+        if old_dir.is_dir():
+            shutil.rmtree(old_dir, ignore_errors=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".{}_".format(out_dir.name), dir=out_dir.parent))
+
+    sites_in = pd.read_csv(sites_file)
+    site_IDs = [site["facility_ID"] for site in sites]
+    np.save(tmp_dir / "site_rows.npy", pd.Index(sites_in["facility_ID"]).get_indexer(site_IDs))
+    for column in INT_SITE_COLUMNS:
+        np.save(tmp_dir / "site_{}.npy".format(column), [site[column] for site in sites])
+    site_objects = {}
+    for column in OBJECT_SITE_COLUMNS:
+        # Index of each site's value in the unique values, -1 if the site has none
+        values, value_ids, index = [], {}, []
+        for site in sites:
+            if column not in site:
+                index.append(-1)
+                continue
+            value_ids.setdefault(id(site[column]), len(values))
+            if value_ids[id(site[column])] == len(values):
+                values.append(site[column])
+            index.append(value_ids[id(site[column])])
+        np.save(tmp_dir / "site_{}_index.npy".format(column), index)
+        site_objects[column] = values
+    with open(tmp_dir / "site_objects.p", "wb") as f:
+        pickle.dump(site_objects, f)
+
+    write_leaks(tmp_dir, "leak_timeseries", leak_timeseries)
+    write_leaks(tmp_dir, "initial_leaks", initial_leaks)
+    if seed_timeseries is not None:
+        np.save(tmp_dir / "seed_timeseries.npy", seed_timeseries)
+    try:
+        os.rename(tmp_dir, out_dir)
+    except OSError:
+        # Another process wrote the same world first
+        shutil.rmtree(tmp_dir)
+
+
+class World:
+    """A pregenerated world in the world cache. Each part of the world is only read
+    from disk when it is requested, and leak columns are memory-mapped.
+    """
+
+    def __init__(self, world_dir, sites_file):
+        """
+        Args:
+            world_dir (Path): World folder
+            sites_file (Path): Infrastructure file
+        """
+        self.world_dir = Path(world_dir)
+        self.sites_file = sites_file
+
+    def sites(self):
+        """Sites of the world, as returned by regenerate_sites.
+
+        Returns:
+            list: Site dictionaries
+        """
+        world_dir = self.world_dir
+        sites_in = pd.read_csv(self.sites_file, index_col="facility_ID")
+        sites_in["facility_ID"] = sites_in.index
+        sites = sites_in.iloc[np.load(world_dir / "site_rows.npy")].to_dict("records")
+        for column in INT_SITE_COLUMNS:
+            values = np.load(world_dir / "site_{}.npy".format(column)).tolist()
+            for site, value in zip(sites, values):
+                site[column] = value
+        with open(world_dir / "site_objects.p", "rb") as f:
+            site_objects = pickle.load(f)
+        for column in OBJECT_SITE_COLUMNS:
+            index = np.load(world_dir / "site_{}_index.npy".format(column)).tolist()
+            for site, value_idx in zip(sites, index):
+                if value_idx >= 0:
+                    site[column] = site_objects[column][value_idx]
+        return sites
+
+    def leak_timeseries(self):
+        """Leak timeseries of each site, keyed by facility_ID."""
+        return read_leaks(self.world_dir, "leak_timeseries")
+
+    def initial_leaks(self):
+        """Initial leaks of each site, keyed by facility_ID."""
+        return read_leaks(self.world_dir, "initial_leaks")
+
+    def seed_timeseries(self):
+        """Daily seeds, or None if the world was generated without them."""
+        seed_file = self.world_dir / "seed_timeseries.npy"
+        if not seed_file.is_file():
+            return None
+        return np.load(seed_file).tolist()
@@ -23,10 +23,10 @@ import datetime
 import random
 import sys
 import warnings
-from math import floor
 import numpy as np
 import pandas as pd
 from weather.daylight_calculator import DaylightCalculatorAve
+from weather.site_weather import SiteWeather
 from config.output_flag_mapping import (
     OUTPUTS,
     SITE_VISITS,
@@ -34,21 +34,27 @@ from config.output_flag_mapping import (
     LEAKS,
     TIMESERIES,
     PLOTS,
+    FORMAT,
 )
-from geography.vector import grid_contains_point
+from geography.distance_cache import DistanceCache
+from geography.grid import assign_grid_cells
 from initialization.leaks import generate_initial_leaks, generate_leak
 from initialization.sites import generate_sites
 from initialization.update_methods import (
     est_n_crews,
     est_site_p_day,
     est_t_bw_sites,
-    est_min_time_bt_surveys,
 )
 from campaigns.methods import update_campaigns, setup_campaigns
 from methods.company import BaseCompany
 from numpy.random import binomial, choice
-from out_processing.plotter import make_plots
+from out_processing.output_store import CSV, output_store
+from out_processing.plotter import plot_jobs
 from utils.attribution import update_tag
+from utils.flag_registry import FlagRegistry
+from utils.leak_table import ACTIVE, LeakTable
+from utils.site_table import expand_site_parameters
+from utils.repair_queue import NATURAL_TAG, REPAIR
 
 warnings.filterwarnings("ignore", category=np.VisibleDeprecationWarning)
 
@@ -72,13 +78,17 @@ class LdarSim:
         self.virtual_world = virtual_world
         self.program_parameters = program_parameters
         self.timeseries = timeseries
-        self.active_leaks = []
+        self.leak_table = LeakTable()
+        self.n_new_leaks = 0
+        self.leak_schedule = None
+        self.cum_total_cost = 0
         self.input_dir = input_dir
         self.output_dir = output_dir
 
         #  --- state variables ---
         self.state["campaigns"] = {}
         state["candidate_flags"] = {}
+        state["leak_table"] = self.leak_table
         # Read in data files
         if virtual_world["emissions"]["leak_file"] is not None:
             state["empirical_leaks"] = np.array(
@@ -94,7 +104,11 @@ class LdarSim:
             # Read in the sites as a list of dictionaries
         if len(state["sites"]) < 1:
             state["sites"], _, _ = generate_sites(
-                virtual_world, input_dir, virtual_world["pregenerate_leaks"]
+                virtual_world,
+                input_dir,
+                virtual_world["pregenerate_leaks"],
+                simulation_settings["start_date"],
+                simulation_settings["end_date"],
             )
         state["max_leak_rate"] = virtual_world["emissions"]["max_leak_rate"]
         state["t"].set_UTC_offset(state["sites"])
@@ -109,81 +123,60 @@ class LdarSim:
             # Shuffle all the entries to randomize order for identical 't_Since_last_LDAR' values
             random.shuffle(state["sites"])
 
-        n_subtype_rs = {}
+        # Natural repair delay of each site, used to schedule natural repair tags
+        if virtual_world["subtype_file"] is not None:
+            NRd = [state["subtypes"]["NRd"][site["subtype_code"]] for site in state["sites"]]
+        else:
+            NRd = [virtual_world.get("NRd")] * len(state["sites"])
+        self.site_NRd = np.array(NRd, dtype=float)
+
+        # Weather grid cell of each site
+        lat_indices, lon_indices, exit_msg = assign_grid_cells(
+            state["sites"], state["weather"].latitude, state["weather"].longitude
+        )
+        if exit_msg is not None:
+            sys.exit(exit_msg)
+
+        # Survey parameters of each site, for each method
+        state["site_tables"] = {}
+        # Survey counters of each site, by method, held by the methods' companies
+        state["site_counters"] = {}
         n_screening_rs_sets = {}
-        sites_per_subtype = {}
-        # Additional variable(s) for each site
-        for site in state["sites"]:
-            if site["subtype_code"] not in n_subtype_rs:
-                n_subtype_rs.update({site["subtype_code"]: {"natural": -1}})
-                sites_per_subtype.update({site["subtype_code"]: 0})
-                add_subtype = True
-            else:
-                add_subtype = False
-            sites_per_subtype[site["subtype_code"]] += 1
-            n_rs = n_subtype_rs[site["subtype_code"]]
-            for m_label, m_obj in program_parameters["methods"].items():
-                # Site parameter overwrite of RS and Time (used for sensitivity analysis)
-                m_RS = "{}_RS".format(m_label)
-                if m_obj["RS"] is not None:
-                    site[m_RS] = m_obj["RS"]
-
-                m_min_time_bt_surveys = "{}_min_time_bt_surveys".format(m_label)
-                # when provided by user in method
-                if m_obj["scheduling"]["min_time_bt_surveys"] is not None:
-                    site[m_min_time_bt_surveys] = m_obj["scheduling"]["min_time_bt_surveys"]
-                # when not provided
-                if (
-                    not m_obj["is_follow_up"]
-                    and m_obj["deployment_type"] == "mobile"
-                    and site[m_RS] > 0
-                ):
-                    if not (m_min_time_bt_surveys in site):
-                        site[m_min_time_bt_surveys] = est_min_time_bt_surveys(
-                            m_RS, len(m_obj["scheduling"]["deployment_months"]), site
-                        )
-
-                if m_RS in site and m_obj["measurement_scale"] != "component":
-                    if m_label not in n_screening_rs_sets:
-                        n_screening_rs_sets.update({m_label: site[m_RS]})
-                    elif n_screening_rs_sets[m_label] != site[m_RS]:
-                        n_screening_rs_sets.update({m_label: "varies"})
-
-                m_time = "{}_time".format(m_label)
-                if m_obj["time"] is not None:
-                    site[m_time] = m_obj["time"]
-                if add_subtype:
-                    if m_RS in site:
-                        # if scheduled capture the RS value
-                        n_subtype_rs[site["subtype_code"]].update({m_label: site[m_RS]})
-                    else:
-                        # If set rs value to -1 (used for tracking later)
-                        n_subtype_rs[site["subtype_code"]].update({m_label: -1})
-                        # If the value changes set to None
-                elif m_RS in site and (n_rs[m_label] != site[m_RS] or n_rs[m_label] is None):
-                    n_subtype_rs[site["subtype_code"]].update({m_label: None})
-                # Calculate the site minimum interval
-                if m_RS in site and site[m_RS] != 0:
-                    n_months = len(
-                        program_parameters["methods"][m_label]["scheduling"]["deployment_months"]
-                    )
-                    n_days = 30.4167 * n_months
-                    site["{}_min_int".format(m_label)] = floor(n_days / site[m_RS])
-                # Automatically assign 1 crew to followup if left unspecified
-                elif m_obj["n_crews"] is None:
-                    m_obj["n_crews"] = 1
+        for m_label, m_obj in program_parameters["methods"].items():
+            site_table = expand_site_parameters(state["sites"], m_obj)
+            state["site_tables"][m_label] = site_table
+            has_RS = ~np.isnan(site_table.RS)
+            if has_RS.any() and m_obj["measurement_scale"] != "component":
+                site_RS = site_table.RS[has_RS]
+                if (site_RS == site_RS[0]).all():
+                    first_site = state["sites"][np.argmax(has_RS)]
+                    n_screening_rs_sets[m_label] = first_site["{}_RS".format(m_label)]
+                else:
+                    n_screening_rs_sets[m_label] = "varies"
+            # Automatically assign 1 crew to followup if left unspecified
+            if m_obj["n_crews"] is None and not (has_RS & (site_table.RS != 0)).all():
+                m_obj["n_crews"] = 1
 
+        # Additional variable(s) for each site
+        for site, lat_index, lon_index in zip(
+            state["sites"], lat_indices.tolist(), lon_indices.tolist()
+        ):
             if virtual_world["pregenerate_leaks"]:
                 initial_leaks = virtual_world["initial_leaks"][site["facility_ID"]]
                 n_leaks = len(virtual_world["initial_leaks"][site["facility_ID"]])
             else:
-                initial_leaks = generate_initial_leaks(virtual_world, site)
+                initial_leaks = generate_initial_leaks(
+                    virtual_world, site, simulation_settings["start_date"]
+                )
                 n_leaks = len(initial_leaks)
+            site_index = self.leak_table.add_site()
+            for leak in initial_leaks:
+                self.add_leak(site_index, leak, state["t"].current_timestep - 1)
             site.update(
                 {
                     "total_emissions_kg": 0,
-                    "active_leaks": initial_leaks,
-                    "repaired_leaks": [],
+                    "active_leaks": self.leak_table.active_leaks(site_index),
+                    "repaired_leaks": self.leak_table.repaired_leaks(site_index),
                     "last_component_survey": None,
                     "historic_t_since_LDAR": None,
                     "tags": [],
@@ -192,24 +185,16 @@ class LdarSim:
                     "flagged_by": None,
                     "date_flagged": None,
                     "crew_ID": None,
-                    "lat_index": min(
-                        range(len(state["weather"].latitude)),
-                        key=lambda i: abs(state["weather"].latitude[i] - float(site["lat"])),
-                    ),
-                    "lon_index": min(
-                        range(len(state["weather"].longitude)),
-                        key=lambda i: abs(state["weather"].longitude[i] - float(site["lon"]) % 360),
-                    ),
+                    "lat_index": lat_index,
+                    "lon_index": lon_index,
                 }
             )
-
-            in_grid, exit_msg = grid_contains_point(
-                [site["lat"], site["lon"]],
-                [state["weather"].latitude, state["weather"].longitude],
-            )
-            if not in_grid:
-                sys.exit(exit_msg)
+        # Weather of the grid cells holding sites, read by wind dependent sensors
+        state["site_weather"] = SiteWeather(state["weather"], state["sites"], state["t"])
         n_sites = len(state["sites"])
+        self.site_repair_delay = np.array(
+            [site.get("repair_delay", 0) for site in state["sites"]], dtype=float
+        )
 
         # Setup Campaigns
         setup_campaigns(
@@ -219,6 +204,9 @@ class LdarSim:
             n_sites,
             n_screening_rs_sets,
         )
+        # Sites flagged for follow-up
+        state["flag_registry"] = FlagRegistry(state["sites"], program_parameters["methods"])
+        state["flags"] = state["flag_registry"].snapshot()
 
         #  --- timeseries variables ---
         timeseries["total_daily_cost"] = np.zeros(virtual_world["timesteps"])
@@ -236,6 +224,12 @@ class LdarSim:
 
         # Initialize method(s) to be used; append to state
         calculate_daylight = False
+        if any(
+            m_obj["scheduling"]["route_planning"]
+            for m_obj in program_parameters["methods"].values()
+        ):
+            # Distances shared by the crews of all route planning methods
+            state["distance_cache"] = DistanceCache(state["sites"])
         for m_label, m_obj in program_parameters["methods"].items():
             # Initialize method site_visit tracking
             state["site_visits"][m_label] = []
@@ -308,35 +302,28 @@ class LdarSim:
                 self.state["sites"],
                 self.state["t"].current_timestep,
                 self.state["t"].current_date,
+                self.state["flag_registry"],
             )
-        self.active_leaks = []
-        for site in self.state["sites"]:
-            for leak in site["active_leaks"]:
-                leak["days_active"] += 1
-                self.active_leaks.append(leak)
-                # Tag by natural if leak is due for NR
-                if self.virtual_world["subtype_file"] is not None:
-                    if leak["days_active"] == self.state["subtypes"]["NRd"][site["subtype_code"]]:
-                        update_tag(
-                            leak,
-                            None,
-                            site,
-                            self.timeseries,
-                            self.state["t"],
-                            "natural",
-                        )
-                else:
-                    if leak["days_active"] == self.virtual_world["NRd"]:
-                        update_tag(
-                            leak,
-                            None,
-                            site,
-                            self.timeseries,
-                            self.state["t"],
-                            "natural",
-                        )
-
-        self.timeseries["active_leaks"].append(len(self.active_leaks))
+        leak_table = self.leak_table
+        leak_table["days_active"][leak_table.active_rows()] += 1
+        # Tag by natural if leak is due for NR
+        nr_rows = leak_table.repair_queue.pop(self.state["t"].current_timestep, NATURAL_TAG)
+        for row in leak_table.site_order(nr_rows).tolist():
+            site_index = leak_table["site_index"][row]
+            if (
+                leak_table["status"][row] == ACTIVE
+                and leak_table["days_active"][row] == self.site_NRd[site_index]
+            ):
+                update_tag(
+                    leak_table.view(row),
+                    None,
+                    self.state["sites"][site_index],
+                    self.timeseries,
+                    self.state["t"],
+                    "natural",
+                )
+
+        self.timeseries["active_leaks"].append(leak_table.n_active)
         self.timeseries["datetime"].append(self.state["t"].current_date)
         #
 
@@ -344,25 +331,63 @@ class LdarSim:
         """
         add new leaks to the leak pool
         """
-        # First, determine whether each site gets a new leak or not
+        # First, determine which sites get a new leak
         virtual_world = self.virtual_world
-        for site in self.state["sites"]:
-            new_leak = None
-            sidx = site["facility_ID"]
-            if virtual_world["pregenerate_leaks"]:
-                new_leak = virtual_world["leak_timeseries"][sidx][self.state["t"].current_timestep]
-            elif binomial(1, self.virtual_world["emissions"]["LPR"]):
+        sites = self.state["sites"]
+        cur_ts = self.state["t"].current_timestep
+        self.n_new_leaks = 0
+        if virtual_world["pregenerate_leaks"]:
+            if self.leak_schedule is None:
+                self.leak_schedule = self.get_leak_schedule()
+            for site_index in self.leak_schedule.get(cur_ts, []):
+                sidx = sites[site_index]["facility_ID"]
+                self.add_new_leak(site_index, virtual_world["leak_timeseries"][sidx][cur_ts])
+        else:
+            new_leaks = binomial(1, virtual_world["emissions"]["LPR"], size=len(sites))
+            for site_index in np.flatnonzero(new_leaks):
+                site = sites[site_index]
                 new_leak = generate_leak(
                     virtual_world, site, self.state["t"].current_date, site["cum_leaks"]
                 )
-            if new_leak is not None:
-                site.update({"n_new_leaks": 1})
-                site["cum_leaks"] += 1
-                site["active_leaks"].append(new_leak)
-            else:
-                site.update({"n_new_leaks": 0})
+                self.add_new_leak(site_index, new_leak)
         return
 
+    def get_leak_schedule(self):
+        """
+        Map each timestep to the indexes of the sites that get a pregenerated leak on it,
+        so only those sites are visited when adding leaks.
+        """
+        leak_schedule = {}
+        for site_index, site in enumerate(self.state["sites"]):
+            site_timeseries = self.virtual_world["leak_timeseries"][site["facility_ID"]]
+            days = getattr(site_timeseries, "days", None)
+            if days is None:
+                # Leak timeseries stored as lists, with None on days without a new leak
+                days = [t for t, leak in enumerate(site_timeseries) if leak is not None]
+            for t in days:
+                leak_schedule.setdefault(int(t), []).append(site_index)
+        return leak_schedule
+
+    def add_new_leak(self, site_index, leak):
+        self.state["sites"][site_index]["cum_leaks"] += 1
+        self.add_leak(site_index, leak, self.state["t"].current_timestep)
+        self.n_new_leaks += 1
+
+    def add_leak(self, site_index, leak, ts_added):
+        """
+        Add a leak to the leak table, and schedule its natural repair tag for the
+        day its days_active reaches NRd.
+        """
+        leak_table = self.leak_table
+        row = leak_table.add(site_index, leak)
+        days_to_NR = self.site_NRd[site_index] - leak_table["days_active"][row]
+        if days_to_NR > 0 and days_to_NR == int(days_to_NR):
+            leak_table.repair_queue.push(ts_added + int(days_to_NR), row, NATURAL_TAG)
+        # Leaks can be provided already tagged
+        if leak_table["tagged"][row] and leak_table["status"][row] == ACTIVE:
+            leak_table.repair_queue.push(self.state["t"].current_timestep, row, REPAIR)
+        return row
+
     def deploy_crews(self):
         """
         Loop over all your methods in the simulation and ask them to find some leaks.
@@ -379,74 +404,83 @@ class LdarSim:
         """
         cur_date = self.state["t"].current_date
         cur_ts = self.state["t"].current_timestep
-        virtual_world = self.virtual_world
         program_parameters = self.program_parameters
         timeseries = self.timeseries
         state = self.state
-        for site in state["sites"]:
-            has_repairs = False
-            for lidx, lk in enumerate(site["active_leaks"]):
-                repair = False
-                if lk["tagged"]:
-                    # if company is natural then repair immediately
-                    if lk["tagged_by_company"] == "natural":
-                        repair = True
-                    elif (cur_date - lk["date_tagged"]).days >= (
-                        site["repair_delay"]
-                        + program_parameters["methods"][lk["tagged_by_company"]]["reporting_delay"]
-                    ):
-                        repair = True
-
-                # Repair Leaks
-                if repair:
-                    has_repairs = True
-                    lk["status"] = "repaired"
-                    lk["date_repaired"] = state["t"].current_date
-                    lk["repair_delay"] = (lk["date_repaired"] - lk["date_tagged"]).days
-
-                    if lk["day_ts_began"] < 0:
-                        duration = cur_ts
-                    else:
-                        duration = cur_ts - lk["day_ts_began"]
-
-                    lk["volume"] = duration * lk["rate"] * 86.4
-                    repair_cost = int(
-                        choice(program_parameters["economics"]["repair_costs"]["vals"])
-                    )
+        leak_table = self.leak_table
 
-                    if lk["tagged_by_company"] != "natural":
-                        timeseries["repair_cost"][state["t"].current_timestep] += repair_cost
-                        timeseries["verification_cost"][
-                            state["t"].current_timestep
-                        ] += program_parameters["economics"]["verification_cost"]
-                        timeseries["total_daily_cost"][state["t"].current_timestep] += (
-                            repair_cost + program_parameters["economics"]["verification_cost"]
-                        )
-
-                        est_duration = cur_ts - lk["estimated_date_began"]
-                        # check if estimate is needed to be kept track of
-                        if "estimate_A" in site.keys():
-                            if site["estimate_A"]:
-                                # Estimated volume in kg. g/s => kg/day is 86.4
-                                lk["estimated_volume"] = est_duration * lk["measured_rate"] * 86.4
-                            elif site["estimate_B"]:
-                                # Estimated volume in kg. g/s => kg/day is 86.4
-                                lk["estimated_volume_b"] = est_duration * lk["measured_rate"] * 86.4
-                        else:
-                            lk["estimated_volume_b"] = 0
-                            lk["estimated_volume_a"] = 0
-                    else:
-                        timeseries["nat_repair_cost"][state["t"].current_timestep] += repair_cost
-                        timeseries["total_daily_cost"][state["t"].current_timestep] += repair_cost
-
-            # Update site leaks
-            if has_repairs:
-                site["repaired_leaks"] += [
-                    lk for lk in site["active_leaks"] if lk["status"] == "repaired"
-                ]
-                site["active_leaks"] = [
-                    lk for lk in site["active_leaks"] if lk["status"] != "repaired"
-                ]
+        # Leaks are queued when tagged, for the first day their repair could be due
+        queued_rows = np.unique(np.array(leak_table.repair_queue.pop(cur_ts, REPAIR), dtype=int))
+        tagged_rows = queued_rows[
+            (leak_table["status"][queued_rows] == ACTIVE) & leak_table["tagged"][queued_rows]
+        ]
+        if len(tagged_rows) == 0:
+            return
+        companies = leak_table.labels("tagged_by_company")
+        reporting_delay = np.array(
+            [
+                (
+                    0
+                    if company == "natural"
+                    else program_parameters["methods"][company]["reporting_delay"]
+                )
+                for company in companies
+            ]
+        )
+        company_codes = leak_table["tagged_by_company"][tagged_rows]
+        # if company is natural then repair immediately
+        natural = company_codes == leak_table.code("tagged_by_company", "natural")
+        days_tagged = leak_table.days_since_tagged(tagged_rows, cur_date)
+        delay = (
+            self.site_repair_delay[leak_table["site_index"][tagged_rows]]
+            + reporting_delay[company_codes]
+        )
+        repair = natural | (days_tagged >= delay)
+        # Check again once enough days have passed since tagging
+        for row, days_left in zip(
+            tagged_rows[~repair].tolist(), np.ceil(delay - days_tagged)[~repair].tolist()
+        ):
+            leak_table.repair_queue.push(cur_ts + max(int(days_left), 1), row, REPAIR)
+        # Repair Leaks, site by site in the order they were found
+        repair_rows = leak_table.site_order(tagged_rows[repair])
+        if len(repair_rows) == 0:
+            return
+        natural = leak_table["tagged_by_company"][repair_rows] == leak_table.code(
+            "tagged_by_company", "natural"
+        )
+        leak_table.repair(repair_rows, cur_date, cur_ts)
+        repair_costs = choice(
+            program_parameters["economics"]["repair_costs"]["vals"], size=len(repair_rows)
+        ).astype(int)
+
+        n_ldar_repairs = np.count_nonzero(~natural)
+        ldar_repair_cost = repair_costs[~natural].sum()
+        nat_repair_cost = repair_costs[natural].sum()
+        if n_ldar_repairs > 0:
+            verification_cost = (
+                program_parameters["economics"]["verification_cost"] * n_ldar_repairs
+            )
+            timeseries["repair_cost"][cur_ts] += ldar_repair_cost
+            timeseries["verification_cost"][cur_ts] += verification_cost
+            timeseries["total_daily_cost"][cur_ts] += ldar_repair_cost + verification_cost
+            for row in repair_rows[~natural].tolist():
+                lk = leak_table.view(row)
+                site = state["sites"][leak_table["site_index"][row]]
+                est_duration = cur_ts - lk["estimated_date_began"]
+                # check if estimate is needed to be kept track of
+                if "estimate_A" in site.keys():
+                    if site["estimate_A"]:
+                        # Estimated volume in kg. g/s => kg/day is 86.4
+                        lk["estimated_volume"] = est_duration * lk["measured_rate"] * 86.4
+                    elif site["estimate_B"]:
+                        # Estimated volume in kg. g/s => kg/day is 86.4
+                        lk["estimated_volume_b"] = est_duration * lk["measured_rate"] * 86.4
+                else:
+                    lk["estimated_volume_b"] = 0
+                    lk["estimated_volume_a"] = 0
+        if n_ldar_repairs < len(repair_rows):
+            timeseries["nat_repair_cost"][cur_ts] += nat_repair_cost
+            timeseries["total_daily_cost"][cur_ts] += nat_repair_cost
 
         return
 
@@ -456,28 +490,17 @@ class LdarSim:
         """
         timeseries = self.timeseries
         state = self.state
-        new_leaks = 0
-        n_tags = 0
-        cum_repaired_leaks = 0
-        daily_emissions_kg = 0
-        # Update timeseries
-        for site in state["sites"]:
-            new_leaks += site["n_new_leaks"]
-            cum_repaired_leaks += len(site["repaired_leaks"])
-            n_tags += site["n_new_leaks"]
-            # convert g/s to kg/day
-            daily_emissions_kg += sum([lk["rate"] for lk in site["active_leaks"]]) * 86.4
-        cur_ts = [state["t"].current_timestep]
-        timeseries["new_leaks"][cur_ts] = new_leaks
-        timeseries["cum_repaired_leaks"][cur_ts] = cum_repaired_leaks
-        timeseries["daily_emissions_kg"][cur_ts] = daily_emissions_kg
+        cur_ts = state["t"].current_timestep
+        # Costs are only added to the current timestep, so earlier days are final
+        self.cum_total_cost += timeseries["total_daily_cost"][cur_ts]
+        timeseries["new_leaks"][cur_ts] = self.n_new_leaks
+        timeseries["cum_repaired_leaks"][cur_ts] = self.leak_table.n_repaired
+        # convert g/s to kg/day
+        timeseries["daily_emissions_kg"][cur_ts] = self.leak_table.active_rate * 86.4
         timeseries["rolling_cost_estimate"][cur_ts] = (
-            sum(timeseries["total_daily_cost"])
-            / (len(timeseries["rolling_cost_estimate"]) + 1)
-            * 365
-            / 200
+            self.cum_total_cost / (len(timeseries["rolling_cost_estimate"]) + 1) * 365 / 200
         )
-        timeseries["n_tags"][state["t"].current_timestep] = n_tags
+        timeseries["n_tags"][cur_ts] = self.n_new_leaks
         return
 
     def finalize(self):
@@ -487,24 +510,35 @@ class LdarSim:
         virtual_world = self.virtual_world
         simulation_settings = self.simulation_settings
         program_parameters = self.program_parameters
-        leaks = []
         cur_ts = self.state["t"].current_timestep
+        leak_table = self.leak_table
+        n_sites = len(self.state["sites"])
 
         # Attribute individual leak emissions to site totals
-        for site in self.state["sites"]:
-            for lk in site["active_leaks"]:
-                if lk["day_ts_began"] < 0:
-                    duration = cur_ts
-                else:
-                    duration = cur_ts - lk["day_ts_began"]
-                lk["volume"] = duration * lk["rate"] * 86.4
+        active_rows = leak_table.active_rows()
+        active_volumes = leak_table.set_volumes(active_rows, cur_ts)
+        repaired_rows = np.array(
+            [row for rows in leak_table.site_repaired for row in rows], dtype=np.int64
+        )
+        repaired_volumes = np.array(leak_table["volume"][repaired_rows], dtype=float)
+        site_index = leak_table["site_index"]
+        active_emis = np.bincount(
+            site_index[active_rows], weights=active_volumes, minlength=n_sites
+        ).tolist()
+        repaired_emis = np.bincount(
+            site_index[repaired_rows], weights=repaired_volumes, minlength=n_sites
+        ).tolist()
+        for company in self.state["methods"]:
+            company.counters.write_sites(self.state["sites"])
+        leak_rows = []
+        for idx, site in enumerate(self.state["sites"]):
             site["active_leak_cnt"] = len(site["active_leaks"])
             site["repaired_leak_cnt"] = len(site["repaired_leaks"])
-            site["active_leak_emis"] = sum([lk["volume"] for lk in site["active_leaks"]])
-            site["repaired_leak_emis"] = sum([lk["volume"] for lk in site["repaired_leaks"]])
+            site["active_leak_emis"] = active_emis[idx]
+            site["repaired_leak_emis"] = repaired_emis[idx]
             site["total_emissions_kg"] = site["active_leak_emis"] + site["repaired_leak_emis"]
-            leaks += site["active_leaks"] + site["repaired_leaks"]
-            del site["n_new_leaks"]
+            leak_rows += leak_table.site_active[idx] + leak_table.site_repaired[idx]
+        leaks = leak_table.to_records(leak_rows)
 
         leak_df = pd.DataFrame(leaks)
         time_df = pd.DataFrame(self.timeseries)
@@ -542,40 +576,25 @@ class LdarSim:
 
         leak_df = pd.concat([leaks_active, leaks_repaired])
 
-        # Write csv files
+        # Write output files
+        outputs = output_store(
+            self.output_dir,
+            program_parameters["program_name"],
+            simulation_settings[OUTPUTS].get(FORMAT, CSV),
+        )
+        simulation = virtual_world["simulation"]
         if simulation_settings[OUTPUTS][LEAKS]:
-            leak_df.to_csv(
-                self.output_dir
-                / "leaks_output_{}_{}.csv".format(
-                    virtual_world["simulation"], program_parameters["program_name"]
-                ),
-                index=False,
-            )
+            outputs.write(LEAKS, leak_df, simulation)
 
         if simulation_settings[OUTPUTS][TIMESERIES]:
-            time_df.to_csv(
-                self.output_dir
-                / "timeseries_output_{}_{}.csv".format(
-                    virtual_world["simulation"], program_parameters["program_name"]
-                ),
-                index=False,
-            )
+            outputs.write(TIMESERIES, time_df, simulation)
 
         if simulation_settings[OUTPUTS][SITES]:
-            site_df.to_csv(
-                self.output_dir
-                / "sites_output_{}_{}.csv".format(
-                    virtual_world["simulation"], program_parameters["program_name"]
-                ),
-                index=False,
-            )
+            outputs.write(SITES, site_df, simulation)
 
         if simulation_settings[OUTPUTS][SITE_VISITS]:
             for meth, meth_vis_df in site_visits.items():
-                meth_vis_df.to_csv(
-                    self.output_dir / f"site_visits_{meth}_{virtual_world['simulation']}.csv",
-                    index=False,
-                )
+                outputs.write(SITE_VISITS, meth_vis_df, simulation, method=meth)
 
         # Write metadata
         f_name = self.output_dir / "metadata_{}.txt".format(virtual_world["simulation"])
@@ -583,9 +602,12 @@ class LdarSim:
         metadata.write(str(virtual_world) + "\n" + str(datetime.datetime.now()))
         metadata.close()
 
-        # Make plots
+        # Collect plots, rendered by the caller (see ldar_sim_run)
+        sim_plot_jobs = []
         if self.simulation_settings[OUTPUTS][PLOTS]:
-            make_plots(leak_df, time_df, site_df, virtual_world["simulation"], self.output_dir)
+            sim_plot_jobs = plot_jobs(
+                leak_df, time_df, site_df, virtual_world["simulation"], self.output_dir
+            )
 
         # Extract necessary information from the parameters
         wanted_c_economics = [
@@ -618,6 +640,7 @@ class LdarSim:
             "sites": site_df,
             "program_name": program_parameters["program_name"],
             "p_c_economics": carbon_economics,
+            "plot_jobs": sim_plot_jobs,
         }
 
         return sim_summary
@@ -24,7 +24,6 @@ import json
 import multiprocessing as mp
 import os
 import sys
-import shutil
 from pathlib import Path
 
 from config.output_flag_mapping import (
@@ -33,16 +32,20 @@ from config.output_flag_mapping import (
     SITES,
     LEAKS,
     BATCH_REPORTING,
+    FORMAT,
 )
-from economics.cost_mitigation import cost_mitigation
 from initialization.args import files_from_args, get_abs_path
 from initialization.input_manager import InputManager
+from initialization.input_store import SimInputStore
 from initialization.sims import create_sims
 from initialization.sites import init_generator_files
-from ldar_sim_run import ldar_sim_run
+from ldar_sim_run import ldar_sim_run_indexed
 from out_processing.batch_reporting import BatchReporting
-from out_processing.prog_table import generate as gen_prog_table
+from out_processing.output_store import output_store_class
+from out_processing.plot_queue import PlotQueue, clear_outputs, remove_stale_figures
+from out_processing.sim_aggregator import SimAggregator
 from utils.generic_functions import check_ERA5_file
+from weather.weather_cache import prepare_weather_cache
 
 opening_msg = """
 You are running LDAR-Sim version 3.0.0 an open sourced software (MIT) license.
@@ -85,13 +88,16 @@ if __name__ == "__main__":
 
     # --- Run Checks ----
     check_ERA5_file(in_dir, virtual_world)
+    output_store_class(sim_params[OUTPUTS][FORMAT])
     has_ref = ref_program in programs
     has_base = base_program in programs
 
     # --- Setup Output folder
+    # Figures of a previous run are kept, so those with unchanged inputs are not
+    # rendered again (see out_processing.plot_queue)
     if os.path.exists(out_dir):
-        shutil.rmtree(out_dir)
-    os.makedirs(out_dir)
+        clear_outputs(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
     input_manager.write_parameters(out_dir / "parameters.yaml")
 
     # If leak generator is used and there are generated files, user is prompted
@@ -103,44 +109,86 @@ if __name__ == "__main__":
         )
     else:
         generator_dir = None
+
+    # Convert the weather file once, simulations share the cached arrays
+    prepare_weather_cache(in_dir, virtual_world)
+
     # --- Create simulations ---
-    simulations = create_sims(sim_params, programs, virtual_world, generator_dir, in_dir, out_dir)
+    # Pregenerated inputs are stored once and loaded by reference in each simulation
+    sim_input_store = SimInputStore()
+    simulations = create_sims(
+        sim_params,
+        programs,
+        virtual_world,
+        generator_dir,
+        in_dir,
+        out_dir,
+        input_store=sim_input_store,
+        defer_plots=True,
+    )
 
     # --- Run simulations (in parallel) --
-    with mp.Pool(processes=sim_params["n_processes"]) as p:
-        sim_outputs = p.starmap(ldar_sim_run, simulations)
-
-    # ---- Generate Outputs ----
-
-    # Do batch reporting
-    print("....Generating output data")
-    if sim_params[OUTPUTS][BATCH_REPORTING] and (
-        sim_params[OUTPUTS][SITES]
-        and sim_params[OUTPUTS][LEAKS]
-        and sim_params[OUTPUTS][TIMESERIES]
-    ):
-        # Create a data object...
-        if has_ref & has_base:
-            print("....Generating cost mitigation outputs")
-            cost_mitigation = cost_mitigation(sim_outputs, ref_program, base_program, out_dir)
-            reporting_data = BatchReporting(
-                out_dir, sim_params["start_date"], ref_program, base_program
-            )
-            if sim_params["n_simulations"] > 1:
-                reporting_data.program_report()
-                if len(programs) > 1:
-                    print("....Generating program comparison plots")
-                    reporting_data.batch_report()
-                    reporting_data.batch_plots()
-        else:
-            print("No reference or base program input...skipping batch reporting and economics.")
-
-    # Generate output table
-    print("....Exporting summary statistic tables")
-    out_prog_table = gen_prog_table(sim_outputs, base_program, programs)
-
-    with open(out_dir / "prog_table.json", "w") as fp:
-        json.dump(out_prog_table, fp)
+    # Outputs are reduced as soon as each simulation finishes, so only the running
+    # aggregates are kept in memory. Dataframes are written to out_dir by the simulations.
+    # Plots are queued and rendered in their own processes once simulations are done, so
+    # simulations do not wait on them and no more than n_processes workers run at a time.
+    sim_aggregator = SimAggregator(programs, base_program)
+    with PlotQueue(processes=sim_params["n_processes"], held=True) as plot_queue:
+        with mp.Pool(processes=sim_params["n_processes"]) as p:
+            for sim_idx, sim_output in p.imap_unordered(
+                ldar_sim_run_indexed, enumerate(simulations)
+            ):
+                plot_queue.submit_all(sim_output.pop("plot_jobs"))
+                sim_aggregator.add(sim_idx, sim_output)
+                del sim_output
+        sim_input_store.cleanup()
+        plot_queue.release()
+
+        # ---- Generate Outputs ----
+
+        # Do batch reporting
+        print("....Generating output data")
+        if sim_params[OUTPUTS][BATCH_REPORTING] and (
+            sim_params[OUTPUTS][SITES]
+            and sim_params[OUTPUTS][LEAKS]
+            and sim_params[OUTPUTS][TIMESERIES]
+        ):
+            # Create a data object...
+            if has_ref & has_base:
+                print("....Generating cost mitigation outputs")
+                sim_aggregator.cost_mitigation(
+                    ref_program, base_program, out_dir, plot_queue=plot_queue
+                )
+                reporting_data = BatchReporting(
+                    out_dir,
+                    sim_params["start_date"],
+                    ref_program,
+                    base_program,
+                    output_format=sim_params[OUTPUTS][FORMAT],
+                )
+                if sim_params["n_simulations"] > 1:
+                    reporting_data.program_report()
+                    if len(programs) > 1:
+                        print("....Generating program comparison plots")
+                        reporting_data.batch_report()
+                        reporting_data.batch_plots(plot_queue=plot_queue)
+            else:
+                print(
+                    "No reference or base program input...skipping batch reporting and economics."
+                )
+
+        # Generate output table
+        print("....Exporting summary statistic tables")
+        out_prog_table = sim_aggregator.prog_table()
+
+        with open(out_dir / "prog_table.json", "w") as fp:
+            json.dump(out_prog_table, fp)
+
+    # Plots were rendered when leaving the plot queue. Remove figures of a previous run
+    # not rendered by this one
+    remove_stale_figures(out_dir, plot_queue.paths)
+    if plot_queue.n_skipped > 0:
+        print("....Kept {} unchanged figures".format(plot_queue.n_skipped))
 
     # Write program metadata
     metadata = open(out_dir / "_metadata.txt", "w")
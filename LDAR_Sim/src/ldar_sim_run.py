@@ -25,10 +25,13 @@ import random as rand
 import sys
 from datetime import datetime, timedelta
 
-from initialization.sites import get_subtype_dist
+from initialization.input_store import load_sim_inputs
+from initialization.sites import get_subtype_file
 from numpy import random as np_rand
+from out_processing.plot_queue import render_job
 from stdout_redirect import stdout_redirect
 from time_counter import TimeCounter
+from weather.deployment_days_cache import cache_stats, reset_cache_stats
 from weather.weather_lookup import WeatherLookup as WL
 from weather.weather_lookup_hourly import WeatherLookup as WL_h
 
@@ -41,7 +44,16 @@ def ldar_sim_run(simulation):
     simulation = a dictionary of simulation parameters necessary to run LDAR-Sim
     """
     # i = simulation['i']
-    simulation = copy.deepcopy(simulation)
+    # Only copy what a run mutates. Pregenerated leaks and seeds are only read, so they
+    # are shared with the caller.
+    simulation = copy.copy(simulation)
+    for key in ["virtual_world", "program", "simulation_settings"]:
+        simulation[key] = copy.deepcopy(simulation[key])
+    if "sim_inputs" in simulation:
+        # Pregenerated inputs are loaded from the input store rather than copied
+        simulation.update(load_sim_inputs(simulation["sim_inputs"]))
+    else:
+        simulation["sites"] = copy.deepcopy(simulation["sites"])
     virtual_world = simulation["virtual_world"]
     program_parameters = simulation["program"]
     input_directory = simulation["input_directory"]
@@ -70,7 +82,7 @@ def ldar_sim_run(simulation):
 
     # --------- Leak distributions -------------
     if len(virtual_world["leak_timeseries"]) < 1:
-        get_subtype_dist(virtual_world, input_directory)
+        get_subtype_file(virtual_world, input_directory)
 
     # --------------------------------------
     # --- Initialize dynamic model state ---
@@ -105,6 +117,7 @@ def ldar_sim_run(simulation):
     # -----------------------------Run simulations----------------------------------
 
     # Initialize objects
+    reset_cache_stats()
     if "weather_is_hourly" in virtual_world and virtual_world["weather_is_hourly"]:
         state["weather"] = WL_h(state, virtual_world, input_directory)
     else:
@@ -120,6 +133,12 @@ def ldar_sim_run(simulation):
         input_directory,
         output_directory,
     )
+    if cache_stats["hits"] or cache_stats["misses"]:
+        print(
+            "Deployment days: {} cached, {} calculated ({:.1f}s of calculation saved)".format(
+                cache_stats["hits"], cache_stats["misses"], cache_stats["seconds_saved"]
+            )
+        )
     start_date = datetime(*simulation_settings["start_date"])
     # Loop through timeseries
     for ts in range(state["t"].timesteps):
@@ -132,6 +151,20 @@ def ldar_sim_run(simulation):
 
     # Clean up and write files
     sim_summary = sim.finalize()
+    if not simulation.get("defer_plots", False):
+        # Render plots here, unless the caller queues them (see out_processing.plot_queue)
+        for job in sim_summary.pop("plot_jobs"):
+            render_job(job)
     print(simulation["closing_message"])
     logfile.close()
     return sim_summary
+
+
+def ldar_sim_run_indexed(indexed_simulation):
+    """
+    Run ldar_sim_run for an (index, [simulation]) pair, as created by enumerating the
+    output of create_sims, and return (index, sim_summary). Used with unordered pool maps,
+    where results need to be matched back to their simulation.
+    """
+    sim_idx, simulation = indexed_simulation
+    return sim_idx, ldar_sim_run(*simulation)
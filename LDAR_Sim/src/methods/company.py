@@ -26,6 +26,8 @@ import numpy as np
 from methods.deployment.generic_funcs import get_deployment_dates
 from utils.attribution import update_flag
 from utils.generic_functions import get_prop_rate
+from utils.site_counters import SiteCounters
+from weather.deployment_days_cache import get_deployment_days
 
 
 class BaseCompany:
@@ -60,13 +62,26 @@ class BaseCompany:
         self.timeseries = timeseries
         self.site_watchlist = {}
         self.crews = []
+
+        # --- init site counters and time series ---
+        # Sites start as if last surveyed their minimum interval ago
+        min_int = self.state["site_tables"][self.name].min_int
+        self.counters = SiteCounters(
+            self.name,
+            self.state["sites"],
+            virtual_world["timesteps"],
+            t_since_last_LDAR=np.where(np.isnan(min_int), 0, min_int),
+        )
+        self.state["site_counters"][self.name] = self.counters
+        self.timeseries.update(self.counters.timeseries)
         deploy_mod = import_module(
             "methods.deployment.{}_company".format(self.config["deployment_type"].lower())
         )
         Schedule = getattr(deploy_mod, "Schedule")
         self.schedule = Schedule(config, program_parameters, state)
         self.deployment_years, self.deployment_months = get_deployment_dates(config, state)
-        self.deployment_days = self.state["weather"].deployment_days(
+        self.deployment_days = get_deployment_days(
+            self.state["weather"],
             method_name=self.name,
             config=config,
             start_date=self.state["t"].start_date,
@@ -74,22 +89,6 @@ class BaseCompany:
             consider_weather=virtual_world["consider_weather"],
         )
 
-        # --- init time series ---
-        n_ts = virtual_world["timesteps"]
-        self.timeseries["{}_prop_sites_avail".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_cost".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_sites_visited".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_travel_time".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_survey_time".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_redund_tags".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_missed_leaks".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_sites_vis_w_leaks".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_eff_flags".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_n_tags".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_flags_redund1".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_flags_redund2".format(self.name)] = np.zeros(n_ts)
-        self.timeseries["{}_flag_wo_vent".format(self.name)] = np.zeros(n_ts)
-
         if self.config["measurement_scale"] != "component":
             # Assign the correct follow-up threshold
             if self.config["follow_up"]["threshold_type"] == "absolute":
@@ -110,19 +109,6 @@ class BaseCompany:
             (len(self.state["weather"].longitude), len(self.state["weather"].latitude))
         )
 
-        # --- init site specific variables ---
-        for site in self.state["sites"]:
-            survey_min_interval = "{}_min_int".format(self.name)
-            if survey_min_interval in site:
-                t_since_last_LDAR = site[survey_min_interval]
-            else:
-                t_since_last_LDAR = 0
-            site.update({"{}_t_since_last_LDAR".format(self.name): t_since_last_LDAR})
-            site.update({"{}_surveys_conducted".format(self.name): 0})
-            site.update({"{}_attempted_today?".format(self.name): False})
-            site.update({"{}_surveys_done_this_year".format(self.name): 0})
-            site.update({"{}_missed_leaks".format(self.name): 0})
-
         rollover = []
         make_crew_loc = import_module(
             "methods.deployment.{}_company".format(self.config["deployment_type"].lower())
@@ -140,9 +126,9 @@ class BaseCompany:
             rollover,
         )
         for idx, cnt in enumerate(self.crews):
-            self.timeseries["{}_cost".format(self.name)][
-                self.state["t"].current_timestep
-            ] += self.config["cost"]["upfront"]
+            self.counters.series("cost")[self.state["t"].current_timestep] += self.config["cost"][
+                "upfront"
+            ]
 
         self.schedule.assign_agents()
 
@@ -190,24 +176,13 @@ class BaseCompany:
                 ]
             )
             prop_avail = available_sites / len(self.state["sites"])
-            self.timeseries["{}_prop_sites_avail".format(self.name)][
-                self.state["t"].current_timestep
-            ] = prop_avail
+            self.counters.series("prop_sites_avail")[self.state["t"].current_timestep] = prop_avail
         else:
-            self.timeseries["{}_prop_sites_avail".format(self.name)][
-                self.state["t"].current_timestep
-            ] = 0
+            self.counters.series("prop_sites_avail")[self.state["t"].current_timestep] = 0
 
-        # Update time series stats
-
-        days_since_LDAR = "{}_t_since_last_LDAR".format(self.name)
-        attempted_today = "{}_attempted_today?".format(self.name)
-        sites_this_year = "{}_surveys_done_this_year".format(self.name)
-        for site in self.state["sites"]:
-            site[days_since_LDAR] += 1
-            site[attempted_today] = False
-            if self.state["t"].current_date.day == 31 and self.state["t"].current_date.month == 12:
-                site[sites_this_year] = 0
+        # Update site counters of all sites at once
+        end_date = self.state["t"].current_date
+        self.counters.end_day(end_of_year=end_date.day == 31 and end_date.month == 12)
 
         # Daily check of watchlist
         if len(self.site_watchlist) > 0:
@@ -215,9 +190,7 @@ class BaseCompany:
 
         # Update followup specific parameters
         if self.config["is_follow_up"]:
-            self.state["flags"] = [
-                site["facility_ID"] for site in self.state["sites"] if site["currently_flagged"]
-            ]
+            self.state["flags"] = self.state["flag_registry"].snapshot()
         return
 
     def candidates_to_watchlist(self):
@@ -305,6 +278,7 @@ class BaseCompany:
             self.state["t"],
             self.state["campaigns"],
             self.name,
+            self.state["flag_registry"],
             self.consider_venting,
         )
 
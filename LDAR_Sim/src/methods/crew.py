@@ -26,6 +26,17 @@ from typing import Any, Dict
 import numpy as np
 
 from config.output_flag_mapping import OUTPUTS, SITE_VISITS
+from methods.detection import (
+    NOT_CHECKED,
+    Sensor,
+    VisitBatch,
+    draw_coverage,
+    equipment_rates,
+    leak_arrays,
+    sequential_sum,
+)
+from utils.attribution import update_tag
+from utils.site_counters import method_key
 
 
 class BaseCrew:
@@ -61,6 +72,7 @@ class BaseCrew:
         self.itinerary = None
         self.id = id
         self.site = site  # Used by stationary deployment methods
+        self.sensor = Sensor(config)
         if len(config["scheduling"]["LDAR_crew_init_location"]) > 0:
             self.lat = float(config["scheduling"]["LDAR_crew_init_location"][1])
             self.lon = float(config["scheduling"]["LDAR_crew_init_location"][0])
@@ -91,6 +103,21 @@ class BaseCrew:
 
         return
 
+    @property
+    def counters(self):
+        """Survey counters of the method's sites."""
+        return self.state["site_counters"][self.config["label"]]
+
+    def add_missed_leaks(self, site, n_missed):
+        """Count covered leaks missed at a site, for the site and the method's timeseries.
+
+        Args:
+            site (dict): Visited site
+            n_missed (int): Leaks missed
+        """
+        counters = self.counters
+        counters.add_missed_leaks(counters.row(site), n_missed, self.state["t"].current_timestep)
+
     def work_a_day(self, site_pool, candidate_flags=None):
         """
         Go to work and find the leaks for a given day
@@ -105,10 +132,19 @@ class BaseCrew:
         # If there are sites ready for survey
         if len(site_pool) > 0:
             itinerary = self.schedule.start_day(site_pool)
+            # Sensors that detect a whole day at once are given all visits at the end
+            batch = VisitBatch() if self.sensor.batch is not None else None
             for site_plan in itinerary:
                 if site_plan["remaining_mins"] == 0:
                     # Only record and fix leaks on the last day of work if there is rollover
-                    self.visit_site(site_plan["site"])
+                    if batch is None:
+                        self.visit_site(site_plan["site"])
+                    else:
+                        batch.add(
+                            site_plan["site"],
+                            self.state["t"].current_date,
+                            *self.covered_emissions(site_plan["site"]),
+                        )
                     # Update the cost per site once the site is done surveying
                     self.daily_cost += self.config["cost"]["per_site"]
                 self.worked_today = True
@@ -117,6 +153,8 @@ class BaseCrew:
                 if self.config["deployment_type"] == "mobile":
                     daily_LDAR_time += site_plan["LDAR_mins_onsite"]
                     daily_travel_time += site_plan["travel_to_mins"]
+            if batch is not None and len(batch) > 0:
+                self.visit_sites(batch)
 
         # Update time series and variables and run end day if crew works
         if self.worked_today:
@@ -127,11 +165,11 @@ class BaseCrew:
                 self.state["t"].current_date.hour - self.schedule.start_hour
             )
             self.daily_cost += self.config["cost"]["per_day"]
-            self.timeseries["{}_cost".format(m_name)][cur_timestep] += self.daily_cost
+            self.timeseries[method_key(m_name, "cost")][cur_timestep] += self.daily_cost
             self.timeseries["total_daily_cost"][cur_timestep] += self.daily_cost
-            self.timeseries["{}_survey_time".format(m_name)][cur_timestep] += daily_LDAR_time
+            self.timeseries[method_key(m_name, "survey_time")][cur_timestep] += daily_LDAR_time
             if self.config["deployment_type"] == "mobile":
-                self.timeseries["{}_travel_time".format(m_name)][cur_timestep] += (
+                self.timeseries[method_key(m_name, "travel_time")][cur_timestep] += (
                     daily_travel_time + itinerary[-1]["travel_home_mins"]
                 )
 
@@ -139,27 +177,106 @@ class BaseCrew:
         """
         Look for emissions at the chosen site.
         """
+        self.record_visit(site, self.detect_emissions(site))
+
+    def visit_sites(self, batch):
+        """
+        Look for emissions at all sites visited in a day, with the sensor's
+        detect_emissions_batch. Visits are recorded at the time they were made.
+
+        Args:
+            batch (VisitBatch): Visits of the day
+        """
+        batch.close()
+        detection = self.sensor.batch(self, batch)
+        time_obj = self.state["t"]
+        end_of_day = time_obj.current_date
+        for visit_idx, site in enumerate(batch.sites):
+            time_obj.current_date = batch.dates[visit_idx]
+            self.record_visit(site, self.batch_site_results(batch, detection, visit_idx))
+        time_obj.current_date = end_of_day
+
+    def batch_site_results(self, batch, detection, visit_idx):
+        """Get the detection results of a visit from the results of a sensor's
+        detect_emissions_batch (see methods.detection.Sensor), tagging the leaks it
+        detected and counting the leaks it missed.
+
+        Returns:
+            dict: Site detection results, as returned by detect_emissions
+        """
+        m_name = self.config["label"]
+        first, last = batch.leak_offsets[visit_idx], batch.leak_offsets[visit_idx + 1]
+        _, site_rate, venting = batch.site_values[visit_idx]
+        site = batch.sites[visit_idx]
+        site_measured_rate = 0
+        if "site_measured_rates" in detection:
+            site_measured_rate = detection["site_measured_rates"][visit_idx].item()
+        if "detected" in detection:
+            detected = np.flatnonzero(detection["detected"][first:last]) + first
+            for leak_idx in detected.tolist():
+                measured_rate = detection["leak_measured_rates"][leak_idx].item()
+                is_new_leak = update_tag(
+                    batch.leaks[leak_idx],
+                    measured_rate,
+                    site,
+                    self.timeseries,
+                    self.state["t"],
+                    m_name,
+                    self.id,
+                    self.program_parameters,
+                )
+                if is_new_leak:
+                    site_measured_rate += measured_rate
+        if "missed_leaks" in detection:
+            self.add_missed_leaks(site, int(detection["missed_leaks"][visit_idx]))
+        equip_measured_rates = []
+        if "equip_measured_rates" in detection:
+            first_group = batch.equipment_offsets[visit_idx]
+            last_group = batch.equipment_offsets[visit_idx + 1]
+            equip_measured_rates = detection["equip_measured_rates"][
+                first_group:last_group
+            ].tolist()
+        return {
+            "site": site,
+            "leaks_present": batch.leaks[first:last],
+            "site_true_rate": site_rate,
+            "site_measured_rate": site_measured_rate,
+            "equip_measured_rates": equip_measured_rates,
+            "vent_rate": venting,
+            "found_leak": bool(detection["found_leak"][visit_idx]),
+        }
+
+    def record_visit(self, site, site_detect_results):
+        """
+        Record the results of a site visit: flag or unflag the site, and update the
+        site and the method's timeseries.
+
+        Args:
+            site (dict): Visited site
+            site_detect_results (dict): Site detection results, see detect_emissions
+        """
         m_name = self.config["label"]
         cur_ts = self.state["t"].current_timestep
-        site_detect_results = self.detect_emissions(site)
 
         if self.config["measurement_scale"].lower() == "component":
             # Remove site from flag pool if component level measurement
             site.update({"currently_flagged": False})
+            self.state["flag_registry"].unflag(site)
             site["last_component_survey"] = cur_ts
             if site_detect_results["found_leak"]:
-                self.timeseries["{}_sites_vis_w_leaks".format(m_name)][cur_ts] += 1
+                self.timeseries[method_key(m_name, "sites_vis_w_leaks")][cur_ts] += 1
         elif self.config["is_follow_up"]:
             site.update({"currently_flagged": False})
+            self.state["flag_registry"].unflag(site)
             if site_detect_results["found_leak"] and (
                 self.config["measurement_scale"].lower() == "site"
                 or self.config["measurement_scale"].lower() == "equipment"
             ):
-                self.timeseries["{}_sites_vis_w_leaks".format(m_name)][cur_ts] += 1
+                self.timeseries[method_key(m_name, "sites_vis_w_leaks")][cur_ts] += 1
                 self.candidate_flags.append(site_detect_results)
         elif site_detect_results["found_leak"]:
             # all other sites flag
-            self.timeseries["{}_sites_vis_w_leaks".format(m_name)][cur_ts] += 1
+            self.timeseries[method_key(m_name, "sites_vis_w_leaks")][cur_ts] += 1
             self.candidate_flags.append(site_detect_results)
 
         # Record results of site visit
@@ -168,11 +285,9 @@ class BaseCrew:
             self.state["site_visits"][self.config["label"]].append(site_vis_rec)
 
         # Update site
-        self.timeseries["{}_sites_visited".format(m_name)][cur_ts] += 1
-        site["{}_surveys_conducted".format(m_name)] += 1
-        site["{}_surveys_done_this_year".format(m_name)] += 1
-        site["historic_t_since_LDAR"] = site["{}_t_since_last_LDAR".format(m_name)]
-        site["{}_t_since_last_LDAR".format(m_name)] = 0
+        self.timeseries[method_key(m_name, "sites_visited")][cur_ts] += 1
+        counters = self.counters
+        site["historic_t_since_LDAR"] = counters.record_survey(counters.row(site))
 
     def detect_emissions(self, site, *args):
         """Run module to detect leaks and tag sites
@@ -182,28 +297,54 @@ class BaseCrew:
                 '*args':  Various sensor parameters, see user manual for more info.
             }
         """
+        (
+            covered_leaks,
+            _,
+            covered_equipment_rates,
+            covered_site_rate,
+            site_rate,
+            venting,
+            equipment_rates,
+        ) = self.covered_emissions(site)
+        return self.sensor.detect_emissions(
+            self,
+            site,
+            covered_leaks,
+            covered_equipment_rates,
+            covered_site_rate,
+            site_rate,
+            venting,
+            equipment_rates,
+        )
+
+    def covered_emissions(self, site):
+        """Find the leaks at a site the sensor can see (spatially and temporally
+        covered), and aggregate true emissions to the equipment and site level.
+
+        Returns:
+            tuple: covered leaks, rate of each covered leak (array), covered rate of
+                each equipment group, covered site rate, site rate, vented emissions
+                and rate of each equipment group
+        """
         m_name = self.config["label"]
-        covered_leaks = []
-        is_sp_covered = True
-        covered_site_rate = 0
-        site_rate = 0
-        covered_equipment_rates = [0] * int(site["equipment_groups"])
-        equipment_rates = [0] * int(site["equipment_groups"])
-        for leak in site["active_leaks"]:
-            # Check to see if leak is spatially covered
-            if "{}_sp_covered".format(m_name) not in leak:
-                is_sp_covered = np.random.binomial(1, self.config["coverage"]["spatial"])
-                leak["{}_sp_covered".format(m_name)] = is_sp_covered
-            if leak["{}_sp_covered".format(m_name)]:
-                # Check to see if leak is temporally covered
-                if np.random.binomial(1, self.config["coverage"]["temporal"]):
-                    covered_leaks.append(leak)
-                    covered_site_rate += leak["rate"]
-                    covered_equipment_rates[leak["equipment_group"] - 1] += leak["rate"]
-            site_rate += leak["rate"]
-            equipment_rates[leak["equipment_group"] - 1] += leak["rate"]
-            # Get the type of sensor, and call the detect emissions function for sensor
-            # Aggregate true emissions to equipment and site level; get list of leaks present
+        sp_key = "{}_sp_covered".format(m_name)
+        leaks = site["active_leaks"]
+        n_equipment_groups = int(site["equipment_groups"])
+        rates, equipment_groups, sp_covered = leak_arrays(leaks, sp_key)
+        # Check to see if leaks are spatially and temporally covered
+        new_sp_covered, covered = draw_coverage(
+            sp_covered, self.config["coverage"]["spatial"], self.config["coverage"]["temporal"]
+        )
+        for leak_idx in np.flatnonzero(sp_covered == NOT_CHECKED).tolist():
+            leaks[leak_idx][sp_key] = new_sp_covered[leak_idx].item()
+        # Aggregate true emissions to equipment and site level; get list of leaks present
+        covered_leaks = [leaks[leak_idx] for leak_idx in np.flatnonzero(covered).tolist()]
+        covered_site_rate = sequential_sum(rates[covered])
+        site_rate = sequential_sum(rates)
+        covered_equipment_rates = equipment_rates(
+            equipment_groups[covered], rates[covered], n_equipment_groups
+        )
+        site_equipment_rates = equipment_rates(equipment_groups, rates, n_equipment_groups)
 
         # Add vented emissions
         venting = 0
@@ -215,23 +356,16 @@ class BaseCrew:
             covered_site_rate += venting
             site_rate += venting
             for rate in range(len(covered_equipment_rates)):
-                covered_equipment_rates[rate] += venting / int(site["equipment_groups"])
-                equipment_rates[rate] += venting / int(site["equipment_groups"])
-        # Import module. If none is specified use method.sensors.{method_type}
-        if self.config["sensor"]["mod_loc"] is None:
-            sensor_mod = import_module("methods.sensors.{}".format(self.config["sensor"]["type"]))
-        else:
-            sensor_mod = import_module(self.config["sensor"]["mod_loc"])
-        detect_emis_sensor = getattr(sensor_mod, "detect_emissions")
-        return detect_emis_sensor(
-            self,
-            site,
+                covered_equipment_rates[rate] += venting / n_equipment_groups
+                site_equipment_rates[rate] += venting / n_equipment_groups
+        return (
             covered_leaks,
+            rates[covered],
             covered_equipment_rates,
             covered_site_rate,
             site_rate,
             venting,
-            equipment_rates,
+            site_equipment_rates,
         )
 
     def gen_site_vis_rec(self, site_detect_results, site) -> Dict[str, Any]:
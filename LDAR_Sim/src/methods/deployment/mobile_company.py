@@ -18,11 +18,13 @@
 #
 # ------------------------------------------------------------------------------
 
+import heapq
 import math
 
 import numpy as np
 import pandas as pd
 from utils.scheduling_utils import is_leap_year
+from utils.site_table import MethodSiteTable
 from methods.crew import BaseCrew
 from sklearn.cluster import KMeans
 
@@ -68,11 +70,201 @@ def make_crews(
         )
 
 
+def site_is_due(
+    site_idx,
+    site_table,
+    counters,
+    current_timestep,
+    current_month,
+    missing_days,
+    missing_days_array,
+):
+    """Check if a site is due for survey by a method that is not a follow-up.
+
+    A site is due if surveys done is less than the total surveys needed for that year
+    AND either the days since last survey is greater or equal to the minimum time
+    interval between surveys (the site should be the next survey), OR minimum days
+    have passed between surveys (the survey needs to be forced to happen).
+
+    Args:
+        site_idx (int): Row of the site in site_table and counters
+        site_table (MethodSiteTable): Survey parameters of the method's sites
+        counters (SiteCounters): Survey counters of the method's sites
+        current_timestep (int): Current timestep
+        current_month (int): Current month
+        missing_days (int): Days of the year so far outside of deployment months
+        missing_days_array (array): Days of each month outside of deployment months,
+            up to the current month
+
+    Returns:
+        bool: True if the site is due
+    """
+    days_since_LDAR = int(counters.t_since_last_LDAR[site_idx])
+    surveys_done = int(counters.surveys_done_this_year[site_idx])
+    min_time_bt_surveys = site_table.min_time[site_idx]
+    min_interval = site_table.min_interval[site_idx]
+    if surveys_done >= site_table.surveys_per_year[site_idx]:
+        return False
+    return (
+        days_since_LDAR
+        + site_table.survey_days[site_idx]
+        - np.sum(
+            missing_days_array[
+                math.ceil(((current_timestep - days_since_LDAR) % 365) / (365 / 12)) : current_month
+            ]
+        )
+    ) >= min_interval or (
+        surveys_done * min_interval + missing_days + min_time_bt_surveys < current_timestep % 365
+    )
+
+
+class DueSiteIndex:
+    """Index of the sites of a method that is not a follow-up, used to find the sites
+    due for survey (see site_is_due) without checking every site every day.
+
+    Days since last survey grow by one every day for all sites and are only reset by
+    surveys, so the timestep of a site's last survey (current timestep less days since
+    last survey) is constant between surveys. From it, each site gets the timestep it
+    becomes due from by days since last survey, and the year day it becomes due from by
+    surveys done, which are kept in two heaps. Sites whose keys have been reached are
+    candidates, checked every day with site_is_due until they are surveyed or no
+    longer near due.
+
+    Keys only grow with surveys, so keys left in the heaps after a survey are early,
+    never late. Keys depend on the days outside deployment months before the current
+    month and surveys done are reset each year, so the heaps are rebuilt when the month
+    changes, from the keys of all sites at once. Keys are compared with a margin of a
+    day, the exact check being left to site_is_due, so due sites and their order are
+    the same as checking all sites.
+    """
+
+    def __init__(self, sites, site_table, counters):
+        """
+        Args:
+            sites (list): Sites of the simulation
+            site_table (MethodSiteTable): Survey parameters of the sites
+            counters (SiteCounters): Survey counters of the sites
+        """
+        self.sites = sites
+        self.site_table = site_table
+        self.counters = counters
+        self.min_interval = np.array(site_table.min_interval, dtype=np.float64)
+        self.min_time = np.array(site_table.min_time, dtype=np.float64)
+        self.survey_days = np.array(site_table.survey_days, dtype=np.float64)
+        self.surveys_per_year = np.array(site_table.surveys_per_year, dtype=np.float64)
+        self.period = None
+        self.candidates = set()
+        self.survey_heap = []
+        self.year_day_heap = []
+
+    def _keys(self, site_idx, current_timestep, missing_days_cum, current_month):
+        """Get the due timestep and due year day of a site, or of an array of sites."""
+        days_since_LDAR = self.counters.t_since_last_LDAR[site_idx]
+        min_interval = self.min_interval[site_idx]
+        first_month = np.ceil(((current_timestep - days_since_LDAR) % 365) / (365 / 12))
+        missing = np.maximum(
+            missing_days_cum[current_month] - missing_days_cum[first_month.astype(np.int64)], 0
+        )
+        due_timestep = (
+            current_timestep - days_since_LDAR + min_interval - self.survey_days[site_idx] + missing
+        )
+        due_year_day = (
+            self.counters.surveys_done_this_year[site_idx] * min_interval + self.min_time[site_idx]
+        )
+        return due_timestep.tolist(), due_year_day.tolist()
+
+    def _surveys_left(self, site_idx):
+        return self.counters.surveys_done_this_year[site_idx] < self.surveys_per_year[site_idx]
+
+    def due_sites(self, time_counter, missing_days, missing_days_array):
+        """Get the sites due for survey, sorted by days since last survey, descending.
+
+        Args:
+            time_counter (TimeCounter): Simulation time
+            missing_days (int): Days of the year so far outside of deployment months
+            missing_days_array (array): Days of each month outside of deployment months,
+                up to the current month
+
+        Returns:
+            list: Sites due for survey
+        """
+        current_timestep = time_counter.current_timestep
+        current_month = time_counter.current_date.month
+        missing_days_cum = np.concatenate([[0], np.cumsum(missing_days_array)])
+        year_day = current_timestep % 365 - missing_days
+        period = (time_counter.current_date.year, current_month)
+        if period != self.period:
+            self.period = period
+            self.candidates = set()
+            site_idxs = np.flatnonzero(self._surveys_left(slice(None)))
+            due_timesteps, due_year_days = self._keys(
+                site_idxs, current_timestep, missing_days_cum, current_month
+            )
+            site_idxs = site_idxs.tolist()
+            self.survey_heap = list(zip(due_timesteps, site_idxs))
+            self.year_day_heap = list(zip(due_year_days, site_idxs))
+            heapq.heapify(self.survey_heap)
+            heapq.heapify(self.year_day_heap)
+
+        while self.survey_heap and self.survey_heap[0][0] <= current_timestep + 1:
+            self.candidates.add(heapq.heappop(self.survey_heap)[1])
+        while self.year_day_heap and self.year_day_heap[0][0] < year_day + 1:
+            self.candidates.add(heapq.heappop(self.year_day_heap)[1])
+
+        due_idxs = []
+        for site_idx in sorted(self.candidates):
+            if site_is_due(
+                site_idx,
+                self.site_table,
+                self.counters,
+                current_timestep,
+                current_month,
+                missing_days,
+                missing_days_array,
+            ):
+                due_idxs.append(site_idx)
+                continue
+            # Drop sites that are surveyed or no longer near due
+            self.candidates.discard(site_idx)
+            if self._surveys_left(site_idx):
+                due_timestep, due_year_day = self._keys(
+                    site_idx, current_timestep, missing_days_cum, current_month
+                )
+                if due_timestep <= current_timestep + 1 or due_year_day < year_day + 1:
+                    self.candidates.add(site_idx)
+                else:
+                    heapq.heappush(self.survey_heap, (due_timestep, site_idx))
+                    heapq.heappush(self.year_day_heap, (due_year_day, site_idx))
+
+        t_since_last_LDAR = self.counters.t_since_last_LDAR[due_idxs].tolist()
+        order = sorted(range(len(due_idxs)), key=t_since_last_LDAR.__getitem__, reverse=True)
+        return [self.sites[due_idxs[visit_idx]] for visit_idx in order]
+
+
 class Schedule:
     def __init__(self, config, program_parameters, state):
         self.program_parameters = program_parameters
         self.config = config
         self.state = state
+        self.due_index = None
+        self._site_table = None
+
+    @property
+    def site_table(self):
+        """Survey parameters of the sites (state["site_tables"]), read from the sites if
+        the simulation has no table for the method."""
+        if self._site_table is None:
+            site_tables = self.state.get("site_tables", {})
+            if self.config["label"] in site_tables:
+                self._site_table = site_tables[self.config["label"]]
+            else:
+                self._site_table = MethodSiteTable(self.state["sites"], self.config)
+        return self._site_table
+
+    @property
+    def counters(self):
+        """Survey counters of the sites (state["site_counters"])."""
+        return self.state["site_counters"][self.config["label"]]
 
     def assign_agents(self):
         """If route planning is enabled, use k-means clustering to split site into N clusters
@@ -127,40 +319,36 @@ class Schedule:
             out_sites (dict): List of sites ready for survey.
         """
         name = self.config["label"]
-        days_since_LDAR = "{}_t_since_last_LDAR".format(name)
-        survey_done_this_year = "{}_surveys_done_this_year".format(name)
-        survey_min_interval = "{}_min_int".format(name)
-        survey_frequency = "{}_RS".format(name)
-        survey_time = "{}_time".format(name)
+        counters = self.counters
+        t_since_last_LDAR = counters.t_since_last_LDAR
         meth = self.program_parameters["methods"]
 
         if self.config["is_follow_up"]:
-            # filter then sort
+            flag_registry = self.state["flag_registry"]
+            if site_pool is flag_registry.last_snapshot:
+                flagged_sites = (
+                    flag_registry.sites[site_idx]
+                    for site_idx in flag_registry.candidates(name, self.state["t"].current_date)
+                )
+            else:
+                flagged_sites = (s for s in self.state["sites"] if s["facility_ID"] in site_pool)
+            # filter for sites past the reporting delay, and for if preferred followup
+            # method is equivalent to method, then sort
             out_sites = list(
                 sorted(
                     (
                         s
-                        for s in self.state["sites"]
-                        if s["facility_ID"] in site_pool
-                        and (
+                        for s in flagged_sites
+                        if (
                             (self.state["t"].current_date - s["date_flagged"]).days
                             >= meth[s["flagged_by"]]["reporting_delay"]
                         )
+                        and (
+                            s["preferred_FU_method"] is None
+                            or s["preferred_FU_method"] == self.config["label"]
+                        )
                     ),
-                    key=lambda x: x[days_since_LDAR],
-                    reverse=True,
-                )
-            )
-            # filter again for if preferred followup method is equivalent to method
-            out_sites = list(
-                sorted(
-                    (
-                        s
-                        for s in out_sites
-                        if s["preferred_FU_method"] is None
-                        or s["preferred_FU_method"] == self.config["label"]
-                    ),
-                    key=lambda x: x[days_since_LDAR],
+                    key=lambda x: t_since_last_LDAR[counters.row(x)],
                     reverse=True,
                 )
             )
@@ -178,73 +366,33 @@ class Schedule:
                     )
             missing_days = math.floor(missing_days)
 
-            days_since_LDAR = "{}_t_since_last_LDAR".format(name)
-
-            # filter then sort
-            # Sort by:
-            #   if surveys done is less than the total surveys needed for that year
-            #               AND
-            #   days since last survey is greater or equal to
-            #   the minimum time interval between surveys
-            #       - should be the next survey
-            #               OR
-            #   minimum days have passed between surveys
-            #       - survey needs to be forced to happen
-            out_sites = list(
-                sorted(
-                    (
-                        s
-                        for s in site_pool
-                        if (
-                            (s[survey_done_this_year] < int(s[survey_frequency]))
-                            and (
-                                (
-                                    (
-                                        s[days_since_LDAR]
-                                        + math.floor(
-                                            s[survey_time] / 60 / self.config["max_workday"]
-                                        )
-                                        - np.sum(
-                                            missing_days_array[
-                                                math.ceil(
-                                                    (
-                                                        (
-                                                            self.state["t"].current_timestep
-                                                            - s[days_since_LDAR]
-                                                        )
-                                                        % 365
-                                                    )
-                                                    / (365 / 12)
-                                                ) : current_month
-                                            ]
-                                        )
-                                    )
-                                    >= max(
-                                        [
-                                            int(s[survey_min_interval]),
-                                            s["{}_min_time_bt_surveys".format(name)],
-                                        ]
-                                    )
-                                )
-                                or (
-                                    s[survey_done_this_year]
-                                    * max(
-                                        [
-                                            int(s[survey_min_interval]),
-                                            s["{}_min_time_bt_surveys".format(name)],
-                                        ]
-                                    )
-                                    + missing_days
-                                    + s["{}_min_time_bt_surveys".format(name)]
-                                    < self.state["t"].current_timestep % 365
-                                )
+            if site_pool is self.state["sites"]:
+                if self.due_index is None:
+                    self.due_index = DueSiteIndex(site_pool, self.site_table, counters)
+                out_sites = self.due_index.due_sites(
+                    self.state["t"], missing_days, missing_days_array
+                )
+            else:
+                site_table = self.site_table
+                out_sites = list(
+                    sorted(
+                        (
+                            s
+                            for s in site_pool
+                            if site_is_due(
+                                site_table.row(s),
+                                site_table,
+                                counters,
+                                self.state["t"].current_timestep,
+                                current_month,
+                                missing_days,
+                                missing_days_array,
                             )
-                        )
-                    ),
-                    key=lambda x: x[days_since_LDAR],
-                    reverse=True,
+                        ),
+                        key=lambda x: t_since_last_LDAR[counters.row(x)],
+                        reverse=True,
+                    )
                 )
-            )
 
         return out_sites
 
@@ -23,8 +23,8 @@ from datetime import timedelta
 
 import numpy as np
 import pandas as pd
-from geography.distance import get_distance
-from geography.homebase import find_homebase, find_homebase_opt
+from geography.site_index import SiteIndex
+from initialization.args import get_abs_path
 from methods.deployment.generic_funcs import get_work_hours
 
 
@@ -59,11 +59,23 @@ class Schedule:
         self.scheduling = self.config["scheduling"]
         # define a list of home bases for crew and redefine the initial location of crew
         if self.scheduling["route_planning"]:
-            hb_file = self.in_dir / self.scheduling["home_bases_files"]
+            hb_file = get_abs_path(self.in_dir) / self.scheduling["home_bases_files"]
             HB = pd.read_csv(hb_file, sep=",")
             self.crew_lon = self.scheduling["LDAR_crew_init_location"][0]
             self.crew_lat = self.scheduling["LDAR_crew_init_location"][1]
             self.home_bases = list(zip(HB["lon"], HB["lat"]))
+            self.distance_cache = self.state["distance_cache"]
+            self.home_base_table = self.distance_cache.home_base_table(self.home_bases)
+
+    @property
+    def site_table(self):
+        """Survey parameters of the method's sites."""
+        return self.state["site_tables"][self.config["label"]]
+
+    @property
+    def counters(self):
+        """Survey counters of the method's sites."""
+        return self.state["site_counters"][self.config["label"]]
 
     def start_day(self, site_pool):
         """Start day method. Initialize time to account for work hours, and set
@@ -100,63 +112,22 @@ class Schedule:
         est_mins_remaining = (self.end_hour - self.start_hour) * 60
 
         # ---- Go through Sites and get travel times ----
-        # 1) Route Planning - add them to a temporary site plan list.
-        #      Choose site from site plan list based on travel time.
-        #      Remove chosen site from site pool, then get new travel
-        #      times and repeat (using while loop).
+        # 1) Route Planning - go to the nearest site, then the nearest site
+        #      from there and so on (see plan_route).
         # 2) No Route Planning - Fill the day with sites visits and
         #      return the days site plan.
 
-        exit_flag = True
-        site_cnt = 0
-        # While loop is only needed for
-        while est_mins_remaining > 0 and len(site_pool) > 0:
-            site_plans_tmp = []
-            for sidx, site in enumerate(site_pool):
-                site_cnt += 1
+        if self.config["scheduling"]["route_planning"]:
+            site_plans_today = self.plan_route(site_pool, est_mins_remaining)
+        elif est_mins_remaining > 0:
+            for site in site_pool:
                 site_plan = self.plan_visit(site, est_mins_remaining=est_mins_remaining)
                 # site plans are dicts that include site, LDAR_mins and go_to_site keys.
                 # Site plan can be empty if weather does not permit travel
                 if site_plan and site_plan["go_to_site"]:
-                    if self.config["scheduling"]["route_planning"]:
-                        site_plans_tmp.append(site_plan)
-                    else:
-                        # The site order will not change if route_planning is not used
-                        site_plans_today.append(site_plan)
-                        est_mins_remaining -= site_plan["LDAR_mins"]
-                        # # The following will allow the program to keep trying sites
-                        # # even after one has failed, in case there is another site
-                        # # that meets the criteria
-                        # if est_mins_remaining <= 0:
-                        #     # if the day has been filled with surveys exit for and while
-                        #     # loop
-                        #     exit_flag = True
-                        #     break
-                        exit_flag = False
-                else:
-                    exit_flag = True
-                    break
-
-            # If there is no route planning and the day has been filled with surveys
-            # or all of the sites have been checked, exit the while loop
-            if not self.config["scheduling"]["route_planning"] and (
-                exit_flag or sidx == len(site_pool) - 1
-            ):
-                break
-
-            # if a crew has sites they can go to then choose site from list
-            if self.config["scheduling"]["route_planning"]:
-                if len(site_plans_tmp) > 0:
-                    # choose a site to visit (rollover site, route planning site
-                    # or longest time without survey)
-                    site_plan = self.choose_site(site_plans_tmp)
+                    # The site order will not change if route_planning is not used
                     site_plans_today.append(site_plan)
                     est_mins_remaining -= site_plan["LDAR_mins"]
-                    site_ID = site_plan["site"]["facility_ID"]
-                    # remove chosen site from site pool
-                    site_pool = [s for s in site_pool if s["facility_ID"] != site_ID]
-                    self.crew_lon = site_plan["site"]["lon"]
-                    self.crew_lat = site_plan["site"]["lat"]
                 else:
                     break
         # -----------------------------
@@ -172,6 +143,47 @@ class Schedule:
 
         return site_plans_today
 
+    def plan_route(self, site_pool, est_mins_remaining):
+        """Plan the day's visits with route planning. The crew goes to the nearest site
+            it can survey today (weather permitting), then to the nearest site from
+            there, until there is not enough time left to travel to the nearest site.
+            Nearest sites are found with a spatial index of the site pool, from which
+            sites are removed as they are planned.
+
+        Args:
+            site_pool (list): List of sites ready for survey.
+            est_mins_remaining (float): Minutes left in the work day
+
+        Returns:
+            list: Site plans (see plan_visit)
+        """
+        if self.consider_weather:
+            cur_ts = self.state["t"].current_timestep
+            deployable_pool = []
+            for site in site_pool:
+                if self.deployment_days[site["lon_index"], site["lat_index"], cur_ts]:
+                    deployable_pool.append(site)
+                elif est_mins_remaining > 0:
+                    # Sites the weather keeps the crew from were still attempted,
+                    # as in plan_visit
+                    self.counters.attempted_today[self.counters.row(site)] = True
+            site_pool = deployable_pool
+        site_index = SiteIndex(
+            [site["lon"] for site in site_pool], [site["lat"] for site in site_pool]
+        )
+        site_plans = []
+        while est_mins_remaining > 0 and len(site_index) > 0:
+            site_idx = site_index.nearest(self.crew_lon, self.crew_lat)
+            site_plan = self.plan_visit(site_pool[site_idx], est_mins_remaining=est_mins_remaining)
+            if not site_plan["go_to_site"]:
+                break
+            site_plans.append(site_plan)
+            est_mins_remaining -= site_plan["LDAR_mins"]
+            site_index.remove(site_idx)
+            self.crew_lon = site_plan["site"]["lon"]
+            self.crew_lat = site_plan["site"]["lat"]
+        return site_plans
+
     def end_day(self, site_pool, itinerary):
         """Travel home; update time to travel to homebase"""
         if self.config["scheduling"]["route_planning"]:
@@ -205,8 +217,7 @@ class Schedule:
                 'remaining_mins': minutes left in survey
         }
         """
-        name = self.config["label"]
-        site["{}_attempted_today?".format(name)] = True
+        self.counters.attempted_today[self.counters.row(site)] = True
 
         # Check weather conditions
         if (
@@ -225,10 +236,10 @@ class Schedule:
                     self.rollover.remove(s)
                     break
                 else:
-                    LDAR_mins = int(site["{}_time".format(name)])
+                    LDAR_mins = int(self.site_table.time[self.site_table.row(site)])
         else:
             # Get survey minutes
-            LDAR_mins = int(site["{}_time".format(name)])
+            LDAR_mins = int(self.site_table.time[self.site_table.row(site)])
         # Get travel time minutes, and check if there is enough time.
         travel_to_plan = self.upd_travel_time_loc(next_loc=site)
         travel_home_plan = self.upd_travel_time_loc(next_loc=next_site, is_homebase=True)
@@ -267,22 +278,23 @@ class Schedule:
             # start day by reading the location of the LDAR team
             # find nearest home base
             if is_homebase and next_loc:
-                next_loc, distance = find_homebase_opt(
+                next_loc, distance = self.home_base_table.nearest_opt(
                     self.crew_lon,
                     self.crew_lat,
                     next_loc["lon"],
                     next_loc["lat"],
-                    self.home_bases,
+                    self.distance_cache.distance(
+                        self.crew_lon, self.crew_lat, next_loc["lon"], next_loc["lat"]
+                    ),
                 )
             elif is_homebase and not next_loc:
-                next_loc, distance = find_homebase(self.crew_lon, self.crew_lat, self.home_bases)
+                next_loc, distance = self.home_base_table.nearest(self.crew_lon, self.crew_lat)
             else:
-                distance = get_distance(
+                distance = self.distance_cache.distance(
                     self.crew_lon,
                     self.crew_lat,
                     next_loc["lon"],
                     next_loc["lat"],
-                    "Haversine",
                 )
 
             speed = np.random.choice(self.config["scheduling"]["travel_speeds"])
@@ -341,32 +353,6 @@ class Schedule:
         }
         return out_dict
 
-    # ---------------------------------------------
-
-    def choose_site(self, site_plans):
-        """Choose the next visit site based on travel time
-
-        Args:
-            site_plans: a list of travel plan dictionary output from plan_visit()
-
-        Returns:
-            A dictionary (travel plan) of the selected site
-        """
-        if len(self.rollover) > 0:
-            site_plan = self.rollover
-
-        # route planning -> find the nearest site
-        if self.config["scheduling"]["route_planning"]:
-            # sort the list based on travel time
-            sorted_site_plans = sorted(site_plans, key=lambda k: k["travel_to_mins"])
-            # first site plan in the sorted list has minimum travel time
-            site_plan = sorted_site_plans[0]
-
-        else:
-            # else just need 1st site to visit
-            site_plan = site_plans[0]
-        return site_plan
-
     # ------------------------------------------------
     def choose_accommodation(self, site=None):
         """choose the home base for crew
@@ -20,12 +20,12 @@
 
 from datetime import timedelta
 
-import netCDF4 as nc
 import numpy as np
 from orbit_predictor.sources import get_predictor_from_tle_lines
 from shapely import speedups
 from shapely.geometry import Point
 from utils.generic_functions import geo_idx, init_orbit_poly, quick_cal_daylight
+from weather.weather_cache import load_weather_cache
 
 speedups.disable()
 
@@ -56,11 +56,8 @@ class Schedule:
         self.end_hour = 23
         self.allowed_end_time = None
 
-        # extract cloud cover data
-        cloud = virtual_world["weather_file"]
-        Dataset = nc.Dataset(self.in_dir / cloud, "r")
-        self.cloudcover = Dataset.variables["tcc"][:]
-        Dataset.close()
+        # extract cloud cover data, memory-mapped from the weather cache
+        self.cloudcover = load_weather_cache(self.in_dir, virtual_world)["tcc"]
         # obtain TLE file path
         self.sat = self.config["TLE_label"]
         self.tlefile = self.config["TLE_file"]
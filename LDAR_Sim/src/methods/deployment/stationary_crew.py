@@ -58,10 +58,10 @@ class Schedule:
                 'remaining_mins':(int)  Always zero for Stationary
                 }
         """
-        name = self.config["label"]
+        counters = self.state["site_counters"][self.config["label"]]
         itinerary = []
         for site in site_pool:
-            site["{}_attempted_today?".format(name)] = True
+            counters.attempted_today[counters.row(site)] = True
             # Check weather conditions
             if (
                 not self.consider_weather
@@ -0,0 +1,304 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        methods.detection
+# Purpose:     Array operations used by crews to find the leaks a sensor can see at a
+#              site, the adapter used to call sensor modules and the batch of site
+#              visits passed to sensors that detect a whole day at once.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+from importlib import import_module
+
+import numpy as np
+
+# Spatial coverage of a leak that has not been checked by a method yet
+NOT_CHECKED = -1
+
+
+def leak_arrays(leaks, sp_key):
+    """Get the columns used for detection from the active leaks of a site. Leaks held
+    in a LeakTable (utils.leak_table.SiteLeaks) are read from the table's columns.
+
+    Args:
+        leaks (list): Active leaks of a site
+        sp_key (str): Spatial coverage field of the method, ie. "OGI_sp_covered"
+
+    Returns:
+        tuple: rates (float array), equipment groups (int array) and spatial coverage
+            (int array, NOT_CHECKED for leaks that have not been checked)
+    """
+    if hasattr(leaks, "rows"):
+        table, rows = leaks.table, leaks.rows
+        rates = table["rate"][rows]
+        equipment_groups = table["equipment_group"][rows]
+        sp_covered = table.extra_values(rows, sp_key, NOT_CHECKED)
+    else:
+        rates = [leak["rate"] for leak in leaks]
+        equipment_groups = [leak["equipment_group"] for leak in leaks]
+        sp_covered = [leak.get(sp_key, NOT_CHECKED) for leak in leaks]
+    return (
+        np.asarray(rates, dtype=np.float64),
+        np.asarray(equipment_groups, dtype=np.int64),
+        np.asarray(sp_covered, dtype=np.int64),
+    )
+
+
+def draw_coverage(sp_covered, p_spatial, p_temporal):
+    """Draw the coverage of leaks at a site. Leaks that have not been checked by the
+    method are spatially covered with probability p_spatial, and spatially covered
+    leaks are temporally covered with probability p_temporal.
+
+    Draws are taken from numpy's global random state in the order of a loop over the
+    leaks (spatial draw then temporal draw for each leak), so results do not change
+    with the number of leaks drawn at once. When the outcome of every spatial draw is
+    known (no unchecked leaks, or p_spatial of 0 or 1) all draws are taken at once,
+    otherwise the temporal draws between two unchecked leaks are.
+
+    Args:
+        sp_covered (array): Spatial coverage of each leak, NOT_CHECKED if not checked
+        p_spatial (float): Probability a leak is spatially covered
+        p_temporal (float): Probability a leak is temporally covered
+
+    Returns:
+        tuple: Spatial coverage of each leak (int array) and whether each leak is
+            covered (bool array)
+    """
+    sp_covered = np.array(sp_covered, dtype=np.int64)
+    n_leaks = len(sp_covered)
+    unchecked = sp_covered == NOT_CHECKED
+    temporal = np.zeros(n_leaks, dtype=bool)
+    if p_spatial in (0, 1) or not unchecked.any():
+        sp_covered[unchecked] = p_spatial
+        sp = sp_covered == 1
+        # Position of each leak's draws in a loop over leaks
+        n_draws = unchecked.astype(np.int64) + sp
+        ends = np.cumsum(n_draws)
+        if n_leaks > 0 and ends[-1] > 0:
+            p = np.empty(ends[-1])
+            p[(ends - n_draws)[unchecked]] = p_spatial
+            p[ends[sp] - 1] = p_temporal
+            temporal[sp] = np.random.binomial(1, p)[ends[sp] - 1] == 1
+    else:
+        start = 0
+        for leak_idx in np.flatnonzero(unchecked).tolist() + [n_leaks]:
+            sp = np.flatnonzero(sp_covered[start:leak_idx] == 1) + start
+            if len(sp) > 0:
+                temporal[sp] = np.random.binomial(1, p_temporal, size=len(sp)) == 1
+            if leak_idx < n_leaks:
+                sp_covered[leak_idx] = np.random.binomial(1, p_spatial)
+            start = leak_idx
+    return sp_covered, (sp_covered == 1) & temporal
+
+
+def sequential_sum(values):
+    """Sum values in order, as a loop adding each value to 0 would.
+
+    Returns:
+        float: Sum, or the integer 0 if there are no values
+    """
+    if len(values) == 0:
+        return 0
+    return np.cumsum(values)[-1].item()
+
+
+def equipment_rates(equipment_groups, rates, n_groups):
+    """Sum the rates of leaks by equipment group, in order, as a loop adding each rate
+    to its equipment group would.
+
+    Args:
+        equipment_groups (array): Equipment group of each leak, starting at 1
+        rates (array): Rate of each leak
+        n_groups (int): Number of equipment groups at the site
+
+    Returns:
+        list: Rate of each equipment group, the integer 0 for groups without leaks
+    """
+    groups = np.asarray(equipment_groups, dtype=np.int64) - 1
+    sums = np.bincount(groups, weights=rates, minlength=n_groups).tolist()
+    counts = np.bincount(groups, minlength=n_groups).tolist()
+    return [rate if count else 0 for rate, count in zip(sums, counts)]
+
+
+class VisitBatch:
+    """Sites visited by a crew in a day, with what the crew's detection kernel found at
+    each visit, as flat arrays for sensors that detect emissions for all visits at once
+    (see Sensor.batch). Visits are in the order the crew made them.
+
+    Covered leaks of all visits are concatenated, leak_visit holds the visit of each and
+    leak_offsets where the leaks of each visit start. Equipment groups of all visits are
+    concatenated the same way (equipment_visit and equipment_offsets).
+    """
+
+    def __init__(self):
+        self.sites = []
+        self.dates = []
+        self.leaks = []
+        # Covered site rate, site rate and venting of each visit, as added
+        self.site_values = []
+        self._leak_rates = []
+        self._leak_visits = []
+        self._equipment_rates = []
+        self._covered_equipment_rates = []
+        self._equipment_visits = []
+
+    def __len__(self):
+        return len(self.sites)
+
+    def add(
+        self,
+        site,
+        date,
+        covered_leaks,
+        covered_leak_rates,
+        covered_equipment_rates,
+        covered_site_rate,
+        site_rate,
+        venting,
+        equipment_rates,
+    ):
+        """Add a site visit, with the results of the crew's detection kernel for the site
+        (see methods.crew.BaseCrew.covered_emissions).
+
+        Args:
+            site (dict): Visited site
+            date (datetime): Date and time of the visit
+            covered_leaks (list): Leaks the sensor can see
+            covered_leak_rates (array): Rate of each covered leak
+            covered_equipment_rates (list): Covered rate of each equipment group
+            covered_site_rate (float): Covered rate of the site
+            site_rate (float): Rate of the site
+            venting (float): Vented emissions of the site
+            equipment_rates (list): Rate of each equipment group
+        """
+        visit_idx = len(self.sites)
+        self.sites.append(site)
+        self.dates.append(date)
+        self.leaks.extend(covered_leaks)
+        self.site_values.append((covered_site_rate, site_rate, venting))
+        self._leak_rates.append(covered_leak_rates)
+        self._leak_visits.append(np.full(len(covered_leaks), visit_idx, dtype=np.int64))
+        self._covered_equipment_rates.extend(covered_equipment_rates)
+        self._equipment_rates.extend(equipment_rates)
+        self._equipment_visits.append(np.full(len(equipment_rates), visit_idx, dtype=np.int64))
+
+    def close(self):
+        """Build the arrays of the batch once all visits have been added."""
+        site_values = np.array(self.site_values, dtype=np.float64).reshape(-1, 3)
+        self.covered_site_rates = site_values[:, 0]
+        self.site_rates = site_values[:, 1]
+        self.venting = site_values[:, 2]
+        self.leak_rates = np.concatenate([np.empty(0)] + self._leak_rates)
+        self.leak_visit = np.concatenate([np.empty(0, dtype=np.int64)] + self._leak_visits)
+        self.n_leaks = np.bincount(self.leak_visit, minlength=len(self))
+        self.leak_offsets = np.concatenate([[0], np.cumsum(self.n_leaks)])
+        self.covered_equipment_rates = np.array(self._covered_equipment_rates, dtype=np.float64)
+        self.equipment_rates = np.array(self._equipment_rates, dtype=np.float64)
+        self.equipment_visit = np.concatenate(
+            [np.empty(0, dtype=np.int64)] + self._equipment_visits
+        )
+        self.equipment_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(self.equipment_visit, minlength=len(self)))]
+        )
+
+    def leak_count(self, mask):
+        """Number of covered leaks of each visit for which mask is True."""
+        return np.bincount(self.leak_visit[mask], minlength=len(self))
+
+    def equipment_sum(self, values):
+        """Sum of a value of each equipment group (ie. measured rates) by visit."""
+        return np.bincount(self.equipment_visit, weights=values, minlength=len(self))
+
+    def equipment_any(self, mask):
+        """Whether mask is True for any equipment group of each visit."""
+        return np.bincount(self.equipment_visit[mask], minlength=len(self)) > 0
+
+
+class Sensor:
+    """Sensor module of a method, imported the first time the crew that owns the sensor
+    detects emissions and kept for the rest of the simulation. Sensor modules are
+    either methods.sensors.{sensor type} or the module set as the sensor's mod_loc.
+
+    Sensor modules provide detect_emissions(crew, site, covered_leaks,
+    covered_equipment_rates, covered_site_rate, site_rate, venting, equipment_rates),
+    which the sensor calls with the results of the crew's detection kernel
+    (see methods.crew.BaseCrew.detect_emissions).
+
+    Sensor modules can also provide detect_emissions_batch(crew, batch), which is used
+    instead when present. It is called once a day with all sites visited by the crew
+    (a VisitBatch), and returns a dictionary of arrays:
+        found_leak (bool, by visit): Did the crew find emissions at the site
+        site_measured_rates (float, by visit, optional): Measured rate of the site.
+            Defaults to 0.
+        missed_leaks (int, by visit, optional): Covered leaks the crew missed, added to
+            the site's and the timeseries' missed leak counts. Defaults to 0.
+        detected (bool, by covered leak, optional): Leaks to tag. Tagged leaks that are
+            new add their measured rate to the site's measured rate. Defaults to none.
+        leak_measured_rates (float, by covered leak, optional): Measured rate of each
+            leak, required for detected leaks.
+        equip_measured_rates (float, by equipment group, optional): Measured rate of
+            each equipment group. Defaults to none.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): Method parameters
+        """
+        self.config = config
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            if self.config["sensor"]["mod_loc"] is None:
+                self._module = import_module(
+                    "methods.sensors.{}".format(self.config["sensor"]["type"])
+                )
+            else:
+                self._module = import_module(self.config["sensor"]["mod_loc"])
+        return self._module
+
+    @property
+    def batch(self):
+        """The detect_emissions_batch function of the sensor module, or None."""
+        return getattr(self.module, "detect_emissions_batch", None)
+
+    def detect_emissions(
+        self,
+        crew,
+        site,
+        covered_leaks,
+        covered_equipment_rates,
+        covered_site_rate,
+        site_rate,
+        venting,
+        equipment_rates,
+    ):
+        """Call the detect_emissions function of the sensor module.
+
+        Returns:
+            dict: Site detection results, see methods.sensors.default
+        """
+        # Looked up on every call, so the module's function can be replaced
+        return self.module.detect_emissions(
+            crew,
+            site,
+            covered_leaks,
+            covered_equipment_rates,
+            covered_site_rate,
+            site_rate,
+            venting,
+            equipment_rates,
+        )
@@ -31,3 +31,23 @@ def measured_rate(true_rate, QE):
         measured_rate = true_rate / denom
 
     return measured_rate
+
+
+def measured_rates(true_rates, QE):
+    """Measured rate of each true rate, with one quantification error drawn for each
+    (see measured_rate).
+
+    Args:
+        true_rates (array): True rates
+        QE (float): Standard deviation of the quantification error
+
+    Returns:
+        array: Measured rates
+    """
+    true_rates = np.asarray(true_rates, dtype=np.float64)
+    quant_error = np.random.normal(0, QE, size=len(true_rates))
+    return np.where(
+        quant_error >= 0,
+        true_rates + true_rates * quant_error,
+        true_rates / np.abs(quant_error - 1),
+    )
@@ -22,13 +22,14 @@ import numpy as np
 import random
 
 
-def determine_delay(virtual_world):
+def determine_delay(virtual_world, rng=None):
     """
     Generates the repair delay
         default: Expects a single value
         list: grabs a random value from a list of possibilities
         distribution: generates a value from a distribution
     Arg: virtual_world parameter dictionary
+         rng: numpy Generator used for the draws. Defaults to the global generators.
     Returns:
         Static Repair delay value based on different functions
     """
@@ -39,10 +40,14 @@ def determine_delay(virtual_world):
         delay = virtual_world["repair_delay"]["val"][0]
     elif virtual_world["repair_delay"]["type"] == "list":
         list_len = len(virtual_world["repair_delay"]["val"])
-        delay_ind = random.randint(0, list_len - 1)
+        if rng is None:
+            delay_ind = random.randint(0, list_len - 1)
+        else:
+            delay_ind = rng.integers(list_len)
         delay = virtual_world["repair_delay"]["val"][delay_ind]
     elif virtual_world["repair_delay"]["type"] == "distribution":
-        delay = np.random.lognormal(
+        lognormal = np.random.lognormal if rng is None else rng.lognormal
+        delay = lognormal(
             virtual_world["repair_delay"]["val"][0],
             virtual_world["repair_delay"]["val"][1],
         )
@@ -21,6 +21,7 @@
 import math
 import numpy as np
 from methods.funcs import measured_rate as get_measured_rate
+from methods.funcs import measured_rates as get_measured_rates
 from utils.attribution import update_tag
 
 
@@ -59,7 +60,6 @@ def detect_emissions(
 
 
     """
-    missed_leaks_str = "{}_missed_leaks".format(self.config["label"])
     equip_measured_rates = []
     site_measured_rate = 0
     found_leak = False
@@ -91,8 +91,7 @@ def detect_emissions(
             if is_new_leak:
                 site_measured_rate += get_measured_rate(leak["rate"], self.config["sensor"]["QE"])
         else:
-            site[missed_leaks_str] += 1
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += 1
+            self.add_missed_leaks(site, 1)
 
     site_dict = {
         "site": site,
@@ -104,3 +103,32 @@ def detect_emissions(
         "found_leak": found_leak,
     }
     return site_dict
+
+
+def detect_emissions_batch(self, batch):
+    """OGI camera method based on Ravikumar 2018, for all sites visited by a crew in a
+    day. The logistic curve parameters k and x0 are drawn for each leak, as in
+    detect_emissions. See methods.detection.Sensor for the returned values.
+    """
+    n_leaks = len(batch.leak_rates)
+    k = np.random.normal(4.9, 0.3, size=n_leaks)
+    x0 = np.random.normal(self.config["sensor"]["MDL"][0], self.config["sensor"]["MDL"][1], n_leaks)
+    x0 = np.log10(x0 * 3600)  # Convert from g/s to g/h and take log
+
+    prob_detect = np.zeros(n_leaks)
+    has_rate = batch.leak_rates != 0
+    x = np.log10(batch.leak_rates[has_rate] * 3600)  # Convert from g/s to g/h
+    with np.errstate(over="ignore"):
+        prob_detect[has_rate] = 1 / (1 + np.exp(-k[has_rate] * (x - x0[has_rate])))
+    detected = np.random.binomial(1, prob_detect) == 1
+
+    leak_measured_rates = np.zeros(n_leaks)
+    leak_measured_rates[detected] = get_measured_rates(
+        batch.leak_rates[detected], self.config["sensor"]["QE"]
+    )
+    return {
+        "found_leak": batch.leak_count(detected) > 0,
+        "detected": detected,
+        "leak_measured_rates": leak_measured_rates,
+        "missed_leaks": batch.leak_count(~detected),
+    }
@@ -19,6 +19,7 @@
 # ------------------------------------------------------------------------------
 import numpy as np
 from methods.funcs import measured_rate as get_measured_rate
+from methods.funcs import measured_rates as get_measured_rates
 from utils.attribution import update_tag
 
 
@@ -60,7 +61,6 @@ def detect_emissions(
 
 
     """
-    missed_leaks_str = "{}_missed_leaks".format(self.config["label"])
     equip_measured_rates = []
     site_measured_rate = 0
     found_leak = False
@@ -86,8 +86,7 @@ def detect_emissions(
             if is_new_leak:
                 site_measured_rate += measured_rate
         else:
-            site[missed_leaks_str] += 1
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += 1
+            self.add_missed_leaks(site, 1)
 
     site_dict = {
         "site": site,
@@ -99,3 +98,24 @@ def detect_emissions(
         "found_leak": found_leak,
     }
     return site_dict
+
+
+def detect_emissions_batch(self, batch):
+    """OGI camera method based on Zimmerle 2020, for all sites visited by a crew in a
+    day. See methods.detection.Sensor for the returned values.
+    """
+    mdl = self.config["sensor"]["MDL"]
+    # factor of 187 converts g/s to scf/h
+    prob_detect = np.minimum(mdl[0] * (187 * batch.leak_rates) ** mdl[1], 1)
+    detected = np.random.binomial(1, prob_detect) == 1
+
+    leak_measured_rates = np.zeros(len(detected))
+    leak_measured_rates[detected] = get_measured_rates(
+        batch.leak_rates[detected], self.config["sensor"]["QE"]
+    )
+    return {
+        "found_leak": batch.leak_count(detected) > 0,
+        "detected": detected,
+        "leak_measured_rates": leak_measured_rates,
+        "missed_leaks": batch.leak_count(~detected),
+    }
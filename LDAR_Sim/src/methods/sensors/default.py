@@ -17,7 +17,9 @@
 # along with this program.  If not, see <https://opensource.org/licenses/MIT>.
 #
 # ------------------------------------------------------------------------------
+import numpy as np
 from methods.funcs import measured_rate as get_measured_rate
+from methods.funcs import measured_rates as get_measured_rates
 from utils.attribution import update_tag
 
 
@@ -35,15 +37,13 @@ def detect_emissions(
     site_measured_rate = 0
     found_leak = False
     n_leaks = len(covered_leaks)
-    missed_leaks_str = "{}_missed_leaks".format(self.config["label"])
 
     if self.config["measurement_scale"] == "site":
         if covered_site_rate > self.config["sensor"]["MDL"][0]:
             found_leak = True
             site_measured_rate = get_measured_rate(covered_site_rate, self.config["sensor"]["QE"])
         else:
-            site[missed_leaks_str] += n_leaks
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+            self.add_missed_leaks(site, n_leaks)
     elif self.config["measurement_scale"] == "equipment":
         for rate in covered_equipment_rates:
             m_rate = get_measured_rate(rate, self.config["sensor"]["QE"])
@@ -54,8 +54,7 @@ def detect_emissions(
             equip_measured_rates.append(m_rate)
             site_measured_rate += m_rate
         if not found_leak:
-            site[missed_leaks_str] += n_leaks
-            self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+            self.add_missed_leaks(site, n_leaks)
 
     elif self.config["measurement_scale"] == "component":
         # If measurement scale is a leak, all leaks will be tagged
@@ -77,7 +76,7 @@ def detect_emissions(
                 if is_new_leak:
                     site_measured_rate += measured_rate
             else:
-                site[missed_leaks_str] += 1
+                self.add_missed_leaks(site, 1)
 
     # Put all necessary information in a dictionary to be assessed at end of day
     site_dict = {
@@ -90,3 +89,48 @@ def detect_emissions(
         "found_leak": found_leak,
     }
     return site_dict
+
+
+def detect_emissions_batch(self, batch):
+    """Detect emissions at all sites visited by a crew in a day, with the same single
+    value MDL threshold as detect_emissions. See methods.detection.Sensor for the
+    returned values.
+    """
+    mdl = self.config["sensor"]["MDL"][0]
+    QE = self.config["sensor"]["QE"]
+    n_visits = len(batch)
+
+    if self.config["measurement_scale"] == "site":
+        found_leak = batch.covered_site_rates > mdl
+        site_measured_rates = np.zeros(n_visits)
+        site_measured_rates[found_leak] = get_measured_rates(
+            batch.covered_site_rates[found_leak], QE
+        )
+        return {
+            "found_leak": found_leak,
+            "site_measured_rates": site_measured_rates,
+            "missed_leaks": np.where(found_leak, 0, batch.n_leaks),
+        }
+    elif self.config["measurement_scale"] == "equipment":
+        equip_measured_rates = get_measured_rates(batch.covered_equipment_rates, QE)
+        equip_found = equip_measured_rates > mdl
+        equip_measured_rates[~equip_found] = 0
+        found_leak = batch.equipment_any(equip_found)
+        return {
+            "found_leak": found_leak,
+            "site_measured_rates": batch.equipment_sum(equip_measured_rates),
+            "equip_measured_rates": equip_measured_rates,
+            "missed_leaks": np.where(found_leak, 0, batch.n_leaks),
+        }
+    elif self.config["measurement_scale"] == "component":
+        # If measurement scale is a leak, all leaks will be tagged
+        detected = batch.leak_rates > mdl
+        leak_measured_rates = np.zeros(len(detected))
+        leak_measured_rates[detected] = get_measured_rates(batch.leak_rates[detected], QE)
+        return {
+            "found_leak": batch.leak_count(detected) > 0,
+            "detected": detected,
+            "leak_measured_rates": leak_measured_rates,
+            "missed_leaks": batch.leak_count(~detected),
+        }
+    return {"found_leak": np.zeros(n_visits, dtype=bool)}
@@ -21,7 +21,6 @@
 import random
 
 import numpy as np
-from utils.generic_functions import geo_idx
 
 
 def detect_emissions(
@@ -38,14 +37,8 @@ def detect_emissions(
     site_measured_rate = 0
     found_leak = False
     n_leaks = len(covered_leaks)
-    missed_leaks_str = "{}_missed_leaks".format(self.config["label"])
     # extract the wind speed on site based on site's geo indices
-    site_lat = np.float16(site["lat"])
-    site_lon = np.float16(site["lon"])
-    lat_idx = geo_idx(site_lat, self.state["weather"].latitude)
-    lon_idx = geo_idx(site_lon, self.state["weather"].longitude)
-    ti = self.state["t"].current_timestep
-    windspeed = self.state["weather"].winds[ti, lat_idx, lon_idx]
+    windspeed = self.state["site_weather"].value("winds", site, self.state["t"].current_date)
     # MDL is calculated based on wind speed and parameter
     # listed in Jacob et al., 2016
     # For point source, MDL is proportion to wind speed
@@ -64,8 +57,7 @@ def detect_emissions(
 
     else:
         site_dict = None
-        site[missed_leaks_str] += n_leaks
-        self.timeseries[missed_leaks_str][self.state["t"].current_timestep] += n_leaks
+        self.add_missed_leaks(site, n_leaks)
 
     site_dict = {
         "site": site,
@@ -78,3 +70,25 @@ def detect_emissions(
     }
 
     return site_dict
+
+
+def detect_emissions_batch(self, batch):
+    """Detect emissions at all sites visited by a satellite in a day, with the wind
+    dependent MDL of detect_emissions. See methods.detection.Sensor for the returned
+    values.
+    """
+    # extract the wind speed on each site based on the site's geo indices
+    windspeed = self.state["site_weather"].values("winds", batch.sites, batch.dates)
+
+    # MDL is calculated based on wind speed and parameter
+    # listed in Jacob et al., 2016
+    Q_min = self.config["sensor"]["MDL"][0] * (self.config["sensor"]["MDL"][1] / windspeed)
+    found_leak = batch.covered_site_rates > Q_min
+    # Based on Table1 of Jacob et al.,2016, the precision of
+    # GHGSat can be off by sigma (usually between 1% to 5%)
+    sigma = np.random.choice([0.01, 0.02, 0.03, 0.04, 0.05], size=len(batch))
+    return {
+        "found_leak": found_leak,
+        "site_measured_rates": np.where(found_leak, batch.covered_site_rates * (1 - sigma), 0),
+        "missed_leaks": np.where(found_leak, 0, batch.n_leaks),
+    }
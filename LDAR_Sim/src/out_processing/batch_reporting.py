@@ -19,7 +19,6 @@
 # ------------------------------------------------------------------------------
 
 import datetime
-import math
 import os
 import warnings
 from pathlib import Path
@@ -27,201 +26,281 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 import plotnine as pn
+from config.output_flag_mapping import SITES, TIMESERIES
 from mizani.formatters import date_format
+from out_processing.output_store import CSV, output_store
+from out_processing.plot_queue import PlotJob, PlotQueue
+from out_processing.quantile_sketch import DEFAULT_CAPACITY, DailyQuantileSketch
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
 
-class BatchReporting:
-    def __init__(self, output_directory, start_date, ref_program, base_program):
+# Timeseries columns read by batch reporting, with the cost of each method
+TIMESERIES_COLUMNS = [
+    "datetime",
+    "daily_emissions_kg",
+    "active_leaks",
+    "cum_repaired_leaks",
+    "rolling_cost_estimate",
+]
+# Descriptive statistics of each program, as (row, timeseries column). Statistics are of
+# the median of each simulation over the reported dates.
+DESCRIPTIVES = (
+    ("median active leaks", "active_leaks"),
+    ("median daily emissions", "daily_emissions_kg"),
+    ("cumulative repaired leaks", "cum_repaired_leaks"),
+)
+# Timeseries columns plotted for each day of the reported dates
+DAILY_COLUMNS = ("active_leaks", "daily_emissions_kg", "rolling_cost_estimate")
+# Quantiles of the daily bands of plots
+LOW_QUANTILE = 0.025
+HIGH_QUANTILE = 0.975
+
+
+class ProgramSummary:
+    """Running summary of the timeseries outputs of a program, updated as each
+    simulation is read: the median over the reported dates of each simulation (for
+    descriptive statistics), a sketch of the distribution across simulations of each
+    plotted timeseries on each reported date (see
+    out_processing.quantile_sketch.DailyQuantileSketch), and the yearly cost per site of
+    each method. Daily emissions are per site. Other timeseries columns are not kept.
+
+    Summaries of separate simulations of a program can be merged (merge).
+    """
+
+    def __init__(self, program, cost_columns, capacity=DEFAULT_CAPACITY):
         """
-        Prepare output csv files to glean summary statistics and plotting data.
+        Args:
+            program (str): Program name
+            cost_columns (list): Timeseries columns with the daily cost of each method
+            capacity (int, optional): Capacity of daily sketches. Defaults to
+                DEFAULT_CAPACITY.
         """
-        self.output_directory = output_directory
-        self.start_date = start_date
-        self.ref_program = ref_program
-        start_date = datetime.datetime(*start_date).strftime("%m-%d-%Y")
-
-        self.directories = [f.name for f in os.scandir(output_directory) if f.is_dir()]
-
-        # For each folder, build a dataframe combining all necessary files
-        self.all_data = [
-            [
-                pd.read_csv(Path(f))
-                for f in os.scandir(fldr)
-                if f.is_file() and "timeseries" in f.name
-            ]
-            for fldr in os.scandir(output_directory)
-            if fldr.is_dir()
-        ]
-        self.site_data = [
+        self.program = program
+        self.cost_columns = cost_columns
+        self.capacity = capacity
+        self.medians = {column: [] for _, column in DESCRIPTIVES}
+        self.daily = {}
+        self.method_costs = []
+
+    @property
+    def n_simulations(self):
+        return len(self.method_costs)
+
+    def add(self, timeseries, report_dates, n_sites):
+        """Add the timeseries of a simulation.
+
+        Args:
+            timeseries (DataFrame): Timeseries output, with TIMESERIES_COLUMNS and the
+                cost columns
+            report_dates (array): Whether each day is reported (after the spin-up)
+            n_sites (int): Number of sites
+        """
+        reported = {
+            column: reported_values(timeseries, column, report_dates, n_sites)
+            for column in TIMESERIES_COLUMNS
+            if column != "datetime"
+        }
+
+        for _, column in DESCRIPTIVES:
+            self.medians[column].append(pd.Series(reported[column]).quantile(0.5))
+        for column in DAILY_COLUMNS:
+            if column not in self.daily:
+                self.daily[column] = DailyQuantileSketch(len(reported[column]), self.capacity)
+            self.daily[column].add(reported[column])
+        n_timesteps = len(timeseries)
+        self.method_costs.append(
             [
-                pd.read_csv(Path(f))
-                for f in os.scandir(fldr)
-                if f.is_file() and "sites_output" in f.name
+                (sum(timeseries[column].tolist()) / n_timesteps / n_sites) * 365
+                for column in self.cost_columns
             ]
-            for fldr in os.scandir(output_directory)
-            if fldr.is_dir()
-        ]
+        )
 
-        # Delete any empty lists (to enable additional folders, e.g. for sensitivity analysis)
-        # Get vector of dates
+    def merge(self, other):
+        """Add the simulations of another summary of the program, after those of this
+        summary.
 
-        dates = pd.to_datetime(self.all_data[0][0].datetime)
-        mask = dates > start_date
-        self.dates_trunc = dates.loc[mask]
+        Args:
+            other (ProgramSummary): Summary
+        """
+        for column, medians in other.medians.items():
+            self.medians[column].extend(medians)
+        for column, sketch in other.daily.items():
+            if column in self.daily:
+                self.daily[column].merge(sketch)
+            else:
+                self.daily[column] = sketch
+        self.method_costs.extend(other.method_costs)
 
-        # Figure out the number of sites used in the simulation
-        # (have to do it this way because n can be sampled or not)
-        self.n_sites = len(self.site_data[0][0])
-
-        # ------- Build list of emissions dataframes ------ #
-        self.emission_dfs = [[] for i in range(len(self.all_data))]
-        for i in range(len(self.all_data)):
-            for j in self.all_data[i]:
-                self.emission_dfs[i].append(j["daily_emissions_kg"])
-            self.emission_dfs[i] = pd.concat(
-                self.emission_dfs[i],
-                axis=1,
-                keys=[i for i in range(len(self.all_data[i]))],
-            )
-            self.emission_dfs[i] = self.emission_dfs[i] / self.n_sites
-
-            # New columns
-            self.emission_dfs[i]["program"] = self.directories[i]
-
-        # Add dates
-        for i in range(len(self.emission_dfs)):
-            self.emission_dfs[i] = pd.concat([self.emission_dfs[i], dates], axis=1)
-
-            # Axe spinup year
-            self.emission_dfs[i]["datetime"] = pd.to_datetime(self.emission_dfs[i]["datetime"])
-            mask = self.emission_dfs[i]["datetime"] > start_date
-            self.emission_dfs[i] = self.emission_dfs[i].loc[mask]
-
-        # ------- Build list of active leak dataframes ------- #
-        self.active_leak_dfs = [[] for i in range(len(self.all_data))]
-        for i in range(len(self.all_data)):
-            for j in self.all_data[i]:
-                self.active_leak_dfs[i].append(j["active_leaks"])
-            self.active_leak_dfs[i] = pd.concat(
-                self.active_leak_dfs[i],
-                axis=1,
-                keys=[i for i in range(len(self.all_data[i]))],
+    def descriptives(self):
+        """Mean, median, standard deviation, min and max of the simulation medians of
+        each DESCRIPTIVES column.
+
+        Returns:
+            DataFrame: Statistics, with a row for each DESCRIPTIVES column
+        """
+        data = []
+        for _, column in DESCRIPTIVES:
+            medians = pd.Series(self.medians[column], dtype=np.float64)
+            data.append(
+                {
+                    "mean": medians.mean(),
+                    "median": medians.median(),
+                    "std": medians.std(),
+                    "min": medians.min(),
+                    "max": medians.max(),
+                }
             )
+        return pd.DataFrame(data, index=[row for row, _ in DESCRIPTIVES])
 
-            # New columns
-            self.active_leak_dfs[i]["program"] = self.directories[i]
+    def daily_stats(self, column):
+        """Get the mean, standard deviation and LOW_QUANTILE and HIGH_QUANTILE quantiles
+        of the simulations on each reported date, from the sketch of the column.
 
-        # Add dates
-        for i in range(len(self.active_leak_dfs)):
-            self.active_leak_dfs[i] = pd.concat([self.active_leak_dfs[i], dates], axis=1)
+        Args:
+            column (str): DAILY_COLUMNS column
 
-            # Axe spinup year
-            self.active_leak_dfs[i]["datetime"] = pd.to_datetime(
-                self.active_leak_dfs[i]["datetime"]
-            )
-            mask = self.active_leak_dfs[i]["datetime"] > start_date
-            self.active_leak_dfs[i] = self.active_leak_dfs[i].loc[mask]
-
-        # ------- Build list of repaired leak dataframes ------- #
-        self.repair_leak_dfs = [[] for i in range(len(self.all_data))]
-        for i in range(len(self.all_data)):
-            for j in self.all_data[i]:
-                self.repair_leak_dfs[i].append(j["cum_repaired_leaks"])
-            self.repair_leak_dfs[i] = pd.concat(
-                self.repair_leak_dfs[i],
-                axis=1,
-                keys=[i for i in range(len(self.all_data[i]))],
-            )
-
-            # New columns
-            self.repair_leak_dfs[i]["program"] = self.directories[i]
+        Returns:
+            dict: "mean", "std", "low" and "high" arrays, with a value for each date
+        """
+        sketch = self.daily[column]
+        low, high = sketch.quantiles([LOW_QUANTILE, HIGH_QUANTILE])
+        return {"mean": sketch.mean(), "std": sketch.std(), "low": low, "high": high}
+
+    def daily_table(self, column, dates, sim_values):
+        """Get a long table of the value of each simulation on each reported date, with
+        the statistics of the date (see daily_stats). Simulations are numbered in order
+        (variable).
+
+        Args:
+            column (str): DAILY_COLUMNS column
+            dates (Series): Reported dates
+            sim_values (iterable): Reported values of each simulation, in the order
+                they were added in
+
+        Returns:
+            DataFrame: Table, with datetime, mean, std, low, high, program, variable and
+                value columns
+        """
+        stats = self.daily_stats(column)
+        dates = dates.to_numpy()
+        tables = []
+        for sim_idx, values in enumerate(sim_values):
+            table = {"datetime": dates}
+            table.update(stats)
+            table["program"] = self.program
+            table["variable"] = sim_idx
+            table["value"] = values
+            tables.append(pd.DataFrame(table))
+        return pd.concat(tables, ignore_index=True)
+
+
+def reported_values(timeseries, column, report_dates, n_sites):
+    """Get the values of a timeseries column on the reported dates, per site for daily
+    emissions.
+
+    Args:
+        timeseries (DataFrame): Timeseries output
+        column (str): Column
+        report_dates (array): Whether each day is reported
+        n_sites (int): Number of sites
+
+    Returns:
+        array: Values
+    """
+    values = timeseries[column].to_numpy()
+    if column == "daily_emissions_kg":
+        values = values / n_sites
+    return values[report_dates]
 
-            # Add dates
-        for i in range(len(self.repair_leak_dfs)):
-            self.repair_leak_dfs[i] = pd.concat([self.repair_leak_dfs[i], dates], axis=1)
 
-            # Axe spinup year
-            self.repair_leak_dfs[i]["datetime"] = pd.to_datetime(
-                self.repair_leak_dfs[i]["datetime"]
-            )
-            mask = self.repair_leak_dfs[i]["datetime"] > start_date
-            self.repair_leak_dfs[i] = self.repair_leak_dfs[i].loc[mask]
-
-        # ------- Build list of cost dataframes ------- #
-        self.cost_dfs = [[] for i in range(len(self.all_data))]
-        for i in range(len(self.all_data)):
-            for j in self.all_data[i]:
-                self.cost_dfs[i].append(j["rolling_cost_estimate"])
-            self.cost_dfs[i] = pd.concat(
-                self.cost_dfs[i], axis=1, keys=[i for i in range(len(self.all_data[i]))]
-            )
-            self.cost_dfs[i] = self.cost_dfs[i]
+class BatchReporting:
+    def __init__(self, output_directory, start_date, ref_program, base_program, output_format=CSV):
+        """
+        Prepare output files to glean summary statistics and plotting data. The
+        timeseries output of each simulation is read once, only with the columns used
+        by reports (see out_processing.output_store), and summarized into a
+        ProgramSummary for each program. Plotted columns are read again when the daily
+        value of every simulation is output (see batch_plots).
+        """
+        self.output_directory = output_directory
+        self.start_date = start_date
+        self.ref_program = ref_program
+        start_date = datetime.datetime(*start_date).strftime("%m-%d-%Y")
 
-            # New columns
-            self.cost_dfs[i]["program"] = self.directories[i]
+        self.directories = [f.name for f in os.scandir(output_directory) if f.is_dir()]
+        self.outputs = [
+            output_store(Path(output_directory) / program, program, output_format)
+            for program in self.directories
+        ]
 
-        # Add dates
-        for i in range(len(self.cost_dfs)):
-            self.cost_dfs[i] = pd.concat([self.cost_dfs[i], dates], axis=1)
+        # Figure out the number of sites used in the simulation
+        # (have to do it this way because n can be sampled or not)
+        first_outputs = self.outputs[0]
+        self.n_sites = len(
+            first_outputs.read(SITES, first_outputs.simulations(SITES)[0], columns=["facility_ID"])
+        )
 
-            # Axe spinup
-            self.cost_dfs[i]["datetime"] = pd.to_datetime(self.cost_dfs[i]["datetime"])
-            mask = self.cost_dfs[i]["datetime"] > start_date
-            self.cost_dfs[i] = self.cost_dfs[i].loc[mask]
+        self.summaries = []
+        self.report_dates = None
+        for program, outputs in zip(self.directories, self.outputs):
+            simulations = outputs.simulations(TIMESERIES)
+            cost_columns = []
+            if len(simulations) > 0:
+                cost_columns = [
+                    column
+                    for column in outputs.columns(TIMESERIES, simulations[0])
+                    if column.endswith("cost") and column != "total_daily_cost"
+                ]
+            summary = ProgramSummary(program, cost_columns)
+            for simulation in simulations:
+                timeseries = outputs.read(
+                    TIMESERIES, simulation, columns=TIMESERIES_COLUMNS + cost_columns
+                )
+                if self.report_dates is None:
+                    # Get vector of dates, and axe spinup year
+                    dates = pd.to_datetime(timeseries["datetime"])
+                    mask = dates > start_date
+                    self.dates_trunc = dates.loc[mask]
+                    self.report_dates = mask.to_numpy()
+                summary.add(timeseries, self.report_dates, self.n_sites)
+            self.summaries.append(summary)
 
         return
 
+    def _ref_first(self):
+        # Program summaries, with the reference program at the top of the list
+        return [summary for summary in self.summaries if summary.program == self.ref_program] + [
+            summary for summary in self.summaries if summary.program != self.ref_program
+        ]
+
+    def _sim_values(self, program, column):
+        # Reported values of a timeseries column for each simulation of a program, read
+        # back from its outputs
+        outputs = self.outputs[self.directories.index(program)]
+        for simulation in outputs.simulations(TIMESERIES):
+            timeseries = outputs.read(TIMESERIES, simulation, columns=[column])
+            yield reported_values(timeseries, column, self.report_dates, self.n_sites)
+
+    def _daily_table(self, column):
+        # Long table of the daily values of all programs, reference program first
+        return pd.concat(
+            [
+                summary.daily_table(
+                    column, self.dates_trunc, self._sim_values(summary.program, column)
+                )
+                for summary in self._ref_first()
+            ],
+            ignore_index=True,
+        )
+
     def program_report(self):
         """
         Output a spreadsheet for each program with descriptive statistics.
         """
-        for i in range(len(self.active_leak_dfs)):
-            data = [
-                {
-                    "mean": self.active_leak_dfs[i].describe(include=[np.number]).loc["50%"].mean(),
-                    "median": self.active_leak_dfs[i]
-                    .describe(include=[np.number])
-                    .loc["50%"]
-                    .median(),
-                    "std": self.active_leak_dfs[i].describe(include=[np.number]).loc["50%"].std(),
-                    "min": self.active_leak_dfs[i].describe(include=[np.number]).loc["50%"].min(),
-                    "max": self.active_leak_dfs[i].describe(include=[np.number]).loc["50%"].max(),
-                },
-                {
-                    "mean": self.emission_dfs[i].describe(include=[np.number]).loc["50%"].mean(),
-                    "median": self.emission_dfs[i]
-                    .describe(include=[np.number])
-                    .loc["50%"]
-                    .median(),
-                    "std": self.emission_dfs[i].describe(include=[np.number]).loc["50%"].std(),
-                    "min": self.emission_dfs[i].describe(include=[np.number]).loc["50%"].min(),
-                    "max": self.emission_dfs[i].describe(include=[np.number]).loc["50%"].max(),
-                },
-                {
-                    "mean": self.repair_leak_dfs[i].describe(include=[np.number]).loc["50%"].mean(),
-                    "median": self.repair_leak_dfs[i]
-                    .describe(include=[np.number])
-                    .loc["50%"]
-                    .median(),
-                    "std": self.repair_leak_dfs[i].describe(include=[np.number]).loc["50%"].std(),
-                    "min": self.repair_leak_dfs[i].describe(include=[np.number]).loc["50%"].min(),
-                    "max": self.repair_leak_dfs[i].describe(include=[np.number]).loc["50%"].max(),
-                },
-            ]
-            output_df = pd.DataFrame(data)
-            output_df.rename(
-                index={
-                    0: "median active leaks",
-                    1: "median daily emissions",
-                    2: "cumulative repaired leaks",
-                },
-                inplace=True,
-            )
-            output_df.to_csv(
-                self.output_directory
-                / "{}_descriptives.csv".format(self.active_leak_dfs[i]["program"].iloc[0]),
+        for summary in self.summaries:
+            summary.descriptives().to_csv(
+                self.output_directory / "{}_descriptives.csv".format(summary.program),
                 index=True,
             )
 
@@ -267,372 +346,319 @@ class BatchReporting:
 
         return
 
-    def batch_plots(self):
+    def batch_plots(self, plot_queue=None):
+        """
+        Output plotting data and figures comparing programs. Figures are rendered by the
+        plot_queue (out_processing.plot_queue.PlotQueue) when one is given, otherwise
+        before returning.
+        """
+        if plot_queue is None:
+            plot_queue = PlotQueue()
         # First, put together active leak data and output for live plotting functionality
         # (no AL plot here currently)
-        dfs = self.active_leak_dfs
-
-        for i in range(len(dfs)):
-            n_cols = dfs[i].shape[1]
-            dfs[i]["mean"] = dfs[i].iloc[:, 0:n_cols].mean(axis=1, numeric_only=True)
-            dfs[i]["std"] = dfs[i].iloc[:, 0:n_cols].std(axis=1, numeric_only=True)
-            dfs[i]["low"] = dfs[i].iloc[:, 0:n_cols].quantile(0.025, axis=1, numeric_only=True)
-            dfs[i]["high"] = dfs[i].iloc[:, 0:n_cols].quantile(0.975, axis=1, numeric_only=True)
-            dfs[i]["program"] = self.directories[i]
-
-        # Move reference program to the top of the list
-        for i, df in enumerate(dfs):
-            if df["program"].iloc[0] == self.ref_program:
-                dfs.insert(0, dfs.pop(i))
-
-        # Arrange dfs for plot 1
-        dfs_p1 = dfs.copy()
-        for i in range(len(dfs_p1)):
-            # Reshape
-            dfs_p1[i] = pd.melt(
-                dfs_p1[i], id_vars=["datetime", "mean", "std", "low", "high", "program"]
-            )
-
-        # Combine dataframes into single dataframe for plotting
-        df_p1: pd.DataFrame = pd.concat(dfs_p1, ignore_index=True)
+        df_p1 = self._daily_table("active_leaks")
 
         # Output Emissions df for other uses (e.g. live plot)
         df_p1.to_csv(self.output_directory / "mean_active_leaks.csv", index=True)
 
         # Now repeat for emissions (which will actually be used for batch plotting)
-        dfs = self.emission_dfs
-
-        for i in range(len(dfs)):
-            n_cols = dfs[i].shape[1]
-            dfs[i]["mean"] = dfs[i].iloc[:, 0:n_cols].mean(axis=1, numeric_only=True)
-            dfs[i]["std"] = dfs[i].iloc[:, 0:n_cols].std(axis=1, numeric_only=True)
-            dfs[i]["low"] = dfs[i].iloc[:, 0:n_cols].quantile(0.025, axis=1, numeric_only=True)
-            dfs[i]["high"] = dfs[i].iloc[:, 0:n_cols].quantile(0.975, axis=1, numeric_only=True)
-            dfs[i]["program"] = self.directories[i]
-
-            # Move reference program to the top of the list
-        for i, df in enumerate(dfs):
-            if df["program"].iloc[0] == self.ref_program:
-                dfs.insert(0, dfs.pop(i))
-
-        # Arrange dfs for plot 1
-        dfs_p1 = dfs.copy()
-        for i in range(len(dfs_p1)):
-            # Reshape
-            dfs_p1[i] = pd.melt(
-                dfs_p1[i], id_vars=["datetime", "mean", "std", "low", "high", "program"]
-            )
-
-        # Combine dataframes into single dataframe for plotting
-        df_p1: pd.DataFrame = pd.concat(dfs_p1, ignore_index=True)
+        df_p1 = self._daily_table("daily_emissions_kg")
 
         # Output Emissions df for other uses (e.g. live plot)
         df_p1.to_csv(self.output_directory / "mean_emissions.csv", index=True)
 
         df_p1["var_prog"] = df_p1["variable"].astype(str) + df_p1["program"].astype(str)
 
-        # Make plots from list of dataframes - one entry per dataframe
-        pn.theme_set(pn.theme_linedraw())
-        plot1 = (
-            pn.ggplot(None)
-            + pn.aes("datetime", "value", group="program")
-            + pn.geom_line(
-                df_p1,
-                pn.aes("datetime", "value", group="var_prog", colour="program"),
-                size=0.1,
+        plot_queue.submit(
+            PlotJob(
+                render_emissions_timeseries,
+                self.output_directory / "emissions_timeseries.png",
+                {"df_p1": df_p1[["datetime", "value", "var_prog", "program", "mean"]]},
             )
-            + pn.geom_line(df_p1, pn.aes("datetime", "mean", colour="program"), size=1)
-            + pn.ylab("Daily emissions (kg/site)")
-            + pn.xlab("")
-            + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
-            + pn.scale_x_datetime(labels=date_format("%Y"))
-            + pn.scale_y_continuous()
-            + pn.aes(ymin=0)
-            + pn.labs(color="Program", fill="Program")
-            + pn.theme(
-                panel_border=pn.element_rect(colour="black", fill=None, size=2),
-                panel_grid_minor_x=pn.element_blank(),
-                panel_grid_major_x=pn.element_blank(),
-                panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-                panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
-            )
-        )
-        plot1.save(
-            self.output_directory / "emissions_timeseries.png",
-            width=7,
-            height=3,
-            dpi=900,
-            verbose=False,
         )
 
-        boxplot = (
-            pn.ggplot(None)
-            + pn.aes("program", "mean")
-            + pn.geom_boxplot(df_p1, pn.aes("program", "mean", fill="program"))
-            + pn.ylab("Daily Emissions (kg/site)")
-            + pn.scale_fill_hue(h=0.15, l=0.25, s=0.9)
-            + pn.labs(color="program", fill="program")
-            + pn.theme(
-                panel_border=pn.element_rect(colour="black", fill=None, size=2),
-                panel_grid_minor_x=pn.element_blank(),
-                panel_grid_major_x=pn.element_blank(),
-                panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-                panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        plot_queue.submit(
+            PlotJob(
+                render_emissions_boxplot,
+                self.output_directory / "emissions_boxplot.png",
+                {"df_p1": df_p1[["program", "mean"]]},
             )
         )
-        boxplot.save(self.output_directory / "emissions_boxplot.png", dpi=900, verbose=False)
 
         # Build relative mitigation plots
-        dfs_p2 = dfs.copy()
-
-        for i in dfs_p2[1:]:
-            i["mean_dif"] = 0
-            i["std_dif"] = 0
-            i["mean_ratio"] = 0
-            i["std_ratio"] = 0
-            for j in range(len(i)):
-                ref_mean = dfs_p2[0].loc[dfs_p2[0].index[j], "mean"]
-                ref_std = dfs_p2[0].loc[dfs_p2[0].index[j], "std"]
-                alt_mean = i.loc[i.index[j], "mean"]
-                alt_std = i.loc[i.index[j], "std"]
-
-                i.loc[i.index[j], "mean_dif"] = alt_mean - ref_mean
-                i.loc[i.index[j], "std_dif"] = math.sqrt(
-                    math.pow(alt_std, 2) + math.pow(ref_std, 2)
-                )
-                i.loc[i.index[j], "mean_ratio"] = alt_mean / ref_mean
-                i.loc[i.index[j], "std_ratio"] = math.sqrt(
-                    math.pow((alt_std / alt_mean), 2) + math.pow((ref_std / ref_mean), 2)
-                )
-
-        # Build plotting dataframe
-        df_p2 = self.dates_trunc.copy().to_frame()
-        df_p2["program"] = dfs_p2[1]["program"]
-        df_p2["mean_dif"] = dfs_p2[1]["mean_dif"]
-        df_p2["std_dif"] = dfs_p2[1]["std_dif"]
-        df_p2["mean_ratio"] = dfs_p2[1]["mean_ratio"]
-        df_p2["std_ratio"] = dfs_p2[1]["std_ratio"]
-
-        df_p2["low_dif"] = dfs_p2[1]["mean_dif"] - 2 * dfs_p2[1]["std_dif"]
-        df_p2["high_dif"] = dfs_p2[1]["mean_dif"] + 2 * dfs_p2[1]["std_dif"]
-        df_p2["low_ratio"] = dfs_p2[1]["mean_ratio"] / (
-            dfs_p2[1]["mean_ratio"] + 2 * dfs_p2[1]["std_ratio"]
-        )
-        df_p2["high_ratio"] = dfs_p2[1]["mean_ratio"] + 2 * dfs_p2[1]["std_ratio"]
-
-        pd.options.mode.chained_assignment = None
-        dfs2_list = [df_p2]
-        for i in dfs_p2[2:]:
-            i["low_dif"] = i["mean_dif"] - 2 * i["std_dif"]
-            i["high_dif"] = i["mean_dif"] + 2 * i["std_dif"]
-            i["low_ratio"] = i["mean_ratio"] / (i["mean_ratio"] + 2 * i["std_ratio"])
-            i["high_ratio"] = i["mean_ratio"] + 2 * i["std_ratio"]
-            short_df = i[
-                [
-                    "program",
-                    "mean_dif",
-                    "std_dif",
-                    "low_dif",
-                    "high_dif",
-                    "mean_ratio",
-                    "std_ratio",
-                    "low_ratio",
-                    "high_ratio",
-                ]
-            ]
-            short_df["datetime"] = np.array(self.dates_trunc)
-            dfs2_list.append(short_df)
+        summaries = self._ref_first()
+        ref_stats = summaries[0].daily_stats("daily_emissions_kg")
+        ref_mean = ref_stats["mean"]
+        ref_std = ref_stats["std"]
+        dfs2_list = []
+        for summary in summaries[1:]:
+            alt_stats = summary.daily_stats("daily_emissions_kg")
+            alt_mean = alt_stats["mean"]
+            alt_std = alt_stats["std"]
+            df_alt = self.dates_trunc.copy().to_frame()
+            df_alt["program"] = summary.program
+            with np.errstate(divide="ignore", invalid="ignore"):
+                df_alt["mean_dif"] = alt_mean - ref_mean
+                df_alt["std_dif"] = np.sqrt(alt_std**2 + ref_std**2)
+                df_alt["mean_ratio"] = alt_mean / ref_mean
+                df_alt["std_ratio"] = np.sqrt((alt_std / alt_mean) ** 2 + (ref_std / ref_mean) ** 2)
+            df_alt["low_dif"] = df_alt["mean_dif"] - 2 * df_alt["std_dif"]
+            df_alt["high_dif"] = df_alt["mean_dif"] + 2 * df_alt["std_dif"]
+            df_alt["low_ratio"] = df_alt["mean_ratio"] / (
+                df_alt["mean_ratio"] + 2 * df_alt["std_ratio"]
+            )
+            df_alt["high_ratio"] = df_alt["mean_ratio"] + 2 * df_alt["std_ratio"]
+            dfs2_list.append(df_alt)
 
         df_p2 = pd.concat(dfs2_list, ignore_index=True)
 
         # Make plot 2
-        plot2 = (
-            pn.ggplot(None)
-            + pn.aes("datetime", "mean_dif", group="program")
-            + pn.geom_ribbon(
-                df_p2,
-                pn.aes(ymin="low_dif", ymax="high_dif", fill="program"),
-                alpha=0.2,
-            )
-            + pn.geom_line(df_p2, pn.aes("datetime", "mean_dif", colour="program"), size=1)
-            + pn.ylab("Daily emissions difference (kg/site)")
-            + pn.xlab("")
-            + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
-            + pn.scale_x_datetime(labels=date_format("%Y"))
-            +
-            #        pn.scale_y_continuous(trans='log10') +
-            pn.labs(color="Program", fill="Program")
-            + pn.theme(
-                panel_border=pn.element_rect(colour="black", fill=None, size=2),
-                panel_grid_minor_x=pn.element_blank(),
-                panel_grid_major_x=pn.element_blank(),
-                panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-                panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        plot_queue.submit(
+            PlotJob(
+                render_emissions_difference,
+                self.output_directory / "emissions_difference.png",
+                {"df_p2": df_p2},
             )
         )
-        plot2.save(
-            self.output_directory / "emissions_difference.png",
-            width=7,
-            height=3,
-            dpi=900,
-            verbose=False,
-        )
 
         # Make plot 3
-        plot3 = (
-            pn.ggplot(None)
-            + pn.aes("datetime", "mean_ratio", group="program")
-            + pn.geom_ribbon(
-                df_p2,
-                pn.aes(ymin="low_ratio", ymax="high_ratio", fill="program"),
-                alpha=0.2,
+        plot_queue.submit(
+            PlotJob(
+                render_emissions_ratio,
+                self.output_directory / "emissions_ratio.png",
+                {"df_p2": df_p2},
             )
-            + pn.geom_hline(yintercept=1, size=0.5, colour="blue")
-            + pn.geom_line(df_p2, pn.aes("datetime", "mean_ratio", colour="program"), size=1)
-            + pn.ylab("Emissions ratio")
-            + pn.xlab("")
-            + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
-            + pn.scale_x_datetime(labels=date_format("%Y"))
-            + pn.labs(color="Program", fill="Program")
-            + pn.theme(
-                panel_border=pn.element_rect(colour="black", fill=None, size=2),
-                panel_grid_minor_x=pn.element_blank(),
-                panel_grid_major_x=pn.element_blank(),
-                panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-                panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
-            )
-        )
-        plot3.save(
-            self.output_directory / "emissions_ratio.png",
-            width=7,
-            height=3,
-            dpi=900,
-            verbose=False,
         )
 
         # ---------------------------------------
         # ------ Figure to compare costs  ------
-        dfs = self.cost_dfs
-
-        for i in range(len(dfs)):
-            n_cols = dfs[i].shape[1]
-            dfs[i]["mean"] = dfs[i].iloc[:, 0:n_cols].mean(axis=1, numeric_only=True)
-            dfs[i]["std"] = dfs[i].iloc[:, 0:n_cols].std(axis=1, numeric_only=True)
-            dfs[i]["low"] = dfs[i].iloc[:, 0:n_cols].quantile(0.025, axis=1, numeric_only=True)
-            dfs[i]["high"] = dfs[i].iloc[:, 0:n_cols].quantile(0.975, axis=1, numeric_only=True)
-            dfs[i]["program"] = self.directories[i]
-
-        # Move reference program to the top of the list
-        for i, df in enumerate(dfs):
-            if df["program"].iloc[0] == self.ref_program:
-                dfs.insert(0, dfs.pop(i))
-
-        # Arrange dfs for plot 1
-        dfs_p1 = dfs.copy()
-        for i in range(len(dfs_p1)):
-            # Reshape
-            dfs_p1[i] = pd.melt(
-                dfs_p1[i], id_vars=["datetime", "mean", "std", "low", "high", "program"]
-            )
-
-        # Combine dataframes into single dataframe for plotting
-        df_p1 = pd.concat(dfs_p1, ignore_index=True)
+        df_p1 = self._daily_table("rolling_cost_estimate")
 
         # Output Emissions df for other uses (e.g. live plot)
         df_p1.to_csv(self.output_directory / "cost_estimate_temporal.csv", index=True)
 
-        # Make plots from list of dataframes - one entry per dataframe
-        pn.theme_set(pn.theme_linedraw())
-        plot1 = (
-            pn.ggplot(None)
-            + pn.aes("datetime", "value", group="program")
-            + pn.geom_ribbon(df_p1, pn.aes(ymin="low", ymax="high", fill="program"), alpha=0.2)
-            + pn.geom_line(df_p1, pn.aes("datetime", "mean", colour="program"), size=1)
-            + pn.ylab("Estimated cost per facility")
-            + pn.xlab("")
-            + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
-            + pn.scale_x_datetime(labels=date_format("%Y"))
-            +
-            # pn.scale_y_continuous(trans='log10') +
-            pn.labs(color="Program", fill="Program")
-            + pn.theme(
-                panel_border=pn.element_rect(colour="black", fill=None, size=2),
-                panel_grid_minor_x=pn.element_blank(),
-                panel_grid_major_x=pn.element_blank(),
-                panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-                panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        plot_queue.submit(
+            PlotJob(
+                render_cost_estimate_temporal,
+                self.output_directory / "cost_estimate_temporal.png",
+                {"df_p1": df_p1[["datetime", "value", "program", "mean", "low", "high"]]},
             )
         )
-        plot1.save(
-            self.output_directory / "cost_estimate_temporal.png",
-            width=7,
-            height=3,
-            dpi=900,
-            verbose=False,
-        )
 
         ########################################
         # Cost breakdown by program and method
-        method_lists = []
-        for i in range(len(self.directories)):
-            df = pd.read_csv(
-                self.output_directory
-                / self.directories[i]
-                / "timeseries_output_0_{}.csv".format(self.directories[i])
-            )
-            df = df.filter(regex="cost$", axis=1)
-            df = df.drop(columns=["total_daily_cost"])
-            method_lists.append(list(df))
-
-        costs = [[] for i in range(len(self.all_data))]
-        for i in range(len(self.all_data)):
-            for j in range(len(self.all_data[i])):
-                simcosts = []
-                for k in range(len(method_lists[i])):
-                    timesteps = len(self.all_data[i][j][method_lists[i][k]])
-                    simcosts.append(
-                        (sum(self.all_data[i][j][method_lists[i][k]]) / timesteps / self.n_sites)
-                        * 365
-                    )
-                costs[i].append(simcosts)
-
         rows_list = []
-        for i in range(len(costs)):
-            df_temp = pd.DataFrame(costs[i])
+        for summary in self.summaries:
+            df_temp = pd.DataFrame(summary.method_costs)
             for j in range(len(df_temp.columns)):
                 dict = {}
-                dict.update({"Program": self.directories[i]})
+                dict.update({"Program": summary.program})
                 dict.update({"Mean Cost": round(df_temp.iloc[:, j].mean())})
                 dict.update({"St. Dev.": df_temp.iloc[:, j].std()})
-                dict.update({"Method": method_lists[i][j].replace("_cost", "")})
+                dict.update({"Method": summary.cost_columns[j].replace("_cost", "")})
                 rows_list.append(dict)
         df = pd.DataFrame(rows_list)
 
         # Output Emissions df for other uses
         df.to_csv(self.output_directory / "cost_comparison.csv", index=True)
 
-        plot = (
-            pn.ggplot(df, pn.aes(x="Program", y="Mean Cost", fill="Method", label="Mean Cost"))
-            + pn.geom_bar(stat="identity")
-            + pn.ylab("Cost per Site per Year")
-            + pn.xlab("Program")
-            + pn.scale_fill_hue(h=0.15, l=0.25, s=0.9)
-            +
-            # pn.geom_text(size=15, position=pn.position_stack(vjust=0.5)) +
-            pn.theme(
-                panel_border=pn.element_rect(colour="black", fill=None, size=2),
-                panel_grid_minor_x=pn.element_blank(),
-                panel_grid_major_x=pn.element_blank(),
-                panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-                panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        plot_queue.submit(
+            PlotJob(
+                render_cost_comparison, self.output_directory / "cost_comparison.png", {"df": df}
             )
         )
-        plot.save(
-            self.output_directory / "cost_comparison.png",
-            width=7,
-            height=3,
-            dpi=900,
-            verbose=False,
-        )
 
         return
+
+
+def render_emissions_timeseries(path, metadata, df_p1):
+    """Render the daily emissions of each simulation and their mean, by program."""
+    pn.theme_set(pn.theme_linedraw())
+    plot1 = (
+        pn.ggplot(None)
+        + pn.aes("datetime", "value", group="program")
+        + pn.geom_line(
+            df_p1,
+            pn.aes("datetime", "value", group="var_prog", colour="program"),
+            size=0.1,
+        )
+        + pn.geom_line(df_p1, pn.aes("datetime", "mean", colour="program"), size=1)
+        + pn.ylab("Daily emissions (kg/site)")
+        + pn.xlab("")
+        + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
+        + pn.scale_x_datetime(labels=date_format("%Y"))
+        + pn.scale_y_continuous()
+        + pn.aes(ymin=0)
+        + pn.labs(color="Program", fill="Program")
+        + pn.theme(
+            panel_border=pn.element_rect(colour="black", fill=None, size=2),
+            panel_grid_minor_x=pn.element_blank(),
+            panel_grid_major_x=pn.element_blank(),
+            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
+            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        )
+    )
+    plot1.save(
+        path,
+        width=7,
+        height=3,
+        dpi=900,
+        verbose=False,
+        metadata=metadata,
+    )
+
+
+def render_emissions_boxplot(path, metadata, df_p1):
+    """Render the distribution of mean daily emissions of each program."""
+    pn.theme_set(pn.theme_linedraw())
+    boxplot = (
+        pn.ggplot(None)
+        + pn.aes("program", "mean")
+        + pn.geom_boxplot(df_p1, pn.aes("program", "mean", fill="program"))
+        + pn.ylab("Daily Emissions (kg/site)")
+        + pn.scale_fill_hue(h=0.15, l=0.25, s=0.9)
+        + pn.labs(color="program", fill="program")
+        + pn.theme(
+            panel_border=pn.element_rect(colour="black", fill=None, size=2),
+            panel_grid_minor_x=pn.element_blank(),
+            panel_grid_major_x=pn.element_blank(),
+            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
+            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        )
+    )
+    boxplot.save(path, dpi=900, verbose=False, metadata=metadata)
+
+
+def render_emissions_difference(path, metadata, df_p2):
+    """Render the difference of mean daily emissions of each program from the reference program."""
+    pn.theme_set(pn.theme_linedraw())
+    plot2 = (
+        pn.ggplot(None)
+        + pn.aes("datetime", "mean_dif", group="program")
+        + pn.geom_ribbon(
+            df_p2,
+            pn.aes(ymin="low_dif", ymax="high_dif", fill="program"),
+            alpha=0.2,
+        )
+        + pn.geom_line(df_p2, pn.aes("datetime", "mean_dif", colour="program"), size=1)
+        + pn.ylab("Daily emissions difference (kg/site)")
+        + pn.xlab("")
+        + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
+        + pn.scale_x_datetime(labels=date_format("%Y"))
+        +
+        #        pn.scale_y_continuous(trans='log10') +
+        pn.labs(color="Program", fill="Program")
+        + pn.theme(
+            panel_border=pn.element_rect(colour="black", fill=None, size=2),
+            panel_grid_minor_x=pn.element_blank(),
+            panel_grid_major_x=pn.element_blank(),
+            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
+            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        )
+    )
+    plot2.save(
+        path,
+        width=7,
+        height=3,
+        dpi=900,
+        verbose=False,
+        metadata=metadata,
+    )
+
+
+def render_emissions_ratio(path, metadata, df_p2):
+    """Render the ratio of mean daily emissions of each program to the reference program."""
+    pn.theme_set(pn.theme_linedraw())
+    plot3 = (
+        pn.ggplot(None)
+        + pn.aes("datetime", "mean_ratio", group="program")
+        + pn.geom_ribbon(
+            df_p2,
+            pn.aes(ymin="low_ratio", ymax="high_ratio", fill="program"),
+            alpha=0.2,
+        )
+        + pn.geom_hline(yintercept=1, size=0.5, colour="blue")
+        + pn.geom_line(df_p2, pn.aes("datetime", "mean_ratio", colour="program"), size=1)
+        + pn.ylab("Emissions ratio")
+        + pn.xlab("")
+        + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
+        + pn.scale_x_datetime(labels=date_format("%Y"))
+        + pn.labs(color="Program", fill="Program")
+        + pn.theme(
+            panel_border=pn.element_rect(colour="black", fill=None, size=2),
+            panel_grid_minor_x=pn.element_blank(),
+            panel_grid_major_x=pn.element_blank(),
+            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
+            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        )
+    )
+    plot3.save(
+        path,
+        width=7,
+        height=3,
+        dpi=900,
+        verbose=False,
+        metadata=metadata,
+    )
+
+
+def render_cost_estimate_temporal(path, metadata, df_p1):
+    """Render the mean estimated cost per facility of each program, with daily bands."""
+    pn.theme_set(pn.theme_linedraw())
+    plot1 = (
+        pn.ggplot(None)
+        + pn.aes("datetime", "value", group="program")
+        + pn.geom_ribbon(df_p1, pn.aes(ymin="low", ymax="high", fill="program"), alpha=0.2)
+        + pn.geom_line(df_p1, pn.aes("datetime", "mean", colour="program"), size=1)
+        + pn.ylab("Estimated cost per facility")
+        + pn.xlab("")
+        + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
+        + pn.scale_x_datetime(labels=date_format("%Y"))
+        +
+        # pn.scale_y_continuous(trans='log10') +
+        pn.labs(color="Program", fill="Program")
+        + pn.theme(
+            panel_border=pn.element_rect(colour="black", fill=None, size=2),
+            panel_grid_minor_x=pn.element_blank(),
+            panel_grid_major_x=pn.element_blank(),
+            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
+            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        )
+    )
+    plot1.save(
+        path,
+        width=7,
+        height=3,
+        dpi=900,
+        verbose=False,
+        metadata=metadata,
+    )
+
+
+def render_cost_comparison(path, metadata, df):
+    """Render the yearly cost per site of each method, by program."""
+    pn.theme_set(pn.theme_linedraw())
+    plot = (
+        pn.ggplot(df, pn.aes(x="Program", y="Mean Cost", fill="Method", label="Mean Cost"))
+        + pn.geom_bar(stat="identity")
+        + pn.ylab("Cost per Site per Year")
+        + pn.xlab("Program")
+        + pn.scale_fill_hue(h=0.15, l=0.25, s=0.9)
+        +
+        # pn.geom_text(size=15, position=pn.position_stack(vjust=0.5)) +
+        pn.theme(
+            panel_border=pn.element_rect(colour="black", fill=None, size=2),
+            panel_grid_minor_x=pn.element_blank(),
+            panel_grid_major_x=pn.element_blank(),
+            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
+            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
+        )
+    )
+    plot.save(
+        path,
+        width=7,
+        height=3,
+        dpi=900,
+        verbose=False,
+        metadata=metadata,
+    )
@@ -21,6 +21,24 @@
 from pandas import concat, DataFrame
 from out_processing.clean_results import clean_sim_df, agg_flatten
 
+TARG_COLS_POINTER = [
+    "_sites_visited",
+    "_eff_flags",
+    "_missed_leaks",
+    "_n_tags",
+    "_sites_vis_w_leaks",
+]
+OUT_COLS_POINTER = [
+    "_sites_visited",
+    "_eff_flags",
+    "_missed_leaks",
+    "_n_tags",
+    "_sites_vis_w_leaks",
+    "_flag_rate",
+    "_tag_rate",
+]
+PS_IDX = ["program_name", "sim"]  # aggregation filter
+
 
 def generate(sim_results, programs):
     """Generate output table for web app. This includes the following columns:
@@ -37,45 +55,73 @@ def generate(sim_results, programs):
             'mit_vol_tco2e', 'mit_vol_perc', 'cost', 'cost_mit_vol_tco2e',
             'nat_leak_repair_count', 'emis_nat_perc'
     """
-    targ_cols_pointer = [
-        "_sites_visited",
-        "_eff_flags",
-        "_missed_leaks",
-        "_n_tags",
-        "_sites_vis_w_leaks",
-    ]
-    out_cols_pointer = [
-        "_sites_visited",
-        "_eff_flags",
-        "_missed_leaks",
-        "_n_tags",
-        "_sites_vis_w_leaks",
-        "_flag_rate",
-        "_tag_rate",
-    ]
-
-    ps_idx = ["program_name", "sim"]  # aggregation filter
+    _, all_meth_cols = method_columns(programs)
+    return summarize([sim_stats(sim, all_meth_cols) for sim in sim_results], programs)
+
 
+def method_columns(programs):
+    """Get the unique methods of all programs and the timeseries columns summarized
+        for them.
+    Args:
+        programs (dict): Program parameters
+
+    Returns:
+        tuple: set of method names, list of column names
+    """
     all_meth_cols = set()
     all_meths = set()
 
     # Get unique methods and unique Column names
     for pidx, p in programs.items():
         for mindx, m in p["methods"].items():
-            for col in targ_cols_pointer:
+            for col in TARG_COLS_POINTER:
                 all_meth_cols.add("{}{}".format(mindx, col))
             all_meths.add(mindx)
-    all_meth_cols = list(all_meth_cols)
+    return all_meths, list(all_meth_cols)
+
+
+def sim_stats(sim_result, all_meth_cols):
+    """Sum the method columns of the timeseries of a single simulation. Columns of
+        methods that are not part of the simulation's program sum to zero, as they
+        would in the table of all simulations.
+    Args:
+        sim_result (dict): simulation output
+        all_meth_cols (list): Method columns of all programs (see method_columns)
+
+    Returns:
+        dataframe: Single row of method column sums
+    """
+    sim = {
+        "meta": sim_result["meta"],
+        "timeseries": sim_result["timeseries"].reindex(columns=all_meth_cols),
+    }
     meth_cols = [{"in": m, "out": m, "type": float} for m in all_meth_cols]
-    prog_ts = clean_sim_df(sim_results, "timeseries", index="ts", params=meth_cols, aggregate=False)
-    sim_stats_daily = agg_flatten(
+    prog_ts = clean_sim_df([sim], "timeseries", index="ts", params=meth_cols, aggregate=False)
+    return agg_flatten(
         prog_ts,
-        ps_idx,
+        PS_IDX,
         all_meth_cols,
         ["sum"],
         include_col_name=True,
         include_agg_name=False,
     )
+
+
+def summarize(sim_stats_daily, programs):
+    """Average the method statistics of all simulations into a table per program
+        (see generate).
+    Args:
+        sim_stats_daily (list): Method column sums of each simulation (see sim_stats),
+            in any order
+        programs (dict): Program parameters
+
+    Returns:
+        dict: Table of methods, keyed by program name
+    """
+    all_meths, _ = method_columns(programs)
+    # Sort simulations like a groupby over all simulations would, so averages do not
+    # depend on the order simulations finished in
+    sim_stats_daily = concat(sim_stats_daily).sort_values(PS_IDX).reset_index(drop=True)
     # Calculate flag and tag rates
     for m in all_meths:
         sim_stats_daily["{}_flag_rate".format(m)] = (
@@ -104,7 +150,7 @@ def generate(sim_results, programs):
         for mindx, m in p["methods"].items():
             # Get rows that include the method label
 
-            meth_rows = targ_rows[["{}{}".format(mindx, col) for col in out_cols_pointer]]
+            meth_rows = targ_rows[["{}{}".format(mindx, col) for col in OUT_COLS_POINTER]]
             meth_rows.columns = meth_rows.columns.str.replace("{}_".format(mindx), "")
             meth_rows = meth_rows.rename(columns={"eff_flags": "n_flags"})
             meth_rows["method_name"] = mindx
@@ -127,7 +173,7 @@ def generate(sim_results, programs):
             meth_df = concat([m for _, m in meth_table.items()])
         else:
             # If there are no methods add default columns
-            meth_df = DataFrame(columns=[s[1:] for s in targ_cols_pointer])
+            meth_df = DataFrame(columns=[s[1:] for s in TARG_COLS_POINTER])
 
         prog_table.update({pidx: meth_df.to_dict("index")})
 
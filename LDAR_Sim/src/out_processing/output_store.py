@@ -0,0 +1,235 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        out_processing.output_store
+# Purpose:     Write and read back the leak, site, timeseries and site visit outputs of
+#              a program, as CSV files or as a partitioned Parquet dataset.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+import datetime
+import numbers
+import os
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from config.output_flag_mapping import SITE_VISITS
+
+# Output formats, set by the outputs: format simulation setting
+CSV = "csv"
+PARQUET = "parquet"
+
+
+def typed_columns(df):
+    """Get a dataframe with a single type for each column, as needed by columnar formats.
+    Columns of python objects are typed by their values: booleans, numbers, strings or
+    dates. Other values (ie. lists of leaks) and columns of mixed values are written as
+    their string representation, as in CSV outputs. Missing values are kept.
+
+    Args:
+        df (DataFrame): Output dataframe
+
+    Returns:
+        DataFrame: Typed dataframe
+    """
+    df = df.infer_objects()
+    for column in df.columns[df.dtypes == object]:
+        values = df[column]
+        is_set = values.notna()
+        types = {type(value) for value in values[is_set]}
+        if not types:
+            continue
+        if all(issubclass(value_type, (bool, np.bool_)) for value_type in types):
+            df[column] = values.astype("boolean")
+        elif all(
+            issubclass(value_type, numbers.Real) and not issubclass(value_type, (bool, np.bool_))
+            for value_type in types
+        ):
+            df[column] = values.astype(np.float64)
+        elif all(issubclass(value_type, datetime.datetime) for value_type in types):
+            df[column] = pd.to_datetime(values)
+        elif not all(issubclass(value_type, str) for value_type in types):
+            df[column] = [
+                str(value) if value_is_set else value
+                for value, value_is_set in zip(values.tolist(), is_set.tolist())
+            ]
+    return df
+
+
+class CsvOutputStore:
+    """Outputs of a program as one CSV file per table and simulation, ie.
+    leaks_output_{simulation}_{program}.csv, and site visits of each method as
+    site_visits_{method}_{simulation}.csv, in the program's output directory.
+    """
+
+    def __init__(self, directory, program):
+        """
+        Args:
+            directory (Path): Output directory of the program
+            program (str): Program name
+        """
+        self.directory = Path(directory)
+        self.program = program
+
+    def _affixes(self, table, method=None):
+        if table == SITE_VISITS:
+            return "site_visits_{}_".format(method), ".csv"
+        return "{}_output_".format(table), "_{}.csv".format(self.program)
+
+    def path(self, table, simulation, method=None):
+        """Get the file of a table for a simulation."""
+        prefix, suffix = self._affixes(table, method)
+        return self.directory / "{}{}{}".format(prefix, simulation, suffix)
+
+    def write(self, table, df, simulation, method=None):
+        """Write a table for a simulation.
+
+        Args:
+            table (str): Output, ie. "leaks", "timeseries", "sites" or "site_visits"
+            df (DataFrame): Output dataframe
+            simulation (int or str): Simulation
+            method (str, optional): Method label, site visits only. Defaults to None.
+        """
+        df.to_csv(self.path(table, simulation, method), index=False)
+
+    def simulations(self, table, method=None):
+        """Get the simulations with a table, in the order they are listed by the
+        file system."""
+        prefix, suffix = self._affixes(table, method)
+        return [
+            entry.name[len(prefix) : -len(suffix)]
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith(suffix)
+        ]
+
+    def columns(self, table, simulation, method=None):
+        """Get the columns of a table for a simulation, without reading its rows."""
+        return pd.read_csv(self.path(table, simulation, method), nrows=0).columns.tolist()
+
+    def read(self, table, simulation, columns=None, method=None):
+        """Read a table for a simulation.
+
+        Args:
+            table (str): Output, ie. "timeseries"
+            simulation (int or str): Simulation
+            columns (list, optional): Columns to read, in order. Defaults to None, all
+                columns.
+            method (str, optional): Method label, site visits only. Defaults to None.
+
+        Returns:
+            DataFrame: Output dataframe
+        """
+        df = pd.read_csv(self.path(table, simulation, method), usecols=columns)
+        return df if columns is None else df[list(columns)]
+
+
+class ParquetOutputStore:
+    """Outputs of a program as a Parquet dataset for each table, in the program's
+    output directory, partitioned by simulation (and by method for site visits), ie.
+    leaks/simulation={simulation}/part-0.parquet and
+    site_visits/method={method}/simulation={simulation}/part-0.parquet. Files are
+    compressed with zstd, and columns are typed (see typed_columns). Requires pyarrow.
+    """
+
+    def __init__(self, directory, program):
+        """
+        Args:
+            directory (Path): Output directory of the program
+            program (str): Program name
+        """
+        self.directory = Path(directory)
+        self.program = program
+
+    def _table_directory(self, table, method=None):
+        if table == SITE_VISITS:
+            return self.directory / table / "method={}".format(method)
+        return self.directory / table
+
+    def path(self, table, simulation, method=None):
+        """Get the file of a table for a simulation."""
+        return (
+            self._table_directory(table, method)
+            / "simulation={}".format(simulation)
+            / "part-0.parquet"
+        )
+
+    def write(self, table, df, simulation, method=None):
+        """Write a table for a simulation, see CsvOutputStore.write."""
+        path = self.path(table, simulation, method)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        typed_columns(df).to_parquet(path, index=False, compression="zstd")
+
+    def simulations(self, table, method=None):
+        """Get the simulations with a table, in the order they are listed by the
+        file system."""
+        table_directory = self._table_directory(table, method)
+        if not table_directory.is_dir():
+            return []
+        return [
+            entry.name[len("simulation=") :]
+            for entry in os.scandir(table_directory)
+            if entry.is_dir() and entry.name.startswith("simulation=")
+        ]
+
+    def columns(self, table, simulation, method=None):
+        """Get the columns of a table for a simulation, from the file schema."""
+        from pyarrow.parquet import read_schema
+
+        return read_schema(self.path(table, simulation, method)).names
+
+    def read(self, table, simulation, columns=None, method=None):
+        """Read a table for a simulation, only reading the requested columns from the
+        file. See CsvOutputStore.read."""
+        return pd.read_parquet(self.path(table, simulation, method), columns=columns)
+
+
+OUTPUT_STORES = {CSV: CsvOutputStore, PARQUET: ParquetOutputStore}
+
+
+def output_store_class(output_format):
+    """Get the output store of an output format, checking that the format is recognized
+    and that its dependencies are installed.
+
+    Args:
+        output_format (str): "csv" or "parquet"
+
+    Returns:
+        type: CsvOutputStore or ParquetOutputStore
+    """
+    if output_format not in OUTPUT_STORES:
+        raise ValueError(
+            'Output format "{}" not recognized. Must be one of: {}.'.format(
+                output_format, ", ".join(OUTPUT_STORES)
+            )
+        )
+    if output_format == PARQUET and find_spec("pyarrow") is None:
+        raise ImportError('The "parquet" output format requires pyarrow to be installed.')
+    return OUTPUT_STORES[output_format]
+
+
+def output_store(directory, program, output_format=CSV):
+    """Get the outputs of a program in an output format.
+
+    Args:
+        directory (Path): Output directory of the program
+        program (str): Program name
+        output_format (str, optional): "csv" or "parquet". Defaults to "csv".
+
+    Returns:
+        CsvOutputStore or ParquetOutputStore: Outputs of the program
+    """
+    return output_store_class(output_format)(directory, program)
@@ -0,0 +1,244 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        out_processing.plot_queue
+# Purpose:     Collect figures as plot jobs and render them in a process pool, skipping
+#              figures that are already rendered from the same inputs.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+import hashlib
+import multiprocessing as mp
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import matplotlib
+
+# PNG text key holding the hash of the inputs of a figure
+HASH_KEY = "ldar_sim_input_hash"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+FIGURE_SUFFIX = ".png"
+
+
+class PlotJob(NamedTuple):
+    """A figure to render: the renderer, the file to save it to, and the data and options
+    passed to the renderer. Renderers are module level functions, called as
+    renderer(path, metadata, **data, **options), that save the figure to path with
+    the PNG metadata. Jobs are pickled to be rendered in other processes, so data
+    should only hold the columns the figure uses.
+    """
+
+    renderer: Callable
+    path: Path
+    data: dict
+    options: Optional[dict] = None
+
+
+def _options(job):
+    return {} if job.options is None else job.options
+
+
+def input_hash(job):
+    """Get the hash of the inputs of a plot job: its renderer, file name, data and
+    options.
+
+    Args:
+        job (PlotJob): Plot job
+
+    Returns:
+        str: Hash
+    """
+    digest = hashlib.sha256()
+    digest.update("{}.{}".format(job.renderer.__module__, job.renderer.__qualname__).encode())
+    digest.update(Path(job.path).name.encode())
+    digest.update(pickle.dumps((job.data, sorted(_options(job).items())), protocol=4))
+    return digest.hexdigest()
+
+
+def figure_hash(path):
+    """Get the input hash saved in the PNG text of a figure.
+
+    Args:
+        path (Path): Figure file
+
+    Returns:
+        str: Hash, None if the figure does not exist or has no hash
+    """
+    try:
+        with open(path, "rb") as figure:
+            if figure.read(8) != PNG_SIGNATURE:
+                return None
+            while True:
+                header = figure.read(8)
+                if len(header) < 8:
+                    return None
+                length, chunk_type = struct.unpack(">I4s", header)
+                if chunk_type in (b"IDAT", b"IEND"):
+                    # Text is written before image data
+                    return None
+                chunk = figure.read(length + 4)[:length]
+                if chunk_type == b"tEXt":
+                    key, _, value = chunk.partition(b"\x00")
+                    if key == HASH_KEY.encode("latin-1"):
+                        return value.decode("latin-1")
+    except FileNotFoundError:
+        return None
+
+
+def render_job(job):
+    """Render a plot job, unless its figure exists and was rendered from the same inputs.
+
+    Args:
+        job (PlotJob): Plot job
+
+    Returns:
+        bool: Whether the figure was rendered
+    """
+    job_hash = input_hash(job)
+    if figure_hash(job.path) == job_hash:
+        return False
+    job.renderer(job.path, {HASH_KEY: job_hash}, **job.data, **_options(job))
+    return True
+
+
+def clear_outputs(directory):
+    """Remove the files in a directory and its subdirectories, except figures, so
+    figures of a previous run in the same directory are not rendered again when their
+    inputs are unchanged.
+
+    Args:
+        directory (Path): Output directory
+    """
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if not file.endswith(FIGURE_SUFFIX):
+                os.remove(os.path.join(root, file))
+
+
+def remove_stale_figures(directory, paths):
+    """Remove the figures in a directory and its subdirectories that are not in paths,
+    such as figures of a previous run kept by clear_outputs, and the subdirectories
+    left empty.
+
+    Args:
+        directory (Path): Output directory
+        paths (set): Figures to keep
+    """
+    keep = {os.path.abspath(path) for path in paths}
+    for root, dirs, files in os.walk(directory, topdown=False):
+        for file in files:
+            path = os.path.abspath(os.path.join(root, file))
+            if file.endswith(FIGURE_SUFFIX) and path not in keep:
+                os.remove(path)
+        if os.path.abspath(root) != os.path.abspath(directory) and not os.listdir(root):
+            os.rmdir(root)
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+
+
+class PlotQueue:
+    """Queue of plot jobs, rendered in a pool of processes with the non-interactive Agg
+    backend as they are submitted, so callers do not wait on rendering. With no
+    processes, jobs are rendered in the calling process when submitted. The pool is
+    started with the first job, and close waits for all jobs to be rendered. Paths of
+    all submitted figures are kept in paths.
+
+    A held queue keeps submitted jobs until release, ie. so rendering processes are only
+    started once other worker processes are done.
+    """
+
+    def __init__(self, processes=0, held=False):
+        """
+        Args:
+            processes (int, optional): Processes rendering jobs. Defaults to 0, jobs
+                rendered when submitted.
+            held (bool, optional): Keep submitted jobs until release. Defaults to False.
+        """
+        self.processes = processes
+        self.held = held
+        self._held_jobs = []
+        self.paths = set()
+        self.n_rendered = 0
+        self.n_skipped = 0
+        self._pool = None
+        self._results = []
+
+    def submit(self, job):
+        """Queue a plot job.
+
+        Args:
+            job (PlotJob): Plot job
+        """
+        self.paths.add(Path(job.path))
+        if self.held:
+            self._held_jobs.append(job)
+            return
+        if self.processes == 0:
+            self._count(render_job(job))
+            return
+        if self._pool is None:
+            self._pool = mp.Pool(processes=self.processes, initializer=_init_worker)
+        self._results.append(self._pool.apply_async(render_job, (job,)))
+
+    def submit_all(self, jobs):
+        """Queue plot jobs."""
+        for job in jobs:
+            self.submit(job)
+
+    def release(self):
+        """Render the held jobs, and jobs as they are submitted from now on."""
+        self.held = False
+        jobs, self._held_jobs = self._held_jobs, []
+        self.submit_all(jobs)
+
+    def _count(self, rendered):
+        if rendered:
+            self.n_rendered += 1
+        else:
+            self.n_skipped += 1
+
+    def close(self):
+        """Wait for all queued jobs to be rendered, and stop the pool. Errors of jobs are
+        raised once all jobs are done. Held jobs are released first.
+        """
+        self.release()
+        if self._pool is None:
+            return
+        self._pool.close()
+        self._pool.join()
+        results, self._results = self._results, []
+        self._pool = None
+        for result in results:
+            self._count(result.get())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            # Drop the jobs left, rather than render figures of a failed run
+            self._held_jobs = []
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool.join()
+                self._pool = None
+                self._results = []
+        else:
+            self.close()
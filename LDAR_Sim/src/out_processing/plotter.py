@@ -21,45 +21,27 @@ import warnings
 
 import plotnine as pn
 from mizani.formatters import date_format
+from out_processing.plot_queue import PlotJob, render_job
 
 
-def make_plots(leak_df, time_df, site_df, sim_n, output_directory):
-    """
-    This function makes a set of standard plots to output at end of simulation.
-    """
+def _setup():
     # Temporarily mute warnings
     warnings.filterwarnings("ignore")
     pn.theme_set(pn.theme_linedraw())
 
-    # Timeseries plots
-    plot_time_1 = (
-        pn.ggplot(time_df, pn.aes("datetime", "daily_emissions_kg"))
-        + pn.geom_line(size=2)
-        + pn.ggtitle("Daily emissions from all sites (kg)")
-        + pn.ylab("")
-        + pn.xlab("")
-        + pn.scale_x_datetime(labels=date_format("%Y"))
-        + pn.theme(
-            panel_border=pn.element_rect(colour="black", fill=None, size=2),
-            panel_grid_minor_x=pn.element_blank(),
-            panel_grid_major_x=pn.element_blank(),
-            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
-        )
-    )
 
-    plot_time_1.save(
-        output_directory / "plot_time_emissions_{}.png".format(sim_n),
-        width=10,
-        height=3,
-        dpi=300,
-        verbose=False,
-    )
+def _columns(df, columns):
+    # Columns of a dataframe used by a figure, of those it has
+    return df[[column for column in columns if column in df.columns]]
 
-    plot_time_2 = (
-        pn.ggplot(time_df, pn.aes("datetime", "active_leaks"))
+
+def render_timeseries(path, metadata, time_df, column, title):
+    """Render a timeseries of all sites."""
+    _setup()
+    plot_time = (
+        pn.ggplot(time_df, pn.aes("datetime", column))
         + pn.geom_line(size=2)
-        + pn.ggtitle("Number of active leaks at all sites")
+        + pn.ggtitle(title)
         + pn.ylab("")
         + pn.xlab("")
         + pn.scale_x_datetime(labels=date_format("%Y"))
@@ -72,15 +54,12 @@ def make_plots(leak_df, time_df, site_df, sim_n, output_directory):
         )
     )
 
-    plot_time_2.save(
-        output_directory / "plot_time_active_{}.png".format(sim_n),
-        width=10,
-        height=3,
-        dpi=300,
-        verbose=False,
-    )
+    plot_time.save(path, width=10, height=3, dpi=300, verbose=False, metadata=metadata)
+
 
-    # Site-level plots
+def render_site_cum_dist(path, metadata, site_df):
+    """Render the cumulative distribution of site-level emissions."""
+    _setup()
     plot_site_1 = (
         pn.ggplot(site_df, pn.aes("cum_frac_sites", "cum_frac_emissions"))
         + pn.geom_line(size=2)
@@ -96,15 +75,12 @@ def make_plots(leak_df, time_df, site_df, sim_n, output_directory):
         + pn.ggtitle("Empirical cumulative distribution of site-level emissions")
     )
 
-    plot_site_1.save(
-        output_directory / "site_cum_dist_{}.png".format(sim_n),
-        width=5,
-        height=4,
-        dpi=300,
-        verbose=False,
-    )
+    plot_site_1.save(path, width=5, height=4, dpi=300, verbose=False, metadata=metadata)
+
 
-    # Leak plots
+def render_leak_duration(path, metadata, leak_df):
+    """Render the distribution of leak duration."""
+    _setup()
     plot_leak_1 = (
         pn.ggplot(leak_df, pn.aes("days_active"))
         + pn.geom_histogram(colour="gray")
@@ -119,16 +95,14 @@ def make_plots(leak_df, time_df, site_df, sim_n, output_directory):
         + pn.xlab("Number of days the leak was active")
         + pn.ylab("Count")
     )
-    plot_leak_1.save(
-        output_directory / "leak_active_hist{}.png".format(sim_n),
-        width=5,
-        height=4,
-        dpi=300,
-        verbose=False,
-    )
+    plot_leak_1.save(path, width=5, height=4, dpi=300, verbose=False, metadata=metadata)
+
 
-    plot_leak_2 = (
-        pn.ggplot(leak_df, pn.aes("cum_frac_leaks", "cum_frac_rate", colour="status"))
+def render_leak_cum_dist(path, metadata, leak_df, column, ylab, title, log_y=False):
+    """Render a cumulative distribution of leak rates, by leak status."""
+    _setup()
+    plot_leak = (
+        pn.ggplot(leak_df, pn.aes("cum_frac_leaks", column, colour="status"))
         + pn.geom_line(size=2)
         + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
         + pn.theme(
@@ -138,42 +112,77 @@ def make_plots(leak_df, time_df, site_df, sim_n, output_directory):
             panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
             panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
         )
-        + pn.xlab("Cumulative fraction of leak sources")
-        + pn.ylab("Cumulative leak rate fraction")
-        + pn.ggtitle("Fractional cumulative distribution")
     )
+    if log_y:
+        plot_leak += pn.scale_y_continuous(trans="log10")
+    plot_leak += pn.xlab("Cumulative fraction of leak sources")
+    plot_leak += pn.ylab(ylab)
+    plot_leak += pn.ggtitle(title)
 
-    plot_leak_2.save(
-        output_directory / "leak_cum_dist1_{}.png".format(sim_n),
-        width=4,
-        height=4,
-        dpi=300,
-        verbose=False,
-    )
+    plot_leak.save(path, width=4, height=4, dpi=300, verbose=False, metadata=metadata)
 
-    plot_leak_3 = (
-        pn.ggplot(leak_df, pn.aes("cum_frac_leaks", "cum_rate", colour="status"))
-        + pn.geom_line(size=2)
-        + pn.scale_colour_hue(h=0.15, l=0.25, s=0.9)
-        + pn.theme(
-            panel_border=pn.element_rect(colour="black", fill=None, size=2),
-            panel_grid_minor_x=pn.element_blank(),
-            panel_grid_major_x=pn.element_blank(),
-            panel_grid_minor_y=pn.element_line(colour="black", linewidth=0.5, alpha=0.3),
-            panel_grid_major_y=pn.element_line(colour="black", linewidth=1, alpha=0.5),
-        )
-        + pn.scale_y_continuous(trans="log10")
-        + pn.xlab("Cumulative fraction of leak sources")
-        + pn.ylab("Cumulative emissions (kg/day)")
-        + pn.ggtitle("Absolute cumulative distribution")
-    )
 
-    plot_leak_3.save(
-        output_directory / "leak_cum_dist2_{}.png".format(sim_n),
-        width=4,
-        height=4,
-        dpi=300,
-        verbose=False,
-    )
+def plot_jobs(leak_df, time_df, site_df, sim_n, output_directory):
+    """
+    Get the jobs of a set of standard plots to output at end of simulation, holding
+    only the columns each plot uses (see out_processing.plot_queue).
+    """
+    leak_dist_df = _columns(leak_df, ["cum_frac_leaks", "cum_frac_rate", "cum_rate", "status"])
+    return [
+        # Timeseries plots
+        PlotJob(
+            render_timeseries,
+            output_directory / "plot_time_emissions_{}.png".format(sim_n),
+            {"time_df": _columns(time_df, ["datetime", "daily_emissions_kg"])},
+            {"column": "daily_emissions_kg", "title": "Daily emissions from all sites (kg)"},
+        ),
+        PlotJob(
+            render_timeseries,
+            output_directory / "plot_time_active_{}.png".format(sim_n),
+            {"time_df": _columns(time_df, ["datetime", "active_leaks"])},
+            {"column": "active_leaks", "title": "Number of active leaks at all sites"},
+        ),
+        # Site-level plots
+        PlotJob(
+            render_site_cum_dist,
+            output_directory / "site_cum_dist_{}.png".format(sim_n),
+            {"site_df": _columns(site_df, ["cum_frac_sites", "cum_frac_emissions"])},
+        ),
+        # Leak plots
+        PlotJob(
+            render_leak_duration,
+            output_directory / "leak_active_hist{}.png".format(sim_n),
+            {"leak_df": _columns(leak_df, ["days_active"])},
+        ),
+        PlotJob(
+            render_leak_cum_dist,
+            output_directory / "leak_cum_dist1_{}.png".format(sim_n),
+            {"leak_df": leak_dist_df},
+            {
+                "column": "cum_frac_rate",
+                "ylab": "Cumulative leak rate fraction",
+                "title": "Fractional cumulative distribution",
+            },
+        ),
+        PlotJob(
+            render_leak_cum_dist,
+            output_directory / "leak_cum_dist2_{}.png".format(sim_n),
+            {"leak_df": leak_dist_df},
+            {
+                "column": "cum_rate",
+                "ylab": "Cumulative emissions (kg/day)",
+                "title": "Absolute cumulative distribution",
+                "log_y": True,
+            },
+        ),
+    ]
+
+
+def make_plots(leak_df, time_df, site_df, sim_n, output_directory):
+    """
+    This function makes a set of standard plots to output at end of simulation.
+    """
+    for job in plot_jobs(leak_df, time_df, site_df, sim_n, output_directory):
+        render_job(job)
 
     return
@@ -19,10 +19,14 @@
 # ------------------------------------------------------------------------------
 
 from numpy import NaN
-from pandas import merge
+from pandas import concat, merge
 from numpy import median, inf
 from out_processing.clean_results import clean_sim_df, agg_flatten
-from out_processing.meth_table import generate as gen_meth_table
+from out_processing.meth_table import method_columns
+from out_processing.meth_table import sim_stats as sim_meth_stats
+from out_processing.meth_table import summarize as summarize_methods
+
+PS_IDX = ["program_name", "sim"]  # aggregation filter
 
 
 def generate(sim_results, baseline_program, programs):
@@ -40,7 +44,36 @@ def generate(sim_results, baseline_program, programs):
             'mit_vol_tco2e', 'mit_vol_perc', 'cost', 'cost_mit_vol_tco2e',
             'nat_leak_repair_count', 'emis_nat_perc'
     """
-    ps_idx = ["program_name", "sim"]
+    reduced = [sim_stats(sim) for sim in sim_results]
+    natural_leaks = {
+        int(sim["meta"]["simulation"]): leaks
+        for sim, (_, leaks) in zip(sim_results, reduced)
+        if sim["program_name"] == baseline_program
+    }
+    sim_progs = [
+        add_mitigation(
+            stats, leaks, natural_leaks.get(int(sim["meta"]["simulation"]), leaks.iloc[0:0])
+        )
+        for sim, (stats, leaks) in zip(sim_results, reduced)
+    ]
+    _, meth_cols = method_columns(programs)
+    sim_meths = [sim_meth_stats(sim, meth_cols) for sim in sim_results]
+    return summarize(sim_progs, sim_meths, programs)
+
+
+def sim_stats(sim_result):
+    """Reduce the output of a single simulation to its summary statistics. Statistics
+        are calculated exactly as they would be for the table of all simulations, so
+        simulations can be reduced as soon as they finish.
+    Args:
+        sim_result (dict): simulation output
+
+    Returns:
+        tuple: Statistics of the simulation (single row dataframe), and the volume of
+            each of its leaks, used to calculate the mitigation once the baseline program
+            of the same simulation is available (see add_mitigation).
+    """
+    sim_results = [sim_result]
     prog_sites = clean_sim_df(
         sim_results,
         "sites",
@@ -58,7 +91,7 @@ def generate(sim_results, baseline_program, programs):
     # Requires two steps, count each by sim then take the average of the sim
     sim_sites_count = agg_flatten(
         prog_sites,
-        ps_idx,
+        PS_IDX,
         ["facility_ID"],
         ["count"],
         prefix="site",
@@ -80,14 +113,14 @@ def generate(sim_results, baseline_program, programs):
 
     sim_stats_daily = agg_flatten(
         prog_ts,
-        ps_idx,
+        PS_IDX,
         ["emis_kg_day", "active_leaks_day", "cost_day"],
         ["sum", median],
         include_col_name=True,
         include_agg_name=True,
     )
 
-    # sim_days_count = agg_flatten(prog_ts, ps_idx, ['ts'], ['count'], prefix='days',
+    # sim_days_count = agg_flatten(prog_ts, PS_IDX, ['ts'], ['count'], prefix='days',
     #                              include_col_name=False, include_agg_name=True)
 
     params = [
@@ -99,21 +132,16 @@ def generate(sim_results, baseline_program, programs):
     ]
     leaks = clean_sim_df(sim_results, "leaks", index="leak_ID", params=params, aggregate=False)
 
-    # sim_leaks_count = agg_flatten(leaks, ps_idx, ['leak_ID'], ['count'], prefix="leak",
+    # sim_leaks_count = agg_flatten(leaks, PS_IDX, ['leak_ID'], ['count'], prefix="leak",
     #                               include_col_name=False, include_agg_name=True)
 
     leaks["volume_kg"] = leaks["rate_kg_day"] * leaks["days_active"]
-    natural_leaks = leaks[leaks["program_name"] == baseline_program][
-        ["leak_ID", "sim", "volume_kg"]
-    ].rename(columns={"volume_kg": "nat_volume_kg"})
-    leaks = merge(leaks, natural_leaks, how="left", on=["leak_ID", "sim"])
-    leaks["mit_vol_kg"] = leaks["nat_volume_kg"] - leaks["volume_kg"]
     # Get responsible companies and attribute leak mitigation to them.
     leaks["init_detect_by"] = leaks["init_detect_by"].replace([None], "active")
     if not leaks[leaks["init_detect_by"] == "natural"].empty:
         sim_leaks_by_NRD = agg_flatten(
             leaks[leaks["init_detect_by"] == "natural"],
-            ps_idx,
+            PS_IDX,
             ["volume_kg"],
             ["sum", "count"],
             prefix="nat_vol",
@@ -121,7 +149,7 @@ def generate(sim_results, baseline_program, programs):
             include_agg_name=True,
         )
 
-        sim_progs = merge(sim_stats_daily, sim_leaks_by_NRD, how="left", on=["program_name", "sim"])
+        sim_progs = merge(sim_stats_daily, sim_leaks_by_NRD, how="left", on=PS_IDX)
     else:
         # these columns are created by the agg_flatten function call above.
         # future work should initialize these columns all in one location instead of changing
@@ -129,19 +157,55 @@ def generate(sim_results, baseline_program, programs):
         sim_progs = sim_stats_daily
         sim_progs["nat_vol_sum"] = float("nan")
         sim_progs["nat_vol_count"] = float("nan")
-        sim_progs["emis_nat_perc"] = float("nan")
 
+    sim_progs = merge(sim_progs, sim_sites_count, how="left", on=PS_IDX)
+    return sim_progs, leaks[PS_IDX + ["leak_ID", "volume_kg"]]
+
+
+def add_mitigation(sim_progs, leaks, natural_leaks):
+    """Add the volume mitigated below the baseline program to the statistics of a
+        simulation (see sim_stats).
+    Args:
+        sim_progs (dataframe): Statistics of the simulation
+        leaks (dataframe): Leak volumes of the simulation
+        natural_leaks (dataframe): Leak volumes of the baseline program in the same
+            simulation, empty if there is no baseline program.
+
+    Returns:
+        dataframe: Statistics of the simulation including the mitigated volume
+    """
+    natural_leaks = natural_leaks[["leak_ID", "sim", "volume_kg"]].rename(
+        columns={"volume_kg": "nat_volume_kg"}
+    )
+    leaks = merge(leaks, natural_leaks, how="left", on=["leak_ID", "sim"])
+    leaks["mit_vol_kg"] = leaks["nat_volume_kg"] - leaks["volume_kg"]
     sim_emis_mit = agg_flatten(
         leaks,
-        ps_idx,
+        PS_IDX,
         ["mit_vol_kg", "volume_kg"],
         agg_types=["sum"],
         include_col_name=True,
         include_agg_name=True,
     )
+    return merge(sim_progs, sim_emis_mit, how="left", on=PS_IDX)
+
+
+def summarize(sim_progs, sim_meths, programs):
+    """Average the statistics of all simulations into the output table for the web app
+        (see generate).
+    Args:
+        sim_progs (list): Statistics of each simulation, including mitigation
+            (see add_mitigation), in any order
+        sim_meths (list): Method statistics of each simulation (see
+            out_processing.meth_table.sim_stats), in any order
+        programs (dict): Program parameters
 
-    sim_progs = merge(sim_progs, sim_emis_mit, how="left", on=["program_name", "sim"])
-    sim_progs = merge(sim_progs, sim_sites_count, how="left", on=["program_name", "sim"])
+    Returns:
+        [dict]: Program summary statistics
+    """
+    # Sort simulations like a groupby over all simulations would, so averages do not
+    # depend on the order simulations finished in
+    sim_progs = concat(sim_progs).sort_values(PS_IDX).reset_index(drop=True)
 
     sim_progs["emis_kg_day_site_med"] = sim_progs["emis_kg_day_median"] / sim_progs["site_count"]
     sim_progs["act_leaks_day_site_med"] = (
@@ -180,7 +244,7 @@ def generate(sim_results, baseline_program, programs):
     out_table = out_table.drop(columns=["sim"])
 
     out_table = out_table.set_index("program_name", drop=False).to_dict("records")
-    out_meth_table = gen_meth_table(sim_results, programs)
+    out_meth_table = summarize_methods(sim_meths, programs)
     for p in out_table:
         p.update({"methods": out_meth_table[p["program_name"]]})
     return out_table
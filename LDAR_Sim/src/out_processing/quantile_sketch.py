@@ -0,0 +1,188 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        out_processing.quantile_sketch
+# Purpose:     Mergeable sketches of the distribution of a daily value across
+#              simulations, with bounded memory.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+import numpy as np
+
+# Values held at each level of a sketch for each day. Quantiles are exact for up to this
+# many simulations.
+DEFAULT_CAPACITY = 128
+
+
+class DailyQuantileSketch:
+    """Sketch of the distribution of a value on each day across simulations, with the
+    mean, standard deviation and quantiles of each day.
+
+    Values of a day are held in levels, a value at level h standing for 2 ** h
+    simulations (a KLL style compactor). Up to `capacity` values are held at each level.
+    When a level holds more, the values of each day are sorted and every other value is
+    moved to the next level, alternating between the odd and even values at each
+    compaction. All days are compacted together, so each holds the same number of values
+    at each level. Memory grows with the log of the number of simulations, and the error
+    of the rank of a quantile is about the number of levels over the capacity.
+
+    Until the first compaction every value is held, and quantiles and standard
+    deviations are exact. Means are always exact. Sketches of the same days can be
+    merged (merge), ie. sketches of separate sets of simulations.
+    """
+
+    def __init__(self, n_days, capacity=DEFAULT_CAPACITY):
+        """
+        Args:
+            n_days (int): Number of days
+            capacity (int, optional): Values held at each level for each day. Defaults
+                to DEFAULT_CAPACITY.
+        """
+        self.n_days = n_days
+        self.capacity = capacity
+        self.count = 0
+        self.sum = np.zeros(n_days)
+        # Running mean and sum of squared deviations, for standard deviations once
+        # values are compacted
+        self._mean = np.zeros(n_days)
+        self._m2 = np.zeros(n_days)
+        # Blocks of values of each level, as arrays with a row for each day
+        self.levels = [[]]
+        self._parity = [0]
+
+    @property
+    def is_exact(self):
+        """Whether every value added is held."""
+        return len(self.levels) == 1
+
+    def add(self, values):
+        """Add the value of a simulation on each day.
+
+        Args:
+            values (array): Value on each day
+        """
+        values = np.asarray(values)
+        self.count += 1
+        self.sum += values
+        delta = values - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (values - self._mean)
+        self.levels[0].append(values[:, np.newaxis])
+        if len(self.levels[0]) > self.capacity:
+            self._compress()
+
+    def merge(self, other):
+        """Add the values of another sketch of the same days.
+
+        Args:
+            other (DailyQuantileSketch): Sketch
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 = self._m2 + other._m2 + delta**2 * self.count * other.count / count
+        self._mean = self._mean + delta * other.count / count
+        self.count = count
+        self.sum = self.sum + other.sum
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+            self._parity.append(0)
+        for level, blocks in enumerate(other.levels):
+            self.levels[level].extend(blocks)
+        self._compress()
+
+    def _level_size(self, level):
+        return sum(block.shape[1] for block in self.levels[level])
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if self._level_size(level) > self.capacity:
+                self._compact(level)
+            level += 1
+
+    def _compact(self, level):
+        items = np.sort(np.hstack(self.levels[level]), axis=1)
+        # With an odd number of values, the largest stays at its level
+        kept = []
+        if items.shape[1] % 2 == 1:
+            kept = [items[:, -1:]]
+            items = items[:, :-1]
+        if level + 1 == len(self.levels):
+            self.levels.append([])
+            self._parity.append(0)
+        self.levels[level] = kept
+        self.levels[level + 1].append(items[:, self._parity[level] :: 2])
+        self._parity[level] = 1 - self._parity[level]
+
+    def _exact_values(self):
+        # Every value, with a row for each day
+        return np.hstack(self.levels[0])
+
+    def mean(self):
+        """Get the mean of each day."""
+        return self.sum / self.count
+
+    def std(self):
+        """Get the sample standard deviation of each day."""
+        if self.is_exact:
+            by_date = self._exact_values()
+            # Sums are taken in the same order as pandas row statistics of a dataframe
+            # with a column for each simulation, so results match to the last digit
+            if np.issubdtype(by_date.dtype, np.integer):
+                return np.ascontiguousarray(by_date.T).std(axis=0, ddof=1)
+            return by_date.std(axis=1, ddof=1)
+        return np.sqrt(self._m2 / (self.count - 1))
+
+    def quantiles(self, qs):
+        """Get quantiles of each day, linearly interpolated between values as
+        numpy.quantile.
+
+        Args:
+            qs (list): Quantiles, between 0 and 1
+
+        Returns:
+            array: Values, with a row for each quantile and a column for each day
+        """
+        if self.is_exact:
+            return np.percentile(self._exact_values(), np.asarray(qs) * 100.0, axis=1)
+
+        items = np.hstack([block for blocks in self.levels for block in blocks])
+        weights = np.concatenate(
+            [
+                np.full(block.shape[1], 2**level)
+                for level, blocks in enumerate(self.levels)
+                for block in blocks
+            ]
+        )
+        order = np.argsort(items, axis=1, kind="stable")
+        items = np.take_along_axis(items, order, axis=1)
+        # Number of simulations up to and including each value, by day
+        ranks = np.cumsum(weights[order], axis=1)
+
+        def value_at(rank):
+            # Value of the simulation at a rank (from 0) on each day
+            column = (ranks <= rank).sum(axis=1, keepdims=True)
+            return np.take_along_axis(items, column, axis=1)[:, 0]
+
+        results = []
+        for q in qs:
+            position = q * (self.count - 1)
+            lower = np.floor(position)
+            low = value_at(lower)
+            high = value_at(min(lower + 1, self.count - 1))
+            results.append(low + (high - low) * (position - lower))
+        return np.array(results)
@@ -0,0 +1,106 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        out_processing.sim_aggregator
+# Purpose:     Reduce simulation outputs into running aggregates as simulations finish
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+from collections import defaultdict
+
+from economics.cost_mitigation import EconomicsAccumulator
+from out_processing import meth_table, prog_table
+
+
+class SimAggregator:
+    """Running aggregates of finished simulations. Each simulation output is reduced
+    to the values used by the economics and summary statistic outputs as soon as it is
+    added, so its leak, site and timeseries dataframes can be dropped (they are written
+    to the output directory by the simulation itself). Results do not depend on the
+    order simulations are added in.
+
+    The mitigated volume of a program needs the leaks of the baseline program of the
+    same simulation, so leak volumes are kept only until the baseline program of their
+    simulation has been added, and baseline leak volumes until every program of their
+    simulation has.
+    """
+
+    def __init__(self, programs, baseline_program):
+        """
+        Args:
+            programs (dict): Program parameters
+            baseline_program (string): Name of the Baseline program
+        """
+        self.programs = programs
+        self.baseline_program = baseline_program
+        _, self.meth_cols = meth_table.method_columns(programs)
+        self.economics = EconomicsAccumulator()
+        self.sim_progs = []
+        self.sim_meths = []
+        self._pending_leaks = defaultdict(list)
+        self._natural_leaks = {}
+        self._n_added = defaultdict(int)
+
+    def add(self, sim_idx, sim_result):
+        """Reduce the output of a finished simulation.
+
+        Args:
+            sim_idx (int): Position of the simulation in the list of simulations, used to
+                keep economics in the order of the simulations
+            sim_result (dict): Simulation output
+        """
+        sim = int(sim_result["meta"]["simulation"])
+        self.economics.add(sim_idx, sim_result)
+        self.sim_meths.append(meth_table.sim_stats(sim_result, self.meth_cols))
+        stats, leaks = prog_table.sim_stats(sim_result)
+
+        if self.baseline_program not in self.programs:
+            self.sim_progs.append(prog_table.add_mitigation(stats, leaks, leaks.iloc[0:0]))
+        elif sim_result["program_name"] == self.baseline_program:
+            self._natural_leaks[sim] = leaks
+            for pending_stats, pending_leaks in self._pending_leaks.pop(sim, []):
+                self.sim_progs.append(
+                    prog_table.add_mitigation(pending_stats, pending_leaks, leaks)
+                )
+            self.sim_progs.append(prog_table.add_mitigation(stats, leaks, leaks))
+        elif sim in self._natural_leaks:
+            self.sim_progs.append(prog_table.add_mitigation(stats, leaks, self._natural_leaks[sim]))
+        else:
+            self._pending_leaks[sim].append((stats, leaks))
+
+        self._n_added[sim] += 1
+        if self._n_added[sim] == len(self.programs):
+            self._natural_leaks.pop(sim, None)
+
+    def _flush(self):
+        # Simulations whose baseline program never finished have nothing mitigated
+        for sim in list(self._pending_leaks):
+            for stats, leaks in self._pending_leaks.pop(sim):
+                self.sim_progs.append(prog_table.add_mitigation(stats, leaks, leaks.iloc[0:0]))
+
+    def prog_table(self):
+        """Program summary statistics of all added simulations
+        (see out_processing.prog_table.generate).
+        """
+        self._flush()
+        return prog_table.summarize(self.sim_progs, self.sim_meths, self.programs)
+
+    def cost_mitigation(self, ref_program, base_program, output_directory, plot_queue=None):
+        """Economics outputs of all added simulations
+        (see economics.cost_mitigation.cost_mitigation).
+        """
+        return self.economics.summarize(
+            ref_program, base_program, output_directory, plot_queue=plot_queue
+        )
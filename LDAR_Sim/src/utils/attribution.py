@@ -12,7 +12,10 @@
 # but WITHOUT ANY WARRANTY; without even the implied warranty of
 # MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 # MIT License for more details.
+from math import ceil
+
 from methods.reporting.estimate import estimate_start_date
+from utils.site_counters import method_key
 
 
 def update_tag(
@@ -47,8 +50,9 @@ def update_tag(
             leak["date_tagged"] = time_obj.current_date
             leak["tagged_by_company"] = company
             timeseries["natural_n_tags"][time_obj.current_timestep] += 1
+            schedule_repair(leak, site, time_obj, company, prog_params)
         elif leak["tagged_by_company"] == company:
-            timeseries["{}_redund_tags".format(company)][time_obj.current_timestep] += 1
+            timeseries[method_key(company, "redund_tags")][time_obj.current_timestep] += 1
         return False
 
     elif not leak["tagged"]:
@@ -75,7 +79,7 @@ def update_tag(
 
         leak["tagged_by_company"] = company
         leak["tagged_by_crew"] = crew_id
-        timeseries["{}_n_tags".format(company)][time_obj.current_timestep] += 1
+        timeseries[method_key(company, "n_tags")][time_obj.current_timestep] += 1
         # if initially flagged give credit to flagging company
         if site["currently_flagged"] and site["flagged_by"] is not None:
             leak["init_detect_by"] = site["flagged_by"]
@@ -83,10 +87,34 @@ def update_tag(
         else:
             leak["init_detect_by"] = company
             leak["init_detect_date"] = leak["date_tagged"]
+        schedule_repair(leak, site, time_obj, company, prog_params)
     return True
 
 
-def update_flag(config, site, timeseries, time_obj, campaign, company, consider_venting=False):
+def schedule_repair(leak, site, time_obj, company, prog_params=None):
+    """Queue a tagged leak for repair on the first day it could be repaired. Leaks
+        tagged by natural are repaired the same day. Leaks that are not part of a
+        leak table (plain dictionaries) have no repair queue and are skipped.
+
+    Args:
+        leak (leak obj): Leak object. See initialization.leaks for details
+        site (dict): site object
+        time_obj (current time obj): current time state. ie self.state['t']
+        company (str): Company responsible for tagging the leak
+        prog_params (dict, optional): Program parameters. Required if company is not natural
+    """
+    repair_queue = getattr(leak, "repair_queue", None)
+    if repair_queue is None:
+        return
+    due_ts = time_obj.current_timestep
+    if company != "natural":
+        due_ts += ceil(site["repair_delay"] + prog_params["methods"][company]["reporting_delay"])
+    repair_queue.push(due_ts, leak.row)
+
+
+def update_flag(
+    config, site, timeseries, time_obj, campaign, company, flag_registry, consider_venting=False
+):
     """Updates the flag on a site. If a site is not flagged
         This function will flag. If it is already flagged, the
         site will be marked as either"
@@ -99,13 +127,14 @@ def update_flag(config, site, timeseries, time_obj, campaign, company, consider_
         timeseries (timeseries obj): ie self.timeseries
         time_obj (current time obj): current time state. ie self.state['t']
         company (str): Company responsible for detecting leak
+        flag_registry (FlagRegistry): Registry of flagged sites, ie. self.state['flag_registry']
         consider_venting (bool): is venting enabled in method?
     """
     site_obj = site["site"]
     site_true_rate = site["site_measured_rate"]
     venting = site["vent_rate"]
     if site_obj["currently_flagged"]:
-        timeseries["{}_flags_redund1".format(company)][time_obj.current_timestep] += 1
+        timeseries[method_key(company, "flags_redund1")][time_obj.current_timestep] += 1
     else:
         # Flag the site for follow-up
         site_obj["currently_flagged"] = True
@@ -114,17 +143,18 @@ def update_flag(config, site, timeseries, time_obj, campaign, company, consider_
 
         site_obj["date_flagged"] = time_obj.current_date
         site_obj["flagged_by"] = company
+        flag_registry.flag(site_obj)
         if company in campaign:
             campaign[company]["sites_followed_up"].add(site_obj["facility_ID"])
-        timeseries["{}_eff_flags".format(company)][time_obj.current_timestep] += 1
+        timeseries[method_key(company, "eff_flags")][time_obj.current_timestep] += 1
 
         # Check to see if the site has any leaks that are active and tagged
         site_leaks = len([lk for lk in site_obj["active_leaks"] if lk["tagged"]])
 
         if site_leaks > 0:
-            timeseries["{}_flags_redund2".format(company)][time_obj.current_timestep] += 1
+            timeseries[method_key(company, "flags_redund2")][time_obj.current_timestep] += 1
 
         # Would the site have been chosen without venting?
         if consider_venting:
             if (site_true_rate - venting) < config["follow_up"]["thresh"]:
-                timeseries["{}_flag_wo_vent".format(company)][time_obj.current_timestep] += 1
+                timeseries[method_key(company, "flag_wo_vent")][time_obj.current_timestep] += 1
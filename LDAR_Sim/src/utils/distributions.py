@@ -88,6 +88,42 @@ def leak_rvs(distribution, max_size=None, gpsec_conversion=None):
     return leaksize
 
 
+def leak_rvs_batch(distribution, size, max_size=None, gpsec_conversion=None, random_state=None):
+    """Vectorized leak_rvs. Draw size leaks at once, converted to g/s, and redraw only
+        the leaks that are not smaller than max size until all of them are.
+    Args:
+        distribution (A scipy Distribution): Distribution of leak sizes
+        size (int): Number of leaks
+        max_size (int, optional): Maximum Leak Size
+        gpsec_conversion (array, optional):  Conversion Units [input_metric, input_increment]
+        random_state (numpy Generator, optional): Random generator used for the draws
+    Returns:
+        array: leak sizes in units provided
+    """
+
+    def draw(n):
+        leaksizes = np.asarray(distribution.rvs(size=n, random_state=random_state), dtype=float)
+        if (
+            gpsec_conversion
+            and gpsec_conversion[0].lower() != "gram"
+            and gpsec_conversion[1].lower() != "second"
+        ):
+            leaksizes = gas_convert(
+                leaksizes,
+                input_metric=gpsec_conversion[0],
+                input_increment=gpsec_conversion[1],
+            )
+        return leaksizes
+
+    leaksizes = draw(size)
+    if max_size:
+        rejected = np.flatnonzero(leaksizes >= max_size)
+        while len(rejected) > 0:
+            leaksizes[rejected] = draw(len(rejected))
+            rejected = rejected[leaksizes[rejected] >= max_size]
+    return leaksizes
+
+
 def unpackage_dist(program, wd):
     """Create scipy like leak distributions based on input dists or leak files
 
@@ -0,0 +1,146 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        utils.flag_registry
+# Purpose:     Registry of the sites flagged for follow-up, indexed by preferred
+#              follow-up method and by whether their reporting delay has passed.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+
+class FlagRegistry:
+    """Sites currently flagged for follow-up, kept up to date by whoever flags
+    (utils.attribution.update_flag, campaigns.methods.update_campaigns) or unflags
+    (methods.crew.BaseCrew.visit_site) a site.
+
+    Flags are split by preferred follow-up method. The flags of each preferred method
+    wait in a heap keyed by the date their reporting delay passes, and are moved to the
+    reported flags of that method from that date. Flags preferring a method that is not a
+    follow-up method of the program are never reported for it, so they are not queued.
+    Entries are not removed from the heaps when a site is unflagged or flagged again, so
+    popped entries are checked against the flag they were pushed for, and heaps are
+    pruned of these stale entries at snapshots when they outgrow the flagged sites.
+
+    Follow-up methods are deployed on the flags as they were at the end of the last
+    follow-up deployment (state["flags"], see snapshot), so the sites unflagged since
+    then are also kept.
+    """
+
+    def __init__(self, sites, methods):
+        """
+        Args:
+            sites (list): Sites of the simulation
+            methods (dict): Method parameters of the program, keyed by method label
+        """
+        self.sites = sites
+        self.methods = methods
+        self.follow_up_methods = {
+            label for label, method in methods.items() if method.get("is_follow_up", False)
+        }
+        self.site_index = {site["facility_ID"]: site_idx for site_idx, site in enumerate(sites)}
+        # Preferred follow-up method and flag count of each flagged site
+        self.flagged = {}
+        self.n_flags = defaultdict(int)
+        self.pending = defaultdict(list)
+        self.reported = defaultdict(set)
+        self.unflagged = set()
+        self.last_snapshot = None
+
+    def flag(self, site):
+        """Register the flag of a site, after its flag values (date_flagged, flagged_by
+        and preferred_FU_method) have been set.
+
+        Args:
+            site (dict): Flagged site
+        """
+        facility_ID = site["facility_ID"]
+        self._remove(facility_ID)
+        preferred = site["preferred_FU_method"]
+        self.flagged[facility_ID] = preferred
+        self.n_flags[facility_ID] += 1
+        if preferred is not None and preferred not in self.follow_up_methods:
+            return
+        reported_date = site["date_flagged"] + timedelta(
+            days=self.methods[site["flagged_by"]]["reporting_delay"]
+        )
+        heapq.heappush(
+            self.pending[preferred],
+            (reported_date, self.site_index[facility_ID], self.n_flags[facility_ID]),
+        )
+
+    def unflag(self, site):
+        """Remove the flag of a site, if it is flagged.
+
+        Args:
+            site (dict): Unflagged site
+        """
+        if self._remove(site["facility_ID"]):
+            self.unflagged.add(site["facility_ID"])
+
+    def _remove(self, facility_ID):
+        if facility_ID not in self.flagged:
+            return False
+        self.reported[self.flagged.pop(facility_ID)].discard(facility_ID)
+        return True
+
+    def snapshot(self):
+        """Get the facility IDs of the flagged sites, the pool of sites of follow-up
+        methods until the next snapshot.
+
+        Returns:
+            set: Facility IDs
+        """
+        self.unflagged = set()
+        self.last_snapshot = set(self.flagged)
+        if sum(len(pending) for pending in self.pending.values()) > 2 * len(self.flagged):
+            self._prune()
+        return self.last_snapshot
+
+    def _prune(self):
+        # Drop heap entries of sites unflagged or flagged again since they were pushed
+        for pending in self.pending.values():
+            pending[:] = [entry for entry in pending if self._is_current(entry)]
+            heapq.heapify(pending)
+
+    def _is_current(self, entry):
+        _, site_idx, n_flags = entry
+        facility_ID = self.sites[site_idx]["facility_ID"]
+        return facility_ID in self.flagged and self.n_flags[facility_ID] == n_flags
+
+    def candidates(self, method, current_date):
+        """Get the sites of the last snapshot that may be due for follow-up by a method:
+        sites flagged for any method or for that method whose reporting delay has
+        passed, and sites unflagged since the snapshot.
+
+        Args:
+            method (str): Follow-up method label
+            current_date (datetime): Current date
+
+        Returns:
+            list: Indexes of the sites in the simulation's sites, sorted
+        """
+        for preferred in (None, method):
+            pending = self.pending[preferred]
+            while pending and pending[0][0] <= current_date:
+                entry = heapq.heappop(pending)
+                if self._is_current(entry):
+                    self.reported[preferred].add(self.sites[entry[1]]["facility_ID"])
+        facility_IDs = (self.reported[None] | self.reported[method] | self.unflagged) & (
+            self.last_snapshot or set()
+        )
+        return sorted(self.site_index[facility_ID] for facility_ID in facility_IDs)
@@ -0,0 +1,408 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        utils.leak_table
+# Purpose:     Columnar (struct of arrays) storage for all leaks in a simulation,
+#              with dictionary style views for code that works on single leaks.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+from collections.abc import MutableMapping, Sequence
+from datetime import datetime, timedelta
+
+import numpy as np
+from utils.repair_queue import RepairQueue
+
+# Leak fields, in the order they are created by initialization.leaks.generate_leak
+LEAK_FIELDS = (
+    "leak_ID",
+    "facility_ID",
+    "equipment_group",
+    "rate",
+    "lat",
+    "lon",
+    "status",
+    "days_active",
+    "volume",
+    "estimated_volume",
+    "estimated_volume_b",
+    "measured_rate",
+    "tagged",
+    "component",
+    "date_began",
+    "day_ts_began",
+    "estimated_date_began",
+    "date_tagged",
+    "tagged_by_company",
+    "tagged_by_crew",
+    "init_detect_by",
+    "init_detect_date",
+    "requires_shutdown",
+    "date_repaired",
+    "repair_delay",
+)
+_FIELD_SET = frozenset(LEAK_FIELDS)
+
+# Fields that are used in daily array operations are kept as typed arrays
+NUMERIC_FIELDS = {
+    "equipment_group": np.int64,
+    "rate": np.float64,
+    "days_active": np.int64,
+    "tagged": np.bool_,
+    "day_ts_began": np.int64,
+}
+# String fields with few distinct values are stored as integer codes. -1 is None.
+CATEGORICAL_FIELDS = ("status", "tagged_by_company")
+ACTIVE = 0
+REPAIRED = 1
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+US_PER_DAY = 86400 * 1000000
+
+
+class LeakTable:
+    """Columnar store for every leak in a simulation. Each leak is a row, each
+    leak field a numpy array, so the daily updates can be done as array operations.
+    Fields that are not part of the leak definition (ie. "{method}_sp_covered")
+    are kept in a per row dictionary.
+
+    Sites reference the table through lists of row indices, one for active and one
+    for repaired leaks, in the same order the old per site leak lists were kept.
+
+    Running totals of the active leak count, the active emission rate (total and
+    per site) and the repaired leak count are updated as leaks are added or
+    repaired, so daily reporting does not need to visit every leak.
+
+    Natural repair tags and repairs are scheduled on the table's repair_queue.
+    """
+
+    def __init__(self, capacity=1024):
+        self.n_rows = 0
+        self.n_active = 0
+        self.n_repaired = 0
+        self.active_rate = 0.0
+        self._site_rate = np.zeros(64, dtype=np.float64)
+        self._capacity = max(int(capacity), 1)
+        self._columns = {}
+        for field in LEAK_FIELDS:
+            self._columns[field] = self._new_column(field, self._capacity)
+        self._columns["site_index"] = np.zeros(self._capacity, dtype=np.int64)
+        # Date tagged as microseconds since the epoch, used for repair scheduling
+        self._columns["tagged_at"] = np.zeros(self._capacity, dtype=np.int64)
+        self._extras = np.empty(self._capacity, dtype=object)
+        self._labels = {"status": ["active", "repaired"], "tagged_by_company": []}
+        self._codes = {
+            field: {label: code for code, label in enumerate(labels)}
+            for field, labels in self._labels.items()
+        }
+        self.site_active = []
+        self.site_repaired = []
+        self.repair_queue = RepairQueue()
+
+    @staticmethod
+    def _new_column(field, size):
+        if field in NUMERIC_FIELDS:
+            return np.zeros(size, dtype=NUMERIC_FIELDS[field])
+        if field == "status":
+            return np.full(size, ACTIVE, dtype=np.int16)
+        if field in CATEGORICAL_FIELDS:
+            return np.full(size, -1, dtype=np.int16)
+        return np.empty(size, dtype=object)
+
+    def _grow(self):
+        new_capacity = self._capacity * 2
+        for field, col in self._columns.items():
+            if field in self._labels or field in _FIELD_SET:
+                new_col = self._new_column(field, new_capacity)
+            else:
+                new_col = np.zeros(new_capacity, dtype=col.dtype)
+            new_col[: self._capacity] = col
+            self._columns[field] = new_col
+        extras = np.empty(new_capacity, dtype=object)
+        extras[: self._capacity] = self._extras
+        self._extras = extras
+        self._capacity = new_capacity
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, field):
+        """Returns a writable view of the column for all leaks in the table."""
+        return self._columns[field][: self.n_rows]
+
+    def add_site(self):
+        """Register a site with the table.
+
+        Returns:
+            int: Index of the site in the table.
+        """
+        site_index = len(self.site_active)
+        if site_index == len(self._site_rate):
+            self._site_rate = np.concatenate([self._site_rate, np.zeros_like(self._site_rate)])
+        self.site_active.append([])
+        self.site_repaired.append([])
+        return site_index
+
+    @property
+    def site_rate(self):
+        """Active emission rate (g/s) of each site"""
+        return self._site_rate[: len(self.site_active)]
+
+    def add(self, site_index, leak):
+        """Add a leak to the table.
+
+        Args:
+            site_index (int): Index of site returned by add_site
+            leak (dict): Leak object. See initialization.leaks for details
+
+        Returns:
+            int: Row of the leak in the table
+        """
+        if self.n_rows == self._capacity:
+            self._grow()
+        row = self.n_rows
+        self.n_rows += 1
+        self._columns["site_index"][row] = site_index
+        for key, value in leak.items():
+            self.set(row, key, value)
+        if self._columns["status"][row] == REPAIRED:
+            self.site_repaired[site_index].append(row)
+            self.n_repaired += 1
+        else:
+            self.site_active[site_index].append(row)
+            rate = self._columns["rate"][row]
+            self.n_active += 1
+            self.active_rate += rate
+            self._site_rate[site_index] += rate
+        return row
+
+    def code(self, field, label):
+        """Get the integer code of a categorical field value, registering it if new."""
+        if label is None:
+            return -1
+        codes = self._codes[field]
+        if label not in codes:
+            codes[label] = len(self._labels[field])
+            self._labels[field].append(label)
+        return codes[label]
+
+    def labels(self, field):
+        """List of categorical field values, indexed by code"""
+        return self._labels[field]
+
+    def get(self, row, key):
+        if key in NUMERIC_FIELDS:
+            return self._columns[key][row].item()
+        if key in self._labels:
+            code = self._columns[key][row]
+            return None if code < 0 else self._labels[key][code]
+        if key in _FIELD_SET:
+            return self._columns[key][row]
+        extras = self._extras[row]
+        if extras is None:
+            raise KeyError(key)
+        return extras[key]
+
+    def set(self, row, key, value):
+        if key in self._labels:
+            self._columns[key][row] = self.code(key, value)
+        elif key in _FIELD_SET:
+            self._columns[key][row] = value
+            if key == "date_tagged":
+                self._columns["tagged_at"][row] = (
+                    0 if value is None else (value - _EPOCH) // _ONE_US
+                )
+        else:
+            if self._extras[row] is None:
+                self._extras[row] = {}
+            self._extras[row][key] = value
+
+    def extra_keys(self, row):
+        extras = self._extras[row]
+        return () if extras is None else extras.keys()
+
+    def extra_values(self, rows, key, default=None):
+        """Value of a field that is not part of the leak definition for each row, or
+        default for rows that do not have it.
+        """
+        return [
+            default if extras is None else extras.get(key, default) for extras in self._extras[rows]
+        ]
+
+    def view(self, row):
+        return LeakView(self, row)
+
+    def active_leaks(self, site_index):
+        return SiteLeaks(self, self.site_active[site_index])
+
+    def repaired_leaks(self, site_index):
+        return SiteLeaks(self, self.site_repaired[site_index])
+
+    def active_rows(self):
+        """Rows of all leaks that have not been repaired, in table order."""
+        return np.flatnonzero(self["status"] == ACTIVE)
+
+    def site_order(self, rows):
+        """Sort rows by site, keeping the order of leaks within a site."""
+        rows = np.asarray(rows, dtype=np.int64)
+        return rows[np.lexsort((rows, self._columns["site_index"][rows]))]
+
+    def days_since_tagged(self, rows, date):
+        """Whole days between the tag date of each leak and date, as (date - date_tagged).days"""
+        now = (date - _EPOCH) // _ONE_US
+        return (now - self._columns["tagged_at"][rows]) // US_PER_DAY
+
+    def emission_rate(self, rows):
+        """Summed emission rate (g/s) of rows. Use active_rate for all active leaks."""
+        return self._columns["rate"][rows].sum()
+
+    def volumes(self, rows, cur_ts):
+        """Emitted volume (kg) of each leak from when it began until timestep cur_ts."""
+        began = self._columns["day_ts_began"][rows]
+        duration = np.where(began < 0, cur_ts, cur_ts - began)
+        return duration * self._columns["rate"][rows] * 86.4
+
+    def set_volumes(self, rows, cur_ts):
+        """Set the volume field of rows and return the volumes as an array."""
+        volumes = self.volumes(rows, cur_ts)
+        self._columns["volume"][rows] = volumes
+        return volumes
+
+    def repair(self, rows, date, cur_ts):
+        """Mark leaks as repaired on date and move them to the repaired leaks of their site.
+
+        Args:
+            rows (array): Rows to repair, in the order they should be added to the
+                site repaired leak lists.
+            date (datetime): Date of repair
+            cur_ts (int): Current timestep
+        """
+        cols = self._columns
+        cols["status"][rows] = REPAIRED
+        cols["date_repaired"][rows] = date
+        cols["repair_delay"][rows] = self.days_since_tagged(rows, date).tolist()
+        self.set_volumes(rows, cur_ts)
+        rates = cols["rate"][rows]
+        self.n_active -= len(rows)
+        self.n_repaired += len(rows)
+        self.active_rate -= rates.sum()
+        np.subtract.at(self._site_rate, cols["site_index"][rows], rates)
+        status = cols["status"]
+        for site_index in np.unique(cols["site_index"][rows]).tolist():
+            active = self.site_active[site_index]
+            self.site_repaired[site_index].extend(
+                [row for row in active if status[row] == REPAIRED]
+            )
+            active[:] = [row for row in active if status[row] != REPAIRED]
+            if not active:
+                self._site_rate[site_index] = 0.0
+        if self.n_active == 0:
+            self.active_rate = 0.0
+
+    def to_records(self, rows):
+        """Leaks as a list of dictionaries, one per row, as used for output dataframes."""
+        rows = np.asarray(rows, dtype=np.int64)
+        values = []
+        for field in LEAK_FIELDS:
+            col = self._columns[field][rows]
+            if field in self._labels:
+                labels = self._labels[field]
+                values.append([None if code < 0 else labels[code] for code in col.tolist()])
+            else:
+                values.append(col.tolist())
+        records = []
+        for idx, extras in enumerate(self._extras[rows]):
+            record = {field: vals[idx] for field, vals in zip(LEAK_FIELDS, values)}
+            if extras:
+                record.update(extras)
+            records.append(record)
+        return records
+
+
+class LeakView(MutableMapping):
+    """Dictionary view of a single leak in a LeakTable. Reads and writes go
+    straight to the table, so sensors and attribution functions can keep working
+    with leaks as dictionaries.
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def repair_queue(self):
+        return self.table.repair_queue
+
+    def __getitem__(self, key):
+        return self.table.get(self.row, key)
+
+    def __setitem__(self, key, value):
+        self.table.set(self.row, key, value)
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            raise TypeError("Leak field {} cannot be deleted".format(key))
+        extras = self.table._extras[self.row]
+        if extras is None:
+            raise KeyError(key)
+        del extras[key]
+
+    def __contains__(self, key):
+        return key in _FIELD_SET or key in self.table.extra_keys(self.row)
+
+    def __iter__(self):
+        yield from LEAK_FIELDS
+        yield from list(self.table.extra_keys(self.row))
+
+    def __len__(self):
+        return len(LEAK_FIELDS) + len(self.table.extra_keys(self.row))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class SiteLeaks(Sequence):
+    """List like view of the leaks of a site. Items are LeakView objects."""
+
+    __slots__ = ("table", "rows")
+
+    def __init__(self, table, rows):
+        self.table = table
+        self.rows = rows
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [LeakView(self.table, row) for row in self.rows[idx]]
+        return LeakView(self.table, self.rows[idx])
+
+    def __iter__(self):
+        table = self.table
+        for row in self.rows:
+            yield LeakView(table, row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            dict(leak) == dict(other_leak) for leak, other_leak in zip(self, other)
+        )
+
+    def __repr__(self):
+        return repr([dict(leak) for leak in self])
@@ -0,0 +1,66 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        utils.repair_queue
+# Purpose:     Timestep keyed queue of leak events (natural repair tagging and repairs),
+#              so only leaks that are due are visited each day.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+import heapq
+
+NATURAL_TAG = 0
+REPAIR = 1
+
+
+class RepairQueue:
+    """Min-heap of (timestep, event, row) entries, where row is a row of a LeakTable.
+
+    NATURAL_TAG events are scheduled when a leak is created, for the day its
+    days_active reaches NRd. REPAIR events are scheduled when a leak is tagged, for
+    the first day its repair could be due. Entries are not removed when a leak is
+    re-tagged or repaired, so whoever pops events checks them against the leak table.
+    """
+
+    def __init__(self):
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, timestep, row, event=REPAIR):
+        heapq.heappush(self._heap, (timestep, event, row))
+
+    def pop(self, timestep, event):
+        """Remove and return the rows of all event entries due on or before timestep.
+
+        Args:
+            timestep (int): Current timestep
+            event (int): NATURAL_TAG or REPAIR
+
+        Returns:
+            list: Rows of due entries, in the order they were scheduled for.
+        """
+        heap = self._heap
+        rows = []
+        other = []
+        while heap and heap[0][0] <= timestep:
+            entry = heapq.heappop(heap)
+            if entry[1] == event:
+                rows.append(entry[2])
+            else:
+                other.append(entry)
+        for entry in other:
+            heapq.heappush(heap, entry)
+        return rows
@@ -0,0 +1,162 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        utils.site_counters
+# Purpose:     Survey counters of each site and daily timeseries of a method, as
+#              preallocated arrays held by the method's company.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+# Site counters of a method, as (site output column suffix, SiteCounters attribute),
+# in the order of the site output columns
+SITE_COUNTERS = (
+    ("t_since_last_LDAR", "t_since_last_LDAR"),
+    ("surveys_conducted", "surveys_conducted"),
+    ("attempted_today?", "attempted_today"),
+    ("surveys_done_this_year", "surveys_done_this_year"),
+    ("missed_leaks", "missed_leaks"),
+)
+# Daily timeseries of a method, held as "{method label}_{timeseries}"
+METHOD_TIMESERIES = (
+    "prop_sites_avail",
+    "cost",
+    "sites_visited",
+    "travel_time",
+    "survey_time",
+    "redund_tags",
+    "missed_leaks",
+    "sites_vis_w_leaks",
+    "eff_flags",
+    "n_tags",
+    "flags_redund1",
+    "flags_redund2",
+    "flag_wo_vent",
+)
+
+
+@lru_cache(maxsize=None)
+def method_key(label, name):
+    """Get the key of a method's site counter or timeseries, ie. "OGI_missed_leaks". Keys
+    are built once and interned, so lookups in the hot loop neither format nor hash new
+    strings.
+
+    Args:
+        label (str): Method label
+        name (str): Counter or timeseries name
+
+    Returns:
+        str: Key
+    """
+    return sys.intern("{}_{}".format(label, name))
+
+
+class SiteCounters:
+    """Survey counters of each site for a method: days since last survey
+    (t_since_last_LDAR), surveys conducted, whether a crew attempted the site today
+    (attempted_today), surveys done this year and covered leaks missed by the method's
+    crews. Counters are arrays indexed by the position of the site in state["sites"], and
+    sites are also keyed by facility_ID (rows). The method's daily timeseries are
+    preallocated arrays (timeseries), shared with the simulation timeseries.
+
+    Counters of a simulation are held by the method's company (BaseCompany.counters) and
+    kept in state["site_counters"], keyed by method label. Counters are written to the
+    sites as "{method label}_{counter}" for outputs (write_sites).
+    """
+
+    def __init__(self, label, sites, n_timesteps, t_since_last_LDAR=None):
+        """
+        Args:
+            label (str): Method label
+            sites (list): Sites of the simulation
+            n_timesteps (int): Number of days simulated
+            t_since_last_LDAR (array, optional): Days since last survey of each site at
+                the start of the simulation. Defaults to None, 0 for all sites.
+        """
+        self.label = label
+        self.rows = {site["facility_ID"]: site_idx for site_idx, site in enumerate(sites)}
+        n_sites = len(sites)
+        if t_since_last_LDAR is None:
+            self.t_since_last_LDAR = np.zeros(n_sites, dtype=np.int64)
+        else:
+            self.t_since_last_LDAR = np.array(t_since_last_LDAR, dtype=np.int64)
+        self.surveys_conducted = np.zeros(n_sites, dtype=np.int64)
+        self.attempted_today = np.zeros(n_sites, dtype=bool)
+        self.surveys_done_this_year = np.zeros(n_sites, dtype=np.int64)
+        self.missed_leaks = np.zeros(n_sites, dtype=np.int64)
+        self.timeseries = {
+            method_key(label, name): np.zeros(n_timesteps) for name in METHOD_TIMESERIES
+        }
+
+    def row(self, site):
+        """Get the row of a site."""
+        return self.rows[site["facility_ID"]]
+
+    def series(self, name):
+        """Get a daily timeseries of the method, ie. "missed_leaks"."""
+        return self.timeseries[method_key(self.label, name)]
+
+    def record_survey(self, site_idx):
+        """Count a survey of a site, resetting its days since last survey.
+
+        Args:
+            site_idx (int): Row of the site
+
+        Returns:
+            int: Days since last survey of the site before the survey
+        """
+        t_since_last_LDAR = int(self.t_since_last_LDAR[site_idx])
+        self.surveys_conducted[site_idx] += 1
+        self.surveys_done_this_year[site_idx] += 1
+        self.t_since_last_LDAR[site_idx] = 0
+        return t_since_last_LDAR
+
+    def add_missed_leaks(self, site_idx, n_missed, timestep):
+        """Count covered leaks missed at a site.
+
+        Args:
+            site_idx (int): Row of the site
+            n_missed (int): Leaks missed
+            timestep (int): Current timestep
+        """
+        self.missed_leaks[site_idx] += n_missed
+        self.series("missed_leaks")[timestep] += n_missed
+
+    def end_day(self, end_of_year=False):
+        """Update the counters of all sites at the end of a day: a day more since last
+        survey, no site attempted, and surveys done this year reset at the end of a year.
+
+        Args:
+            end_of_year (bool, optional): Whether the day is the last day of a year.
+                Defaults to False.
+        """
+        self.t_since_last_LDAR += 1
+        self.attempted_today[:] = False
+        if end_of_year:
+            self.surveys_done_this_year[:] = 0
+
+    def write_sites(self, sites):
+        """Set the counters of each site on the sites, as "{method label}_{counter}".
+
+        Args:
+            sites (list): Sites of the simulation, in the order of the rows
+        """
+        for column, attribute in SITE_COUNTERS:
+            key = method_key(self.label, column)
+            for site, value in zip(sites, getattr(self, attribute).tolist()):
+                site[key] = value
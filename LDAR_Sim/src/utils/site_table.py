@@ -0,0 +1,155 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        utils.site_table
+# Purpose:     Survey parameters of each site for a method, as columns indexed by site,
+#              read by the method's scheduler and crews.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+import numpy as np
+
+# Days in a month, used to spread surveys over deployment months
+DAYS_PER_MONTH = 30.4167
+# Survey parameters of a site, held by each site as "{method label}_{parameter}"
+SITE_PARAMETERS = ("RS", "time", "min_int", "min_time_bt_surveys")
+
+
+def site_column(sites, key):
+    """Get the values of a site field, NaN for sites without it.
+
+    Args:
+        sites (list): Sites
+        key (str): Site field, ie. "OGI_RS"
+
+    Returns:
+        array: Value of each site
+    """
+    return np.array([site.get(key, np.nan) for site in sites], dtype=np.float64)
+
+
+class MethodSiteTable:
+    """Survey parameters of each site for a method: required surveys per year (RS),
+    minutes to survey (time), minimum days between surveys (min_int) and minimum days
+    between surveys enforced by scheduling (min_time_bt_surveys). Columns are arrays
+    indexed by the position of the site in state["sites"], NaN where a site has no
+    value. Sites are also keyed by facility_ID (rows).
+
+    Tables of a simulation are built by expand_site_parameters and kept in
+    state["site_tables"], keyed by method label.
+    """
+
+    def __init__(self, sites, config, columns=None):
+        """
+        Args:
+            sites (list): Sites of the simulation
+            config (dict): Method parameters
+            columns (dict, optional): Column of each survey parameter. Defaults to None,
+                reading the parameters held by the sites.
+        """
+        self.label = config["label"]
+        self.rows = {site["facility_ID"]: site_idx for site_idx, site in enumerate(sites)}
+        if columns is None:
+            columns = {
+                param: site_column(sites, "{}_{}".format(self.label, param))
+                for param in SITE_PARAMETERS
+            }
+        self.RS = columns["RS"]
+        self.time = columns["time"]
+        self.min_int = columns["min_int"]
+        self.min_time_bt_surveys = columns["min_time_bt_surveys"]
+
+        # Values used by scheduling, as lists for fast access by site
+        self.surveys_per_year = np.trunc(self.RS).tolist()
+        self.min_interval = np.fmax(np.trunc(self.min_int), self.min_time_bt_surveys).tolist()
+        self.min_time = self.min_time_bt_surveys.tolist()
+        if "max_workday" in config:
+            self.survey_days = np.floor(self.time / 60 / config["max_workday"]).tolist()
+
+    def row(self, site):
+        """Get the row of a site."""
+        return self.rows[site["facility_ID"]]
+
+
+def expand_site_parameters(sites, config):
+    """Set the survey parameters of each site for a method. Parameters set by the method
+    (RS, time and scheduling min_time_bt_surveys) replace those of the sites. Mobile
+    methods that are not follow-ups estimate min_time_bt_surveys for sites without one
+    (see initialization.update_methods.est_min_time_bt_surveys), and min_int is set for
+    sites with an RS that is not 0.
+
+    Parameters are calculated for all sites at once, then set on the sites as
+    "{method label}_{parameter}" for outputs.
+
+    Args:
+        sites (list): Sites of the simulation
+        config (dict): Method parameters
+
+    Returns:
+        MethodSiteTable: Survey parameters of each site
+    """
+    label = config["label"]
+    keys = {param: "{}_{}".format(label, param) for param in SITE_PARAMETERS}
+    n_days = DAYS_PER_MONTH * len(config["scheduling"]["deployment_months"])
+    # Values to set on the sites, for each parameter
+    site_values = {}
+
+    RS = site_column(sites, keys["RS"])
+    if config["RS"] is not None:
+        RS[:] = config["RS"]
+        site_values["RS"] = [config["RS"]] * len(sites)
+
+    min_time = site_column(sites, keys["min_time_bt_surveys"])
+    method_min_time = config["scheduling"]["min_time_bt_surveys"]
+    if method_min_time is not None:
+        min_time[:] = method_min_time
+        site_values["min_time_bt_surveys"] = [method_min_time] * len(sites)
+    elif not config["is_follow_up"] and config["deployment_type"] == "mobile":
+        estimate = np.isnan(min_time) & (RS > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            est_min_time = np.floor((n_days / RS) / 2)
+        min_time[estimate] = est_min_time[estimate]
+        est_values = est_min_time.tolist()
+        site_values["min_time_bt_surveys"] = [
+            int(est_values[site_idx]) if is_estimated else None
+            for site_idx, is_estimated in enumerate(estimate.tolist())
+        ]
+
+    time = site_column(sites, keys["time"])
+    if config["time"] is not None:
+        time[:] = config["time"]
+        site_values["time"] = [config["time"]] * len(sites)
+
+    min_int = site_column(sites, keys["min_int"])
+    has_interval = ~np.isnan(RS) & (RS != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        site_min_int = np.floor(n_days / RS)
+    min_int[has_interval] = site_min_int[has_interval]
+    int_values = site_min_int.tolist()
+    site_values["min_int"] = [
+        int(int_values[site_idx]) if is_set else None
+        for site_idx, is_set in enumerate(has_interval.tolist())
+    ]
+
+    for param, values in site_values.items():
+        key = keys[param]
+        for site, value in zip(sites, values):
+            if value is not None:
+                site[key] = value
+
+    return MethodSiteTable(
+        sites,
+        config,
+        columns={"RS": RS, "time": time, "min_int": min_int, "min_time_bt_surveys": min_time},
+    )
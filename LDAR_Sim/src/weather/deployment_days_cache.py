@@ -0,0 +1,121 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        weather.deployment_days_cache
+# Purpose:     On disk cache of the deployment day masks of methods, shared by all
+#              simulations and programs that use the same weather and method settings.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Name of the folder, in the weather cache, holding the deployment day masks
+MASK_DIR_NAME = "deployment_days"
+
+# Cache lookups made by this process, see reset_cache_stats
+cache_stats = {"hits": 0, "misses": 0, "seconds_saved": 0.0}
+
+
+def reset_cache_stats():
+    cache_stats.update({"hits": 0, "misses": 0, "seconds_saved": 0.0})
+
+
+def mask_key(weather, config, start_date, start_work_hour, consider_weather):
+    """Get the content address of a deployment day mask, a hash of everything the
+    mask depends on besides the weather data itself.
+
+    Args:
+        weather (WeatherLookup): Daily or hourly weather lookup
+        config (dict): Method parameters
+        start_date (datetime): Start day of Program
+        start_work_hour (int): Start hour of the work day
+        consider_weather (boolean): Ignore weather if false
+
+    Returns:
+        str: Hex digest
+    """
+    inputs = {
+        "lookup": type(weather).__module__,
+        "weather_envs": config["weather_envs"],
+        "max_workday": config.get("max_workday"),
+        "start_date": start_date.isoformat(),
+        "start_work_hour": start_work_hour,
+        "timesteps": weather.virtual_world["timesteps"],
+        "UTC_offset": weather.state["t"].UTC_offset,
+        "consider_weather": consider_weather,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_deployment_days(
+    weather, method_name, config, start_date, start_work_hour=0, consider_weather=False
+):
+    """Get the deployment day mask of a method, with dimensions [num_lngs, num_lats,
+    num_days]. The mask is read from the cache when it has already been calculated
+    for the same weather and settings, otherwise it is calculated with
+    weather.deployment_days and cached. Masks are stored bit packed next to the
+    weather arrays they were calculated from.
+
+    Args:
+        weather (WeatherLookup): Daily or hourly weather lookup
+        method_name (string): LDAR Method ie. "OGI"
+        config (dict): Method parameters
+        start_date (datetime): Start day of Program
+        start_work_hour (int, optional): Start hour of the work day. Defaults to 0.
+        consider_weather (boolean, optional): Ignore weather if false. Defaults to False.
+
+    Returns:
+        boolean Matrix: Deployment days
+    """
+    cache_dir = getattr(weather, "cache_dir", None)
+    if cache_dir is None:
+        # Weather that is not read from the weather cache
+        return weather.deployment_days(
+            method_name, config, start_date, start_work_hour, consider_weather
+        )
+    mask_file = (
+        Path(cache_dir)
+        / MASK_DIR_NAME
+        / "{}.npz".format(mask_key(weather, config, start_date, start_work_hour, consider_weather))
+    )
+    if mask_file.is_file():
+        with np.load(mask_file) as cached:
+            shape = tuple(cached["shape"])
+            DD_all = np.unpackbits(cached["bits"], count=int(np.prod(shape))).reshape(shape)
+            cache_stats["hits"] += 1
+            cache_stats["seconds_saved"] += float(cached["seconds"])
+        return DD_all.astype(bool)
+
+    start = time.perf_counter()
+    DD_all = weather.deployment_days(
+        method_name, config, start_date, start_work_hour, consider_weather
+    )
+    seconds = time.perf_counter() - start
+    cache_stats["misses"] += 1
+
+    # Write to a temporary file then rename, so other processes never read a partial mask
+    mask_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_file = tempfile.mkstemp(suffix=".npz", dir=mask_file.parent)
+    with os.fdopen(fd, "wb") as f:
+        np.savez(f, bits=np.packbits(DD_all.ravel()), shape=DD_all.shape, seconds=seconds)
+    os.replace(tmp_file, mask_file)
+    return DD_all
@@ -0,0 +1,178 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        weather.site_weather
+# Purpose:     Weather of the grid cells that hold sites, extracted once per simulation
+#              for constant time lookups by site and time.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+from datetime import datetime
+from functools import cached_property
+
+import numpy as np
+
+
+class SiteWeather:
+    """Weather at the sites of a simulation. The weather of each grid cell holding a site
+    (site_cell) is copied out of the weather data as a compact (site_cell, time) array,
+    the first time a weather variable is requested, so lookups by site and time are
+    single array reads. Sites are matched to cells with their lat_index and lon_index.
+
+    Time is days for daily weather data (weather.weather_lookup.WeatherLookup) and hours
+    for hourly weather data (weather.weather_lookup_hourly.WeatherLookup). Hourly
+    lookups match WeatherLookup.get_hourly_weather, including UTC offset and rollover
+    of the weather data.
+    """
+
+    def __init__(self, weather, sites, time_obj):
+        """
+        Args:
+            weather (WeatherLookup): Daily or hourly weather lookup
+            sites (list): Sites of the simulation, with lat_index and lon_index
+            time_obj (TimeCounter): Time of the simulation, ie. state["t"]
+        """
+        self.weather = weather
+        self.time_obj = time_obj
+        self.is_hourly = hasattr(weather, "get_start_hour_index")
+        # Site cell of each (lat_index, lon_index) holding a site
+        self.cells = {}
+        for site in sites:
+            self.cells.setdefault((site["lat_index"], site["lon_index"]), len(self.cells))
+        cell_idxs = np.array(list(self.cells), dtype=np.int64).reshape(-1, 2)
+        self.cell_lat_index = cell_idxs[:, 0]
+        self.cell_lon_index = cell_idxs[:, 1]
+        self._data = {}
+
+    @cached_property
+    def n_times(self):
+        """Number of times in the weather data."""
+        return len(self.weather.winds)
+
+    @cached_property
+    def first_hour(self):
+        """Hourly weather data index of midnight of the first simulation day, before
+        any rollover."""
+        start_date = self.time_obj.start_date
+        return self.weather.get_start_hour_index(
+            datetime.combine(start_date.date(), datetime.min.time())
+        )
+
+    def data(self, weather_var):
+        """Get the compact array of a weather variable.
+
+        Args:
+            weather_var (str): Weather variable, ie. "winds", "temps" or "precip"
+
+        Returns:
+            array: Values with dimensions [site_cell, time]
+        """
+        if weather_var not in self._data:
+            values = getattr(self.weather, weather_var)[:, self.cell_lat_index, self.cell_lon_index]
+            self._data[weather_var] = np.ascontiguousarray(values.T)
+        return self._data[weather_var]
+
+    def site_cell(self, site):
+        """Get the site cell of a site."""
+        return self.cells[(site["lat_index"], site["lon_index"])]
+
+    def time_index(self, timestep, hour=0):
+        """Get the weather data index of an hour of a simulation day. Daily weather data
+        is indexed by day.
+
+        Args:
+            timestep (int): Simulation day
+            hour (int, optional): Hour of the day, hourly weather data only. Defaults to 0.
+
+        Returns:
+            int: Index in the time dimension
+        """
+        if not self.is_hourly:
+            return timestep
+        return (self.first_hour + 24 * timestep + hour) % self.n_times
+
+    def date_index(self, date):
+        """Get the weather data index of a date and time, the hour of the date for hourly
+        weather data and the simulation day of the date for daily weather data.
+
+        Args:
+            date (datetime): Local date and time
+
+        Returns:
+            int: Index in the time dimension
+        """
+        if not self.is_hourly:
+            return (date.date() - self.time_obj.start_date.date()).days
+        return self.weather.get_start_hour_index(date) % self.n_times
+
+    def at(self, weather_var, site, timestep, hour=0):
+        """Get a weather variable at a site, on an hour of a simulation day.
+
+        Args:
+            weather_var (str): Weather variable, ie. "winds"
+            site (dict): Site
+            timestep (int): Simulation day
+            hour (int, optional): Hour of the day, hourly weather data only. Defaults to 0.
+
+        Returns:
+            float: Value
+        """
+        return self.data(weather_var)[self.site_cell(site), self.time_index(timestep, hour)]
+
+    def hourly(self, weather_var, site, date, number_of_hours=1):
+        """Get a weather variable at a site, for consecutive hours starting at a date and
+        time. Hourly weather data only.
+
+        Args:
+            weather_var (str): Weather variable, ie. "winds"
+            site (dict): Site
+            date (datetime): Local date and time of the first hour
+            number_of_hours (int, optional): Number of hours. Defaults to 1.
+
+        Returns:
+            array: Value of each hour
+        """
+        hours = (
+            self.weather.get_start_hour_index(date) + np.arange(number_of_hours)
+        ) % self.n_times
+        return self.data(weather_var)[self.site_cell(site), hours]
+
+    def value(self, weather_var, site, date):
+        """Get a weather variable at a site, at a date and time.
+
+        Args:
+            weather_var (str): Weather variable, ie. "winds"
+            site (dict): Site
+            date (datetime): Local date and time
+
+        Returns:
+            float: Value
+        """
+        return self.data(weather_var)[self.site_cell(site), self.date_index(date)]
+
+    def values(self, weather_var, sites, dates):
+        """Get a weather variable at each of a list of sites, at a date and time for each.
+
+        Args:
+            weather_var (str): Weather variable, ie. "winds"
+            sites (list): Sites
+            dates (list): Local date and time for each site
+
+        Returns:
+            array: Value for each site
+        """
+        cells = [self.site_cell(site) for site in sites]
+        times = [self.date_index(date) for date in dates]
+        return self.data(weather_var)[cells, times]
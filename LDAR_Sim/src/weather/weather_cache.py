@@ -0,0 +1,188 @@
+# ------------------------------------------------------------------------------
+# Program:     The LDAR Simulator (LDAR-Sim)
+# File:        weather.weather_cache
+# Purpose:     Convert a NetCDF weather file once into .npy arrays that simulations
+#              open memory-mapped, so all processes share one copy through the page cache.
+#
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the MIT License as published
+# by the Free Software Foundation, version 3.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# MIT License for more details.
+
+# You should have received a copy of the MIT License
+# along with this program.  If not, see <https://opensource.org/licenses/MIT>.
+#
+# ------------------------------------------------------------------------------
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from netCDF4 import Dataset
+
+# Name of the folder, in the input directory, holding cached weather arrays
+CACHE_DIR_NAME = "weather_cache"
+# Characters of the weather file hash in the names of cache folders
+HASH_LENGTH = 16
+# Arrays that are small enough to be read into memory rather than memory-mapped
+AXES = ("time", "latitude", "longitude")
+
+# Cache folder of each weather file already looked up in this process,
+# keyed by (path, size, modification time) to avoid rehashing the file
+_cache_dirs = {}
+
+
+def file_hash(path, chunk_size=2**20):
+    """Get the SHA-256 hash of the content of a file.
+
+    Args:
+        path (Path): File path
+        chunk_size (int, optional): Bytes read at a time. Defaults to 1 MiB.
+
+    Returns:
+        str: Hex digest
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def get_weather_cache(input_directory, weather_file):
+    """Get the folder of the cached arrays of a weather file, converting the weather
+    file if it has not been cached yet. The folder is named after the hash of the
+    weather file, so a changed file gets a new cache, and the caches of previous
+    versions of the file are removed.
+
+    Args:
+        input_directory (Path): Input directory holding the weather file
+        weather_file (str): NetCDF weather file name
+
+    Returns:
+        Path: Folder holding the cached arrays
+    """
+    source = Path(input_directory) / weather_file
+    stat = source.stat()
+    key = (str(source.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _cache_dirs:
+        cache_dir = (
+            Path(input_directory)
+            / CACHE_DIR_NAME
+            / "{}_{}".format(source.stem, file_hash(source)[:HASH_LENGTH])
+        )
+        if not cache_dir.is_dir():
+            write_weather_cache(source, cache_dir)
+            remove_stale_caches(source, cache_dir)
+        _cache_dirs[key] = cache_dir
+    return _cache_dirs[key]
+
+
+def write_weather_cache(source, cache_dir):
+    """Convert a NetCDF weather file into .npy arrays. Values are converted to the
+    units used by the simulation (Celsius, m/s net wind speed, mm precipitation).
+    The arrays are written to a temporary folder that is then renamed, so processes
+    never see a partially written cache.
+
+    Args:
+        source (Path): NetCDF weather file
+        cache_dir (Path): Folder to write the arrays to
+    """
+    weather_data = Dataset(source, "r")
+    weather_data.set_auto_mask(False)
+    variables = weather_data.variables
+    arrays = {axis: variables[axis][:] for axis in AXES}
+    # Convert to degrees Celcius (time, lat, long)
+    arrays["temps"] = np.array(variables["t2m"]) - 273.15
+    # Calculate the net wind speed (time, lat, long)
+    winds = np.add(np.square(np.array(variables["u10"])), np.square(np.array(variables["v10"])))
+    arrays["winds"] = np.sqrt(winds.astype(float))
+    # Convert m to mm (time, lat, long)
+    arrays["precip"] = np.array(variables["tp"]) * 1000
+    # Total cloud cover, used by satellites (time, lat, long)
+    if "tcc" in variables:
+        arrays["tcc"] = np.array(variables["tcc"])
+    weather_data.close()
+
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".{}_".format(cache_dir.name), dir=cache_dir.parent))
+    for name, array in arrays.items():
+        np.save(tmp_dir / "{}.npy".format(name), array)
+    try:
+        os.rename(tmp_dir, cache_dir)
+    except OSError:
+        # Another process cached the same file first
+        shutil.rmtree(tmp_dir)
+
+
+def remove_stale_caches(source, cache_dir):
+    """Remove the caches of previous versions of a weather file, along with the
+    deployment day masks cached in them.
+
+    Args:
+        source (Path): NetCDF weather file
+        cache_dir (Path): Folder of the current cache of the file, which is kept
+    """
+    name_pattern = re.compile(r"{}_[0-9a-f]{{{}}}".format(re.escape(source.stem), HASH_LENGTH))
+    for old_dir in cache_dir.parent.iterdir():
+        if old_dir != cache_dir and old_dir.is_dir() and name_pattern.fullmatch(old_dir.name):
+            # Caches still open in other processes are left for the next run
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def weather_cache_dir(input_directory, virtual_world):
+    """Get the folder of the cached arrays of the virtual world's weather file.
+
+    Args:
+        input_directory (Path): Input directory holding the weather file
+        virtual_world (dict): Virtual world parameters. When "weather_cache" is set
+            (see prepare_weather_cache), that folder is used.
+
+    Returns:
+        Path: Folder holding the cached arrays
+    """
+    cache_dir = virtual_world.get("weather_cache")
+    if cache_dir is None:
+        return get_weather_cache(input_directory, virtual_world["weather_file"])
+    return Path(cache_dir)
+
+
+def load_weather_cache(input_directory, virtual_world):
+    """Open the cached weather arrays of the virtual world's weather file. Weather
+    arrays are memory-mapped read only, axes are read into memory.
+
+    Args:
+        input_directory (Path): Input directory holding the weather file
+        virtual_world (dict): Virtual world parameters
+
+    Returns:
+        dict: Arrays keyed by name (time, latitude, longitude, temps, winds, precip, tcc)
+    """
+    weather = {}
+    for array_file in weather_cache_dir(input_directory, virtual_world).glob("*.npy"):
+        if array_file.stem in AXES:
+            weather[array_file.stem] = np.load(array_file)
+        else:
+            weather[array_file.stem] = np.load(array_file, mmap_mode="r")
+    return weather
+
+
+def prepare_weather_cache(input_directory, virtual_world):
+    """Cache the virtual world's weather file before simulations start, and point the
+    simulations at the cache so they do not need to hash the weather file.
+
+    Args:
+        input_directory (Path): Input directory holding the weather file
+        virtual_world (dict): Virtual world parameters, updated with "weather_cache"
+    """
+    cache_dir = get_weather_cache(input_directory, virtual_world["weather_file"])
+    virtual_world["weather_cache"] = str(cache_dir)
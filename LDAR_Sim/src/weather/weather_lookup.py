@@ -19,46 +19,33 @@
 # ------------------------------------------------------------------------------
 
 import numpy as np
-from netCDF4 import Dataset
+from weather.weather_cache import load_weather_cache, weather_cache_dir
 
 
 class WeatherLookup:
     def __init__(self, state, virtual_world, input_directory):
         """
-        Read in NetCDF files and returns the environment at a given place in time.
+        Read in cached NetCDF weather and returns the environment at a given place in time.
         """
         self.state = state
         self.virtual_world = virtual_world
 
-        # Read in weather data as NetCDF file(s)
-
-        self.weather_data = Dataset(
-            input_directory / self.virtual_world["weather_file"], "r"
-        )  # Load wind and temp data
-        self.weather_data.set_auto_mask(False)  # Load wind and temp data
-        # Extract temperatures
-        self.temps = np.array(self.weather_data.variables["t2m"])
-        # Convert to degrees Celcius (time, lat, long)
-        self.temps = self.temps - 273.15
-        # Extract u wind component
-        self.u_wind = np.array(self.weather_data.variables["u10"])
-        # Extract v wind component
-        self.v_wind = np.array(self.weather_data.variables["v10"])
-        self.winds = np.add(
-            np.square(self.u_wind), np.square(self.v_wind)
-        )  # Calculate the net wind speed
-        # Calculate the net wind speed (time, lat, long)
-        self.winds = np.sqrt(self.winds.astype(float))
-        # Extract precipitation values (time, lat, long)
-        self.precip = np.array(self.weather_data.variables["tp"])
-        self.precip = self.precip * 1000  # Convert m to mm (time, lat, long)
+        # Read in weather data, memory-mapped from the weather cache (time, lat, long)
+        self.cache_dir = weather_cache_dir(input_directory, self.virtual_world)
+        weather = load_weather_cache(input_directory, self.virtual_world)
+        # Temperatures in degrees Celcius
+        self.temps = weather["temps"]
+        # Net wind speed
+        self.winds = weather["winds"]
+        # Precipitation in mm
+        self.precip = weather["precip"]
 
         # Extract time values
-        self.time_total = self.weather_data.variables["time"][:]
+        self.time_total = weather["time"]
         # Extract latitude values
-        self.latitude = self.weather_data.variables["latitude"][:]
+        self.latitude = weather["latitude"]
         # Extract longitude values
-        self.longitude = self.weather_data.variables["longitude"][:]
+        self.longitude = weather["longitude"]
         # Length of time dimension - number of timesteps
         self.time_length = len(self.time_total)
         # Length of latitude dimension - n cells
@@ -66,8 +53,6 @@ class WeatherLookup:
         # Length of longitude dimension - n cells
         self.lon_length = len(self.longitude)
 
-        self.weather_data.close()  # close the netCDF4 file
-
         return
 
     def deployment_days(
@@ -80,38 +65,18 @@ class WeatherLookup:
         DD = deployment day
         """
 
-        # Initialize empty boolean arrays for threshold pass(1)/fail(0)
-        bool_temp = np.zeros((self.lon_length, self.lat_length, self.virtual_world["timesteps"]))
-        bool_wind = np.zeros((self.lon_length, self.lat_length, self.virtual_world["timesteps"]))
-        bool_precip = np.zeros((self.lon_length, self.lat_length, self.virtual_world["timesteps"]))
-
-        # For each day...
-        for day in range(self.virtual_world["timesteps"]):
-            # Count DDs for each criteria
-            for lat in range(self.lat_length):
-                for lon in range(self.lon_length):
-                    # Check daily weather variables are within method range
-                    if (
-                        config["weather_envs"]["temp"][0]
-                        <= self.temps[day, lat, lon]
-                        <= config["weather_envs"]["temp"][1]
-                    ):
-                        bool_temp[lon, lat, day] = 1
-                    if (
-                        config["weather_envs"]["wind"][0]
-                        <= self.winds[day, lat, lon]
-                        <= config["weather_envs"]["wind"][1]
-                    ):
-                        bool_wind[lon, lat, day] = 1
-                    if (
-                        config["weather_envs"]["precip"][0]
-                        <= self.precip[day, lat, lon]
-                        <= config["weather_envs"]["precip"][1]
-                    ):
-                        bool_precip[lon, lat, day] = 1
+        # Threshold pass/fail arrays (day, lat, lon) for each criteria
+        days = np.arange(self.virtual_world["timesteps"])
+        weather_envs = config["weather_envs"]
+        temps = self.temps[days]
+        winds = self.winds[days]
+        precip = self.precip[days]
+        bool_temp = (weather_envs["temp"][0] <= temps) & (temps <= weather_envs["temp"][1])
+        bool_wind = (weather_envs["wind"][0] <= winds) & (winds <= weather_envs["wind"][1])
+        bool_precip = (weather_envs["precip"][0] <= precip) & (precip <= weather_envs["precip"][1])
 
         # Check to see if all criteria (temp, wind, and precip) were met...
-        bool_sum = np.add(bool_temp, np.add(bool_wind, bool_precip))
-        DD_all = bool_sum == 3
+        DD_all = bool_temp & bool_wind & bool_precip
 
-        return DD_all
+        # Return as (lon, lat, day)
+        return np.ascontiguousarray(DD_all.transpose(2, 1, 0))
@@ -23,25 +23,25 @@ from datetime import datetime as dt
 from datetime import timedelta as tdelt
 
 import numpy as np
-from netCDF4 import Dataset
+from weather.weather_cache import load_weather_cache, weather_cache_dir
 
 
 class WeatherLookup:
+    # Maximum number of hourly values averaged at once in deployment_days
+    MAX_BLOCK_HRS = 4_000_000
+
     def __init__(self, state, virtual_world, input_directory):
         """
-        Read in NetCDF files and returns the environment at a given place in time.
+        Read in cached NetCDF weather and returns the environment at a given place in time.
 
         """
         self.state = state
         self.virtual_world = virtual_world
 
-        # Read in weather data as NetCDF file(s)
-
-        self.weather_data = Dataset(
-            input_directory / self.virtual_world["weather_file"], "r"
-        )  # Load wind and temp data
-        self.weather_data.set_auto_mask(False)
-        self.time_total = self.weather_data.variables["time"][:]  # Extract time values
+        # Read in weather data, memory-mapped from the weather cache (time, lat, long)
+        self.cache_dir = weather_cache_dir(input_directory, self.virtual_world)
+        weather = load_weather_cache(input_directory, self.virtual_world)
+        self.time_total = weather["time"]  # Extract time values
         self.weather_time_meta = {}
         # Get start and end date of weather data. (Time is hours since Jan1, 1900)
         start_date = dt(1900, 1, 1) + tdelt(hours=int(self.time_total[0]))
@@ -66,21 +66,11 @@ class WeatherLookup:
                 "leap_year": leap_year,
                 "note": "hours since Jan 1, 1900",
             }
-        self.temps = np.array(self.weather_data.variables["t2m"])  # Extract temperatures
-        self.temps = self.temps - 273.15  # Convert to degrees Celcius (time, lat, long)
-        self.u_wind = np.array(self.weather_data.variables["u10"])  # Extract u wind component
-        self.v_wind = np.array(self.weather_data.variables["v10"])  # Extract v wind component
-        self.winds = np.add(
-            np.square(self.u_wind), np.square(self.v_wind)
-        )  # Calculate the net wind speed
-        # Calculate the net wind speed (time, lat, long)
-        self.winds = np.sqrt(self.winds.astype(float))
-        # Extract precipitation values (time, lat, long)
-        self.precip = np.array(self.weather_data.variables["tp"])
-        self.precip = self.precip * 1000  # Convert m to mm (time, lat, long)
-        self.latitude = self.weather_data.variables["latitude"][:]  # Extract latitude values
-        self.longitude = self.weather_data.variables["longitude"][:]  # Extract longitude values
-        self.weather_data.close()  # close the netCDF4 file
+        self.temps = weather["temps"]  # Temperatures in degrees Celcius
+        self.winds = weather["winds"]  # Net wind speed
+        self.precip = weather["precip"]  # Precipitation in mm
+        self.latitude = weather["latitude"]  # Extract latitude values
+        self.longitude = weather["longitude"]  # Extract longitude values
         return
 
     def deployment_days(
@@ -100,69 +90,66 @@ class WeatherLookup:
             boolean Matrix: See Summary for description
         """
 
-        # Initialize empty boolean arrays for threshold pass(1)/fail(0)
-        bool_temp = np.zeros(
-            (len(self.longitude), len(self.latitude), self.virtual_world["timesteps"])
-        )
-        bool_wind = np.zeros(
-            (len(self.longitude), len(self.latitude), self.virtual_world["timesteps"])
-        )
-        bool_precip = np.zeros(
-            (len(self.longitude), len(self.latitude), self.virtual_world["timesteps"])
-        )
-
-        # For each day...
-        for day in range(self.virtual_world["timesteps"]):
-            start_dt = dt(start_date.year, start_date.month, start_date.day, start_work_hour, 0)
-            nday_dt = start_dt + tdelt(days=day)
-            if "max_workday" in config:
-                max_day = config["max_workday"]
-            else:
-                max_day = 23
-                # Count DDs for each criteria
-            for lat in range(len(self.latitude)):
-                for lon in range(len(self.longitude)):
-                    # If you exceed minimum temperature...
-                    if consider_weather:
-                        hr_weather = self.get_hourly_weather(
-                            ["winds", "precip", "temps"],
-                            nday_dt,
-                            number_of_hours=max_day,
-                            lat_idx=lat,
-                            lon_idx=lon,
-                        )
-                        if (
-                            config["weather_envs"]["temp"][0]
-                            <= np.mean(hr_weather["temps"])
-                            <= config["weather_envs"]["temp"][1]
-                        ):
-                            # Count one instrument day (instrument can be used)
-                            bool_temp[lon, lat, day] = 1
-                        # If you are below the maximum wind...
-                        if (
-                            config["weather_envs"]["wind"][0]
-                            <= np.mean(hr_weather["winds"])
-                            <= config["weather_envs"]["wind"][1]
-                        ):
-                            # Count one instrument day (instrument can be used)
-                            bool_wind[lon, lat, day] = 1
-                        # If you are below the precipitation threshold...
-                        if (
-                            config["weather_envs"]["precip"][0]
-                            <= np.mean(hr_weather["precip"])
-                            <= config["weather_envs"]["precip"][1]
-                        ):
-                            # Count one instrument day (instrument can be used)
-                            bool_precip[lon, lat, day] = 1
-                    else:
-                        bool_temp[lon, lat, day] = 1
-                        bool_wind[lon, lat, day] = 1
-                        bool_precip[lon, lat, day] = 1
-
-                        # Check to see if all criteria (temp, wind, and precip) were met...
-        bool_sum = np.add(bool_temp, np.add(bool_wind, bool_precip))
-        DD_all = bool_sum == 3
-        return DD_all
+        n_days = self.virtual_world["timesteps"]
+        if not consider_weather:
+            return np.ones((len(self.longitude), len(self.latitude), n_days), dtype=bool)
+        if "max_workday" in config:
+            max_day = config["max_workday"]
+        else:
+            max_day = 23
+        start_dt = dt(start_date.year, start_date.month, start_date.day, start_work_hour, 0)
+        # Hours of the weather data used for each day (day, hour)
+        day_hrs = self.get_hourly_index(start_dt, n_days, number_of_hours=max_day)
+
+        # Check the daily mean of each weather variable is within method range, in blocks of
+        # days to bound the size of the (lat, lon, day, hour) array the means are taken over
+        DD_all = np.ones((len(self.latitude), len(self.longitude), n_days), dtype=bool)
+        block = max(1, self.MAX_BLOCK_HRS // max(DD_all[:, :, 0].size * max_day, 1))
+        for weather_var, env in (("temps", "temp"), ("winds", "wind"), ("precip", "precip")):
+            # (lat, lon, time) view, so each cell's hourly values are on the last axis
+            data_set = np.moveaxis(self.__getattribute__(weather_var), 0, -1)
+            min_val, max_val = config["weather_envs"][env]
+            for first in range(0, n_days, block):
+                last = first + block
+                day_mean = data_set[:, :, day_hrs[first:last]].mean(axis=-1)
+                DD_all[:, :, first:last] &= (min_val <= day_mean) & (day_mean <= max_val)
+
+        # Return as (lon, lat, day)
+        return np.ascontiguousarray(DD_all.transpose(1, 0, 2))
+
+    def get_hourly_index(self, start_datetime, n_days, number_of_hours=24):
+        """Get the indexes of the hourly weather data used for each of n_days consecutive days,
+        starting at start_datetime. Matches the hours returned by get_hourly_weather, including
+        UTC offset and rollover of the weather data.
+
+        Args:
+            start_datetime (datetime): Start of the first day
+            n_days (int): Number of days
+            number_of_hours (int, optional): Number of consecutive hours in a day. Defaults to 24.
+
+        Returns:
+            array: Weather data indexes with dimensions [n_days, number_of_hours]
+        """
+        cur_day_srt_idx = self.get_start_hour_index(start_datetime)
+        day_srt_idx = cur_day_srt_idx + 24 * np.arange(n_days)
+        return (day_srt_idx[:, None] + np.arange(number_of_hours)) % len(self.winds)
+
+    def get_start_hour_index(self, start_datetime):
+        """Get the index of the weather data for start_datetime, before any rollover.
+
+        Args:
+            start_datetime (datetime): Local datetime
+
+        Returns:
+            int: Hours since the start of the weather data
+        """
+        # Weather data is in timesteps since Jan 1 , 1900 UTC, the following
+        # gets the current date in timesteps since Jan 1, 1900 UTC.
+        date_UTC = start_datetime - tdelt(hours=self.state["t"].UTC_offset)
+        dtime_s1900_UTC = date_UTC - dt(1900, 1, 1, 0, 0)
+        hrs_s1900_UTC = int(dtime_s1900_UTC.days * 24 + np.floor(dtime_s1900_UTC.seconds / 3600))
+        start_hr_s1900_UTC = self.weather_time_meta[0]["start_hr"]
+        return int(hrs_s1900_UTC - start_hr_s1900_UTC)
 
     def get_hourly_weather(
         self,
@@ -205,15 +192,9 @@ class WeatherLookup:
             lat_idx = find_nearest(lat, self.latitude)
             lon_idx = find_nearest(lon, self.longitude)
 
-        # Weather data is in timesteps since Jan 1 , 1900 UTC, the following
-        # gets the current date in timesteps since Jan 1, 1900 UTC.
-        date_UTC = start_datetime - tdelt(hours=self.state["t"].UTC_offset)
-        dtime_s1900_UTC = date_UTC - dt(1900, 1, 1, 0, 0)
-        hrs_s1900_UTC = int(dtime_s1900_UTC.days * 24 + np.floor(dtime_s1900_UTC.seconds / 3600))
-        start_hr_s1900_UTC = self.weather_time_meta[0]["start_hr"]
         # Get the index (of the weather data array) for the start hour and endhour
         # (start hour + workhours) for the day
-        cur_day_srt_idx = int(hrs_s1900_UTC - start_hr_s1900_UTC)
+        cur_day_srt_idx = self.get_start_hour_index(start_datetime)
         cur_day_stp_idx = int(cur_day_srt_idx + number_of_hours)
 
         # The following will "rollover" the weather data so the start and stop
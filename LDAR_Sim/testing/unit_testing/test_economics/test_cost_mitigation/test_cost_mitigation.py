@@ -0,0 +1,55 @@
+"""Test file to unit test economics.cost_mitigation functionality"""
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from src.economics.cost_mitigation import EconomicsAccumulator, sim_economics
+from testing.unit_testing.test_out_processing.test_sim_aggregator.sim_aggregator_testing_fixtures import (  # Noqa: 401
+    mock_programs_fix,
+    mock_sim_results_fix,
+)
+
+matplotlib.use("Agg")
+
+
+def test_066_economics_match_row_wise_calculation(tmp_path, mock_sim_results):
+    accumulator = EconomicsAccumulator()
+    for sim_idx, sim_result in enumerate(mock_sim_results):
+        accumulator.add(sim_idx, sim_result)
+    economics_df = accumulator.summarize("P_OGI", "P_none", tmp_path).set_index("program_name")
+    assert accumulator.n_simulations == 9
+    for program_name, row in economics_df.iterrows():
+        sims = [sim for sim in mock_sim_results if sim["program_name"] == program_name]
+        emissions_kg = np.mean([sim["timeseries"]["daily_emissions_kg"].sum() for sim in sims])
+        difference_mcf = (
+            row["total_emissions_mcf"] - economics_df.loc["P_none", "total_emissions_mcf"]
+        )
+        tonnes = ((abs(difference_mcf * 1000) / 35.3147) * 0.678) / 1000 * 28
+        assert np.isclose(row["total_program_emissions_kg"], emissions_kg)
+        assert np.isclose(row["dif_base_tonnesCO2e"], tonnes if difference_mcf <= 0 else 0)
+        assert np.isclose(row["value_gas_sold"], max(-difference_mcf * 3, 0))
+
+    cost_method = pd.read_csv(tmp_path / "annual_cost_method_site.csv", index_col=0)
+    ogi_costs = [sim["timeseries"]["OGI_cost"].sum() for sim in mock_sim_results[1::3]]
+    assert np.isclose(
+        cost_method.loc["P_OGI", "OGI_cost"], np.mean(ogi_costs) / 5 / 20 * 365 / 1000
+    )
+    assert np.isnan(cost_method.loc["P_none", "OGI_cost"])
+    assert np.isclose(
+        cost_method.loc["P_air", "adjusted_program_cost"],
+        cost_method.loc["P_air"].drop("adjusted_program_cost").sum(),
+    )
+
+
+def test_066_reduced_economics_match_in_any_order(tmp_path, mock_sim_results):
+    expected = EconomicsAccumulator()
+    for sim_idx, sim_result in enumerate(mock_sim_results):
+        expected.add(sim_idx, sim_result)
+    accumulator = EconomicsAccumulator()
+    for sim_idx in reversed(range(len(mock_sim_results))):
+        accumulator.add_economics(sim_idx, sim_economics(mock_sim_results[sim_idx]))
+    pd.testing.assert_frame_equal(
+        accumulator.summarize("P_OGI", "P_none", tmp_path),
+        expected.summarize("P_OGI", "P_none", tmp_path),
+    )
@@ -1,10 +1,13 @@
 """File containing fixtures to facilitate testing external sensors"""
+
 import datetime
 from typing import Any, Dict
 
 import pytest
 import numpy as np
 from src.time_counter import TimeCounter
+from src.utils.site_counters import SiteCounters
+from src.weather.site_weather import SiteWeather
 from src.weather.weather_lookup_hourly import WeatherLookup
 
 
@@ -261,7 +264,7 @@ def mock_site_dict_for_sensor_return_2_fix() -> Dict[str, Any]:
         "site": {
             "equipment_groups": 1,
             "active_leaks": [{"leak_ID": 1, "rate": 3, "equipment_group": 1}],
-            "M_test_missed_leaks": 1,
+            "facility_ID": 1,
         },
         "leaks_present": [{"leak_ID": 1, "rate": 3, "equipment_group": 1}],
         "site_true_rate": 3,
@@ -277,7 +280,7 @@ def mock_site_for_sensor_testing_2_fix() -> "dict[str, Any]":
     return {
         "equipment_groups": 1,
         "active_leaks": [{"leak_ID": 1, "rate": 3, "equipment_group": 1}],
-        "M_test_missed_leaks": 0,
+        "facility_ID": 1,
     }
 
 
@@ -291,12 +294,15 @@ def mock_state_for_sensor_testing_2_fix(mocker) -> "dict[str, Any]":
 
     mock_weather = mocker.Mock(WeatherLookup)
     mock_weather.get_hourly_weather.return_value = {"winds": np.array([1.0])}
+    mock_site_weather = mocker.Mock(SiteWeather)
+    mock_site_weather.hourly.return_value = np.array([1.0])
 
     return {
         "t": mock_tc,
         "M_test_n_tags": {11: 0},
-        "M_test_missed_leaks": {datetime.datetime(2017, 1, 1, 8, 0): 0},
+        "site_counters": {"M_test": SiteCounters("M_test", [{"facility_ID": 1}], 12)},
         "weather": mock_weather,
+        "site_weather": mock_site_weather,
         "prog_params": {"methods": {"M_Test": None}},
     }
 
@@ -307,16 +313,19 @@ def mock_state_for_sensor_testing_1_fix(mocker) -> "dict[str, Any]":
     mock_tc = mocker.Mock(TimeCounter)
 
     mock_tc.current_date = datetime.datetime(2017, 1, 1, 8, 0)
-    mock_tc.current_timestep = datetime.datetime(2017, 1, 1, 8, 0)
+    mock_tc.current_timestep = 11
 
     mock_weather = mocker.Mock(WeatherLookup)
     mock_weather.get_hourly_weather.return_value = {"winds": np.array([1.0])}
+    mock_site_weather = mocker.Mock(SiteWeather)
+    mock_site_weather.hourly.return_value = np.array([1.0])
 
     return {
         "t": mock_tc,
         "M_test_n_tags": {11: 0},
-        "M_test_missed_leaks": {datetime.datetime(2017, 1, 1, 8, 0): 0},
+        "site_counters": {"M_test": SiteCounters("M_test", [{"facility_ID": 1}], 12)},
         "weather": mock_weather,
+        "site_weather": mock_site_weather,
         "prog_params": {"methods": {"M_Test": None}},
     }
 
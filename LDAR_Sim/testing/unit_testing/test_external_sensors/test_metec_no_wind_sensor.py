@@ -101,3 +101,5 @@ def test_092_detect_emissions_simple_fail(
     )
     expected: dict = mock_site_dict_for_sensor_return_2
     assert result == expected
+    assert crew.counters.missed_leaks.tolist() == [1]
+    assert crew.counters.series("missed_leaks")[11] == 1
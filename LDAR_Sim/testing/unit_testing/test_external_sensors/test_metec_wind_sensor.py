@@ -104,6 +104,8 @@ def test_093_detect_emissions_simple_fail(
     )
     expected: dict = mock_site_dict_for_sensor_return_2
     assert result == expected
+    assert crew.counters.missed_leaks.tolist() == [1]
+    assert crew.counters.series("missed_leaks")[11] == 1
 
 
 def test_093_detect_emissions_cutoff_fail(
@@ -145,6 +147,8 @@ def test_093_detect_emissions_cutoff_fail(
     )
     expected: dict = mock_site_dict_for_sensor_return_2
     assert result == expected
+    assert crew.counters.missed_leaks.tolist() == [1]
+    assert crew.counters.series("missed_leaks")[11] == 1
 
 
 def test_093_detect_emissions_simple_equip(
@@ -0,0 +1,35 @@
+"""Test file to unit test distance_cache.py DistanceCache functionality"""
+
+import numpy as np
+from src.geography.distance import get_distance
+from src.geography.distance_cache import DistanceCache
+
+
+def test_035_distances_match_get_distance():
+    rng = np.random.default_rng(0)
+    lons, lats = rng.uniform(-115, -110, 60), rng.uniform(50, 55, 60)
+    # Sites at the same location
+    lons[1], lats[1] = lons[0], lats[0]
+    sites = [{"lon": lon, "lat": lat} for lon, lat in zip(lons, lats)]
+    distance_cache = DistanceCache(sites, radius=100)
+    assert 0 < len(distance_cache.data) < 60 * 59
+    for lon1, lat1 in zip(lons, lats):
+        for lon2, lat2 in zip(lons, lats):
+            assert np.isclose(
+                distance_cache.distance(lon1, lat1, lon2, lat2),
+                get_distance(lon1, lat1, lon2, lat2, "Haversine"),
+            )
+    # Locations that are not sites
+    assert np.isclose(
+        distance_cache.distance(-112.5, 52.5, lons[0], lats[0]),
+        get_distance(-112.5, 52.5, lons[0], lats[0], "Haversine"),
+    )
+
+
+def test_035_home_base_table_is_shared():
+    sites = [{"lon": -112.0, "lat": 52.0}, {"lon": -113.0, "lat": 53.0}]
+    distance_cache = DistanceCache(sites)
+    home_bases = [(-112.1, 52.1), (-113.0, 53.0)]
+    home_base_table = distance_cache.home_base_table(home_bases)
+    assert distance_cache.home_base_table(list(home_bases)) is home_base_table
+    assert home_base_table.distances.shape == (2, 2)
@@ -0,0 +1,48 @@
+"""Test file to unit test grid.py assign_grid_cells functionality"""
+
+import numpy as np
+from src.geography import grid
+from src.geography.grid import assign_grid_cells, nearest_index
+
+
+def test_036_nearest_index_matches_min():
+    """Tests the closest grid values match a search of the grid, including ties"""
+    rng = np.random.default_rng(0)
+    grid_values = np.array([51.0, 50.75, 50.5, 50.25, 50.25, 50.0], dtype=np.float32)
+    values = np.concatenate([rng.uniform(49.5, 51.5, 200), [50.625, 50.25, 50.375]])
+    expected = [
+        min(range(len(grid_values)), key=lambda i: abs(grid_values[i] - value))
+        for value in values.tolist()
+    ]
+    assert nearest_index(values, grid_values).tolist() == expected
+
+
+def test_036_assign_grid_cells_cached(mocker):
+    """Tests sites are assigned with longitudes modulo 360, and assignments are reused"""
+    latitude = np.array([50.0, 50.25, 50.5])
+    longitude = np.array([245.0, 245.25, 245.5])
+    sites = [{"facility_ID": "A", "lat": "50.2", "lon": "245.4"}, {"lat": 50.4, "lon": 245.1}]
+    lat_index, lon_index, exit_msg = assign_grid_cells(sites, latitude, longitude)
+    assert lat_index.tolist() == [1, 2]
+    assert lon_index.tolist() == [2, 0]
+    assert exit_msg is None
+    spy = mocker.spy(grid, "nearest_index")
+    lat_index, lon_index, exit_msg = assign_grid_cells(sites, latitude, longitude)
+    assert lat_index.tolist() == [1, 2]
+    assert spy.call_count == 0
+
+
+def test_036_assign_grid_cells_reports_all_sites_outside():
+    """Tests every site outside of the grid is listed in the exit message"""
+    latitude = np.array([50.0, 50.25, 50.5])
+    longitude = np.array([-115.0, -114.75])
+    sites = [
+        {"facility_ID": "A", "lat": 50.1, "lon": -114.9},
+        {"facility_ID": "B", "lat": 51.0, "lon": -114.9},
+        {"facility_ID": "C", "lat": 49.0, "lon": -116.0},
+    ]
+    _, _, exit_msg = assign_grid_cells(sites, latitude, longitude)
+    lines = exit_msg.split("\n")
+    assert lines[0].startswith("Simulation terminated: 2 site(s)")
+    assert "B" in lines[1] and lines[1].endswith("too far North")
+    assert "C" in lines[2] and lines[2].endswith("too far South and West")
@@ -0,0 +1,38 @@
+"""Test file to unit test homebase.py HomeBaseTable functionality"""
+
+import numpy as np
+from src.geography.homebase import HomeBaseTable, find_homebase, find_homebase_opt
+
+
+def test_033_home_base_table_matches_find_homebase():
+    rng = np.random.default_rng(0)
+    home_bases = list(zip(rng.uniform(-115, -110, 20), rng.uniform(50, 55, 20)))
+    sites = list(zip(rng.uniform(-115, -110, 50), rng.uniform(50, 55, 50)))
+    home_base_table = HomeBaseTable(home_bases, sites[:25])
+    # Sites that were not looked up in advance are found on first lookup
+    for lon, lat in sites:
+        home_base, dist = home_base_table.nearest(lon, lat)
+        expected_home_base, expected_dist = find_homebase(lon, lat, home_bases)
+        assert home_base == expected_home_base
+        assert np.isclose(dist, expected_dist)
+
+
+def test_033_home_base_table_matches_find_homebase_opt():
+    rng = np.random.default_rng(1)
+    home_bases = list(zip(rng.uniform(-115, -110, 20), rng.uniform(50, 55, 20)))
+    sites = list(zip(rng.uniform(-115, -110, 10), rng.uniform(50, 55, 10)))
+    # A site at a home base, that home base is skipped
+    sites.append(home_bases[3])
+    home_base_table = HomeBaseTable(home_bases, sites)
+    for lon1, lat1 in sites:
+        for lon2, lat2 in sites:
+            home_base, dist = home_base_table.nearest_opt(lon1, lat1, lon2, lat2)
+            expected_home_base, expected_dist = find_homebase_opt(
+                lon1, lat1, lon2, lat2, home_bases
+            )
+            assert home_base == expected_home_base
+            assert np.isclose(dist, expected_dist)
+    # The home bases are not changed
+    assert len(home_bases) == 20
+    assert find_homebase_opt(*sites[0], *home_bases[3], home_bases)[0] != home_bases[3]
+    assert len(home_bases) == 20
@@ -0,0 +1,23 @@
+"""Test file to unit test site_index.py SiteIndex functionality"""
+
+import numpy as np
+from src.geography.distance import get_distance
+from src.geography.site_index import SiteIndex
+
+
+def test_034_nearest_skips_removed_sites():
+    rng = np.random.default_rng(0)
+    lons, lats = rng.uniform(-115, -110, 100), rng.uniform(50, 55, 100)
+    site_index = SiteIndex(lons, lats)
+    lon, lat = -112.5, 52.5
+    remaining = set(range(100))
+    while len(site_index) > 0:
+        site_idx = site_index.nearest(lon, lat)
+        expected = min(
+            remaining, key=lambda idx: get_distance(lon, lat, lons[idx], lats[idx], "Haversine")
+        )
+        assert site_idx == expected
+        site_index.remove(site_idx)
+        remaining.remove(site_idx)
+        lon, lat = lons[site_idx], lats[site_idx]
+    assert site_index.nearest(lon, lat) is None
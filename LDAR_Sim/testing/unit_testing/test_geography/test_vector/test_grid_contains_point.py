@@ -1,7 +1,7 @@
 """Test file to unit test vector.py grid_contains_point functionality"""
 
 import pytest
-from src.geography.vector import grid_contains_point
+from src.geography.vector import grid_contains_point, grid_contains_points
 
 
 @pytest.mark.parametrize(
@@ -50,3 +50,16 @@ def test_032_grid_contains_point(test_input, expected):
     """Tests grid cointains point"""
     result = grid_contains_point(test_input[0], test_input[1])
     assert expected == result
+
+
+def test_032_grid_contains_points_matches_grid_contains_point():
+    """Tests the bulk check reports the same points as grid_contains_point"""
+    grid = [[49.0, 50.0, 51.0], [-115.0, -114.0]]
+    lats = [50.0, 52.0, 48.0, 50.5, 52.0]
+    lons = [-114.5, -114.5, -114.5, -113.0, -116.0]
+    is_contained, directions = grid_contains_points([lats, lons], grid)
+    for point_idx, point in enumerate(zip(lats, lons)):
+        in_grid, exit_msg = grid_contains_point(point, grid)
+        assert is_contained[point_idx] == in_grid
+        assert (exit_msg is None) == (directions[point_idx] == [])
+    assert directions == [[], ["North"], ["South"], ["East"], ["North", "West"]]
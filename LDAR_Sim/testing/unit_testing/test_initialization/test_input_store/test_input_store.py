@@ -0,0 +1,45 @@
+"""
+Module to test the simulation input store
+"""
+
+import numpy as np
+from src.initialization.input_store import SimInputStore, load_sim_inputs
+from src.initialization.leaks import generate_site_leaks
+from testing.unit_testing.test_initialization.test_leaks.leak_testing_fixtures import (  # Noqa: 401
+    mock_sites_for_site_leaks_fix,
+    mock_vw_for_site_leaks_fix,
+)
+
+
+def test_043_load_sim_inputs_matches_stored_inputs(
+    tmp_path, mock_vw_for_site_leaks, mock_sites_for_site_leaks
+):
+    leak_timeseries, initial_leaks = generate_site_leaks(
+        mock_vw_for_site_leaks,
+        mock_sites_for_site_leaks,
+        [2022, 1, 1],
+        [2023, 1, 1],
+        np.random.default_rng(1),
+    )
+    store = SimInputStore(tmp_path / "store")
+    sites = [{"facility_ID": site["facility_ID"]} for site in mock_sites_for_site_leaks]
+    path_0 = store.put("0_P_A", sites, leak_timeseries, initial_leaks)
+    path_1 = store.put("0_P_B", sites, leak_timeseries, initial_leaks)
+    # Leaks shared by programs are stored once
+    assert len(list((tmp_path / "store").glob("leaks_*"))) == 1
+
+    inputs = load_sim_inputs(path_0)
+    assert inputs["sites"] == sites
+    for site in sites:
+        site_ID = site["facility_ID"]
+        assert list(inputs["leak_timeseries"][site_ID]) == list(leak_timeseries[site_ID])
+        assert list(inputs["initial_leaks"][site_ID]) == list(initial_leaks[site_ID])
+        # Leak arrays are shared read only
+        assert not inputs["leak_timeseries"][site_ID].rates.flags.writeable
+
+    # Each load gets its own copy of the sites
+    inputs["sites"][0]["cum_leaks"] = 10
+    assert "cum_leaks" not in load_sim_inputs(path_1)["sites"][0]
+
+    store.cleanup()
+    assert not (tmp_path / "store").exists()
@@ -1,9 +1,11 @@
-""" Fixtures for testing leaks"""
+"""Fixtures for testing leaks"""
 
 import pytest
 from datetime import datetime
 from typing import Any, Dict
 
+from scipy.stats import lognorm
+
 
 @pytest.fixture(name="mock_vw")
 def mock_vw_fix():
@@ -80,3 +82,49 @@ def mock_site_return_test_fix() -> list[Dict[str, Any]]:
             "repair_delay": None,
         }
     ]
+
+
+@pytest.fixture(name="mock_vw_for_site_leaks")
+def mock_vw_for_site_leaks_fix():
+    return {
+        "subtype_file": None,
+        "NRd": 150,
+        "n_init_leaks_prob": None,
+        "n_init_days": None,
+        "emissions": {
+            "LPR": 0.05,
+            "leak_file": None,
+            "max_leak_rate": 2,
+        },
+    }
+
+
+@pytest.fixture(name="mock_sites_for_site_leaks")
+def mock_sites_for_site_leaks_fix() -> list[Dict[str, Any]]:
+    leak_rate_dist = lognorm(2, scale=1)
+    return [
+        {
+            "facility_ID": "sample_site",
+            "equipment_groups": 3,
+            "lat": 52.0,
+            "lon": -114.0,
+            "leak_rate_source": "sample",
+            "empirical_leak_rates": [1, 2, 3],
+        },
+        {
+            "facility_ID": "dist_site_1",
+            "equipment_groups": 1,
+            "lat": 53.0,
+            "lon": -115.0,
+            "leak_rate_dist": leak_rate_dist,
+            "leak_rate_units": ["gram", "second"],
+        },
+        {
+            "facility_ID": "dist_site_2",
+            "equipment_groups": 2,
+            "lat": 54.0,
+            "lon": -116.0,
+            "leak_rate_dist": leak_rate_dist,
+            "leak_rate_units": ["gram", "second"],
+        },
+    ]
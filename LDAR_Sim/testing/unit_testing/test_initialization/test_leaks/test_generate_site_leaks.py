@@ -0,0 +1,69 @@
+"""
+Module to test generate_site_leaks
+"""
+
+import copy
+
+import numpy as np
+from src.initialization.leaks import generate_site_leaks
+from testing.unit_testing.test_initialization.test_leaks.leak_testing_fixtures import (  # Noqa: 401
+    mock_sites_for_site_leaks_fix,
+    mock_vw_for_site_leaks_fix,
+)
+
+
+def test_042_generate_site_leaks_reproducible(mock_vw_for_site_leaks, mock_sites_for_site_leaks):
+    sites_2 = copy.deepcopy(mock_sites_for_site_leaks)
+    leak_timeseries, initial_leaks = generate_site_leaks(
+        mock_vw_for_site_leaks,
+        mock_sites_for_site_leaks,
+        [2022, 1, 1],
+        [2023, 1, 1],
+        np.random.default_rng(1),
+    )
+    leak_timeseries_2, initial_leaks_2 = generate_site_leaks(
+        mock_vw_for_site_leaks, sites_2, [2022, 1, 1], [2023, 1, 1], np.random.default_rng(1)
+    )
+    for site in mock_sites_for_site_leaks:
+        site_ID = site["facility_ID"]
+        assert list(leak_timeseries[site_ID]) == list(leak_timeseries_2[site_ID])
+        assert list(initial_leaks[site_ID]) == list(initial_leaks_2[site_ID])
+        # One entry per day, None on days without a new leak
+        assert len(leak_timeseries[site_ID]) == 365
+        new_leaks = [leak for leak in leak_timeseries[site_ID] if leak is not None]
+        assert site["initial_leaks"] == len(initial_leaks[site_ID])
+        assert site["cum_leaks"] == len(initial_leaks[site_ID]) + len(new_leaks)
+        # Leaks are numbered initial leaks first, then new leaks by day
+        leak_IDs = [leak["leak_ID"] for leak in list(initial_leaks[site_ID]) + new_leaks]
+        assert leak_IDs == [
+            "{}_{}".format(site_ID, str(count).zfill(10))
+            for count in range(1, site["cum_leaks"] + 1)
+        ]
+        for leak in new_leaks:
+            assert leak_timeseries[site_ID][leak["day_ts_began"]] == leak
+        for leak in initial_leaks[site_ID]:
+            assert 0 <= leak["days_active"] < 150
+            assert leak["day_ts_began"] == 0
+
+
+def test_042_generate_site_leaks_rates(mock_vw_for_site_leaks, mock_sites_for_site_leaks):
+    leak_timeseries, initial_leaks = generate_site_leaks(
+        mock_vw_for_site_leaks,
+        mock_sites_for_site_leaks,
+        [2022, 1, 1],
+        [2025, 1, 1],
+        np.random.default_rng(2),
+    )
+    for site in mock_sites_for_site_leaks:
+        site_ID = site["facility_ID"]
+        leaks = list(initial_leaks[site_ID]) + [
+            leak for leak in leak_timeseries[site_ID] if leak is not None
+        ]
+        assert len(leaks) > 0
+        for leak in leaks:
+            assert 1 <= leak["equipment_group"] <= site["equipment_groups"]
+            if "empirical_leak_rates" in site:
+                assert leak["rate"] in site["empirical_leak_rates"]
+            else:
+                # Distribution draws are truncated at the maximum leak rate
+                assert 0 < leak["rate"] < mock_vw_for_site_leaks["emissions"]["max_leak_rate"]
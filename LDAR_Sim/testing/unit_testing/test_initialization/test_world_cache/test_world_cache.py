@@ -0,0 +1,85 @@
+"""
+Module to test the pregenerated world cache
+"""
+
+import numpy as np
+import pandas as pd
+from src.initialization.leaks import generate_site_leaks
+from src.initialization.sites import regenerate_sites
+from src.initialization.world_cache import World, world_dir, world_key, write_world
+from testing.unit_testing.test_initialization.test_leaks.leak_testing_fixtures import (  # Noqa: 401
+    mock_sites_for_site_leaks_fix,
+    mock_vw_for_site_leaks_fix,
+)
+
+SIM_PARAMS = {
+    "start_date": [2022, 1, 1],
+    "end_date": [2023, 1, 1],
+    "preseed_random": False,
+    "leak_generation_seed": 1,
+}
+
+
+def write_sites_file(in_dir, sites):
+    # Rows of the infrastructure file are not in the order of the generated sites
+    sites_in = pd.DataFrame(
+        [
+            {key: site[key] for key in ["facility_ID", "lat", "lon", "equipment_groups"]}
+            for site in reversed(sites)
+        ]
+    )
+    sites_in.to_csv(in_dir / "sites.csv", index=False)
+
+
+def test_044_world_round_trip(tmp_path, mock_vw_for_site_leaks, mock_sites_for_site_leaks):
+    mock_vw_for_site_leaks["infrastructure_file"] = "sites.csv"
+    write_sites_file(tmp_path, mock_sites_for_site_leaks)
+    leak_timeseries, initial_leaks = generate_site_leaks(
+        mock_vw_for_site_leaks,
+        mock_sites_for_site_leaks,
+        SIM_PARAMS["start_date"],
+        SIM_PARAMS["end_date"],
+        np.random.default_rng(1),
+    )
+    for delay, site in enumerate(mock_sites_for_site_leaks):
+        site["repair_delay"] = [2, 0.5, 2][delay]
+        site.setdefault("leak_rate_units", ["gram", "second"])
+        # Removed by generate_sites once leaks are generated
+        site.pop("leak_rate_dist", None)
+    sites = regenerate_sites(mock_vw_for_site_leaks, mock_sites_for_site_leaks, tmp_path)
+
+    key = world_key(mock_vw_for_site_leaks, SIM_PARAMS, tmp_path)
+    out_dir = world_dir(tmp_path, 0, key)
+    write_world(out_dir, sites, leak_timeseries, initial_leaks, [4, 5], tmp_path / "sites.csv")
+    world = World(out_dir, tmp_path / "sites.csv")
+
+    world_sites = world.sites()
+    assert world_sites == sites
+    assert [list(site) for site in world_sites] == [list(site) for site in sites]
+    assert [type(site["repair_delay"]) for site in world_sites] == [int, float, int]
+    world_leak_timeseries = world.leak_timeseries()
+    world_initial_leaks = world.initial_leaks()
+    for site in sites:
+        site_ID = site["facility_ID"]
+        assert list(world_leak_timeseries[site_ID]) == list(leak_timeseries[site_ID])
+        assert list(world_initial_leaks[site_ID]) == list(initial_leaks[site_ID])
+    assert world.seed_timeseries() == [4, 5]
+
+
+def test_044_world_key_invalidation(tmp_path, mock_vw_for_site_leaks, mock_sites_for_site_leaks):
+    mock_vw_for_site_leaks["infrastructure_file"] = "sites.csv"
+    write_sites_file(tmp_path, mock_sites_for_site_leaks)
+    key = world_key(mock_vw_for_site_leaks, SIM_PARAMS, tmp_path)
+    # Keys added while running do not change the world
+    mock_vw_for_site_leaks["weather_cache"] = "cache"
+    assert world_key(mock_vw_for_site_leaks, SIM_PARAMS, tmp_path) == key
+    # Generation settings, parameters and input files do
+    assert (
+        world_key(mock_vw_for_site_leaks, {**SIM_PARAMS, "leak_generation_seed": 2}, tmp_path)
+        != key
+    )
+    mock_vw_for_site_leaks["NRd"] = 10
+    key_2 = world_key(mock_vw_for_site_leaks, SIM_PARAMS, tmp_path)
+    assert key_2 != key
+    write_sites_file(tmp_path, mock_sites_for_site_leaks[:2])
+    assert world_key(mock_vw_for_site_leaks, SIM_PARAMS, tmp_path) != key_2
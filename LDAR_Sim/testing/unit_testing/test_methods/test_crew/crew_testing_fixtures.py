@@ -1,9 +1,12 @@
 """File containing fixtures to facilitate testing crew methods"""
+
 import datetime
 from typing import Any
 
 import pytest
 from src.time_counter import TimeCounter
+from src.utils.flag_registry import FlagRegistry
+from src.utils.site_counters import SiteCounters
 
 
 @pytest.fixture(name="mock_config_for_crew_testing_1")
@@ -108,7 +111,12 @@ def mock_state_for_site_level_FU_visit_site_testing_fix(mocker) -> "dict[str, An
 
     mock_tc.current_date = datetime.datetime(2017, 1, 1, 8, 0)
     mock_tc.current_timestep = 1
-    return {"site_visits": {"M_sl_FU": []}, "t": mock_tc}
+    return {
+        "site_visits": {"M_sl_FU": []},
+        "t": mock_tc,
+        "flag_registry": FlagRegistry([], {}),
+        "site_counters": {"M_sl_FU": SiteCounters("M_sl_FU", [{"facility_ID": 1}], 2)},
+    }
 
 
 @pytest.fixture(name="mock_site_for_site_level_FU_visit_site_testing")
@@ -118,9 +126,6 @@ def mock_site_for_site_level_FU_visit_site_testing_fix() -> tuple[dict]:
         "facility_ID": 1,
         "subtype_code": 1,
         "active_leaks": [{"leak_ID": 1, "rate": 3, "equipment_group": 1, "M_test_sp_covered": 1}],
-        "M_sl_FU_surveys_conducted": 0,
-        "M_sl_FU_surveys_done_this_year": 0,
-        "M_sl_FU_t_since_last_LDAR": 0,
         "currently_flagged": True,
     }
 
@@ -141,9 +146,6 @@ def mock_results_for_site_level_FU_visit_site_testing_fix() -> tuple[dict]:
             "active_leaks": [
                 {"leak_ID": 1, "rate": 3, "equipment_group": 1, "M_test_sp_covered": 1}
             ],
-            "M_sl_FU_surveys_conducted": 1,
-            "M_sl_FU_surveys_done_this_year": 1,
-            "M_sl_FU_t_since_last_LDAR": 0,
             "historic_t_since_LDAR": 0,
             "currently_flagged": False,
         },
@@ -185,7 +187,12 @@ def mock_state_for_component_level_FU_visit_site_testing_fix(mocker) -> "dict[st
 
     mock_tc.current_date = datetime.datetime(2017, 1, 1, 8, 0)
     mock_tc.current_timestep = 1
-    return {"site_visits": {"M_cl_FU": []}, "t": mock_tc}
+    return {
+        "site_visits": {"M_cl_FU": []},
+        "t": mock_tc,
+        "flag_registry": FlagRegistry([], {}),
+        "site_counters": {"M_cl_FU": SiteCounters("M_cl_FU", [{"facility_ID": 1}], 2)},
+    }
 
 
 @pytest.fixture(name="mock_site_for_component_level_FU_visit_site_testing")
@@ -195,9 +202,6 @@ def mock_site_for_component_level_follow_up_visit_site_testing_fix() -> tuple[di
         "facility_ID": 1,
         "subtype_code": 1,
         "active_leaks": [{"leak_ID": 1, "rate": 3, "equipment_group": 1, "M_test_sp_covered": 1}],
-        "M_cl_FU_surveys_conducted": 0,
-        "M_cl_FU_surveys_done_this_year": 0,
-        "M_cl_FU_t_since_last_LDAR": 0,
         "currently_flagged": True,
     }
 
@@ -214,9 +218,6 @@ def mock_results_for_component_level_FU_visit_site_testing_fix() -> tuple[dict]:
             "active_leaks": [
                 {"leak_ID": 1, "rate": 3, "equipment_group": 1, "M_test_sp_covered": 1}
             ],
-            "M_cl_FU_surveys_conducted": 1,
-            "M_cl_FU_surveys_done_this_year": 1,
-            "M_cl_FU_t_since_last_LDAR": 0,
             "historic_t_since_LDAR": 0,
             "currently_flagged": False,
             "last_component_survey": 1,
@@ -259,7 +260,12 @@ def mock_state_for_site_level_FU_visit_site_testing_small_leak_fix(mocker) -> "d
 
     mock_tc.current_date = datetime.datetime(2017, 1, 1, 8, 0)
     mock_tc.current_timestep = 1
-    return {"site_visits": {"M_sl_FU": []}, "t": mock_tc}
+    return {
+        "site_visits": {"M_sl_FU": []},
+        "t": mock_tc,
+        "flag_registry": FlagRegistry([], {}),
+        "site_counters": {"M_sl_FU": SiteCounters("M_sl_FU", [{"facility_ID": 1}], 2)},
+    }
 
 
 @pytest.fixture(name="mock_site_for_site_level_FU_visit_site_testing_small_leak")
@@ -269,9 +275,6 @@ def mock_site_for_site_level_FU_visit_site_testing_small_leak_fix() -> tuple[dic
         "facility_ID": 1,
         "subtype_code": 1,
         "active_leaks": [{"leak_ID": 1, "rate": 0.5, "equipment_group": 1, "M_test_sp_covered": 1}],
-        "M_sl_FU_surveys_conducted": 0,
-        "M_sl_FU_surveys_done_this_year": 0,
-        "M_sl_FU_t_since_last_LDAR": 0,
         "currently_flagged": True,
     }
 
@@ -288,9 +291,6 @@ def mock_results_for_site_level_FU_visit_site_testing_small_leak_fix() -> tuple[
             "active_leaks": [
                 {"leak_ID": 1, "rate": 0.5, "equipment_group": 1, "M_test_sp_covered": 1}
             ],
-            "M_sl_FU_surveys_conducted": 1,
-            "M_sl_FU_surveys_done_this_year": 1,
-            "M_sl_FU_t_since_last_LDAR": 0,
             "historic_t_since_LDAR": 0,
             "currently_flagged": False,
         },
@@ -332,7 +332,12 @@ def mock_state_for_component_level_FU_visit_site_testing_small_leak_fix(mocker)
 
     mock_tc.current_date = datetime.datetime(2017, 1, 1, 8, 0)
     mock_tc.current_timestep = 1
-    return {"site_visits": {"M_cl_FU": []}, "t": mock_tc}
+    return {
+        "site_visits": {"M_cl_FU": []},
+        "t": mock_tc,
+        "flag_registry": FlagRegistry([], {}),
+        "site_counters": {"M_cl_FU": SiteCounters("M_cl_FU", [{"facility_ID": 1}], 2)},
+    }
 
 
 @pytest.fixture(name="mock_site_for_component_level_FU_visit_site_testing_small_leak")
@@ -342,9 +347,6 @@ def mock_site_for_component_level_follow_up_visit_site_testing_small_leak_fix()
         "facility_ID": 1,
         "subtype_code": 1,
         "active_leaks": [{"leak_ID": 1, "rate": 0.5, "equipment_group": 1, "M_test_sp_covered": 1}],
-        "M_cl_FU_surveys_conducted": 0,
-        "M_cl_FU_surveys_done_this_year": 0,
-        "M_cl_FU_t_since_last_LDAR": 0,
         "currently_flagged": True,
     }
 
@@ -361,9 +363,6 @@ def mock_results_for_component_level_FU_visit_site_testing_small_leak_fix() -> t
             "active_leaks": [
                 {"leak_ID": 1, "rate": 0.5, "equipment_group": 1, "M_test_sp_covered": 1}
             ],
-            "M_cl_FU_surveys_conducted": 1,
-            "M_cl_FU_surveys_done_this_year": 1,
-            "M_cl_FU_t_since_last_LDAR": 0,
             "historic_t_since_LDAR": 0,
             "currently_flagged": False,
             "last_component_survey": 1,
@@ -406,7 +405,12 @@ def mock_state_for_site_level_non_FU_visit_site_testing_fix(mocker) -> "dict[str
 
     mock_tc.current_date = datetime.datetime(2017, 1, 1, 8, 0)
     mock_tc.current_timestep = 1
-    return {"site_visits": {"M_sl_FU": []}, "t": mock_tc}
+    return {
+        "site_visits": {"M_sl_FU": []},
+        "t": mock_tc,
+        "flag_registry": FlagRegistry([], {}),
+        "site_counters": {"M_sl_FU": SiteCounters("M_sl_FU", [{"facility_ID": 1}], 2)},
+    }
 
 
 @pytest.fixture(name="mock_site_for_site_level_non_FU_visit_site_testing")
@@ -416,9 +420,6 @@ def mock_site_for_site_level_non_FU_visit_site_testing_fix() -> tuple[dict]:
         "facility_ID": 1,
         "subtype_code": 1,
         "active_leaks": [{"leak_ID": 1, "rate": 3, "equipment_group": 1, "M_test_sp_covered": 1}],
-        "M_sl_FU_surveys_conducted": 0,
-        "M_sl_FU_surveys_done_this_year": 0,
-        "M_sl_FU_t_since_last_LDAR": 0,
         "currently_flagged": False,
     }
 
@@ -439,9 +440,6 @@ def mock_results_for_site_level_non_FU_visit_site_testing_fix() -> tuple[dict]:
             "active_leaks": [
                 {"leak_ID": 1, "rate": 3, "equipment_group": 1, "M_test_sp_covered": 1}
             ],
-            "M_sl_FU_surveys_conducted": 1,
-            "M_sl_FU_surveys_done_this_year": 1,
-            "M_sl_FU_t_since_last_LDAR": 0,
             "historic_t_since_LDAR": 0,
             "currently_flagged": False,
         },
@@ -483,7 +481,12 @@ def mock_state_for_site_level_non_FU_visit_site_testing_small_leak_fix(mocker) -
 
     mock_tc.current_date = datetime.datetime(2017, 1, 1, 8, 0)
     mock_tc.current_timestep = 1
-    return {"site_visits": {"M_cl_FU": []}, "t": mock_tc}
+    return {
+        "site_visits": {"M_cl_FU": []},
+        "t": mock_tc,
+        "flag_registry": FlagRegistry([], {}),
+        "site_counters": {"M_cl_FU": SiteCounters("M_cl_FU", [{"facility_ID": 1}], 2)},
+    }
 
 
 @pytest.fixture(name="mock_site_for_site_level_non_FU_visit_site_testing_small_leak")
@@ -493,9 +496,6 @@ def mock_site_for_site_level_non_FU_visit_site_testing_small_leak_fix() -> tuple
         "facility_ID": 1,
         "subtype_code": 1,
         "active_leaks": [{"leak_ID": 1, "rate": 0.5, "equipment_group": 1, "M_test_sp_covered": 1}],
-        "M_cl_FU_surveys_conducted": 0,
-        "M_cl_FU_surveys_done_this_year": 0,
-        "M_cl_FU_t_since_last_LDAR": 0,
         "currently_flagged": False,
     }
 
@@ -512,9 +512,6 @@ def mock_results_for_site_level_non_FU_visit_site_testing_small_leak_fix() -> tu
             "active_leaks": [
                 {"leak_ID": 1, "rate": 0.5, "equipment_group": 1, "M_test_sp_covered": 1}
             ],
-            "M_cl_FU_surveys_conducted": 1,
-            "M_cl_FU_surveys_done_this_year": 1,
-            "M_cl_FU_t_since_last_LDAR": 0,
             "historic_t_since_LDAR": 0,
             "currently_flagged": False,
             "last_component_survey": 1,
@@ -143,3 +143,6 @@ def test_053_visit_site_gives_expected_behavior(
     assert result == request.getfixturevalue(expected)[1]
     assert site == request.getfixturevalue(expected)[2]
     assert crew.timeseries == request.getfixturevalue(expected)[3]
+    assert crew.counters.surveys_conducted.tolist() == [1]
+    assert crew.counters.surveys_done_this_year.tolist() == [1]
+    assert crew.counters.t_since_last_LDAR.tolist() == [0]
@@ -0,0 +1,38 @@
+"""Test file to unit test detection.py draw_coverage functionality"""
+
+import numpy as np
+import pytest
+from src.methods.detection import NOT_CHECKED, draw_coverage, equipment_rates
+
+
+def loop_coverage(sp_covered, p_spatial, p_temporal):
+    """Coverage drawn leak by leak"""
+    sp_covered = list(sp_covered)
+    covered = []
+    for leak_idx, is_sp_covered in enumerate(sp_covered):
+        if is_sp_covered == NOT_CHECKED:
+            sp_covered[leak_idx] = np.random.binomial(1, p_spatial)
+        covered.append(bool(sp_covered[leak_idx] and np.random.binomial(1, p_temporal)))
+    return sp_covered, covered
+
+
+@pytest.mark.parametrize("p_spatial", [0, 0.3, 0.7, 1])
+@pytest.mark.parametrize("p_temporal", [0, 0.4, 1])
+def test_055_draw_coverage_matches_loop_over_leaks(p_spatial, p_temporal):
+    rng = np.random.default_rng(0)
+    for n_leaks in [0, 1, 5, 40]:
+        sp_covered = rng.choice([NOT_CHECKED, 0, 1], size=n_leaks)
+        np.random.seed(n_leaks)
+        expected_sp, expected_covered = loop_coverage(sp_covered, p_spatial, p_temporal)
+        expected_next = np.random.random_sample()
+        np.random.seed(n_leaks)
+        sp, covered = draw_coverage(sp_covered, p_spatial, p_temporal)
+        assert sp.tolist() == expected_sp
+        assert covered.tolist() == expected_covered
+        # The same number of draws is taken
+        assert np.random.random_sample() == expected_next
+
+
+def test_055_equipment_rates_sums_in_order():
+    rates = np.array([0.1, 0.2, 0.3, 1e-17])
+    assert equipment_rates([1, 3, 1, 1], rates, 3) == [0.1 + 0.3 + 1e-17, 0, 0.2]
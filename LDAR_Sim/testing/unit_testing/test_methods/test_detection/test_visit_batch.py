@@ -0,0 +1,89 @@
+"""Test file to unit test sensor detect_emissions_batch functionality"""
+
+import copy
+import datetime
+
+import numpy as np
+import pytest
+from src.methods.crew import BaseCrew
+from src.methods.detection import VisitBatch
+from src.methods.funcs import measured_rate, measured_rates
+from src.methods.sensors import default
+from src.utils.site_counters import SiteCounters
+
+
+def make_crew(measurement_scale):
+    config = {
+        "scheduling": {"LDAR_crew_init_location": [], "route_planning": False},
+        "deployment_type": "mobile",
+        "label": "M_test",
+        "coverage": {"spatial": 1.0, "temporal": 1.0},
+        "sensor": {"mod_loc": None, "type": "default", "MDL": [1.0], "QE": 0},
+        "measurement_scale": measurement_scale,
+    }
+    virtual_world = {"emissions": {"consider_venting": False}, "consider_weather": False}
+    settings = {"input_directory": None, "outputs": {"site_visits": True}}
+    return BaseCrew(None, None, virtual_world, settings, config, None, None, None, None)
+
+
+def make_sites():
+    rates = [[0.5, 0.25], [], [3.0], [0.75, 0.5, 0.125], [0.25]]
+    return [
+        {
+            "facility_ID": site_idx,
+            "equipment_groups": 2,
+            "active_leaks": [
+                {"leak_ID": leak_idx, "rate": rate, "equipment_group": leak_idx % 2 + 1}
+                for leak_idx, rate in enumerate(site_rates)
+            ],
+        }
+        for site_idx, site_rates in enumerate(rates)
+    ]
+
+
+def make_batch(crew, sites):
+    batch = VisitBatch()
+    for site in sites:
+        batch.add(site, datetime.datetime(2017, 1, 1, 8), *crew.covered_emissions(site))
+    batch.close()
+    return batch
+
+
+@pytest.mark.parametrize("measurement_scale", ["site", "equipment"])
+def test_056_default_batch_matches_site_by_site(measurement_scale, mocker):
+    crew = make_crew(measurement_scale)
+    sites = make_sites()
+    counters = SiteCounters("M_test", sites, 1)
+    crew.timeseries = counters.timeseries
+    crew.state = {"t": mocker.Mock(current_timestep=0), "site_counters": {"M_test": counters}}
+    expected = [crew.detect_emissions(site) for site in copy.deepcopy(sites)]
+    batch = make_batch(crew, sites)
+    result = default.detect_emissions_batch(crew, batch)
+
+    assert result["found_leak"].tolist() == [site["found_leak"] for site in expected]
+    assert result["site_measured_rates"].tolist() == [
+        site["site_measured_rate"] for site in expected
+    ]
+    assert result["missed_leaks"].tolist() == counters.missed_leaks.tolist()
+    if measurement_scale == "equipment":
+        assert result["equip_measured_rates"].tolist() == [
+            rate for site in expected for rate in site["equip_measured_rates"]
+        ]
+
+
+def test_056_default_batch_detects_leaks_above_mdl():
+    crew = make_crew("component")
+    batch = make_batch(crew, make_sites())
+    result = default.detect_emissions_batch(crew, batch)
+    assert result["detected"].tolist() == (batch.leak_rates > 1.0).tolist()
+    assert result["found_leak"].tolist() == [False, False, True, False, False]
+    assert result["missed_leaks"].tolist() == [2, 0, 0, 3, 1]
+    assert batch.leak_offsets.tolist() == [0, 2, 2, 3, 6, 7]
+
+
+def test_056_measured_rates_matches_measured_rate():
+    true_rates = [0.5, 2.0, 7.5, 0.0]
+    np.random.seed(0)
+    expected = [measured_rate(rate, 0.3) for rate in true_rates]
+    np.random.seed(0)
+    assert measured_rates(true_rates, 0.3).tolist() == expected
@@ -0,0 +1,26 @@
+"""Test file to unit test repair_delay.py determine_delay functionality"""
+
+import random
+
+import numpy as np
+import pytest
+from src.methods.init_func.repair_delay import determine_delay
+
+
+@pytest.mark.parametrize(
+    "repair_delay",
+    [
+        {"type": "list", "val": [1, 5, 10]},
+        {"type": "distribution", "val": [1, 0.5]},
+    ],
+)
+def test_094_determine_delay_with_rng_keeps_global_state(repair_delay):
+    virtual_world = {"repair_delay": repair_delay}
+    random_state = random.getstate()
+    np_random_state = np.random.get_state()
+    delays = [determine_delay(virtual_world, np.random.default_rng(3)) for _ in range(2)]
+    assert delays[0] == delays[1]
+    assert random.getstate() == random_state
+    np_random_state_after = np.random.get_state()
+    assert np.array_equal(np_random_state_after[1], np_random_state[1])
+    assert np_random_state_after[2] == np_random_state[2]
@@ -0,0 +1,53 @@
+"""Test file to unit test mobile_company.py get_due_sites functionality"""
+
+import numpy as np
+from src.methods.deployment.mobile_company import Schedule
+from src.time_counter import TimeCounter
+from src.utils.site_counters import SiteCounters
+
+
+def make_sites(n_sites, rng):
+    sites = []
+    for site_idx in range(n_sites):
+        min_int = int(rng.integers(0, 120))
+        sites.append(
+            {
+                "facility_ID": site_idx,
+                "OGI_RS": int(rng.integers(1, 7)),
+                "OGI_time": int(rng.integers(30, 900)),
+                "OGI_min_int": min_int,
+                "OGI_min_time_bt_surveys": int(rng.integers(0, 60)),
+            }
+        )
+    return sites
+
+
+def test_054_get_due_sites_matches_scan_of_all_sites():
+    rng = np.random.default_rng(0)
+    time_counter = TimeCounter([2017, 5, 15], [2020, 3, 1])
+    sites = make_sites(200, rng)
+    counters = SiteCounters(
+        "OGI",
+        sites,
+        time_counter.timesteps,
+        t_since_last_LDAR=[site["OGI_min_int"] for site in sites],
+    )
+    state = {"sites": sites, "t": time_counter, "site_counters": {"OGI": counters}}
+    config = {"label": "OGI", "is_follow_up": False, "max_workday": 8}
+    program_parameters = {
+        "methods": {"OGI": {"scheduling": {"deployment_months": [2, 3, 4, 6, 7, 9, 10, 11]}}}
+    }
+    schedule = Schedule(config, program_parameters, state)
+    for _ in range(time_counter.timesteps):
+        if time_counter.current_date.month in [2, 3, 4, 6, 7, 9, 10, 11]:
+            due_sites = schedule.get_due_sites(state["sites"])
+            # A copy of the sites is scanned site by site
+            expected = schedule.get_due_sites(list(state["sites"]))
+            assert [site["facility_ID"] for site in due_sites] == [
+                site["facility_ID"] for site in expected
+            ]
+            for site in due_sites[: int(rng.integers(0, 15))]:
+                counters.record_survey(counters.row(site))
+        current_date = time_counter.current_date
+        counters.end_day(end_of_year=current_date.day == 31 and current_date.month == 12)
+        time_counter.next_day()
@@ -0,0 +1,39 @@
+"""Test file to unit test mobile_crew.py plan_route functionality"""
+
+import numpy as np
+from src.methods.deployment.mobile_crew import Schedule
+from src.time_counter import TimeCounter
+from src.utils.site_counters import SiteCounters
+
+
+def make_schedule(sites, deployment_days):
+    time_counter = TimeCounter([2017, 1, 1], [2017, 1, 10])
+    schedule = Schedule.__new__(Schedule)
+    schedule.state = {
+        "t": time_counter,
+        "site_counters": {"OGI": SiteCounters("OGI", sites, time_counter.timesteps)},
+    }
+    schedule.config = {"label": "OGI"}
+    schedule.consider_weather = True
+    schedule.deployment_days = deployment_days
+    schedule.crew_lon, schedule.crew_lat = -114.0, 51.0
+    return schedule
+
+
+def test_057_plan_route_counts_sites_skipped_for_weather_as_attempted():
+    sites = [
+        {"facility_ID": site_idx, "lon": -114.0 + site_idx, "lat": 51.0, "lon_index": site_idx}
+        for site_idx in range(3)
+    ]
+    for site in sites:
+        site["lat_index"] = 0
+    # No site can be surveyed on the first day
+    deployment_days = np.zeros((3, 1, 10), dtype=bool)
+    schedule = make_schedule(sites, deployment_days)
+    assert schedule.plan_route(sites, est_mins_remaining=480) == []
+    assert schedule.counters.attempted_today.tolist() == [True, True, True]
+
+    # Sites are not attempted without time left in the day
+    schedule = make_schedule(sites, deployment_days)
+    assert schedule.plan_route(sites, est_mins_remaining=0) == []
+    assert schedule.counters.attempted_today.tolist() == [False, False, False]
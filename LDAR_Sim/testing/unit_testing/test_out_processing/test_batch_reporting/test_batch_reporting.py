@@ -0,0 +1,94 @@
+"""Test file to unit test out_processing.batch_reporting functionality"""
+
+import numpy as np
+import pandas as pd
+
+from src.out_processing.batch_reporting import ProgramSummary
+
+N_DAYS = 40
+N_SITES = 4
+
+
+def make_timeseries(rng):
+    return pd.DataFrame(
+        {
+            "datetime": pd.date_range("2017-01-01", periods=N_DAYS),
+            "daily_emissions_kg": rng.uniform(0, 50, N_DAYS),
+            "active_leaks": rng.integers(0, 30, N_DAYS),
+            "cum_repaired_leaks": np.cumsum(rng.integers(0, 3, N_DAYS)),
+            "rolling_cost_estimate": rng.uniform(0, 10, N_DAYS),
+            "OGI_cost": rng.uniform(0, 100, N_DAYS),
+        }
+    )
+
+
+def make_summary(n_simulations):
+    rng = np.random.default_rng(0)
+    timeseries = [make_timeseries(rng) for _ in range(n_simulations)]
+    report_dates = (timeseries[0]["datetime"] > "01-10-2017").to_numpy()
+    summary = ProgramSummary("P_OGI", ["OGI_cost"])
+    for sim_timeseries in timeseries:
+        summary.add(sim_timeseries, report_dates, N_SITES)
+    return summary, timeseries, report_dates
+
+
+def test_063_descriptives_match_describe():
+    summary, timeseries, report_dates = make_summary(5)
+    emissions = pd.concat([ts["daily_emissions_kg"] for ts in timeseries], axis=1) / N_SITES
+    sim_medians = emissions.loc[report_dates].describe().loc["50%"]
+    descriptives = summary.descriptives()
+    assert descriptives.loc["median daily emissions", "mean"] == sim_medians.mean()
+    assert descriptives.loc["median daily emissions", "std"] == sim_medians.std()
+    assert descriptives.loc["median daily emissions", "max"] == sim_medians.max()
+    assert summary.n_simulations == 5
+    assert summary.method_costs[0] == [
+        sum(timeseries[0]["OGI_cost"].tolist()) / N_DAYS / N_SITES * 365
+    ]
+
+
+def test_063_daily_stats_match_row_statistics():
+    # Enough simulations for sums to be taken pairwise
+    summary, timeseries, report_dates = make_summary(12)
+    for column in ["active_leaks", "rolling_cost_estimate"]:
+        sims = pd.concat([ts[column] for ts in timeseries], axis=1).loc[report_dates]
+        stats = summary.daily_stats(column)
+        # Sketches hold every simulation, so statistics are exact
+        assert np.array_equal(stats["mean"], sims.mean(axis=1).to_numpy())
+        assert np.array_equal(stats["std"], sims.std(axis=1).to_numpy())
+        assert np.array_equal(stats["low"], sims.quantile(0.025, axis=1).to_numpy())
+        assert np.array_equal(stats["high"], sims.quantile(0.975, axis=1).to_numpy())
+
+
+def test_063_daily_table_is_long_by_simulation():
+    summary, timeseries, report_dates = make_summary(3)
+    dates = pd.Series(pd.date_range("2017-01-01", periods=N_DAYS)[report_dates], name="datetime")
+    sim_values = [ts["active_leaks"].to_numpy()[report_dates] for ts in timeseries]
+    table = summary.daily_table("active_leaks", dates, sim_values)
+    n_dates = int(report_dates.sum())
+    assert list(table.columns) == [
+        "datetime",
+        "mean",
+        "std",
+        "low",
+        "high",
+        "program",
+        "variable",
+        "value",
+    ]
+    assert len(table) == 3 * n_dates
+    assert table["variable"].tolist() == [0] * n_dates + [1] * n_dates + [2] * n_dates
+    assert table["value"].tolist() == np.concatenate(sim_values).tolist()
+
+
+def test_063_merged_summaries_match_one_summary():
+    summary, timeseries, report_dates = make_summary(6)
+    first = ProgramSummary("P_OGI", ["OGI_cost"])
+    second = ProgramSummary("P_OGI", ["OGI_cost"])
+    for sim_idx, sim_timeseries in enumerate(timeseries):
+        (first if sim_idx < 4 else second).add(sim_timeseries, report_dates, N_SITES)
+    first.merge(second)
+    pd.testing.assert_frame_equal(first.descriptives(), summary.descriptives())
+    assert first.method_costs == summary.method_costs
+    merged_stats = first.daily_stats("daily_emissions_kg")
+    for stat, values in summary.daily_stats("daily_emissions_kg").items():
+        assert np.allclose(merged_stats[stat], values)
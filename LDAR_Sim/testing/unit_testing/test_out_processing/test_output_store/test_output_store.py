@@ -0,0 +1,110 @@
+"""Test file to unit test out_processing.output_store functionality"""
+
+import datetime
+from importlib.util import find_spec
+
+import pandas as pd
+import pytest
+
+from src.out_processing.output_store import (
+    CsvOutputStore,
+    output_store,
+    output_store_class,
+    typed_columns,
+)
+
+
+def make_timeseries():
+    return pd.DataFrame(
+        {
+            "datetime": [datetime.datetime(2017, 1, day) for day in range(1, 4)],
+            "daily_emissions_kg": [1.5, 2.0, 2.5],
+            "OGI_cost": [0.0, 100.0, 0.0],
+            "total_daily_cost": [0.0, 100.0, 0.0],
+        }
+    )
+
+
+def test_062_csv_keeps_output_file_names(tmp_path):
+    outputs = output_store(tmp_path, "P_OGI", "csv")
+    outputs.write("timeseries", make_timeseries(), 0)
+    outputs.write("site_visits", pd.DataFrame({"site_visited": [1]}), 0, method="OGI")
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "site_visits_OGI_0.csv",
+        "timeseries_output_0_P_OGI.csv",
+    ]
+    assert outputs.simulations("timeseries") == ["0"]
+    assert outputs.simulations("site_visits", method="OGI") == ["0"]
+    assert outputs.simulations("leaks") == []
+
+
+def test_062_csv_reads_projected_columns(tmp_path):
+    outputs = CsvOutputStore(tmp_path, "P_OGI")
+    timeseries = make_timeseries()
+    for simulation in range(3):
+        outputs.write("timeseries", timeseries, simulation)
+    assert sorted(outputs.simulations("timeseries")) == ["0", "1", "2"]
+    assert outputs.columns("timeseries", 1) == list(timeseries.columns)
+    result = outputs.read("timeseries", 1, columns=["OGI_cost", "daily_emissions_kg"])
+    pd.testing.assert_frame_equal(result, timeseries[["OGI_cost", "daily_emissions_kg"]])
+
+
+def test_062_typed_columns_give_one_type_per_column():
+    df = pd.DataFrame(
+        {
+            "flagged": [True, None, False],
+            "t_since": [1, None, 3],
+            "flagged_by": ["OGI", None, "OGI"],
+            "date_flagged": [datetime.datetime(2017, 1, 1), None, None],
+            "tags": [[], [{"leak_ID": 1}], None],
+        }
+    )
+    result = typed_columns(df)
+    assert str(result["flagged"].dtype) == "boolean"
+    assert result["t_since"].dtype == "float64"
+    assert result["flagged_by"].tolist() == ["OGI", None, "OGI"]
+    assert result["date_flagged"].dtype == "datetime64[ns]"
+    assert result["tags"].tolist() == ["[]", "[{'leak_ID': 1}]", None]
+    assert df["tags"].tolist() == [[], [{"leak_ID": 1}], None]
+
+
+def test_062_unknown_output_format_is_rejected():
+    with pytest.raises(ValueError):
+        output_store_class("xlsx")
+
+
+def test_062_parquet_requires_pyarrow(monkeypatch):
+    monkeypatch.setattr(
+        "src.out_processing.output_store.find_spec",
+        lambda name: None if name == "pyarrow" else find_spec(name),
+    )
+    with pytest.raises(ImportError):
+        output_store_class("parquet")
+
+
+def test_062_parquet_round_trip(tmp_path):
+    outputs = output_store(tmp_path, "P_OGI", "parquet")
+    timeseries = make_timeseries()
+    outputs.write("timeseries", timeseries, 0)
+    assert (tmp_path / "timeseries" / "simulation=0" / "part-0.parquet").is_file()
+    assert outputs.simulations("timeseries") == ["0"]
+    assert outputs.columns("timeseries", 0) == list(timeseries.columns)
+    result = outputs.read("timeseries", 0, columns=["datetime", "OGI_cost"])
+    pd.testing.assert_frame_equal(result, timeseries[["datetime", "OGI_cost"]])
+
+
+def test_062_parquet_keeps_typed_site_columns(tmp_path):
+    outputs = output_store(tmp_path, "P_OGI", "parquet")
+    sites = pd.DataFrame(
+        {
+            "facility_ID": ["site_0", "site_1"],
+            "OGI_attempted_today?": [True, None],
+            "active_leaks": [[1, 2], []],
+        }
+    )
+    outputs.write("sites", sites, 1)
+    result = outputs.read("sites", 1)
+    assert result["facility_ID"].tolist() == ["site_0", "site_1"]
+    assert str(result["OGI_attempted_today?"].dtype) == "boolean"
+    assert result["OGI_attempted_today?"].isna().tolist() == [False, True]
+    assert result["active_leaks"].tolist() == ["[1, 2]", "[]"]
@@ -0,0 +1,116 @@
+"""Test file to unit test out_processing.plot_queue functionality"""
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from src.out_processing.plot_queue import (  # noqa: E402
+    PlotJob,
+    PlotQueue,
+    clear_outputs,
+    figure_hash,
+    input_hash,
+    remove_stale_figures,
+)
+
+
+def render_line(path, metadata, values, title=""):
+    fig, ax = plt.subplots()
+    ax.plot(values)
+    ax.set_title(title)
+    fig.savefig(path, metadata=metadata)
+    plt.close(fig)
+
+
+def test_065_rendered_figure_holds_input_hash_and_is_skipped(tmp_path):
+    job = PlotJob(render_line, tmp_path / "line.png", {"values": np.arange(5)})
+    queue = PlotQueue()
+    queue.submit(job)
+    assert figure_hash(job.path) == input_hash(job)
+    mtime = job.path.stat().st_mtime_ns
+    queue.submit(job)
+    assert job.path.stat().st_mtime_ns == mtime
+    assert (queue.n_rendered, queue.n_skipped) == (1, 1)
+
+
+def test_065_changed_inputs_are_rendered(tmp_path):
+    path = tmp_path / "line.png"
+    jobs = [
+        PlotJob(render_line, path, {"values": np.arange(5)}),
+        PlotJob(render_line, path, {"values": np.arange(6)}),
+        PlotJob(render_line, path, {"values": np.arange(6)}, {"title": "Line"}),
+    ]
+    queue = PlotQueue()
+    queue.submit_all(jobs)
+    assert queue.n_rendered == 3
+    assert figure_hash(path) == input_hash(jobs[2])
+    assert figure_hash(tmp_path / "missing.png") is None
+
+
+def test_065_jobs_are_rendered_in_pool(tmp_path):
+    jobs = [
+        PlotJob(render_line, tmp_path / "line_{}.png".format(n), {"values": np.arange(n)})
+        for n in range(1, 4)
+    ]
+    with PlotQueue(processes=2) as queue:
+        queue.submit_all(jobs)
+    assert queue.n_rendered == 3
+    for job in jobs:
+        assert figure_hash(job.path) == input_hash(job)
+
+
+def test_065_jobs_without_options_do_not_share_options(tmp_path):
+    first = PlotJob(render_line, tmp_path / "first.png", {"values": np.arange(3)})
+    second = PlotJob(render_line, tmp_path / "second.png", {"values": np.arange(3)})
+    assert first.options is None and second.options is None
+    assert input_hash(first) != input_hash(second)
+
+
+def test_065_figures_of_previous_run_are_kept_until_stale(tmp_path):
+    program_dir = tmp_path / "P_OGI"
+    job = PlotJob(render_line, program_dir / "line.png", {"values": np.arange(5)})
+    program_dir.mkdir()
+    PlotQueue().submit(job)
+    (program_dir / "leaks_output_0_P_OGI.csv").write_text("leak_ID")
+    (tmp_path / "P_old").mkdir()
+    (tmp_path / "P_old" / "line.png").write_bytes(job.path.read_bytes())
+
+    clear_outputs(tmp_path)
+    assert sorted(path.name for path in tmp_path.rglob("*") if path.is_file()) == [
+        "line.png",
+        "line.png",
+    ]
+    queue = PlotQueue()
+    queue.submit(job)
+    assert (queue.n_rendered, queue.n_skipped) == (0, 1)
+    remove_stale_figures(tmp_path, queue.paths)
+    assert [path for path in tmp_path.rglob("*")] == [program_dir, job.path]
+
+
+def test_065_held_jobs_are_rendered_once_released(tmp_path):
+    jobs = [
+        PlotJob(render_line, tmp_path / "line_{}.png".format(n), {"values": np.arange(n)})
+        for n in range(1, 3)
+    ]
+    with PlotQueue(processes=1, held=True) as queue:
+        queue.submit_all(jobs)
+        assert queue._pool is None
+        assert not any(job.path.exists() for job in jobs)
+        queue.release()
+    assert queue.n_rendered == 2
+    assert all(figure_hash(job.path) == input_hash(job) for job in jobs)
+
+
+def test_065_queue_is_stopped_on_error(tmp_path):
+    job = PlotJob(render_line, tmp_path / "line.png", {"values": np.arange(3)})
+    try:
+        with PlotQueue(processes=1, held=True) as queue:
+            queue.submit(job)
+            raise RuntimeError("simulation failed")
+    except RuntimeError:
+        pass
+    assert queue._pool is None and queue._held_jobs == []
+    assert not job.path.exists()
@@ -0,0 +1,59 @@
+"""Test file to unit test out_processing.quantile_sketch functionality"""
+
+import numpy as np
+
+from src.out_processing.quantile_sketch import DailyQuantileSketch
+
+QUANTILES = [0.025, 0.5, 0.975]
+
+
+def make_values(n_simulations, n_days=30):
+    return np.random.default_rng(0).lognormal(size=(n_simulations, n_days))
+
+
+def rank_errors(values, quantiles):
+    # Difference between the share of simulations below each quantile and the quantile
+    return [
+        np.abs((values < quantiles[q_idx]).mean(axis=0) - q).max()
+        for q_idx, q in enumerate(QUANTILES)
+    ]
+
+
+def test_064_sketch_is_exact_up_to_capacity():
+    values = make_values(20)
+    sketch = DailyQuantileSketch(values.shape[1], capacity=20)
+    for sim_values in values:
+        sketch.add(sim_values)
+    assert sketch.is_exact
+    assert np.array_equal(
+        sketch.quantiles(QUANTILES), np.percentile(values, np.array(QUANTILES) * 100.0, axis=0)
+    )
+    assert np.array_equal(sketch.mean(), values.mean(axis=0))
+    assert np.allclose(sketch.std(), values.std(axis=0, ddof=1))
+
+
+def test_064_compacted_sketch_has_bounded_size_and_error():
+    values = make_values(2000)
+    sketch = DailyQuantileSketch(values.shape[1], capacity=64)
+    for sim_values in values:
+        sketch.add(sim_values)
+    assert not sketch.is_exact
+    n_held = sum(block.shape[1] for blocks in sketch.levels for block in blocks)
+    assert n_held <= 64 * len(sketch.levels)
+    assert max(rank_errors(values, sketch.quantiles(QUANTILES))) < 0.03
+    assert np.allclose(sketch.mean(), values.mean(axis=0))
+    assert np.allclose(sketch.std(), values.std(axis=0, ddof=1))
+
+
+def test_064_merged_sketches_match_one_sketch():
+    values = make_values(1000)
+    sketches = [DailyQuantileSketch(values.shape[1], capacity=64) for _ in range(3)]
+    for sim_idx, sim_values in enumerate(values):
+        sketches[sim_idx % 3].add(sim_values)
+    merged = sketches[0]
+    merged.merge(sketches[1])
+    merged.merge(sketches[2])
+    assert merged.count == 1000
+    assert max(rank_errors(values, merged.quantiles(QUANTILES))) < 0.03
+    assert np.allclose(merged.mean(), values.mean(axis=0))
+    assert np.allclose(merged.std(), values.std(axis=0, ddof=1))
@@ -0,0 +1,79 @@
+"""Fixtures for testing the simulation output aggregator"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def mock_sim_result(program_name, sim, rng, methods):
+    n_days, n_sites, n_leaks = 20, 5, 12
+    timeseries = pd.DataFrame(
+        {
+            "daily_emissions_kg": rng.uniform(0, 100, n_days),
+            "active_leaks": rng.integers(0, 10, n_days),
+            "total_daily_cost": rng.uniform(0, 50, n_days),
+            "verification_cost": rng.uniform(0, 5, n_days),
+        }
+    )
+    for method in methods:
+        timeseries["{}_cost".format(method)] = rng.uniform(0, 20, n_days)
+        for col in ["sites_visited", "eff_flags", "missed_leaks", "n_tags", "sites_vis_w_leaks"]:
+            timeseries["{}_{}".format(method, col)] = rng.integers(0, 5, n_days)
+    timeseries["total_daily_cost"] = timeseries.filter(regex="^(?!total).*cost$").sum(axis=1)
+    sites = pd.DataFrame(
+        {
+            "facility_ID": ["site_{}".format(i) for i in range(n_sites)],
+            "lat": rng.uniform(50, 51, n_sites),
+            "lon": rng.uniform(-115, -114, n_sites),
+            "total_emissions_kg": rng.uniform(0, 1000, n_sites),
+            "subtype_code": "0",
+        }
+    )
+    leaks = pd.DataFrame(
+        {
+            "leak_ID": ["site_{}_{}".format(i % n_sites, i) for i in range(n_leaks)],
+            "facility_ID": ["site_{}".format(i % n_sites) for i in range(n_leaks)],
+            "days_active": rng.integers(1, n_days, n_leaks),
+            "init_detect_by": rng.choice(
+                ["natural", None, methods[0] if methods else None], n_leaks
+            ),
+            "rate": rng.uniform(0, 2, n_leaks),
+        }
+    )
+    return {
+        "meta": {"program_name": program_name, "simulation": str(sim)},
+        "leaks": leaks,
+        "timeseries": timeseries,
+        "sites": sites,
+        "program_name": program_name,
+        "p_c_economics": {
+            "sale_price_natgas": 3,
+            "GWP_CH4": 28,
+            "carbon_price_tonnesCO2e": 40,
+            "cost_CCUS": 20,
+        },
+    }
+
+
+@pytest.fixture(name="mock_programs")
+def mock_programs_fix():
+    return {
+        "P_none": {"methods": {}},
+        "P_OGI": {"methods": {"OGI": {"measurement_scale": "component", "is_follow_up": False}}},
+        "P_air": {
+            "methods": {
+                "aircraft": {"measurement_scale": "equipment", "is_follow_up": False},
+                "OGI_FU": {"measurement_scale": "component", "is_follow_up": True},
+            }
+        },
+    }
+
+
+@pytest.fixture(name="mock_sim_results")
+def mock_sim_results_fix(mock_programs):
+    rng = np.random.default_rng(0)
+    return [
+        mock_sim_result(program_name, sim, rng, list(program["methods"]))
+        for sim in range(3)
+        for program_name, program in mock_programs.items()
+    ]
@@ -0,0 +1,39 @@
+"""Test file to unit test out_processing.sim_aggregator functionality"""
+
+import json
+
+import matplotlib
+import pandas as pd
+
+from src.economics.cost_mitigation import cost_mitigation
+from src.out_processing.prog_table import generate as gen_prog_table
+from src.out_processing.sim_aggregator import SimAggregator
+from testing.unit_testing.test_out_processing.test_sim_aggregator.sim_aggregator_testing_fixtures import (  # Noqa: 401
+    mock_programs_fix,
+    mock_sim_results_fix,
+)
+
+matplotlib.use("Agg")
+
+
+def test_061_prog_table_matches_generate_in_any_order(mock_programs, mock_sim_results):
+    expected = gen_prog_table(mock_sim_results, "P_none", mock_programs)
+    sim_aggregator = SimAggregator(mock_programs, "P_none")
+    # Add programs before their baseline program, as unordered pools may
+    for sim_idx in reversed(range(len(mock_sim_results))):
+        sim_aggregator.add(sim_idx, mock_sim_results[sim_idx])
+    assert json.dumps(sim_aggregator.prog_table(), sort_keys=True) == json.dumps(
+        expected, sort_keys=True
+    )
+    # Baseline leaks are dropped once every program of their simulation is added
+    assert sim_aggregator._natural_leaks == {}
+
+
+def test_061_cost_mitigation_matches_in_any_order(tmp_path, mock_programs, mock_sim_results):
+    expected = cost_mitigation(mock_sim_results, "P_OGI", "P_none", tmp_path)
+    sim_aggregator = SimAggregator(mock_programs, "P_none")
+    for sim_idx in reversed(range(len(mock_sim_results))):
+        sim_aggregator.add(sim_idx, mock_sim_results[sim_idx])
+    pd.testing.assert_frame_equal(
+        sim_aggregator.cost_mitigation("P_OGI", "P_none", tmp_path), expected
+    )
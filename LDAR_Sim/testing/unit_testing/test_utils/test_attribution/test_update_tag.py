@@ -1,5 +1,7 @@
 """Test file to unit test attribution.py update_tag functionality"""
 from src.utils.attribution import update_tag
+from src.utils.leak_table import LeakTable
+from src.utils.repair_queue import REPAIR
 from testing.unit_testing.test_utils.test_attribution.attribution_testing_fixtures import (  # Noqa: 401
     mock_leak_for_update_tag_testing_1_fix,
     mock_leak_for_update_tag_testing_2_fix,
@@ -53,3 +55,24 @@ def test_072_update_tag_nat_repair_no_prev_tag(
         ]
         == 1
     )
+
+
+def test_072_update_tag_schedules_repair(
+    mock_site_for_update_tag_testing_1,
+    mock_timeseries_for_update_tag_testing_1,
+    mock_TimeCounter_for_update_tag_testing_1,
+    mock_company_for_update_tag_testing_1,
+):
+    leak_table = LeakTable()
+    site_index = leak_table.add_site()
+    row = leak_table.add(site_index, {"tagged": False})
+    update_tag(
+        leak_table.view(row),
+        None,
+        mock_site_for_update_tag_testing_1,
+        mock_timeseries_for_update_tag_testing_1,
+        mock_TimeCounter_for_update_tag_testing_1,
+        mock_company_for_update_tag_testing_1,
+    )
+    current_timestep = mock_TimeCounter_for_update_tag_testing_1.current_timestep
+    assert leak_table.repair_queue.pop(current_timestep, REPAIR) == [row]
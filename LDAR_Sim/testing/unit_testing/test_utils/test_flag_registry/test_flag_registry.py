@@ -0,0 +1,77 @@
+"""Test file to unit test utils.flag_registry functionality"""
+
+from datetime import datetime
+
+from src.utils.flag_registry import FlagRegistry
+
+METHODS = {
+    "air": {"reporting_delay": 2, "is_follow_up": False},
+    "makeup": {"reporting_delay": 0, "is_follow_up": False},
+    "OGI_FU": {"reporting_delay": 0, "is_follow_up": True},
+    "drone_FU": {"reporting_delay": 0, "is_follow_up": True},
+}
+
+
+def flag(flag_registry, site, date, flagged_by, preferred_FU_method=None):
+    site.update(
+        {
+            "date_flagged": date,
+            "flagged_by": flagged_by,
+            "preferred_FU_method": preferred_FU_method,
+        }
+    )
+    flag_registry.flag(site)
+
+
+def test_075_candidates_follow_reporting_delay_and_preferred_method():
+    sites = [{"facility_ID": facility_ID} for facility_ID in ["a", "b", "c", "d"]]
+    flag_registry = FlagRegistry(sites, METHODS)
+    flag(flag_registry, sites[3], datetime(2020, 1, 1, 8), "air")
+    flag(flag_registry, sites[1], datetime(2020, 1, 1, 8), "makeup", "OGI_FU")
+    flag(flag_registry, sites[0], datetime(2020, 1, 1, 8), "makeup", "drone_FU")
+    flag_registry.snapshot()
+    assert flag_registry.candidates("OGI_FU", datetime(2020, 1, 2, 8)) == [1]
+    assert flag_registry.candidates("OGI_FU", datetime(2020, 1, 3, 8)) == [1, 3]
+    assert flag_registry.candidates("drone_FU", datetime(2020, 1, 3, 8)) == [0, 3]
+
+
+def test_075_candidates_are_limited_to_last_snapshot():
+    sites = [{"facility_ID": facility_ID} for facility_ID in ["a", "b", "c"]]
+    flag_registry = FlagRegistry(sites, METHODS)
+    flag(flag_registry, sites[0], datetime(2020, 1, 1), "makeup")
+    flag(flag_registry, sites[1], datetime(2020, 1, 1), "makeup")
+    assert flag_registry.snapshot() == {"a", "b"}
+    # Sites unflagged since the snapshot are kept, sites flagged since are not
+    flag_registry.unflag(sites[0])
+    flag(flag_registry, sites[2], datetime(2020, 1, 1), "makeup")
+    assert flag_registry.candidates("OGI_FU", datetime(2020, 1, 1)) == [0, 1]
+    assert flag_registry.snapshot() == {"b", "c"}
+    assert flag_registry.candidates("OGI_FU", datetime(2020, 1, 1)) == [1, 2]
+
+
+def test_075_flagging_again_replaces_flag():
+    sites = [{"facility_ID": "a"}]
+    flag_registry = FlagRegistry(sites, METHODS)
+    flag(flag_registry, sites[0], datetime(2020, 1, 1), "makeup", "drone_FU")
+    flag(flag_registry, sites[0], datetime(2020, 1, 1), "air", "OGI_FU")
+    flag_registry.snapshot()
+    assert flag_registry.candidates("drone_FU", datetime(2020, 1, 5)) == []
+    assert flag_registry.candidates("OGI_FU", datetime(2020, 1, 2)) == []
+    assert flag_registry.candidates("OGI_FU", datetime(2020, 1, 3)) == [0]
+
+
+def test_075_heaps_stay_bounded_by_flagged_sites():
+    sites = [{"facility_ID": facility_ID} for facility_ID in ["a", "b", "c"]]
+    flag_registry = FlagRegistry(sites, METHODS)
+    # No follow-up method of the program is preferred, so no follow-up reports the flag
+    flag(flag_registry, sites[2], datetime(2020, 1, 1), "makeup", "aircraft_FU")
+    assert flag_registry.pending["aircraft_FU"] == []
+    assert flag_registry.snapshot() == {"c"}
+    for day in range(1, 29):
+        for site in sites[:2]:
+            flag(flag_registry, site, datetime(2020, 2, day), "air", "OGI_FU")
+        flag_registry.snapshot()
+        n_pending = sum(len(pending) for pending in flag_registry.pending.values())
+        assert n_pending <= 2 * len(flag_registry.flagged)
+    assert flag_registry.candidates("OGI_FU", datetime(2020, 3, 1)) == [0, 1]
+    assert flag_registry.candidates("drone_FU", datetime(2020, 3, 1)) == []
@@ -0,0 +1,38 @@
+"""Fixtures for testing utils.leak_table"""
+
+import pytest
+import datetime
+
+
+@pytest.fixture(name="mock_leaks_for_leak_table_testing_1")
+def mock_leaks_for_leak_table_testing_1_fix():
+    return [
+        {
+            "leak_ID": "site_0000000001",
+            "facility_ID": "site",
+            "equipment_group": 1,
+            "rate": 1.5,
+            "status": "active",
+            "days_active": 0,
+            "volume": None,
+            "tagged": False,
+            "date_began": datetime.datetime(2017, 1, 1),
+            "day_ts_began": -10,
+            "date_tagged": None,
+            "tagged_by_company": None,
+        },
+        {
+            "leak_ID": "site_0000000002",
+            "facility_ID": "site",
+            "equipment_group": 2,
+            "rate": 0.5,
+            "status": "active",
+            "days_active": 3,
+            "volume": None,
+            "tagged": True,
+            "date_began": datetime.datetime(2017, 1, 1),
+            "day_ts_began": 2,
+            "date_tagged": datetime.datetime(2017, 1, 4, 10, 0),
+            "tagged_by_company": "OGI",
+        },
+    ]
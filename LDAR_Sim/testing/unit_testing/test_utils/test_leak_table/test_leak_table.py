@@ -0,0 +1,66 @@
+"""Test file to unit test utils.leak_table functionality"""
+
+import datetime
+
+from src.utils.leak_table import LEAK_FIELDS, LeakTable
+from testing.unit_testing.test_utils.test_leak_table.leak_table_testing_fixtures import (  # Noqa: 401
+    mock_leaks_for_leak_table_testing_1_fix,
+)
+
+
+def test_073_leak_view_matches_leak_dict(mock_leaks_for_leak_table_testing_1):
+    leak_table = LeakTable(capacity=1)
+    site_index = leak_table.add_site()
+    for leak in mock_leaks_for_leak_table_testing_1:
+        leak_table.add(site_index, leak)
+    active_leaks = leak_table.active_leaks(site_index)
+    assert len(active_leaks) == 2
+    assert list(active_leaks[1].keys()) == list(LEAK_FIELDS)
+    for leak, leak_view in zip(mock_leaks_for_leak_table_testing_1, active_leaks):
+        assert {key: leak_view[key] for key in leak} == leak
+
+
+def test_073_leak_view_writes_to_table(mock_leaks_for_leak_table_testing_1):
+    leak_table = LeakTable()
+    site_index = leak_table.add_site()
+    for leak in mock_leaks_for_leak_table_testing_1:
+        leak_table.add(site_index, leak)
+    leak_view = leak_table.active_leaks(site_index)[0]
+    leak_view["tagged"] = True
+    leak_view["M_test_sp_covered"] = 1
+    assert "M_test_sp_covered" in leak_view
+    assert "M_test_sp_covered" not in leak_table.view(1)
+    assert leak_table["tagged"].tolist() == [True, True]
+    assert leak_table.to_records([0])[0]["M_test_sp_covered"] == 1
+
+
+def test_073_repair_moves_leaks_and_sets_volume(mock_leaks_for_leak_table_testing_1):
+    leak_table = LeakTable()
+    site_index = leak_table.add_site()
+    for leak in mock_leaks_for_leak_table_testing_1:
+        leak_table.add(site_index, leak)
+    repair_date = datetime.datetime(2017, 1, 6, 8, 0)
+    leak_table.repair([1], repair_date, 5)
+    assert leak_table.active_rows().tolist() == [0]
+    assert leak_table.n_repaired == 1
+    repaired_leak = leak_table.repaired_leaks(site_index)[0]
+    assert repaired_leak["status"] == "repaired"
+    assert repaired_leak["repair_delay"] == 1
+    assert repaired_leak["volume"] == 3 * 0.5 * 86.4
+    assert leak_table.emission_rate([0, 1]) == 2.0
+    assert leak_table.volumes([0], 5).tolist() == [5 * 1.5 * 86.4]
+
+
+def test_073_running_totals_follow_adds_and_repairs(mock_leaks_for_leak_table_testing_1):
+    leak_table = LeakTable()
+    site_indices = [leak_table.add_site(), leak_table.add_site()]
+    for site_index, leak in zip(site_indices, mock_leaks_for_leak_table_testing_1):
+        leak_table.add(site_index, leak)
+    assert leak_table.n_active == 2
+    assert leak_table.active_rate == 2.0
+    assert leak_table.site_rate.tolist() == [1.5, 0.5]
+    leak_table.repair([0], datetime.datetime(2017, 1, 6, 8, 0), 5)
+    assert leak_table.n_active == 1
+    assert leak_table.n_repaired == 1
+    assert leak_table.active_rate == 0.5
+    assert leak_table.site_rate.tolist() == [0.0, 0.5]
@@ -0,0 +1,16 @@
+"""Test file to unit test utils.repair_queue functionality"""
+
+from src.utils.repair_queue import NATURAL_TAG, REPAIR, RepairQueue
+
+
+def test_074_pop_returns_only_due_events_of_type():
+    repair_queue = RepairQueue()
+    repair_queue.push(3, 10)
+    repair_queue.push(1, 11)
+    repair_queue.push(2, 12, NATURAL_TAG)
+    repair_queue.push(5, 13)
+    assert repair_queue.pop(3, REPAIR) == [11, 10]
+    assert len(repair_queue) == 2
+    assert repair_queue.pop(3, NATURAL_TAG) == [12]
+    assert repair_queue.pop(4, REPAIR) == []
+    assert repair_queue.pop(5, REPAIR) == [13]
@@ -0,0 +1,74 @@
+"""Test file to unit test site_counters.py SiteCounters functionality"""
+
+import numpy as np
+from src.utils.site_counters import SiteCounters, method_key
+
+
+def make_sites(n_sites):
+    return [{"facility_ID": "site_{}".format(site_idx)} for site_idx in range(n_sites)]
+
+
+def test_077_end_day_matches_site_by_site():
+    rng = np.random.default_rng(0)
+    sites = make_sites(50)
+    counters = SiteCounters("OGI", sites, 400, t_since_last_LDAR=rng.integers(0, 90, 50))
+    for site, t_since_last_LDAR in zip(sites, counters.t_since_last_LDAR.tolist()):
+        site.update(
+            {
+                "OGI_t_since_last_LDAR": t_since_last_LDAR,
+                "OGI_surveys_conducted": 0,
+                "OGI_attempted_today?": False,
+                "OGI_surveys_done_this_year": 0,
+            }
+        )
+    for day in range(400):
+        for site in rng.choice(sites, int(rng.integers(0, 8)), replace=False):
+            site_idx = counters.row(site)
+            counters.attempted_today[site_idx] = True
+            site["OGI_attempted_today?"] = True
+            assert counters.record_survey(site_idx) == site["OGI_t_since_last_LDAR"]
+            site["OGI_surveys_conducted"] += 1
+            site["OGI_surveys_done_this_year"] += 1
+            site["OGI_t_since_last_LDAR"] = 0
+        end_of_year = day % 365 == 364
+        counters.end_day(end_of_year=end_of_year)
+        for site in sites:
+            site["OGI_t_since_last_LDAR"] += 1
+            site["OGI_attempted_today?"] = False
+            if end_of_year:
+                site["OGI_surveys_done_this_year"] = 0
+
+    expected = [dict(site) for site in sites]
+    counters.write_sites(sites)
+    for site, expected_site in zip(sites, expected):
+        assert site == dict(expected_site, OGI_missed_leaks=0)
+
+
+def test_077_write_sites_keeps_column_order():
+    sites = make_sites(3)
+    SiteCounters("OGI", sites, 10).write_sites(sites)
+    assert list(sites[0]) == [
+        "facility_ID",
+        "OGI_t_since_last_LDAR",
+        "OGI_surveys_conducted",
+        "OGI_attempted_today?",
+        "OGI_surveys_done_this_year",
+        "OGI_missed_leaks",
+    ]
+
+
+def test_077_missed_leaks_update_site_and_timeseries():
+    sites = make_sites(3)
+    counters = SiteCounters("OGI", sites, 10)
+    timeseries = {}
+    timeseries.update(counters.timeseries)
+    counters.add_missed_leaks(counters.row(sites[1]), 2, 4)
+    counters.add_missed_leaks(counters.row(sites[1]), 1, 5)
+    assert counters.missed_leaks.tolist() == [0, 3, 0]
+    assert timeseries["OGI_missed_leaks"].tolist() == [0, 0, 0, 0, 2, 1, 0, 0, 0, 0]
+    assert timeseries["OGI_missed_leaks"] is counters.series("missed_leaks")
+
+
+def test_077_method_key_is_interned():
+    assert method_key("OGI", "cost") is method_key("OG" + "I", "co" + "st")
+    assert method_key("OGI", "cost") == "OGI_cost"
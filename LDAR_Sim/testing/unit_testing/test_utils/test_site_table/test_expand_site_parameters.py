@@ -0,0 +1,70 @@
+"""Test file to unit test site_table.py expand_site_parameters functionality"""
+
+from math import floor
+
+import numpy as np
+import pytest
+from src.utils.site_table import expand_site_parameters
+
+
+def expand_site_by_site(site, m_label, m_obj):
+    """Survey parameters of a site, set one site at a time"""
+    m_RS = "{}_RS".format(m_label)
+    if m_obj["RS"] is not None:
+        site[m_RS] = m_obj["RS"]
+    m_min_time_bt_surveys = "{}_min_time_bt_surveys".format(m_label)
+    if m_obj["scheduling"]["min_time_bt_surveys"] is not None:
+        site[m_min_time_bt_surveys] = m_obj["scheduling"]["min_time_bt_surveys"]
+    if not m_obj["is_follow_up"] and m_obj["deployment_type"] == "mobile" and site[m_RS] > 0:
+        if m_min_time_bt_surveys not in site:
+            n_days = 30.4167 * len(m_obj["scheduling"]["deployment_months"])
+            site[m_min_time_bt_surveys] = floor((n_days / site[m_RS]) / 2)
+    if m_obj["time"] is not None:
+        site["{}_time".format(m_label)] = m_obj["time"]
+    if m_RS in site and site[m_RS] != 0:
+        n_days = 30.4167 * len(m_obj["scheduling"]["deployment_months"])
+        site["{}_min_int".format(m_label)] = floor(n_days / site[m_RS])
+
+
+def make_sites(rng):
+    sites = []
+    for site_idx in range(50):
+        site = {"facility_ID": site_idx, "OGI_RS": int(rng.integers(0, 5)), "OGI_time": 120}
+        if site_idx % 7 == 0:
+            site["OGI_min_time_bt_surveys"] = 20
+        sites.append(site)
+    return sites
+
+
+@pytest.mark.parametrize(
+    "RS, min_time_bt_surveys, time",
+    [(None, None, None), (3, None, 240), (None, 15, None), (2, 10, 60)],
+)
+def test_076_expand_site_parameters_matches_site_by_site(RS, min_time_bt_surveys, time):
+    m_obj = {
+        "label": "OGI",
+        "RS": RS,
+        "time": time,
+        "is_follow_up": False,
+        "deployment_type": "mobile",
+        "max_workday": 8,
+        "scheduling": {
+            "min_time_bt_surveys": min_time_bt_surveys,
+            "deployment_months": [1, 2, 3, 5, 6, 7, 9],
+        },
+    }
+    sites = make_sites(np.random.default_rng(0))
+    expected = make_sites(np.random.default_rng(0))
+    site_table = expand_site_parameters(sites, m_obj)
+    for site in expected:
+        expand_site_by_site(site, "OGI", m_obj)
+    assert sites == expected
+    # Parameters are added in the same order, so site outputs keep their columns
+    assert [list(site) for site in sites] == [list(site) for site in expected]
+    for site_idx, site in enumerate(sites):
+        assert site_table.row(site) == site_idx
+        for param in ("RS", "time", "min_int", "min_time_bt_surveys"):
+            value = getattr(site_table, param)[site_idx]
+            assert site.get("OGI_{}".format(param), np.nan) == value or np.isnan(value)
+            assert ("OGI_{}".format(param) in site) != np.isnan(value)
+        assert site_table.survey_days[site_idx] == floor(site["OGI_time"] / 60 / 8)
@@ -0,0 +1,34 @@
+"""Fixtures for testing weather deployment days"""
+
+import datetime
+
+import numpy as np
+import pytest
+from src.weather.weather_lookup_hourly import WeatherLookup
+
+
+@pytest.fixture(name="mock_hourly_weather_for_deployment_days")
+def mock_hourly_weather_for_deployment_days_fix(mocker):
+    # Two years of hourly weather, on a 3 x 4 grid, starting Jan 1, 2017 UTC
+    rng = np.random.default_rng(0)
+    n_hours = 2 * 365 * 24
+    weather = WeatherLookup.__new__(WeatherLookup)
+    weather.state = {"t": mocker.Mock(UTC_offset=-7.0)}
+    weather.virtual_world = {"timesteps": 800}
+    weather.weather_time_meta = {
+        0: {"start_hr": (datetime.datetime(2017, 1, 1) - datetime.datetime(1900, 1, 1)).days * 24}
+    }
+    weather.latitude = np.array([50.0, 50.25, 50.5])
+    weather.longitude = np.array([240.0, 240.25, 240.5, 240.75])
+    weather.temps = rng.normal(5, 15, (n_hours, 3, 4))
+    weather.winds = rng.gamma(2, 2, (n_hours, 3, 4))
+    weather.precip = rng.exponential(0.2, (n_hours, 3, 4))
+    return weather
+
+
+@pytest.fixture(name="mock_config_for_deployment_days")
+def mock_config_for_deployment_days_fix():
+    return {
+        "max_workday": 10,
+        "weather_envs": {"temp": [-10, 30], "wind": [0, 5], "precip": [0, 0.25]},
+    }
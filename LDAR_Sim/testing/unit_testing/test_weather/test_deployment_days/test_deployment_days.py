@@ -0,0 +1,48 @@
+"""Test file to unit test WeatherLookup.deployment_days"""
+
+import datetime
+
+import numpy as np
+from testing.unit_testing.test_weather.test_deployment_days.deployment_days_testing_fixtures import (  # Noqa: 401
+    mock_config_for_deployment_days_fix,
+    mock_hourly_weather_for_deployment_days_fix,
+)
+
+
+def test_081_hourly_deployment_days_matches_hourly_weather(
+    mock_hourly_weather_for_deployment_days, mock_config_for_deployment_days
+):
+    weather = mock_hourly_weather_for_deployment_days
+    config = mock_config_for_deployment_days
+    # Starts late in the weather data, so the days roll over to the start of the data
+    start_date = datetime.datetime(2018, 6, 1)
+    weather.MAX_BLOCK_HRS = 1000
+    DD_all = weather.deployment_days("OGI", config, start_date, start_work_hour=8)
+    assert DD_all.shape == (4, 3, 800)
+    envs = config["weather_envs"]
+    for day in range(800):
+        day_dt = datetime.datetime(2018, 6, 1, 8) + datetime.timedelta(days=day)
+        for lat in range(3):
+            for lon in range(4):
+                hr_weather = weather.get_hourly_weather(
+                    ["winds", "precip", "temps"], day_dt, 10, lat_idx=lat, lon_idx=lon
+                )
+                expected = (
+                    envs["temp"][0] <= np.mean(hr_weather["temps"]) <= envs["temp"][1]
+                    and envs["wind"][0] <= np.mean(hr_weather["winds"]) <= envs["wind"][1]
+                    and envs["precip"][0] <= np.mean(hr_weather["precip"]) <= envs["precip"][1]
+                )
+                assert DD_all[lon, lat, day] == expected
+
+
+def test_081_hourly_deployment_days_without_weather(
+    mock_hourly_weather_for_deployment_days, mock_config_for_deployment_days
+):
+    DD_all = mock_hourly_weather_for_deployment_days.deployment_days(
+        "OGI",
+        mock_config_for_deployment_days,
+        datetime.datetime(2017, 1, 1),
+        consider_weather=False,
+    )
+    assert DD_all.shape == (4, 3, 800)
+    assert DD_all.all()
@@ -0,0 +1,49 @@
+"""Test file to unit test weather.deployment_days_cache functionality"""
+
+import datetime
+
+import numpy as np
+from src.weather.deployment_days_cache import cache_stats, get_deployment_days, reset_cache_stats
+from testing.unit_testing.test_weather.test_deployment_days.deployment_days_testing_fixtures import (  # Noqa: 401
+    mock_config_for_deployment_days_fix,
+    mock_hourly_weather_for_deployment_days_fix,
+)
+
+
+def test_083_deployment_days_reused_from_cache(
+    mock_hourly_weather_for_deployment_days, mock_config_for_deployment_days, tmp_path, mocker
+):
+    weather = mock_hourly_weather_for_deployment_days
+    weather.cache_dir = tmp_path
+    config = mock_config_for_deployment_days
+    start_date = datetime.datetime(2018, 6, 1)
+    expected = weather.deployment_days("OGI", config, start_date, 8, True)
+    reset_cache_stats()
+
+    DD_all = get_deployment_days(weather, "OGI", config, start_date, 8, True)
+    assert np.array_equal(DD_all, expected)
+    assert cache_stats["hits"] == 0 and cache_stats["misses"] == 1
+
+    # The second lookup is read from the cache, for any method with the same settings
+    calculate = mocker.spy(weather, "deployment_days")
+    DD_all = get_deployment_days(weather, "OGI_FU", config, start_date, 8, True)
+    assert DD_all.dtype == bool
+    assert np.array_equal(DD_all, expected)
+    assert calculate.call_count == 0
+    assert cache_stats["hits"] == 1 and cache_stats["misses"] == 1
+
+    # Changed settings are calculated again
+    config["weather_envs"]["wind"] = [0, 4]
+    get_deployment_days(weather, "OGI", config, start_date, 8, True)
+    assert calculate.call_count == 1
+    assert cache_stats["misses"] == 2
+
+
+def test_083_deployment_days_without_weather_cache(
+    mock_hourly_weather_for_deployment_days, mock_config_for_deployment_days
+):
+    weather = mock_hourly_weather_for_deployment_days
+    config = mock_config_for_deployment_days
+    start_date = datetime.datetime(2017, 1, 1)
+    DD_all = get_deployment_days(weather, "OGI", config, start_date, 8, True)
+    assert np.array_equal(DD_all, weather.deployment_days("OGI", config, start_date, 8, True))
@@ -0,0 +1,54 @@
+"""Test file to unit test SiteWeather"""
+
+import datetime
+
+import numpy as np
+from src.weather.site_weather import SiteWeather
+from testing.unit_testing.test_weather.test_deployment_days.deployment_days_testing_fixtures import (  # Noqa: 401
+    mock_hourly_weather_for_deployment_days_fix,
+)
+
+
+def test_084_site_weather_matches_hourly_weather(mocker, mock_hourly_weather_for_deployment_days):
+    weather = mock_hourly_weather_for_deployment_days
+    sites = [
+        {"lat_index": 2, "lon_index": 1},
+        {"lat_index": 0, "lon_index": 3},
+        {"lat_index": 2, "lon_index": 1},
+    ]
+    start_date = datetime.datetime(2018, 12, 30)
+    site_weather = SiteWeather(weather, sites, mocker.Mock(start_date=start_date))
+    assert len(site_weather.cells) == 2
+    # Hours late in the weather data roll over to the start of the data
+    for day in range(0, 30, 3):
+        for hour in (0, 7, 23):
+            date = start_date + datetime.timedelta(days=day, hours=hour)
+            for site in sites:
+                expected = weather.get_hourly_weather(["winds", "temps"], date, 5, site=site)
+                assert np.array_equal(
+                    site_weather.hourly("winds", site, date, 5), expected["winds"]
+                )
+                assert np.array_equal(
+                    site_weather.hourly("temps", site, date, 5), expected["temps"]
+                )
+                assert site_weather.at("winds", site, day, hour) == expected["winds"][0]
+                assert site_weather.value("winds", site, date) == expected["winds"][0]
+            assert np.array_equal(
+                site_weather.values("winds", sites, [date] * 3),
+                [site_weather.value("winds", site, date) for site in sites],
+            )
+
+
+def test_084_site_weather_daily_weather(mocker):
+    weather = mocker.Mock(spec=["winds", "latitude", "longitude"])
+    weather.winds = np.random.default_rng(0).gamma(2, 2, (30, 3, 4))
+    sites = [{"lat_index": 1, "lon_index": 2}, {"lat_index": 0, "lon_index": 0}]
+    start_date = datetime.datetime(2017, 1, 1)
+    site_weather = SiteWeather(weather, sites, mocker.Mock(start_date=start_date))
+    assert site_weather.data("winds").shape == (2, 30)
+    for day in range(30):
+        date = start_date + datetime.timedelta(days=day, hours=9)
+        for site in sites:
+            expected = weather.winds[day, site["lat_index"], site["lon_index"]]
+            assert site_weather.at("winds", site, day) == expected
+            assert site_weather.value("winds", site, date) == expected
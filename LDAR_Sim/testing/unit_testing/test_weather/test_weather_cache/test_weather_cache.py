@@ -0,0 +1,53 @@
+"""Test file to unit test weather.weather_cache functionality"""
+
+import os
+
+import numpy as np
+from netCDF4 import Dataset
+from src.weather.weather_cache import get_weather_cache, load_weather_cache, prepare_weather_cache
+from testing.unit_testing.test_weather.test_weather_cache.weather_cache_testing_fixtures import (  # Noqa: 401
+    mock_weather_file_for_weather_cache_fix,
+    write_weather_file,
+)
+
+
+def test_082_load_weather_cache_converts_units(mock_weather_file_for_weather_cache):
+    in_dir, weather_file = mock_weather_file_for_weather_cache
+    weather = load_weather_cache(in_dir, {"weather_file": weather_file})
+    weather_data = Dataset(in_dir / weather_file, "r")
+    weather_data.set_auto_mask(False)
+    variables = weather_data.variables
+    winds = np.sqrt((np.square(variables["u10"][:]) + np.square(variables["v10"][:])).astype(float))
+    assert np.array_equal(weather["temps"], variables["t2m"][:] - 273.15)
+    assert np.array_equal(weather["winds"], winds)
+    assert np.array_equal(weather["precip"], variables["tp"][:] * 1000)
+    assert np.array_equal(weather["tcc"], variables["tcc"][:])
+    assert np.array_equal(weather["latitude"], variables["latitude"][:])
+    assert np.array_equal(weather["time"], variables["time"][:])
+    weather_data.close()
+    # Weather arrays are shared read only
+    assert isinstance(weather["winds"], np.memmap)
+    assert not weather["winds"].flags.writeable
+
+
+def test_082_weather_cache_keyed_by_file_content(mock_weather_file_for_weather_cache):
+    in_dir, weather_file = mock_weather_file_for_weather_cache
+    cache_dir = get_weather_cache(in_dir, weather_file)
+    assert get_weather_cache(in_dir, weather_file) == cache_dir
+    virtual_world = {"weather_file": weather_file}
+    prepare_weather_cache(in_dir, virtual_world)
+    assert virtual_world["weather_cache"] == str(cache_dir)
+
+    # Caches of other weather files are kept, even when their names start alike
+    other_file = "{}_2.nc".format(os.path.splitext(weather_file)[0])
+    write_weather_file(in_dir / other_file, 2)
+    other_cache_dir = get_weather_cache(in_dir, other_file)
+
+    # A changed weather file is cached again, replacing its previous cache
+    write_weather_file(in_dir / weather_file, 1)
+    os.utime(in_dir / weather_file, ns=(0, 0))
+    new_cache_dir = get_weather_cache(in_dir, weather_file)
+    assert new_cache_dir != cache_dir
+    assert sorted(os.listdir(new_cache_dir.parent)) == sorted(
+        [other_cache_dir.name, new_cache_dir.name]
+    )
@@ -0,0 +1,26 @@
+"""Fixtures for testing weather.weather_cache"""
+
+import numpy as np
+import pytest
+from netCDF4 import Dataset
+
+
+def write_weather_file(path, seed):
+    rng = np.random.default_rng(seed)
+    weather_data = Dataset(path, "w")
+    weather_data.createDimension("time", 48)
+    weather_data.createDimension("latitude", 2)
+    weather_data.createDimension("longitude", 3)
+    weather_data.createVariable("time", "i4", ("time",))[:] = 1025832 + np.arange(48)
+    weather_data.createVariable("latitude", "f4", ("latitude",))[:] = [50.0, 50.25]
+    weather_data.createVariable("longitude", "f4", ("longitude",))[:] = [240.0, 240.25, 240.5]
+    for name, scale in (("t2m", 280), ("u10", 3), ("v10", 3), ("tp", 0.001), ("tcc", 1)):
+        variable = weather_data.createVariable(name, "f4", ("time", "latitude", "longitude"))
+        variable[:] = rng.random((48, 2, 3)) * scale
+    weather_data.close()
+
+
+@pytest.fixture(name="mock_weather_file_for_weather_cache")
+def mock_weather_file_for_weather_cache_fix(tmp_path):
+    write_weather_file(tmp_path / "weather.nc", 0)
+    return tmp_path, "weather.nc"